@@ -0,0 +1,100 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Benchmark of the jsonl and parquet exports of records.
+
+Writes synthetic raw records (as returned by `nrp-cmd scan records --raw`)
+both as jsonl and as parquet with the given columns, then reads one column
+back from each file, printing the throughput and the sizes of the files:
+
+    python benchmarks/columnar_export.py --count 200000 --column metadata.title
+"""
+
+import argparse
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pyarrow.parquet as pq
+from raw_records import make_hit
+
+from nrp_cmd import json_codec
+from nrp_cmd.columnar import DEFAULT_RECORD_COLUMNS, ParquetRecordWriter
+from nrp_cmd.types.records import LazyRecord
+
+
+def write_jsonl(records: list[LazyRecord], path: Path) -> None:
+    """Write the records as jsonl."""
+    with path.open("wb") as f:
+        for record in records:
+            f.write(json_codec.dumps(record))
+            f.write(b"\n")
+
+
+def write_parquet(records: list[LazyRecord], path: Path, columns: list[str]) -> None:
+    """Write the columns of the records as parquet."""
+    with ParquetRecordWriter(path, columns) as writer:
+        for record in records:
+            writer.write(record)
+
+
+def read_jsonl(path: Path, column: str) -> list:
+    """Read a column from the jsonl file."""
+    keys = column.split(".")
+    values = []
+    with path.open("rb") as f:
+        for line in f:
+            value = json_codec.loads(line)
+            for key in keys:
+                value = value.get(key) if isinstance(value, dict) else None
+            values.append(value)
+    return values
+
+
+def read_parquet(path: Path, column: str) -> list:
+    """Read a column from the parquet file."""
+    return pq.read_table(path, columns=[column]).column(column).to_pylist()
+
+
+def timed(label: str, count: int, func: Callable[..., object], *args: Any) -> None:
+    """Run the function and print the number of records per second."""
+    wall = time.perf_counter()
+    func(*args)
+    wall = time.perf_counter() - wall
+    print(f"{label:<16} {count / wall:10.0f} records/s  ({wall:.2f} s)")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100_000, help="Number of records")
+    parser.add_argument(
+        "--column",
+        action="append",
+        help="Exported column (repeatable), the default columns if not set",
+    )
+    args = parser.parse_args()
+    columns = args.column or list(DEFAULT_RECORD_COLUMNS)
+
+    records = [LazyRecord(make_hit(idx)) for idx in range(args.count)]
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl = Path(tmp) / "records.jsonl"
+        parquet = Path(tmp) / "records.parquet"
+        timed("write jsonl", args.count, write_jsonl, records, jsonl)
+        timed("write parquet", args.count, write_parquet, records, parquet, columns)
+        timed("read jsonl", args.count, read_jsonl, jsonl, columns[0])
+        timed("read parquet", args.count, read_parquet, parquet, columns[0])
+        print(
+            f"jsonl {jsonl.stat().st_size / 1024**2:.1f} MiB, "
+            f"parquet {parquet.stat().st_size / 1024**2:.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Benchmark of structuring and unstructuring of records, files and requests.
+
+Generates a corpus of realistic json documents (records with files and
+parents, file entries with links and metadata, requests with payloads),
+structures them into the types of nrp_cmd.types and unstructures them back,
+printing the number of documents per second for each type:
+
+    python benchmarks/converter_hooks.py --count 10000
+"""
+
+import argparse
+import time
+
+from raw_records import BASE_URL, make_hit
+
+from nrp_cmd.converter import converter
+from nrp_cmd.types.files import File
+from nrp_cmd.types.records import Record
+from nrp_cmd.types.requests import Request
+
+
+def make_record(idx: int) -> dict:
+    """Return a record with embedded file entries."""
+    record = make_hit(idx)
+    record["files"] = {
+        "enabled": True,
+        "entries": {
+            f"data-{i}.csv": make_file(idx * 10 + i, record["id"]) for i in range(2)
+        },
+    }
+    record["metadata"]["version"] = None
+    return record
+
+
+def make_file(idx: int, record_id: str = "abcde") -> dict:
+    """Return a file entry."""
+    key = f"data-{idx}.csv"
+    url = f"{BASE_URL}/{record_id}/files/{key}"
+    return {
+        "key": key,
+        "created": "2024-01-01T10:00:00+00:00",
+        "updated": "2024-01-01T10:00:00+00:00",
+        "status": "completed",
+        "size": 1024 * idx,
+        "checksum": f"md5:{idx:032x}",
+        "mimetype": "text/csv",
+        "metadata": {"description": f"Data file {idx}", "caption": None},
+        "transfer": {"type": "L"},
+        "links": {
+            "self": url,
+            "content": f"{url}/content",
+            "commit": f"{url}/commit",
+        },
+    }
+
+
+def make_request(idx: int) -> dict:
+    """Return a publish request."""
+    url = f"https://repository.example.org/api/requests/{idx}"
+    return {
+        "id": f"{idx:08x}-request",
+        "created": "2024-01-01T10:00:00+00:00",
+        "updated": "2024-01-02T10:00:00+00:00",
+        "revision_id": 2,
+        "type": "publish_draft",
+        "title": None,
+        "status": "submitted",
+        "is_closed": False,
+        "is_open": True,
+        "expires_at": None,
+        "is_expired": False,
+        "created_by": {"user": "1"},
+        "receiver": {"community": "cesnet"},
+        "topic": {"datasets_draft": f"{idx:05d}-abcde"},
+        "payload": {"version": "1.0", "published_record:links:self": url},
+        "links": {
+            "self": url,
+            "self_html": f"https://repository.example.org/requests/{idx}",
+            "comments": f"{url}/comments",
+            "timeline": f"{url}/timeline",
+            "actions": {"accept": f"{url}/actions/accept", "cancel": None},
+        },
+    }
+
+
+def measure(name: str, documents: list[dict], type_: type, repeat: int) -> None:
+    """Structure and unstructure the documents, print the best throughput of the runs."""
+    structure_time = unstructure_time = float("inf")
+    for _ in range(repeat):
+        wall = time.perf_counter()
+        structured = [converter.structure(document, type_) for document in documents]
+        structure_time = min(structure_time, time.perf_counter() - wall)
+
+        wall = time.perf_counter()
+        for obj in structured:
+            converter.unstructure(obj)
+        unstructure_time = min(unstructure_time, time.perf_counter() - wall)
+
+    print(
+        f"{name:<8} structure {len(documents) / structure_time:10.0f} docs/s  "
+        f"unstructure {len(documents) / unstructure_time:10.0f} docs/s"
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=10_000, help="Documents per type")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs")
+    args = parser.parse_args()
+
+    records = [make_record(idx) for idx in range(args.count)]
+    measure("record", records, Record, args.repeat)
+    files = [make_file(idx) for idx in range(args.count)]
+    measure("file", files, File, args.repeat)
+    requests = [make_request(idx) for idx in range(args.count)]
+    measure("request", requests, Request, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Benchmark of the aiofile and memory-mapped file sources and sinks.
+
+The source benchmark sends the whole file through the stream into a local
+socket, as the http layer does during an upload. The sink benchmark writes
+the file in concurrent parts, as a multipart download does. Use files larger
+than the RAM to see the effect of the page cache, for example:
+
+    python benchmarks/file_streams.py --size 10 --directory /data/tmp
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from nrp_cmd.async_client.streams import (
+    FileSink,
+    FileSource,
+    MappedFileSink,
+    MappedFileSource,
+)
+
+CHUNK = os.urandom(1024 * 1024)
+DRAIN_BUFFER = bytearray(1024 * 1024)
+
+
+def create_file(path: Path, size: int) -> None:
+    """Create a file with the given size filled with random data."""
+    with open(path, "wb") as f:
+        written = 0
+        while written < size:
+            written += f.write(CHUNK[: min(len(CHUNK), size - written)])
+
+
+def drain(sock: socket.socket) -> None:
+    """Read and discard everything from the socket."""
+    while sock.recv_into(DRAIN_BUFFER):
+        pass
+
+
+async def send_source(source) -> None:
+    """Send the whole source into a socket."""
+    loop = asyncio.get_running_loop()
+    sender, receiver = socket.socketpair()
+    drainer = threading.Thread(target=drain, args=(receiver,))
+    drainer.start()
+    stream = await source.open()
+    try:
+        sender.setblocking(False)
+        async for chunk in stream:
+            await loop.sock_sendall(sender, chunk)
+    finally:
+        await stream.close()
+        sender.close()
+        drainer.join()
+        receiver.close()
+
+
+async def write_sink(sink, size: int, parts: int) -> None:
+    """Write size bytes into the sink in concurrent parts."""
+    await sink.allocate(size)
+    part_size = (size + parts - 1) // parts
+
+    async def write_part(offset: int, count: int) -> None:
+        chunk = await sink.open_chunk(offset)
+        while count > 0:
+            count -= await chunk.write(CHUNK[: min(len(CHUNK), count)])
+        await chunk.close()
+
+    await asyncio.gather(
+        *(
+            write_part(offset, min(part_size, size - offset))
+            for offset in range(0, size, part_size)
+        )
+    )
+    await sink.close()
+
+
+async def measure(name: str, size: int, coro) -> None:
+    """Run the coroutine and print throughput and cpu time."""
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    await coro
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    gib = size / 1024**3
+    print(
+        f"{name:<28} {gib / wall:8.2f} GiB/s  {cpu / gib:8.2f} cpu s/GiB  ({wall:.1f} s)"
+    )
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=float, default=10, help="File size in GiB")
+    parser.add_argument("--parts", type=int, default=8, help="Parts of the download")
+    parser.add_argument("--directory", type=Path, default=None)
+    args = parser.parse_args()
+
+    size = int(args.size * 1024**3)
+    with tempfile.TemporaryDirectory(dir=args.directory) as tmp:
+        source_path = Path(tmp) / "source.bin"
+        create_file(source_path, size)
+
+        await measure(
+            "send  FileSource (aiofile)", size, send_source(FileSource(source_path))
+        )
+        await measure(
+            "send  MappedFileSource", size, send_source(MappedFileSource(source_path))
+        )
+
+        sink_path = Path(tmp) / "sink.bin"
+        await measure(
+            "write FileSink (aiofile)",
+            size,
+            write_sink(FileSink(sink_path), size, args.parts),
+        )
+        sink_path.unlink()
+        await measure(
+            "write MappedFileSink",
+            size,
+            write_sink(MappedFileSink(sink_path), size, args.parts),
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Benchmark of the json codecs installed in the environment.
+
+Decodes the payloads, then encodes every record of them as a jsonl line, as
+`nrp-cmd scan records` does. The payloads are files with captured responses
+of the repository (for example saved by `curl` from the search endpoint)
+or jsonl files with one record per line. Without files, synthetic search
+responses are used:
+
+    python benchmarks/json_codecs.py captured/page-*.json
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from raw_records import make_page
+
+from nrp_cmd.json_codec import JSONCodec, available_codecs
+
+
+def load_payloads(paths: list[Path]) -> list[bytes]:
+    """Return the payloads of the files, each line of a jsonl file is a payload."""
+    payloads: list[bytes] = []
+    for path in paths:
+        if path.suffix == ".jsonl":
+            payloads.extend(
+                line for line in path.read_bytes().splitlines() if line.strip()
+            )
+        else:
+            payloads.append(path.read_bytes())
+    return payloads
+
+
+def records_of(payload: object) -> list:
+    """Return the records of a decoded payload."""
+    if isinstance(payload, dict) and isinstance(payload.get("hits"), dict):
+        return payload["hits"].get("hits", [])
+    return [payload]
+
+
+def measure(codec: JSONCodec, payloads: list[bytes], repeat: int) -> None:
+    """Decode and encode the payloads and print the throughput."""
+    size = sum(len(payload) for payload in payloads) * repeat
+
+    wall = time.perf_counter()
+    for _ in range(repeat):
+        decoded = [codec.loads(payload) for payload in payloads]
+    decode_time = time.perf_counter() - wall
+
+    records = [record for payload in decoded for record in records_of(payload)]
+    wall = time.perf_counter()
+    for _ in range(repeat):
+        for record in records:
+            codec.dumps(record)
+    encode_time = time.perf_counter() - wall
+
+    print(
+        f"{codec.name:<8} decode {size / decode_time / 1024**2:8.1f} MiB/s  "
+        f"encode {len(records) * repeat / encode_time:10.0f} records/s"
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("payloads", type=Path, nargs="*", help="Captured payloads")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over payloads")
+    args = parser.parse_args()
+
+    if args.payloads:
+        payloads = load_payloads(args.payloads)
+    else:
+        payloads = [make_page(page, 500, 10 * 500) for page in range(10)]
+
+    for codec in available_codecs():
+        measure(codec, payloads, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Benchmark of structured and raw listing of records.
+
+Parses synthetic search responses either into fully structured RecordList
+(the default mode of the client) or into RecordList with LazyRecord hits
+(the raw mode) and writes the records as jsonl, as `nrp-cmd scan records`
+does. For example:
+
+    python benchmarks/raw_records.py --pages 50 --page-size 500
+"""
+
+import argparse
+import json
+import time
+from datetime import UTC, datetime, timedelta
+
+from nrp_cmd import json_codec
+from nrp_cmd.cli.arguments import OutputFormat
+from nrp_cmd.cli.base import format_output
+from nrp_cmd.converter import deserialize_rest_response
+from nrp_cmd.types.records import RecordList
+
+BASE_URL = "https://repository.example.org/api/datasets"
+
+
+def make_hit(idx: int) -> dict:
+    """Return a search hit resembling a dataset record."""
+    timestamp = (datetime(2024, 1, 1, tzinfo=UTC) + timedelta(minutes=idx)).isoformat()
+    record_id = f"{idx:05d}-abcde"
+    return {
+        "id": record_id,
+        "created": timestamp,
+        "updated": timestamp,
+        "revision_id": 3,
+        "links": {
+            "self": f"{BASE_URL}/{record_id}",
+            "self_html": f"https://repository.example.org/datasets/{record_id}",
+            "files": f"{BASE_URL}/{record_id}/files",
+        },
+        "files": {"enabled": True},
+        "parent": {"id": f"{idx:05d}-parent", "communities": {"default": "cesnet"}},
+        "metadata": {
+            "title": f"Dataset number {idx}",
+            "creators": [
+                {
+                    "person_or_org": {
+                        "name": f"Creator {idx}, {i}",
+                        "type": "personal",
+                        "identifiers": [{"scheme": "orcid", "identifier": "0000"}],
+                    },
+                    "affiliations": [{"name": "CESNET"}],
+                }
+                for i in range(3)
+            ],
+            "description": "Lorem ipsum dolor sit amet. " * 20,
+            "subjects": [{"subject": f"subject {i}"} for i in range(5)],
+            "publication_date": "2024-01-01",
+            "resource_type": {"id": "dataset"},
+        },
+    }
+
+
+def make_page(page: int, page_size: int, total: int) -> bytes:
+    """Return a serialized search response."""
+    return json.dumps(
+        {
+            "hits": {
+                "hits": [
+                    make_hit(page * page_size + idx) for idx in range(page_size)
+                ],
+                "total": total,
+            },
+            "links": {
+                "self": f"{BASE_URL}?page={page + 1}&size={page_size}",
+                "next": f"{BASE_URL}?page={page + 2}&size={page_size}",
+            },
+            "sortBy": "newest",
+            "aggregations": {},
+        }
+    ).encode()
+
+
+def structured(payload: bytes) -> RecordList:
+    """Parse the response as the client does by default."""
+    return deserialize_rest_response(None, payload, RecordList, None)
+
+
+def raw(payload: bytes) -> RecordList:
+    """Parse the response as the client does in the raw mode."""
+    return RecordList.from_raw(json_codec.loads(payload))
+
+
+def measure(name: str, pages: list[bytes], parse) -> None:
+    """Parse the pages, write the records as jsonl and print the throughput."""
+    count = 0
+    output_size = 0
+    wall = time.perf_counter()
+    for payload in pages:
+        for record in parse(payload):
+            output_size += len(format_output(OutputFormat.JSON_LINES, record))
+            count += 1
+    wall = time.perf_counter() - wall
+    print(
+        f"{name:<12} {count / wall:10.0f} records/s  "
+        f"{output_size / wall / 1024**2:8.1f} MiB/s of jsonl  ({wall:.2f} s)"
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=20, help="Number of pages")
+    parser.add_argument("--page-size", type=int, default=500, help="Records per page")
+    args = parser.parse_args()
+
+    total = args.pages * args.page_size
+    pages = [make_page(page, args.page_size, total) for page in range(args.pages)]
+
+    measure("structured", pages, structured)
+    measure("raw", pages, raw)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ cd "$(dirname "$0")"
 
 # Generate synchronous client from the asynchronous client
 export skipped_directories=( "connection" )
-export skipped_files=( "streams/os.py" "__init__.py" "streams/memory.py" "streams/os.py" "invenio/transfer/multipart.py" )
+export skipped_files=( "streams/os.py" "__init__.py" "streams/memory.py" "streams/os.py" "invenio/transfer/multipart.py" "invenio/transfer/scheduler.py" "invenio/scan.py" "invenio/introspection.py" )
 
 isSkipped () {
   local fn="$1"
@@ -69,6 +69,8 @@ EOF
         sed 's/asynccontextmanager/contextmanager/g' | \
         sed 's/__aiter__/__iter__/g' | \
         sed 's/__anext__/__next__/g' | \
+        sed 's/__aenter__/__enter__/g' | \
+        sed 's/__aexit__/__exit__/g' | \
         sed 's/StopAsyncIteration/StopIteration/g' | \
         sed 's/AsyncIterator/Iterator/g' | \
         sed 's/AsyncIterable/Iterable/g' | \
@@ -79,6 +81,7 @@ EOF
         sed 's/_async_/_sync_/g' | \
         sed 's/Async/Sync/g' | \
         sed 's/anext/next/g' | \
+        sed 's/\baiter(/iter(/g' | \
         sed 's/^import asyncio//' | \
         sed 's/^from asyncio .*$//'
     # need to add newline otherwise the last line will be ignored
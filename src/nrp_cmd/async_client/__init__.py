@@ -1,3 +1,4 @@
+import asyncio
 import importlib.metadata as importlib_metadata
 from functools import lru_cache
 
@@ -13,17 +14,80 @@ from .base_client import (
     RecordStatus,
 )
 from .connection import AsyncConnection
-from .connection.limiter import limit_connections
+from .connection.limiter import adaptive_limit_connections, limit_connections
 from .doi import resolve_doi
 
 
 @lru_cache(maxsize=1)
+def async_client_entry_points() -> dict[str, type[AsyncRepositoryClient]]:
+    """Load all available asynchronous client classes, keyed by their entry point names."""
+    return {
+        ep.name: ep.load()
+        for ep in importlib_metadata.entry_points(group="nrp_cmd.async_client")
+    }
+
+
 def async_client_classes() -> list[type[AsyncRepositoryClient]]:
     """Load all available asynchronous client classes."""
-    async_client_classes: list[type[AsyncRepositoryClient]] = []
-    for ep in importlib_metadata.entry_points(group="nrp_cmd.async_client"):
-        async_client_classes.append(ep.load())
-    return async_client_classes
+    return list(async_client_entry_points().values())
+
+
+_pending_discoveries: dict[str, asyncio.Task[str | None]] = {}
+"""Discoveries in progress, keyed by the repository url."""
+
+
+async def discover_async_client(
+    repository_config: RepositoryConfig,
+    config: Config,
+    refresh: bool = False,
+) -> type[AsyncRepositoryClient] | None:
+    """Find the client class that can handle the repository.
+
+    The discovered client is cached (see Config.discovery_ttl) and concurrent
+    discoveries of the same repository within the event loop share
+    a single probe of the repository.
+
+    :param repository_config: configuration of the repository
+    :param config: configuration holding the discovery cache
+    :param refresh: probe the repository even if the client is cached
+    :return: the client class or None if no installed client can handle
+             the repository
+    """
+    clients = async_client_entry_points()
+    if not refresh:
+        discovered = config.get_discovered_client(repository_config.url)
+        if discovered is not None and discovered.client in clients:
+            return clients[discovered.client]
+
+    key = str(repository_config.url)
+    loop = asyncio.get_running_loop()
+    probe = _pending_discoveries.get(key)
+    if probe is None or probe.get_loop() is not loop:
+        probe = loop.create_task(_probe_repository(repository_config, config))
+        _pending_discoveries[key] = probe
+
+        def forget(task: asyncio.Task[str | None]) -> None:
+            if _pending_discoveries.get(key) is task:
+                del _pending_discoveries[key]
+
+        probe.add_done_callback(forget)
+    # a cancelled caller must not cancel the probe shared with other callers
+    client = await asyncio.shield(probe)
+    return clients[client] if client is not None else None
+
+
+async def _probe_repository(
+    repository_config: RepositoryConfig, config: Config
+) -> str | None:
+    """Ask the installed clients, return the name of the first that handles the repository."""
+    for name, async_client_class in async_client_entry_points().items():
+        api_url = await async_client_class.can_handle_repository(
+            repository_config.url, verify_tls=repository_config.verify_tls
+        )
+        if api_url:
+            config.set_discovered_client(repository_config.url, name, api_url)
+            return name
+    return None
 
 
 async def get_async_client(
@@ -35,6 +99,7 @@ async def get_async_client(
 
     :param repository: the repository alias or URL
     :param refresh: whether to refresh the client configuration from the server
+                    (and discover the client again, see discover_async_client)
     :param max_connections: the maximum number of parallel connections
     :param config: the configuration to use. If not given, the configuration is loaded
     from the configuration file.
@@ -53,13 +118,13 @@ async def get_async_client(
         repository_config = repository
     else:
         repository_config = config.find_repository(repository)
-    for async_client_class in async_client_classes():
-        if await async_client_class.can_handle_repository(
-            repository_config.url, verify_tls=repository_config.verify_tls
-        ):
-            return await async_client_class.from_configuration(
-                repository_config, refresh=refresh
-            )
+    async_client_class = await discover_async_client(
+        repository_config, config, refresh=refresh
+    )
+    if async_client_class is not None:
+        return await async_client_class.from_configuration(
+            repository_config, refresh=refresh
+        )
     raise ValueError(f"No async client found for repository {repository_config.url}")
 
 
@@ -119,10 +184,10 @@ async def resolve_record_id(
     """Get an asynchronous client for the given URL."""
     if not config:
         config = Config.from_file()
-    connection = AsyncConnection()
-    record_url, repository_config = await get_repository_from_record_id(
-        connection, str(url), config
-    )
+    async with AsyncConnection() as connection:
+        record_url, repository_config = await get_repository_from_record_id(
+            connection, str(url), config
+        )
     return (
         await get_async_client(
             repository=record_url,
@@ -135,6 +200,7 @@ async def resolve_record_id(
 
 __all__ = (
     "get_async_client",
+    "discover_async_client",
     "AsyncRepositoryClient",
     "connection",
     "invenio",
@@ -147,5 +213,6 @@ __all__ = (
     "doi",
     "RecordStatus",
     "limit_connections",
+    "adaptive_limit_connections",
     "resolve_record_id",
 )
@@ -7,7 +7,12 @@
 #
 """Asynchronous connection for the NRP client."""
 
-from .connection import AsyncConnection
-from .limiter import limit_connections
+from .connection import AsyncConnection, close_pooled_connections
+from .limiter import adaptive_limit_connections, limit_connections
 
-__all__ = ("AsyncConnection", "limit_connections")
+__all__ = (
+    "AsyncConnection",
+    "adaptive_limit_connections",
+    "close_pooled_connections",
+    "limit_connections",
+)
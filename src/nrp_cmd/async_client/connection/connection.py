@@ -10,23 +10,28 @@
 import asyncio
 import contextlib
 import inspect
-import json as _json
 import logging
+import weakref
 from collections.abc import (
     AsyncGenerator,
     AsyncIterator,
     Awaitable,
     Callable,
 )
+from datetime import UTC, datetime
 from functools import partial
-from typing import Any, Literal, cast, overload
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Literal, Self, cast, overload
 
 from aiohttp import ClientResponse, ClientSession, TCPConnector
 from aiohttp.client_exceptions import ClientConnectorError
+from attrs import evolve
 from cattrs.dispatch import UnstructureHook
 from multidict import CIMultiDictProxy, MultiDictProxy
 from yarl import URL
 
+from ... import json_codec
 from ...converter import deserialize_rest_response
 from ...errors import (
     RepositoryClientError,
@@ -36,13 +41,16 @@ from ...errors import (
     StructureError,
     is_instance_of_exceptions,
 )
+from ...http_cache import CachedResponse, ResponseCache, response_variant
 from ...progress import DummyProgressBar, ProgressBar, current_progress
-from ..streams.base import DataSink, DataSource
+from ..streams.base import DataSink, DataSource, ResumableDataSink
+from ..streams.file import is_range_completed
 from ..streams.progress import ProgressSink
 from .auth import AuthenticatedClientRequest, BearerAuthentication, BearerTokenForHost
 from .aws_limits import MINIMAL_DOWNLOAD_PART_SIZE, adjust_download_multipart_params
 from .limiter import current_limiter
 from .response import RepositoryResponse
+from .sendfile import FilePayload
 
 log = logging.getLogger("invenio_nrp.async_client.connection")
 communication_log_url = logging.getLogger("nrp_cmd.communication.url")
@@ -128,8 +136,70 @@ async def _cast_error() -> AsyncIterator[None]:
         raise RepositoryCommunicationError(str(e)) from e
 
 
+_pooled_sessions: dict[ClientSession, asyncio.AbstractEventLoop] = {}
+"""Open pooled sessions of all connections, with the event loops they belong to.
+
+The sessions are tracked instead of the connections, so that the session
+of a connection that has been garbage-collected without being closed can
+still be closed here.
+"""
+
+
+async def close_pooled_connections() -> None:
+    """Close pooled sessions of all connections that have not been closed yet.
+
+    Call this before the event loop is shut down if you can not close
+    the connections (or clients) explicitly.
+    """
+    for session, session_loop in list(_pooled_sessions.items()):
+        await _close_session(session, session_loop)
+
+
+async def _close_session(
+    session: ClientSession, session_loop: asyncio.AbstractEventLoop
+) -> None:
+    """Close a pooled session, waiting for it if it belongs to the running loop."""
+    if session_loop is asyncio.get_running_loop():
+        _pooled_sessions.pop(session, None)
+        await session.close()
+    else:
+        _close_session_in_loop(session, session_loop)
+
+
+def _close_session_in_loop(
+    session: ClientSession, session_loop: asyncio.AbstractEventLoop
+) -> None:
+    """Schedule closing of a pooled session in its own event loop.
+
+    The session can be closed only inside its own loop. If that loop
+    is not running anymore, the session is dropped with a warning.
+    """
+    _pooled_sessions.pop(session, None)
+    if session.closed:
+        return
+    if session_loop.is_running():
+        asyncio.run_coroutine_threadsafe(session.close(), session_loop)
+    else:
+        log.warning(
+            "Dropping http session of an event loop that is not running, "
+            "its keep-alive connections are not closed cleanly"
+        )
+
+
 class AsyncConnection:
-    """Pre-configured asynchronous http connection."""
+    """Pre-configured asynchronous http connection.
+
+    The connection keeps a pool of keep-alive http connections that is shared
+    by all requests made through it. The pool is created lazily on the first
+    request and is bound to the event loop that made it. Close the connection
+    when you are done with it, either by calling `close` or by using it
+    as an async context manager:
+
+    ```
+    async with AsyncConnection() as connection:
+        await connection.get(url=..., result_class=dict)
+    ```
+    """
 
     def __init__(
         self,
@@ -138,11 +208,36 @@ class AsyncConnection:
         verify_tls: bool = True,
         retry_count: int = 5,
         retry_after_seconds: int = 1,
+        pool_size: int = 100,
+        pool_size_per_host: int = 0,
+        keepalive_timeout: float = 30,
+        dns_cache_ttl: int | None = 300,
+        response_cache: ResponseCache | None = None,
     ):
-        """Create a new connection with the given configuration."""
+        """Create a new connection with the given configuration.
+
+        :param tokens:              bearer tokens keyed by the url of the server
+        :param verify_tls:          whether to verify tls certificates
+        :param retry_count:         number of retries for idempotent requests
+        :param retry_after_seconds: base retry interval in seconds
+        :param pool_size:           maximum number of pooled connections (0 for unlimited)
+        :param pool_size_per_host:  maximum number of pooled connections to a single host (0 for unlimited)
+        :param keepalive_timeout:   how long an idle connection is kept in the pool, in seconds
+        :param dns_cache_ttl:       how long resolved host names are cached, in seconds (None to cache forever)
+        :param response_cache:      cache of GET responses revalidated by conditional requests,
+                                    responses are not cached if not set
+        """
         self._verify_tls = verify_tls
         self._retry_count = retry_count
         self._retry_after_seconds = retry_after_seconds
+        self._pool_size = pool_size
+        self._pool_size_per_host = pool_size_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._dns_cache_ttl = dns_cache_ttl
+        self._response_cache = response_cache
+        self._session: ClientSession | None = None
+        self._session_loop: asyncio.AbstractEventLoop | None = None
+        self._session_finalizer: weakref.finalize | None = None
 
         _tokens: list[BearerTokenForHost] = [
             BearerTokenForHost(host_url=url, token=token)
@@ -181,27 +276,84 @@ class AsyncConnection:
         """Set the base retry interval in seconds."""
         self._retry_after_seconds = value
 
-    @contextlib.asynccontextmanager
-    async def _client(
-        self, idempotent: bool = False
-    ) -> AsyncGenerator[ClientSession, None]:
-        """Create a new session with the repository and configure it with the token.
+    async def __aenter__(self) -> Self:
+        """Enter the connection context, the pool is created on the first request."""
+        return self
 
-        :return: A new http client
-        """
-        """
-        Create a new session with the repository and configure it with the token.
-        :return: A new http client
+    async def __aexit__(
+        self,
+        _ext: type[BaseException] | None,
+        _exc: BaseException | None,
+        _tb: TracebackType | None,
+    ) -> None:
+        """Close the pooled session when leaving the context."""
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the pooled session and all its keep-alive connections.
+
+        The connection can still be used after it has been closed, a new pool
+        will be created on the next request.
         """
+        session, self._session = self._session, None
+        session_loop, self._session_loop = self._session_loop, None
+        if self._session_finalizer is not None:
+            self._session_finalizer.detach()
+            self._session_finalizer = None
+        if session is None or session_loop is None:
+            return
+        await _close_session(session, session_loop)
 
-        connector = TCPConnector(verify_ssl=self._verify_tls)
-        async with ClientSession(
+    def _get_session(self) -> ClientSession:
+        """Return the pooled session, creating it inside the running loop if needed."""
+        loop = asyncio.get_running_loop()
+        if (
+            self._session is not None
+            and not self._session.closed
+            and self._session_loop is loop
+        ):
+            return self._session
+
+        # aiohttp session can not be shared between event loops, so if the connection
+        # is used from another loop, the previous pool is dropped and a new one is created
+        if self._session_finalizer is not None:
+            # closes the session in its own loop
+            self._session_finalizer()
+        connector = TCPConnector(
+            limit=self._pool_size,
+            limit_per_host=self._pool_size_per_host,
+            keepalive_timeout=self._keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self._dns_cache_ttl,
+        )
+        self._session = ClientSession(
             request_class=AuthenticatedClientRequest,
             response_class=RepositoryResponse,
             connector=connector,
             raise_for_status=False,
-        ) as session:
-            yield session
+        )
+        self._session_loop = loop
+        _pooled_sessions[self._session] = loop
+        # a connection that is garbage-collected without being closed
+        # closes its session in the background
+        self._session_finalizer = weakref.finalize(
+            self, _close_session_in_loop, self._session, loop
+        )
+        self._session_finalizer.atexit = False
+        return self._session
+
+    @contextlib.asynccontextmanager
+    async def _client(
+        self, idempotent: bool = False
+    ) -> AsyncGenerator[ClientSession, None]:
+        """Return the pooled session configured for the repository.
+
+        The session is not closed when the context exits, its connections
+        are returned to the pool and reused by subsequent requests.
+
+        :return: http client
+        """
+        yield self._get_session()
 
     @overload
     async def head(
@@ -288,6 +440,8 @@ class AsyncConnection:
         :raises RepositoryServerError: if the request fails due to server error (HTTP 5xx)
         :raises RepositoryCommunicationError: if the request fails due to network error
         """
+        if self._response_cache is not None and _is_cacheable(result_class):
+            return await self._get_cached(url=url, result_class=result_class, **kwargs)
         with current_progress.short_task():
             return await self._retried(
                 "GET",
@@ -300,6 +454,80 @@ class AsyncConnection:
                 **kwargs,
             )
 
+    async def _get_cached[T](
+        self,
+        *,
+        url: URL,
+        result_class: type[T],
+        **kwargs: Any,
+    ) -> T:
+        """Perform a GET request, reusing the cached response if it has not changed."""
+        assert self._response_cache is not None
+        params = kwargs.get("params")
+        cache_url = url.update_query(params) if params else url
+        variant = response_variant(
+            self._auth.tokens, cache_url, kwargs.get("headers") or {}
+        )
+        cached = self._response_cache.get(cache_url, variant)
+        response = await self.get_revalidated(url=url, cached=cached, **kwargs)
+        if response.url != str(cache_url):
+            response = evolve(response, url=str(cache_url))
+        if response.validation_headers and (
+            cached is None or response.validation_headers != cached.validation_headers
+        ):
+            self._response_cache.put(response, variant)
+        return self._parse_result(
+            response.payload.encode("utf-8"), response.etag, result_class
+        )
+
+    async def get_revalidated(
+        self,
+        *,
+        url: URL,
+        cached: CachedResponse | None = None,
+        **kwargs: Any,
+    ) -> CachedResponse:
+        """Perform a conditional GET request revalidating a cached response.
+
+        :param url:                 the url of the request
+        :param cached:              previously downloaded response, its validators
+                                    are sent in If-None-Match/If-Modified-Since headers
+        :param kwargs:              any kwargs to pass to the aiohttp client
+        :return:                    the cached response if the server returned 304 Not Modified,
+                                    otherwise the downloaded response
+
+        :raises RepositoryClientError: if the request fails due to client passing incorrect parameters (HTTP 4xx)
+        :raises RepositoryServerError: if the request fails due to server error (HTTP 5xx)
+        :raises RepositoryCommunicationError: if the request fails due to network error
+        """
+
+        async def _revalidate(response: ClientResponse) -> CachedResponse:
+            if response.status == 304 and cached is not None:
+                return cached.revalidated()
+            payload = await response.read()
+            await response.raise_for_invenio_status()  # type: ignore
+            return CachedResponse(
+                url=str(url),
+                payload=payload.decode("utf-8"),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                fetched=datetime.now(UTC),
+            )
+
+        headers = {
+            **kwargs.pop("headers", {}),
+            **(cached.validation_headers if cached else {}),
+        }
+        with current_progress.short_task():
+            return await self._retried(
+                "GET",
+                url,
+                _revalidate,
+                idempotent=True,
+                headers=headers,
+                **kwargs,
+            )
+
     async def post[T](
         self,
         *,
@@ -405,6 +633,7 @@ class AsyncConnection:
         async def _put(response: ClientResponse) -> ClientResponse:
             if response.status == 413:
                 raise RepositoryCommunicationError("Request payload too large")
+            await response.raise_for_invenio_status()  # type: ignore
             return response
 
         with current_progress.short_task():
@@ -417,6 +646,67 @@ class AsyncConnection:
                 **kwargs,
             )
 
+    async def put_file(
+        self,
+        *,
+        url: URL,
+        file_name: Path,
+        offset: int = 0,
+        count: int | None = None,
+        progress_bar: ProgressBar | None = None,
+        **kwargs: Any,
+    ) -> ClientResponse:
+        """Perform a PUT request with a (range of) local file sent via sendfile.
+
+        The data are not read into python on plain http connections, see
+        the sendfile module. Retries reset the progress of the failed attempt.
+
+        :param url:                 the url of the request
+        :param file_name:           the file to send
+        :param offset:              offset of the first sent byte
+        :param count:               number of bytes to send, until the end of file if None
+        :param progress_bar:        progress bar updated as the data are sent
+        :param kwargs:              any kwargs to pass to the aiohttp client
+        :return:                    the response (not parsed)
+
+        :raises RepositoryClientError: if the request fails due to client passing incorrect parameters (HTTP 4xx)
+        :raises RepositoryServerError: if the request fails due to server error (HTTP 5xx)
+        :raises RepositoryCommunicationError: if the request fails due to network
+        """
+        progress_bar = progress_bar or DummyProgressBar()
+        sent = 0
+
+        def update_progress(count: int) -> None:
+            nonlocal sent
+            sent += count
+            progress_bar.increment(count)
+
+        async def payload() -> FilePayload:
+            # roll back the progress of a previous attempt
+            nonlocal sent
+            progress_bar.increment(-sent)
+            sent = 0
+            return FilePayload(file_name, offset, count, progress=update_progress)
+
+        async def _put(response: ClientResponse) -> ClientResponse:
+            if response.status == 413:
+                raise RepositoryCommunicationError("Request payload too large")
+            await response.raise_for_invenio_status()  # type: ignore
+            # the response might arrive while the reading was paused by sendfile,
+            # read it so that the connection can be returned to the pool
+            await response.read()
+            return response
+
+        with current_progress.short_task():
+            return await self._retried(
+                "PUT",
+                url,
+                _put,
+                idempotent=True,
+                data=payload,
+                **kwargs,
+            )
+
     async def get_stream(
         self,
         *,
@@ -438,6 +728,8 @@ class AsyncConnection:
         """
 
         async def _copy_stream(response: ClientResponse) -> None:
+            # do not write an error response into the sink
+            await response.raise_for_invenio_status()  # type: ignore
             chunk = await sink.open_chunk(offset=offset)
             try:
                 async for data in response.content.iter_any():
@@ -519,7 +811,7 @@ class AsyncConnection:
 
         if communication_log_response.isEnabledFor(logging.INFO):
             communication_log_response.info(
-                "%s", _json.dumps(_json.loads(json_payload))
+                "%s", json_payload.decode("utf-8", errors="replace")
             )
 
         await response.raise_for_invenio_status()  # type: ignore
@@ -528,15 +820,30 @@ class AsyncConnection:
             return None
 
         assert result_class is not None
+        if inspect.isclass(result_class) and issubclass(result_class, ClientResponse):
+            return cast("T", response)  # mypy can not get it
+        return self._parse_result(
+            json_payload, response.headers.get("ETag"), result_class
+        )
+
+    def _parse_result[T](
+        self, json_payload: bytes, etag: str | None, result_class: type[T]
+    ) -> T:
+        """Parse the payload of a successful response.
+
+        :param json_payload:        the payload of the response
+        :param etag:                the ETag header of the response
+        :param result_class:        the class to parse the response to
+        :return:                    the parsed result
+        """
         if inspect.isclass(result_class):
-            if issubclass(result_class, ClientResponse):
-                return cast("T", response)  # mypy can not get it
-            elif issubclass(result_class, str):
+            if issubclass(result_class, str):
                 return cast("T", json_payload.decode("utf-8"))  # mypy can not get it
             elif issubclass(result_class, dict):
-                return _json.loads(json_payload)
-        etag = remove_quotes(response.headers.get("ETag"))
-        return deserialize_rest_response(self, json_payload, result_class, etag)
+                return json_codec.loads(json_payload)
+        return deserialize_rest_response(
+            self, json_payload, result_class, remove_quotes(etag)
+        )
 
     @overload
     async def _retried[T](
@@ -593,19 +900,31 @@ class AsyncConnection:
                         communication_log_url.info("%s %s", method.upper(), url)
                     if communication_log_request.isEnabledFor(logging.INFO):
                         if json is not None:
-                            communication_log_request.info("%s", _json.dumps(json))
+                            communication_log_request.info(
+                                "%s", json_codec.dumps_str(json)
+                            )
                         if data is not None:
                             communication_log_request.info("(stream)")
                     yield
 
                 async with (
                     attempt,
-                    current_limiter.limit(url),
+                    current_limiter.limit(url) as slot,
                     self._client(idempotent=True) as client,
                     _cast_error(),
                     print_log(),
-                    client.request(method, url, auth=self._auth, **kwargs) as response,
+                    client.request(
+                        method,
+                        url,
+                        auth=self._auth,
+                        ssl=self._verify_tls,
+                        **kwargs,
+                    ) as response,
                 ):
+                    if data is None:
+                        # the latency of a streamed upload is its transfer time,
+                        # only the other requests tell how loaded the server is
+                        slot.responded()
                     if callback is not None:
                         return await callback(response)
                     else:
@@ -624,7 +943,21 @@ class AsyncConnection:
         parts: int | None = None,
         part_size: int | None = None,
         progress_bar: ProgressBar | None = None,
+        checksum: str | None = None,
     ) -> None:
+        """Download a file to the sink, in parallel parts if the server supports ranges.
+
+        If the sink is a ResumableDataSink, already downloaded ranges are skipped,
+        every finished part is recorded in the sink and the sink is finalized
+        (verifying the size and the checksum) when the whole file has been downloaded.
+
+        :param url:             url of the file
+        :param sink:            where to write the data
+        :param parts:           requested number of parts
+        :param part_size:       requested size of a part
+        :param progress_bar:    progress bar to update
+        :param checksum:        expected "algo:hexdigest" checksum of the file
+        """
         progress_bar = progress_bar or DummyProgressBar()
 
         try:
@@ -643,8 +976,16 @@ class AsyncConnection:
         elif "Content-Length" in headers:
             size = int(headers["Content-Length"])
 
-        if size:
+        resumable_sink = sink if isinstance(sink, ResumableDataSink) else None
+        completed: list[tuple[int, int]] = []
+        if resumable_sink is not None:
+            completed = await resumable_sink.resume(
+                size or None, remove_quotes(headers.get("ETag"))
+            )
+        elif size:
             await sink.allocate(size)
+
+        if size:
             progress_bar.set_total(size)
 
         if (
@@ -653,10 +994,23 @@ class AsyncConnection:
             and any(x == "bytes" for x in headers.getall("Accept-Ranges", []))
         ):
             await self._download_multipart(
-                location, sink, size, progress_bar, parts, part_size
+                location,
+                sink,
+                size,
+                progress_bar,
+                parts,
+                part_size,
+                completed=completed,
             )
+        elif size and is_range_completed(completed, 0, size):
+            progress_bar.increment(size)
         else:
             await self._download_single(location, sink, progress_bar)
+            if resumable_sink is not None and size:
+                await resumable_sink.mark_completed(0, size)
+
+        if resumable_sink is not None:
+            await resumable_sink.finalize(checksum)
 
     async def _download_single(
         self, url: URL, sink: DataSink, progress_bar: ProgressBar
@@ -671,22 +1025,42 @@ class AsyncConnection:
         progress_bar: ProgressBar,
         parts: int | None = None,
         part_size: int | None = None,
+        completed: list[tuple[int, int]] | None = None,
     ) -> None:
         adjusted_part_size, adjusted_parts = adjust_download_multipart_params(
             size, parts, part_size
         )
-        async with asyncio.TaskGroup() as tg:
-            for i in range(adjusted_parts):
-                start = i * adjusted_part_size
-                part_size = min((i + 1) * adjusted_part_size, size) - start
-                tg.create_task(
-                    self.get_stream(
-                        url=url,
-                        sink=ProgressSink(sink, progress_bar),
-                        offset=start,
-                        size=part_size,
-                    )
-                )
+
+        async def download_part(start: int, count: int) -> None:
+            await self.get_stream(
+                url=url,
+                sink=ProgressSink(sink, progress_bar),
+                offset=start,
+                size=count,
+            )
+            if isinstance(sink, ResumableDataSink):
+                await sink.mark_completed(start, count)
+
+        downloads = []
+        for i in range(adjusted_parts):
+            start = i * adjusted_part_size
+            part_size = min((i + 1) * adjusted_part_size, size) - start
+            if completed and is_range_completed(completed, start, start + part_size):
+                progress_bar.increment(part_size)
+                continue
+            downloads.append(download_part(start, part_size))
+
+        # a failed part does not cancel the others, so that as much as possible
+        # is downloaded (and recorded in a resumable sink) before giving up
+        results = await asyncio.gather(*downloads, return_exceptions=True)
+        for result in results:
+            # cancellation (or an interrupt) of a part is not a failed download,
+            # it must not be lost when the failures are collected below
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            raise ExceptionGroup("Failed to download some parts of the file", failures)
 
 
 def remove_quotes(etag: str | None) -> str | None:
@@ -702,6 +1076,13 @@ def remove_quotes(etag: str | None) -> str | None:
     return etag.strip('"')
 
 
+def _is_cacheable(result_class: type) -> bool:
+    """Return True if the parsed result of a GET request can be built from a cached payload."""
+    return not (
+        inspect.isclass(result_class) and issubclass(result_class, ClientResponse)
+    )
+
+
 def connection_unstructure_hook(data: Any, previous: UnstructureHook) -> Any:
     ret = previous(data)
     ret.pop("_connection", None)
@@ -709,4 +1090,4 @@ def connection_unstructure_hook(data: Any, previous: UnstructureHook) -> Any:
     return ret
 
 
-__all__ = ("AsyncConnection",)
+__all__ = ("AsyncConnection", "close_pooled_connections")
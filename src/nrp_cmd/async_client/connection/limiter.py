@@ -5,28 +5,112 @@
 # modify it under the terms of the MIT License; see LICENSE file for more
 # details.
 #
-"""Contains the limiter class for limiting the number of simultaneous connections."""
+"""Contains the limiter class for limiting the number of simultaneous connections.
+
+The limiter is hierarchical - there is a global cap on the number of simultaneous
+connections and an optional cap on connections to a single server (host). When
+the limiter is full, waiting requests are queued per host and the free slots are
+handed over to the hosts in a round-robin fashion, so that a burst of requests
+to one server (for example pre-signed S3 part urls) can not starve requests
+to another one (for example the repository API).
+"""
 
 import asyncio
 import contextlib
 import contextvars
+import logging
+import time
+from collections import deque
 from collections.abc import AsyncGenerator, Generator
 
+from attrs import define, field
 from yarl import URL
 
+from ...errors import (
+    RepositoryCommunicationError,
+    RepositoryRetryError,
+    RepositoryServerError,
+)
+
+log = logging.getLogger("invenio_nrp.async_client.connection.limiter")
+
+
+@define(kw_only=True)
+class LimiterStatistics:
+    """Statistics of waiting for a free slot in the limiter."""
+
+    acquired: int = 0
+    """Number of granted slots."""
+
+    waited: int = 0
+    """Number of granted slots that had to wait in the queue."""
+
+    total_wait_time: float = 0
+    """Total time (in seconds) spent waiting in the queue."""
+
+    max_wait_time: float = 0
+    """The longest time (in seconds) spent waiting in the queue."""
+
+    @property
+    def average_wait_time(self) -> float:
+        """Average time (in seconds) spent waiting in the queue per granted slot."""
+        return self.total_wait_time / self.acquired if self.acquired else 0
+
+    def record(self, wait_time: float | None) -> None:
+        """Record a granted slot.
 
-class Limiter(asyncio.Semaphore):
+        :param wait_time: time spent in the queue, None if the slot was free
+        """
+        self.acquired += 1
+        if wait_time is not None:
+            self.waited += 1
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+
+@define
+class LimiterSlot:
+    """A slot granted by the limiter, held for the duration of a request."""
+
+    granted: float = field(factory=time.monotonic)
+    """Time when the slot was granted."""
+
+    latency: float | None = None
+    """Time (in seconds) until the response headers arrived, None if not known."""
+
+    def responded(self) -> None:
+        """Record that the headers of the response have arrived."""
+        if self.latency is None:
+            self.latency = time.monotonic() - self.granted
+
+
+def limiter_key(url: URL) -> str:
+    """Return the key under which per-server limits are tracked for the url."""
+    return f"{url.host}:{url.port}" if url.host else ""
+
+
+class Limiter:
     """A class to limit the number of simultaneous connections."""
 
     def __init__(self, capacity: int, per_server_capacity: int = -1):
         """Initialize the limiter.
 
-        :param capacity:    the number of simultaneous connections
+        :param capacity:            the number of simultaneous connections
+        :param per_server_capacity: the number of simultaneous connections to a single
+                                    server, -1 means that only the global capacity
+                                    applies
         """
         if capacity <= 0:
             capacity = 10
         self.capacity = capacity
-        super().__init__(capacity)
+        self.per_server_capacity = (
+            min(per_server_capacity, capacity) if per_server_capacity > 0 else capacity
+        )
+        self._in_use = 0
+        self._in_use_per_server: dict[str, int] = {}
+        # servers with waiting requests, in the order in which they get served
+        self._waiters: dict[str, deque[asyncio.Future[None]]] = {}
+        self._statistics: dict[str, LimiterStatistics] = {}
 
     @property
     def free(self) -> int:
@@ -34,12 +118,260 @@ class Limiter(asyncio.Semaphore):
 
         :return:   the number of remaining connections (approximate)
         """
-        return self._value
+        return self.capacity - self._in_use
+
+    @property
+    def waiting(self) -> int:
+        """The number of requests waiting for a free slot."""
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    @property
+    def statistics(self) -> dict[str, LimiterStatistics]:
+        """Per-server statistics of the time spent waiting for a free slot."""
+        return self._statistics
+
+    @property
+    def total_statistics(self) -> LimiterStatistics:
+        """Statistics of the time spent waiting for a free slot, for all servers."""
+        ret = LimiterStatistics()
+        for stats in self._statistics.values():
+            ret.acquired += stats.acquired
+            ret.waited += stats.waited
+            ret.total_wait_time += stats.total_wait_time
+            ret.max_wait_time = max(ret.max_wait_time, stats.max_wait_time)
+        return ret
+
+    @contextlib.asynccontextmanager
+    async def limit(self, url: URL) -> AsyncGenerator[LimiterSlot, None]:
+        """Wait for a free slot for the url and hold it for the duration of the context.
+
+        :param url: the url of the request, its host is used for per-server limits
+        """
+        key = limiter_key(url)
+        await self._acquire(key)
+        try:
+            yield LimiterSlot()
+        finally:
+            self._release(key)
+
+    def _can_acquire(self, key: str) -> bool:
+        return (
+            self._in_use < self.capacity
+            and self._in_use_per_server.get(key, 0) < self._server_capacity(key)
+        )
+
+    def _server_capacity(self, key: str) -> int:
+        """Return the number of simultaneous connections allowed to the server."""
+        return self.per_server_capacity
+
+    def _take(self, key: str) -> None:
+        self._in_use += 1
+        self._in_use_per_server[key] = self._in_use_per_server.get(key, 0) + 1
+
+    def _record(self, key: str, wait_time: float | None) -> None:
+        self._statistics.setdefault(key, LimiterStatistics()).record(wait_time)
+
+    async def _acquire(self, key: str) -> None:
+        if key not in self._waiters and self._can_acquire(key):
+            self._take(key)
+            self._record(key, None)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(future)
+        start = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # the slot has been handed over to us, give it to someone else
+                self._release(key)
+            else:
+                self._remove_waiter(key, future)
+            raise
+        self._record(key, time.monotonic() - start)
+
+    def _remove_waiter(self, key: str, future: asyncio.Future[None]) -> None:
+        waiters = self._waiters.get(key)
+        if waiters is None:
+            return
+        with contextlib.suppress(ValueError):
+            waiters.remove(future)
+        if not waiters:
+            del self._waiters[key]
+
+    def _release(self, key: str) -> None:
+        self._in_use -= 1
+        self._in_use_per_server[key] -= 1
+        if not self._in_use_per_server[key]:
+            del self._in_use_per_server[key]
+        self._wake_up_waiters()
+
+    def _wake_up_waiters(self) -> None:
+        """Hand over free slots to the waiting requests, round-robin between servers."""
+        while self._in_use < self.capacity:
+            for key in self._waiters:
+                if self._can_acquire(key):
+                    break
+            else:
+                return
+            waiters = self._waiters.pop(key)
+            future = waiters.popleft()
+            if waiters:
+                # move the server to the end of the queue
+                self._waiters[key] = waiters
+            if future.done():
+                continue
+            self._take(key)
+            future.set_result(None)
+
+
+@define(kw_only=True)
+class ServerConcurrency:
+    """Adaptive (AIMD) concurrency state of a single server.
+
+    The limit is increased additively (by about one connection per "round" of
+    requests) while the latency stays close to the best latency seen so far,
+    and it is halved when the server signals an overload - that is, on
+    429 Too many requests, 503 Service unavailable, 504 Gateway timeout
+    or a timeout on the client side.
+    """
+
+    limit: float
+    """Current number of allowed simultaneous connections."""
+
+    min_limit: int = 1
+    """The limit will never drop below this value."""
+
+    max_limit: int
+    """The limit will never grow above this value."""
+
+    latency_tolerance: float = 2.0
+    """Latency up to this multiple of the best latency is considered as flat."""
+
+    backoff_factor: float = 0.5
+    """Multiplicative decrease of the limit on overload."""
+
+    min_latency: float | None = None
+    """The best latency seen, slowly forgotten so that it follows changes in the network."""
+
+    last_decrease: float = field(default=0.0)
+    """Time of the last decrease, used to decrease only once per burst of failures."""
+
+    @property
+    def capacity(self) -> int:
+        """The current limit as a whole number of connections."""
+        return max(self.min_limit, min(self.max_limit, int(self.limit)))
+
+    def on_success(self, latency: float) -> None:
+        """Record a successful request and increase the limit if latency is flat."""
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+        else:
+            # forget the best latency slowly
+            self.min_latency += (latency - self.min_latency) * 0.01
+        if latency <= self.min_latency * self.latency_tolerance:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def on_overload(self) -> None:
+        """Record an overload signal from the server and decrease the limit."""
+        now = time.monotonic()
+        # requests that were in flight together fail together, decrease only once
+        if now - self.last_decrease < (self.min_latency or 0) + 1:
+            return
+        self.last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.backoff_factor)
+
+
+_server_concurrency: dict[str, ServerConcurrency] = {}
+"""Adaptive per-server state, shared by all adaptive limiters for the life of the process."""
+
+
+def is_overload_error(exc: BaseException) -> bool:
+    """Return True if the exception signals that the server is overloaded."""
+    if isinstance(exc, RepositoryRetryError | TimeoutError):
+        return True
+    if isinstance(exc, RepositoryServerError):
+        status = exc.status
+        if status is None and isinstance(exc.json, dict):
+            # the http status is not known, use the one reported in the body
+            status = exc.json.get("status")
+        return status in (503, 504)
+    if isinstance(exc, RepositoryCommunicationError):
+        return isinstance(exc.__cause__, TimeoutError)
+    return False
+
+
+class AdaptiveLimiter(Limiter):
+    """Limiter that adapts the per-server capacity to the server's responses.
+
+    The global capacity is fixed, the capacity of every server is driven by
+    `ServerConcurrency` - it grows while the server responds quickly and shrinks
+    when it reports an overload. The per-server state is kept for the life
+    of the process, so later commands start with the already discovered limit.
+
+    The latency is the time until the response headers arrive, reported by
+    `LimiterSlot.responded`. Requests that do not report it (for example
+    uploads, whose response comes only after the whole body has been sent)
+    are not used for growing the limit, as their duration is given
+    by the bandwidth rather than by the load of the server.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 64,
+        per_server_capacity: int = 32,
+        initial_server_capacity: int = 8,
+    ):
+        """Initialize the limiter.
+
+        :param capacity:                the global number of simultaneous connections
+        :param per_server_capacity:     the maximal number of simultaneous connections
+                                        to a single server
+        :param initial_server_capacity: the number of simultaneous connections to
+                                        a server that has not been seen yet
+        """
+        super().__init__(capacity, per_server_capacity)
+        self.initial_server_capacity = min(
+            initial_server_capacity, self.per_server_capacity
+        )
+
+    def server_concurrency(self, key: str) -> ServerConcurrency:
+        """Return the adaptive state of the server."""
+        state = _server_concurrency.get(key)
+        if state is None:
+            state = _server_concurrency[key] = ServerConcurrency(
+                limit=self.initial_server_capacity,
+                max_limit=self.per_server_capacity,
+            )
+        return state
+
+    def _server_capacity(self, key: str) -> int:
+        state = self.server_concurrency(key)
+        return min(self.per_server_capacity, state.capacity)
 
     @contextlib.asynccontextmanager
-    async def limit(self, url: URL) -> AsyncGenerator[None, None]:
-        async with self:
-            yield
+    async def limit(self, url: URL) -> AsyncGenerator[LimiterSlot, None]:
+        """Wait for a free slot and feed the outcome of the request back to the limiter.
+
+        :param url: the url of the request, its host is used for per-server limits
+        """
+        key = limiter_key(url)
+        await self._acquire(key)
+        state = self.server_concurrency(key)
+        slot = LimiterSlot()
+        try:
+            yield slot
+        except BaseException as e:
+            if is_overload_error(e):
+                state.on_overload()
+                log.debug("%s: overloaded, limit %s", key, state.capacity)
+            raise
+        else:
+            if slot.latency is not None:
+                state.on_success(slot.latency)
+        finally:
+            self._release(key)
 
 
 current_limiter_var = contextvars.ContextVar[Limiter]("current_limiter")
@@ -56,8 +388,13 @@ class CurrentLimiterProxy:
         """
         return current_limiter_var.get().free
 
+    @property
+    def statistics(self) -> dict[str, LimiterStatistics]:
+        """Per-server statistics of the current limiter."""
+        return current_limiter_var.get().statistics
+
     @contextlib.asynccontextmanager
-    async def limit(self, url: URL) -> AsyncGenerator[None, None]:
+    async def limit(self, url: URL) -> AsyncGenerator[LimiterSlot, None]:
         try:
             limiter = current_limiter_var.get()
         except LookupError:
@@ -65,8 +402,8 @@ class CurrentLimiterProxy:
         if limiter is None:
             limiter = Limiter(10)
             current_limiter_var.set(limiter)
-        async with limiter.limit(url):
-            yield
+        async with limiter.limit(url) as slot:
+            yield slot
 
     def reset(self):
         """Reset the current limiter."""
@@ -76,13 +413,64 @@ class CurrentLimiterProxy:
 current_limiter = CurrentLimiterProxy()
 
 
+def log_limiter_statistics(limiter: Limiter) -> None:
+    """Log the queue wait statistics of the limiter at the debug level."""
+    if not log.isEnabledFor(logging.DEBUG):
+        return
+    for key, stats in limiter.statistics.items():
+        log.debug(
+            "%s: %d requests, %d waited, average wait %.3fs, max wait %.3fs",
+            key,
+            stats.acquired,
+            stats.waited,
+            stats.average_wait_time,
+            stats.max_wait_time,
+        )
+
+
 @contextlib.contextmanager
 def limit_connections(
     max_connections: int, per_server_connections: int = -1
 ) -> Generator[None, None, None]:
-    """Limit the number of simultaneous connections."""
-    token = current_limiter_var.set(Limiter(max_connections, per_server_connections))
+    """Limit the number of simultaneous connections.
+
+    :param max_connections:         the global number of simultaneous connections
+    :param per_server_connections:  the number of simultaneous connections to a single
+                                    server, -1 for no per-server limit
+    """
+    limiter = Limiter(max_connections, per_server_connections)
+    token = current_limiter_var.set(limiter)
+    try:
+        yield
+    finally:
+        current_limiter_var.reset(token)
+        log_limiter_statistics(limiter)
+
+
+@contextlib.contextmanager
+def adaptive_limit_connections(
+    max_connections: int = 64,
+    per_server_connections: int = 32,
+    initial_server_connections: int = 8,
+) -> Generator[None, None, None]:
+    """Limit the number of simultaneous connections adaptively.
+
+    The number of connections to each server starts at `initial_server_connections`
+    and is adjusted between 1 and `per_server_connections` according to the latency
+    and overload responses of the server, see `AdaptiveLimiter`.
+
+    :param max_connections:             the global number of simultaneous connections
+    :param per_server_connections:      the maximal number of simultaneous connections
+                                        to a single server
+    :param initial_server_connections:  the initial number of simultaneous connections
+                                        to a single server
+    """
+    limiter = AdaptiveLimiter(
+        max_connections, per_server_connections, initial_server_connections
+    )
+    token = current_limiter_var.set(limiter)
     try:
         yield
     finally:
         current_limiter_var.reset(token)
+        log_limiter_statistics(limiter)
@@ -7,13 +7,13 @@
 #
 """A response that can raise parsed invenio errors."""
 
-import json
 from datetime import datetime
 from email.utils import parsedate_to_datetime
 from typing import Any
 
 from aiohttp import ClientResponse
 
+from ... import json_codec
 from ...errors import (
     DoesNotExistError,
     RepositoryClientError,
@@ -38,7 +38,7 @@ class RepositoryResponse(ClientResponse):
             self.release()
             payload: Any
             try:
-                payload = json.loads(payload_text)
+                payload = json_codec.loads(payload_text)
             except ValueError:
                 payload = {
                     "status": self.status,
@@ -61,9 +61,9 @@ class RepositoryResponse(ClientResponse):
                 raise RepositoryRetryError(after_seconds)
 
             if self.status >= 500:
-                raise RepositoryServerError(self.request_info, payload)
+                raise RepositoryServerError(self.request_info, payload, self.status)
             elif self.status >= 400:
                 if self.status == 404:
-                    raise DoesNotExistError(self.request_info, payload)
-                raise RepositoryClientError(self.request_info, payload)
+                    raise DoesNotExistError(self.request_info, payload, self.status)
+                raise RepositoryClientError(self.request_info, payload, self.status)
             raise RepositoryCommunicationError(self.request_info, payload)
@@ -0,0 +1,166 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Upload of local files without copying them through python.
+
+On plain http connections the file is handed to the kernel via os.sendfile,
+so the data never enter the python process. On TLS connections (where the
+kernel can not encrypt the data) asyncio falls back to reading the file with
+readinto into a reusable buffer.
+
+Event loops without loop.sendfile (uvloop, which the command line client
+runs on) get the same on plain http connections: once the transport has
+written its buffer, os.sendfile is called on the socket of the transport in
+a worker thread. Writers that chunk or compress the body (and TLS connections
+on these loops) get the file read in chunks in a worker thread, each chunk
+is written through the writer.
+"""
+
+import asyncio
+import os
+import select
+from collections.abc import Callable
+from pathlib import Path
+from typing import IO, Any, override
+
+from aiohttp.abc import AbstractStreamWriter
+from aiohttp.payload import Payload
+
+SENDFILE_CHUNK_SIZE = 8 * 1024 * 1024
+"""Number of bytes sent by a single sendfile call, progress is reported after each."""
+
+SENDFILE_WRITE_TIMEOUT = 60
+"""Seconds the socket sendfile waits for the peer to accept more data."""
+
+
+async def socket_sendfile(
+    transport: asyncio.WriteTransport, file: IO[bytes], offset: int, count: int
+) -> int:
+    """Send a byte range of a file directly to the socket of a transport.
+
+    Used on event loops that do not implement loop.sendfile.
+
+    :param transport:   plain (not TLS) transport of the connection
+    :param file:        file opened in binary mode
+    :param offset:      offset of the first sent byte
+    :param count:       number of bytes to send
+    :return:            number of bytes sent, less than count at the end of the file
+    :raises NotImplementedError: if the transport has no plain socket
+    """
+    sock = transport.get_extra_info("socket")
+    if (
+        sock is None
+        or transport.get_extra_info("sslcontext") is not None
+        or not hasattr(os, "sendfile")
+        or not hasattr(select, "poll")
+    ):
+        raise NotImplementedError("Socket sendfile is not available")
+    # the data buffered by the transport (headers) must leave before the file
+    while transport.get_write_buffer_size():
+        await asyncio.sleep(0.001)
+    return await asyncio.to_thread(
+        _sendfile_to_socket, sock.fileno(), file.fileno(), offset, count
+    )
+
+
+def _sendfile_to_socket(sock_fd: int, file_fd: int, offset: int, count: int) -> int:
+    """Send a byte range of a file to a non-blocking socket, waiting until it is writable."""
+    poller = select.poll()
+    poller.register(sock_fd, select.POLLOUT)
+    sent = 0
+    while sent < count:
+        try:
+            chunk = os.sendfile(sock_fd, file_fd, offset + sent, count - sent)
+        except BlockingIOError:
+            if not poller.poll(SENDFILE_WRITE_TIMEOUT * 1000):
+                raise TimeoutError("Timeout while sending the file") from None
+            continue
+        if not chunk:
+            # end of the file
+            break
+        sent += chunk
+    return sent
+
+
+class FilePayload(Payload):
+    """aiohttp payload sending a byte range of a local file."""
+
+    def __init__(
+        self,
+        file_name: Path,
+        offset: int = 0,
+        count: int | None = None,
+        progress: Callable[[int], None] | None = None,
+        chunk_size: int = SENDFILE_CHUNK_SIZE,
+        **kwargs: Any,
+    ):
+        """Initialize the payload.
+
+        :param file_name:   the file to send
+        :param offset:      offset of the first sent byte
+        :param count:       number of bytes to send, until the end of the file if None
+        :param progress:    called with the number of bytes sent after each chunk
+        :param chunk_size:  number of bytes sent by a single sendfile call
+        """
+        kwargs.setdefault("content_type", "application/octet-stream")
+        super().__init__(file_name, **kwargs)
+        if count is None:
+            count = file_name.stat().st_size - offset
+        self._offset = offset
+        self._size = count
+        self._progress = progress
+        self._chunk_size = chunk_size
+
+    @override
+    async def write(self, writer: AbstractStreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        # sendfile bypasses the writer, so it can be used only if the writer
+        # would pass the data to the transport unchanged
+        transport: asyncio.WriteTransport | None = getattr(writer, "transport", None)
+        direct = (
+            transport is not None
+            and not getattr(writer, "chunked", True)
+            and getattr(writer, "_compress", None) is None
+        )
+        offset = self._offset
+        remaining = self._size or 0
+        f = await asyncio.to_thread(open, self._value, "rb", buffering=0)
+        try:
+            while remaining > 0:
+                count = min(self._chunk_size, remaining)
+                sent = 0
+                if direct and transport is not None:
+                    # make sure that the headers have left the writer
+                    await writer.drain()
+                    try:
+                        try:
+                            sent = await loop.sendfile(transport, f, offset, count)
+                        except NotImplementedError:
+                            # uvloop does not implement loop.sendfile
+                            sent = await socket_sendfile(transport, f, offset, count)
+                    except NotImplementedError:
+                        direct = False
+                if not direct:
+                    f.seek(offset)
+                    data = await loop.run_in_executor(None, f.read, count)
+                    await writer.write(data)
+                    sent = len(data)
+                if not sent:
+                    raise OSError(
+                        f"File {self._value} is shorter than expected, "
+                        f"{remaining} bytes missing"
+                    )
+                offset += sent
+                remaining -= sent
+                if self._progress is not None:
+                    self._progress(sent)
+        finally:
+            f.close()
+
+    @override
+    def decode(self, encoding: str = "utf-8", errors: str = "strict") -> str:
+        raise TypeError("File payload can not be decoded")
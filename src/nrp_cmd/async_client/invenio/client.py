@@ -1,5 +1,6 @@
 """Invenio asynchronous client."""
 
+from types import TracebackType
 from typing import Any, Self, override
 
 from yarl import URL  # noqa: TCH002    as attrs need to have type info in runtime
@@ -11,11 +12,12 @@ from ...errors import (
     StructureError,
     is_instance_of_exceptions,
 )
-from ...rdm_compat import make_rdm_info
-from ...types.info import ModelInfo, RepositoryInfo
+from ...http_cache import ResponseCache
+from ...types.info import RepositoryInfo
 from ..base_client import AsyncRepositoryClient
 from ..connection import AsyncConnection
 from .files import AsyncInvenioFilesClient
+from .introspection import RepositoryInfoFetcher, introspect_rdm_repository
 from .records import AsyncInvenioRecordsClient
 from .requests import AsyncInvenioRequestsClient
 
@@ -39,31 +41,33 @@ class AsyncInvenioRepositoryClient(AsyncRepositoryClient):
     async def can_handle_repository(
         cls, url: URL | str, verify_tls: bool = True
     ) -> URL | None:
-        connection = AsyncConnection(verify_tls=verify_tls)
         if isinstance(url, str):
             url = URL(url)
 
-        # check if the repository is an NRP invenio repository
-        well_known_url = url.with_path("/.well-known/repository")
-        try:
-            data = await connection.get(url=well_known_url, result_class=dict[str, Any])
-            if "invenio_version" in data:
-                if "api" in data.get("links", {}):
-                    return URL(data["links"]["api"])
-                # fallback for older oarepo-runtime versions
-                return url.with_path("/api")
-        except Exception:
-            pass
-
-        # check if the repository is a plain Invenio RDM repository, such as zenodo
-        try:
-            root_page_data = await connection.get(
-                url=url.with_path("/"), result_class=str
-            )
-            if '<meta name="generator" content="InvenioRDM' in root_page_data:
-                return url.with_path("/api")
-        except Exception:
-            pass
+        async with AsyncConnection(verify_tls=verify_tls) as connection:
+            # check if the repository is an NRP invenio repository
+            well_known_url = url.with_path("/.well-known/repository")
+            try:
+                data = await connection.get(
+                    url=well_known_url, result_class=dict[str, Any]
+                )
+                if "invenio_version" in data:
+                    if "api" in data.get("links", {}):
+                        return URL(data["links"]["api"])
+                    # fallback for older oarepo-runtime versions
+                    return url.with_path("/api")
+            except Exception:
+                pass
+
+            # check if the repository is a plain Invenio RDM repository, such as zenodo
+            try:
+                root_page_data = await connection.get(
+                    url=url.with_path("/"), result_class=str
+                )
+                if '<meta name="generator" content="InvenioRDM' in root_page_data:
+                    return url.with_path("/api")
+            except Exception:
+                pass
         return None
 
     @override
@@ -96,11 +100,16 @@ class AsyncInvenioRepositoryClient(AsyncRepositoryClient):
             tokens.update(extra_tokens)
         if config.token:
             tokens[config.url] = config.token
+        response_cache = ResponseCache()
         self._connection = AsyncConnection(
             tokens=tokens,
             verify_tls=config.verify_tls,
             retry_count=config.retry_count,
             retry_after_seconds=config.retry_after_seconds,
+            response_cache=response_cache if config.cache_responses else None,
+        )
+        self._info_fetcher = RepositoryInfoFetcher(
+            self._connection, config, response_cache
         )
 
     @override
@@ -109,32 +118,36 @@ class AsyncInvenioRepositoryClient(AsyncRepositoryClient):
             return self._config.info
 
         try:
-            info = await self._connection.get(
-                url=self._config.well_known_repository_url,
-                result_class=RepositoryInfo,
-            )
-            self._config.info = info
-
-            if not self._config.info.links.models:
-                raise ValueError("The repository does not provide the models link.")
-
-            models = await self._connection.get(
-                url=self._config.info.links.models,
-                result_class=list[ModelInfo],
-            )
-
-            info.models = {model.type: model for model in models}
-
+            info = self._config.info = await self._info_fetcher.fetch()
         except* (RepositoryClientError, RepositoryCommunicationError) as exc:
             if is_instance_of_exceptions(exc, StructureError):
                 raise exc
             # not a NRP based repository, suppose that it is plain invenio rdm
-            info = self._config.info = make_rdm_info(
-                self._config.url, self._config.verify_tls
+            info = self._config.info = await introspect_rdm_repository(
+                self._connection, self._config.url
             )
 
         return info
 
+    @override
+    async def close(self) -> None:
+        """Close the client and release pooled http connections."""
+        await self._info_fetcher.close()
+        await self._connection.close()
+
+    @override
+    async def __aenter__(self) -> Self:
+        return self
+
+    @override
+    async def __aexit__(
+        self,
+        _ext: type[BaseException] | None,
+        _exc: BaseException | None,
+        _tb: TracebackType | None,
+    ) -> None:
+        await self.close()
+
     @property
     @override
     def records(self) -> AsyncInvenioRecordsClient:
@@ -1,15 +1,30 @@
+import logging
 from pathlib import Path
 from typing import Any, overload, override
 
 from yarl import URL
 
+from ...errors import (
+    RepositoryClientError,
+    RepositoryCommunicationError,
+    RepositoryError,
+)
 from ...progress import DummyProgressBar, current_progress
-from ...types.files import TRANSFER_TYPE_LOCAL, File, FilesAPIList, FilesList
+from ...types.files import (
+    TRANSFER_TYPE_LOCAL,
+    TRANSFER_TYPE_MULTIPART,
+    File,
+    FilesAPIList,
+    FilesList,
+)
 from ...types.info import RepositoryInfo
 from ...types.records import Record
 from ..base_client import AsyncFilesClient
 from ..connection import AsyncConnection
-from ..streams import DataSink, DataSource
+from ..streams import DataSink, DataSource, FileSource
+from .transfer.journal import UploadJournal
+
+log = logging.getLogger("invenio_nrp.async_client.invenio.files")
 
 
 class AsyncInvenioFilesClient(AsyncFilesClient):
@@ -85,6 +100,8 @@ class AsyncInvenioFilesClient(AsyncFilesClient):
         transfer_type: str = TRANSFER_TYPE_LOCAL,
         transfer_metadata: dict | None = None,
         progress: str | None = None,
+        resume: bool = False,
+        transfer_options: dict[str, Any] | None = None,
     ) -> File:
         """Upload a file to the repository.
 
@@ -92,12 +109,14 @@ class AsyncInvenioFilesClient(AsyncFilesClient):
         :param key: key of the file
         :param file: file to upload
         :param metadata: metadata of the file
+        :param resume: keep a journal of uploaded parts of a multipart upload of a local
+                       file and resume a previously interrupted upload of the same file
+        :param transfer_options: keyword arguments of the transfer implementation,
+                                 for example {"use_sendfile": True}
         """
         files_url = self._get_files_url(record_or_url)
 
         if isinstance(source, (str, Path)):
-            from ..streams import FileSource
-
             source = FileSource(source)
 
         # 1. initialize the upload
@@ -117,18 +136,36 @@ class AsyncInvenioFilesClient(AsyncFilesClient):
 
         from .transfer import transfer_registry
 
-        transfer = transfer_registry.get(transfer_type)
+        transfer = transfer_registry.get(transfer_type, **(transfer_options or {}))
 
         await transfer.prepare(self._connection, files_url, transfer_payload, source)
 
-        with current_progress.short_task():
-            initialized_upload: FilesList = await self._connection.post(
-                url=files_url,
-                json=[transfer_payload],
-                result_class=FilesList,
+        journal: UploadJournal | None = None
+        initialized_upload_metadata: File | None = None
+        if resume and transfer_type == TRANSFER_TYPE_MULTIPART:
+            journal, initialized_upload_metadata = await self._resume_upload(
+                files_url, key, source, transfer_payload
             )
+            if journal is None and initialized_upload_metadata is not None:
+                # the upload has been already committed
+                return initialized_upload_metadata
+
+        if initialized_upload_metadata is None:
+            with current_progress.short_task():
+                initialized_upload: FilesList = await self._connection.post(
+                    url=files_url,
+                    json=[transfer_payload],
+                    result_class=FilesList,
+                )
 
-        initialized_upload_metadata = initialized_upload[key]
+            initialized_upload_metadata = initialized_upload[key]
+
+            if journal is not None:
+                upload_links = initialized_upload_metadata.links
+                assert upload_links is not None
+                journal.links = [part.url for part in upload_links.parts or []]
+                journal.commit_url = upload_links.commit
+                journal.save()
 
         # 2. upload the file using one of the transfer types
         if progress:
@@ -138,13 +175,18 @@ class AsyncInvenioFilesClient(AsyncFilesClient):
         progress_bar.set_total(await source.size())
         try:
             await transfer.upload(
-                self._connection, initialized_upload_metadata, source, progress_bar
+                self._connection,
+                initialized_upload_metadata,
+                source,
+                progress_bar,
+                journal=journal,
             )
         finally:
             progress_bar.finish()
 
         # 3. prepare the commit payload
         commit_payload = await transfer.get_commit_payload(initialized_upload_metadata)
+        checksums = await transfer.checksums()
 
         with current_progress.short_task():
             if initialized_upload_metadata.links.commit:
@@ -153,10 +195,110 @@ class AsyncInvenioFilesClient(AsyncFilesClient):
                     json=commit_payload,
                     result_class=File,
                 )
-
-                return committed_upload
             else:
-                return initialized_upload_metadata
+                committed_upload = initialized_upload_metadata
+
+        assert committed_upload is not None
+        try:
+            self._verify_checksum(committed_upload, checksums)
+        except RepositoryCommunicationError:
+            # the upload can not be resumed and the corrupted file
+            # must not be left in the record
+            if journal is not None:
+                journal.delete()
+            await self._delete_corrupted(committed_upload)
+            raise
+
+        if journal is not None:
+            journal.delete()
+        return committed_upload
+
+    def _verify_checksum(self, file: File, checksums: dict[str, str]) -> None:
+        """Compare the checksum computed by the repository with the uploaded data.
+
+        :param file:        the committed file
+        :param checksums:   hex digests computed while the file was being uploaded
+        """
+        repository_checksum = getattr(file, "checksum", None)
+        if not isinstance(repository_checksum, str) or ":" not in repository_checksum:
+            return
+        algo, digest = repository_checksum.split(":", 1)
+        if algo in checksums and checksums[algo] != digest.lower():
+            raise RepositoryCommunicationError(
+                f"Checksum mismatch for uploaded file {file.key}: "
+                f"repository has {repository_checksum}, uploaded {algo}:{checksums[algo]}"
+            )
+
+    async def _delete_corrupted(self, file: File) -> None:
+        """Delete a committed file whose checksum does not match the uploaded data.
+
+        :raises RepositoryCommunicationError: if the file could not be deleted
+        """
+        try:
+            await self.delete(file)
+        except RepositoryError as e:
+            raise RepositoryCommunicationError(
+                f"Uploaded file {file.key} is corrupted and could not be deleted, "
+                "please delete it from the record"
+            ) from e
+        log.error("Uploaded file %s is corrupted and has been deleted", file.key)
+
+    async def _resume_upload(
+        self,
+        files_url: URL,
+        key: str,
+        source: DataSource,
+        transfer_payload: dict[str, Any],
+    ) -> tuple[UploadJournal | None, File | None]:
+        """Look up the journal of an interrupted upload.
+
+        :return: a tuple of (journal, file). If the upload can be resumed, both are set.
+                 If the upload has already been committed, the journal is None and
+                 the file is the committed file. If there is nothing to resume,
+                 a fresh journal is returned together with None.
+        """
+        if not isinstance(source, FileSource):
+            # only files can be re-read in a later run
+            return None, None
+
+        identity = await source.identity()
+        size = transfer_payload["size"]
+        part_size = transfer_payload["transfer"]["part_size"]
+        journal_path = UploadJournal.journal_path(files_url, key)
+
+        journal = UploadJournal.load(journal_path)
+        if journal is not None and journal.matches(identity, size, part_size):
+            try:
+                existing = await self._connection.get(
+                    url=files_url / key, result_class=File
+                )
+            except RepositoryClientError:
+                existing = None
+            if existing is not None and existing.size == size:
+                if existing.status == "completed":
+                    journal.delete()
+                    return None, existing
+                if existing.links and existing.links.parts:
+                    log.info(
+                        "Resuming upload of %s, %s parts already uploaded",
+                        key,
+                        len(journal.completed),
+                    )
+                    return journal, existing
+
+        if journal is not None:
+            log.info("Can not resume upload of %s, starting from scratch", key)
+            journal.delete()
+
+        journal = UploadJournal(
+            files_url=files_url,
+            key=key,
+            source=identity,
+            size=size,
+            part_size=part_size,
+            path=journal_path,
+        )
+        return journal, None
 
     @override
     @overload
@@ -241,7 +383,12 @@ class AsyncInvenioFilesClient(AsyncFilesClient):
             progress_bar = DummyProgressBar()
 
         await self._connection.download_file(
-            content_url, sink, parts, part_size, progress_bar
+            content_url,
+            sink,
+            parts,
+            part_size,
+            progress_bar,
+            checksum=getattr(file_or_url, "checksum", None),
         )
 
     def _get_files_url(self, record_or_url: Record | URL) -> URL:
@@ -0,0 +1,221 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Introspection of Invenio repositories.
+
+NRP repositories describe themselves at /.well-known/repository, which links
+to the list of the models. RepositoryInfoFetcher keeps both responses in
+the response cache (nrp_cmd.http_cache) together with their ETag and
+Last-Modified headers, so that a refresh of the repository info sends
+conditional requests and downloads the responses only if they have changed.
+Both responses are revalidated concurrently when the models url is known
+from the cached info.
+
+With RepositoryConfig.stale_while_revalidate, the cached info is returned
+immediately and the responses are revalidated in the background. The
+refreshed info replaces RepositoryConfig.info when the revalidation finishes,
+the command runs on the cached info until then.
+
+Repositories that do not provide the NRP /.well-known/repository endpoint
+are supposed to be plain Invenio RDM (such as Zenodo). Their version is read
+from the generator meta tag of the homepage, which is downloaded over the
+client's connection so that the event loop is not blocked, and the
+repository info is built by nrp_cmd.rdm_compat. The client keeps
+the info in RepositoryConfig.info, so the homepage is downloaded again
+only when the info is refreshed.
+
+Concurrent introspections of the same host share a single download
+of the homepage.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from typing import TYPE_CHECKING
+
+from ... import json_codec
+from ...converter import converter
+from ...errors import RepositoryError, StructureError
+from ...http_cache import CachedResponse, ResponseCache
+from ...rdm_compat import rdm_info, rdm_version_from_homepage
+from ...types.info import ModelInfo, RepositoryInfo
+
+if TYPE_CHECKING:
+    from yarl import URL
+
+    from ...config import RepositoryConfig
+    from ..connection import AsyncConnection
+
+log = logging.getLogger("invenio_nrp.async_client.invenio.introspection")
+
+_pending_introspections: dict[str, asyncio.Task[RepositoryInfo]] = {}
+"""Introspections in progress, keyed by the root url of the repository."""
+
+
+class RepositoryInfoFetcher:
+    """Downloads the repository info, revalidating the cached responses."""
+
+    def __init__(
+        self,
+        connection: AsyncConnection,
+        config: RepositoryConfig,
+        cache: ResponseCache | None = None,
+    ) -> None:
+        """Initialize the fetcher.
+
+        :param connection:  connection used to download the info
+        :param config:      configuration of the repository, its info is replaced
+                            when a background revalidation finishes
+        :param cache:       cache of the responses, ResponseCache() if not set
+        """
+        self._connection = connection
+        self._config = config
+        self._cache = cache or ResponseCache()
+        self._refresh: asyncio.Task[RepositoryInfo] | None = None
+
+    async def fetch(self) -> RepositoryInfo:
+        """Return the repository info.
+
+        :raises ValueError: if the repository does not provide the models link
+        """
+        if self._config.stale_while_revalidate:
+            info = self._cached_info()
+            if info is not None:
+                if self._refresh is None:
+                    self._refresh = asyncio.create_task(self._revalidate())
+                    self._refresh.add_done_callback(self._refreshed)
+                return info
+        return await self._revalidate()
+
+    async def close(self) -> None:
+        """Wait for the background revalidation, its errors are ignored."""
+        if self._refresh is not None:
+            with contextlib.suppress(Exception):
+                await self._refresh
+
+    def _refreshed(self, task: asyncio.Task[RepositoryInfo]) -> None:
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            log.warning(
+                "Could not refresh the info of repository %s: %s",
+                self._config.url,
+                task.exception(),
+            )
+            return
+        self._config.info = task.result()
+
+    def _cached_info(self) -> RepositoryInfo | None:
+        """Return the info from the cached responses, None if they are not cached."""
+        info_response = self._cache.get(self._config.well_known_repository_url)
+        if info_response is None:
+            return None
+        try:
+            info = _structure(info_response, RepositoryInfo)
+            if not info.links.models:
+                return None
+            models_response = self._cache.get(info.links.models)
+            if models_response is None:
+                return None
+            info.models = {
+                model.type: model
+                for model in _structure(models_response, list[ModelInfo])
+            }
+        except (StructureError, ValueError):
+            # cached by a different version of the client
+            return None
+        return info
+
+    async def _revalidate(self) -> RepositoryInfo:
+        info_url = self._config.well_known_repository_url
+        cached_info = self._cache.get(info_url)
+        models_url = _models_url(cached_info)
+
+        models_response: CachedResponse | None = None
+        if models_url is not None:
+            info_response, models_response = await asyncio.gather(
+                self._get(info_url), self._get_speculative(models_url)
+            )
+        else:
+            info_response = await self._get(info_url)
+
+        info = _structure(info_response, RepositoryInfo)
+        if not info.links.models:
+            raise ValueError("The repository does not provide the models link.")
+        if models_response is None or models_response.url != str(info.links.models):
+            models_response = await self._get(info.links.models)
+
+        info.models = {
+            model.type: model for model in _structure(models_response, list[ModelInfo])
+        }
+        self._cache.put(info_response)
+        self._cache.put(models_response)
+        return info
+
+    async def _get(self, url: URL) -> CachedResponse:
+        return await self._connection.get_revalidated(
+            url=url, cached=self._cache.get(url)
+        )
+
+    async def _get_speculative(self, url: URL) -> CachedResponse | None:
+        """Get the models from the cached url, None if they are not there anymore.
+
+        The models link might have changed since the info was cached, the models
+        are then downloaded again from the link in the fresh info.
+        """
+        try:
+            return await self._get(url)
+        except RepositoryError as e:
+            log.debug("Could not revalidate the models at %s: %s", url, e)
+            return None
+
+
+def _structure[T](response: CachedResponse, result_class: type[T]) -> T:
+    return converter.structure(json_codec.loads(response.payload), result_class)
+
+
+def _models_url(info_response: CachedResponse | None) -> URL | None:
+    """Return the models url from a cached info response."""
+    if info_response is None:
+        return None
+    try:
+        return _structure(info_response, RepositoryInfo).links.models
+    except (StructureError, ValueError):
+        return None
+
+
+async def introspect_rdm_repository(
+    connection: AsyncConnection, url: URL
+) -> RepositoryInfo:
+    """Return the repository info of a plain Invenio RDM repository.
+
+    :param connection:  connection used to download the homepage
+    :param url:         any url within the repository
+    :raises ValueError: if the homepage does not contain the Invenio RDM version
+    """
+    root_url = url.with_path("/")
+    key = str(root_url)
+    loop = asyncio.get_running_loop()
+    introspection = _pending_introspections.get(key)
+    if introspection is None or introspection.get_loop() is not loop:
+        introspection = loop.create_task(_introspect(connection, root_url))
+        _pending_introspections[key] = introspection
+
+        def forget(task: asyncio.Task[RepositoryInfo]) -> None:
+            if _pending_introspections.get(key) is task:
+                del _pending_introspections[key]
+
+        introspection.add_done_callback(forget)
+    # a cancelled caller must not cancel the introspection shared with other callers
+    return await asyncio.shield(introspection)
+
+
+async def _introspect(connection: AsyncConnection, root_url: URL) -> RepositoryInfo:
+    homepage = await connection.get(url=root_url, result_class=str)
+    return rdm_info(root_url, rdm_version_from_homepage(homepage))
@@ -0,0 +1,598 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Pipelined scan of records.
+
+Invenio does not provide a scan api over REST, so a scan is simulated by
+paginated searches. A paginated search can return at most a window of records
+(opensearch's max_result_window), so larger result sets are split into
+windows on the record's creation date, each of them containing less records
+than the window size.
+
+The windows are planned up front from the first search response: if the
+repository returns a date histogram of the record creation dates among
+its aggregations, consecutive histogram buckets are packed into windows
+that are just under the window size. The last window ends just after the
+newest record, as calendar buckets (months, years) do not have a fixed
+length. Only if the histogram is not available
+(or a single bucket is larger than the window), the windows are found by
+bisection - splitting the window in halves until the halves fit. The plan
+can be inspected before the scan and parts of it scanned separately,
+for example by different workers of a harvest. The number of records
+in each window is compared with the plan when the window is scanned, windows
+that grew past the window size are bisected.
+
+An incremental harvest is a scan limited to records updated since the cursor
+of the previous harvest (and before the start of the harvest, less a safety
+margin for clock skew and indexing delay), the records are then scanned by
+the same windowed machinery.
+
+The scanner overlaps the network round-trips:
+
+* pages of a window are prefetched while the consumer handles the current one,
+* independent date windows are scanned concurrently,
+* the first page of a window is fetched in full and doubles as the probe
+  whether the window needs to be split, so no extra size=1 requests are made.
+
+Pages are passed to the consumer through a bounded queue, so that a slow
+consumer stops the scan instead of buffering the whole repository in memory.
+Records within a window keep the order of the search, windows are returned
+in the order they finish.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+from collections import deque
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+from attrs import define, field
+
+from ...config.cursors import HarvestCursor
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+    from ...dedup import DedupStore
+    from ...types.records import Record, RecordList
+    from ..base_client import RecordStatus
+    from .records import AsyncInvenioRecordsClient
+
+log = logging.getLogger("invenio_nrp.async_client.invenio.scan")
+
+DEFAULT_SCAN_PREFETCH = 2
+"""Number of pages of a window fetched ahead of the consumer."""
+
+DEFAULT_SCAN_CONCURRENCY = 4
+"""Number of date windows scanned at the same time."""
+
+DEFAULT_SCAN_QUEUE_SIZE = 16
+"""Number of pages waiting for the consumer before the scan is paused."""
+
+MINIMAL_WINDOW_DURATION = timedelta(milliseconds=1)
+"""Windows shorter than this are not split even if they contain too many records."""
+
+DEFAULT_SCAN_HISTOGRAM = "created"
+"""Name of the aggregation with the date histogram of record creation dates."""
+
+DEFAULT_HARVEST_MARGIN = timedelta(minutes=1)
+"""Records updated less than this before the harvest are left for the next harvest."""
+
+
+def opensearch_date_serialize(date: datetime) -> str:
+    """Serialize the date in the format understood by opensearch query parser."""
+    return date.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def date_in_between(date1: datetime, date2: datetime) -> datetime:
+    """Return the date in the middle of the interval."""
+    return date1 + (date2 - date1) / 2
+
+
+def parse_bucket_date(key: Any) -> datetime:
+    """Parse the key of a date histogram bucket.
+
+    Opensearch returns the key as milliseconds since the epoch, invenio
+    facets serialize it as a string (either the milliseconds or a date).
+    """
+    if isinstance(key, str):
+        try:
+            key = int(key)
+        except ValueError:
+            date = datetime.fromisoformat(key)
+            if date.tzinfo is None:
+                date = date.replace(tzinfo=UTC)
+            return date.astimezone(UTC)
+    return datetime.fromtimestamp(key / 1000, tz=UTC)
+
+
+@define(frozen=True)
+class ScanWindow:
+    """Interval [start, end) of record creation dates."""
+
+    start: datetime
+    end: datetime
+
+    count: int | None = field(default=None, eq=False)
+    """Expected number of records in the window, None if not known."""
+
+    def query(self, q: str | None) -> str:
+        """Return the query limited to records created within the window."""
+        date_query = (
+            f"created:[{opensearch_date_serialize(self.start)} "
+            f"TO {opensearch_date_serialize(self.end)}}}"
+        )
+        if q:
+            return f"({q}) AND {date_query}"
+        return date_query
+
+    @property
+    def can_split(self) -> bool:
+        """Return True if the window is long enough to be split."""
+        return self.end - self.start >= MINIMAL_WINDOW_DURATION
+
+    def split(self, parts: int = 2) -> list[ScanWindow]:
+        """Split the window into parts of the same duration.
+
+        The number of records in the parts is not known.
+        """
+        step = (self.end - self.start) / parts
+        boundaries = [self.start + step * i for i in range(parts)] + [self.end]
+        return [ScanWindow(start, end) for start, end in itertools.pairwise(boundaries)]
+
+
+@define(kw_only=True)
+class ScanPlan:
+    """Partitioning of a scan into date windows."""
+
+    total: int
+    """Number of records matching the query when the scan was planned."""
+
+    method: str
+    """How the windows were planned - "pagination", "histogram" or "bisection"."""
+
+    windows: list[ScanWindow] = field(factory=list)
+    """Windows to scan, empty if the records can be paginated without windows."""
+
+    def shards(self, count: int) -> list[ScanPlan]:
+        """Distribute the windows between count plans with similar number of records.
+
+        Windows are split if there are less of them than shards. Plans that
+        can not be sharded (paginated scans) are returned as a single shard.
+        """
+        if not self.windows:
+            return [self]
+        default_count = max(1, self.total // len(self.windows))
+        # expected number of records in each window, split windows share
+        # the records of the original window evenly
+        expected = {
+            window: default_count if window.count is None else window.count
+            for window in self.windows
+        }
+
+        while len(expected) < count:
+            largest = max(expected, key=expected.__getitem__)
+            if not largest.can_split:
+                break
+            parts = largest.split()
+            share = expected.pop(largest) // len(parts)
+            expected.update(dict.fromkeys(parts, share))
+
+        # largest windows first, each to the least loaded shard
+        loads = [(0, shard) for shard in range(min(count, len(expected)))]
+        shard_windows: list[list[ScanWindow]] = [[] for _ in loads]
+        for window in sorted(expected, key=expected.__getitem__, reverse=True):
+            load, shard = heapq.heappop(loads)
+            shard_windows[shard].append(window)
+            heapq.heappush(loads, (load + expected[window], shard))
+        return [
+            ScanPlan(
+                total=sum(expected[window] for window in assigned),
+                method=self.method,
+                windows=sorted(assigned, key=lambda window: window.start),
+            )
+            for assigned in shard_windows
+        ]
+
+
+def histogram_windows(
+    aggregation: Any, total: int, window_size: int, newest: datetime
+) -> list[ScanWindow] | None:
+    """Pack consecutive buckets of a date histogram into windows.
+
+    Each window contains at most window_size records unless it is made
+    of a single bucket that is larger than that - such windows are split
+    by bisection during the scan.
+
+    :param aggregation: date histogram aggregation from the search response
+    :param total:       number of records matching the query
+    :param window_size: maximal number of records in a window
+    :param newest:      creation date of the newest record matching the query,
+                        the last window ends just after it
+    :return:            windows covering all the records or None if the aggregation
+                        can not be used (missing, not a date histogram, or its counts
+                        do not match the query)
+    """
+    buckets = aggregation.get("buckets") if isinstance(aggregation, dict) else None
+    if not buckets:
+        return None
+    try:
+        counts = sorted(
+            (parse_bucket_date(bucket["key"]), int(bucket["doc_count"]))
+            for bucket in buckets
+        )
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None
+    if sum(count for _, count in counts) != total:
+        return None
+
+    # the length of the last bucket is not known (calendar intervals do not
+    # have a fixed length), so the last window ends after the newest record
+    last_end = max(counts[-1][0], newest.astimezone(UTC)) + timedelta(seconds=1)
+    boundaries = [date for date, _ in counts[1:]] + [last_end]
+
+    windows: list[ScanWindow] = []
+    window_start, window_end, window_count = counts[0][0], counts[0][0], 0
+    for (_, count), bucket_end in zip(counts, boundaries, strict=True):
+        if window_count and window_count + count > window_size:
+            windows.append(ScanWindow(window_start, window_end, window_count))
+            window_start, window_count = window_end, 0
+        window_count += count
+        window_end = bucket_end
+    windows.append(ScanWindow(window_start, window_end, window_count))
+    return windows
+
+
+def incremental_query(
+    q: str | None, cursor: HarvestCursor | None, until: datetime
+) -> str:
+    """Return the query limited to records updated between the cursor and until."""
+    since = (
+        opensearch_date_serialize(cursor.updated.astimezone(UTC)) if cursor else "*"
+    )
+    date_query = f"updated:[{since} TO {opensearch_date_serialize(until)}}}"
+    if q:
+        return f"({q}) AND {date_query}"
+    return date_query
+
+
+class _Done:
+    """Marker of the end of the scan in the output queue."""
+
+
+class RecordScanner:
+    """Scanner returning all records matching a query.
+
+    Usage:
+
+    ```
+    scanner = RecordScanner(records_client, q="...")
+    try:
+        async for record in scanner.records():
+            ...
+    finally:
+        await scanner.close()
+    ```
+
+    To split the scan, call plan() and pass subsets of the planned windows
+    to other scanners via the plan argument.
+    """
+
+    def __init__(
+        self,
+        client: AsyncInvenioRecordsClient,
+        *,
+        q: str | None = None,
+        model: str | None = None,
+        status: RecordStatus | None = None,
+        facets: dict[str, str] | None = None,
+        window_size: int,
+        page_size: int,
+        prefetch: int = DEFAULT_SCAN_PREFETCH,
+        concurrency: int = DEFAULT_SCAN_CONCURRENCY,
+        queue_size: int = DEFAULT_SCAN_QUEUE_SIZE,
+        histogram: str | None = DEFAULT_SCAN_HISTOGRAM,
+        plan: ScanPlan | None = None,
+        dedup: DedupStore | None = None,
+        raw: bool = False,
+    ):
+        """Initialize the scanner.
+
+        :param client:          client used for searching
+        :param q:               query string
+        :param model:           model of the records
+        :param status:          published/draft records
+        :param facets:          additional facets/url parameters of the search
+        :param window_size:     maximal number of records returned by a paginated search
+        :param page_size:       number of records on a page
+        :param prefetch:        number of pages fetched ahead within a window
+        :param concurrency:     number of date windows scanned concurrently
+        :param queue_size:      number of pages buffered for the consumer
+        :param histogram:       name of the date histogram aggregation used for planning,
+                                None to always plan by bisection
+        :param plan:            previously planned windows to scan, planned from the
+                                first search response if not set
+        :param dedup:           store of ids of returned records, records already
+                                in the store are skipped
+        :param raw:             return the records as LazyRecord (json structured into
+                                Record only on attribute access)
+        """
+        self._client = client
+        self._q = q
+        self._model = model
+        self._status = status
+        self._facets = facets
+        self._window_size = window_size
+        self._page_size = page_size
+        self._prefetch = max(1, prefetch)
+        self._concurrency = max(1, concurrency)
+        self._histogram = histogram
+        self._plan = plan
+        self._dedup = dedup
+        self._raw = raw
+        self._first_page: RecordList | None = None
+        self._output: asyncio.Queue[list[Record] | BaseException | _Done] = (
+            asyncio.Queue(maxsize=max(1, queue_size))
+        )
+        self._windows: asyncio.Queue[ScanWindow] = asyncio.Queue()
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def records(self) -> AsyncIterator[Record]:
+        """Return the scanned records."""
+        if not self._tasks:
+            self._tasks.append(asyncio.create_task(self._run()))
+        while True:
+            item = await self._output.get()
+            if isinstance(item, _Done):
+                return
+            if isinstance(item, BaseException):
+                raise item
+            for record in item:
+                if self._dedup is None or self._dedup.add(str(record.id)):
+                    yield record
+
+    async def close(self) -> None:
+        """Stop the scan and wait for the background tasks."""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks.clear()
+
+    async def _search(
+        self, q: str | None, page: int = 1, size: int | None = None, sort: str | None = None
+    ) -> RecordList:
+        facets = dict(self._facets or {})
+        if sort:
+            facets["sort"] = sort
+        return await self._client.search(
+            q=q,
+            page=page,
+            size=size or self._page_size,
+            model=self._model,
+            status=self._status,
+            facets=facets,
+            raw=self._raw,
+        )
+
+    async def plan(self) -> ScanPlan:
+        """Plan the windows of the scan.
+
+        The first page of the search is fetched and kept for the scan. Its
+        date histogram is used to plan the windows; without the histogram,
+        the range of creation dates is split into equal windows, that are
+        bisected further during the scan if needed.
+        """
+        if self._plan is None:
+            self._first_page = await self._search(self._q)
+            total = self._first_page.hits.total
+            if total <= self._window_size:
+                self._plan = ScanPlan(total=total, method="pagination")
+            elif windows := await self._histogram_windows(self._first_page, total):
+                self._plan = ScanPlan(total=total, method="histogram", windows=windows)
+            else:
+                self._plan = ScanPlan(
+                    total=total,
+                    method="bisection",
+                    windows=await self._initial_windows(),
+                )
+            log.debug(
+                "Scan of %s records planned by %s into %s windows",
+                total,
+                self._plan.method,
+                len(self._plan.windows),
+            )
+        return self._plan
+
+    async def _histogram_windows(
+        self, first_page: RecordList, total: int
+    ) -> list[ScanWindow] | None:
+        if not self._histogram or not isinstance(first_page.aggregations, dict):
+            return None
+        aggregation = first_page.aggregations.get(self._histogram)
+        if aggregation is None:
+            return None
+        newest = await self._search(self._q, size=1, sort="newest")
+        return histogram_windows(
+            aggregation,
+            total,
+            self._window_size,
+            newest.hits.hits[0].created,
+        )
+
+    async def _run(self) -> None:
+        try:
+            plan = await self.plan()
+            if not plan.windows:
+                first_page = self._first_page or await self._search(self._q)
+                await self._scan_window(self._q, first_page)
+            else:
+                # there are more records than can be paginated,
+                # so the scan is split to windows on the creation date
+                for window in plan.windows:
+                    self._windows.put_nowait(window)
+                self._tasks.extend(
+                    asyncio.create_task(self._window_worker())
+                    for _ in range(self._concurrency)
+                )
+                await self._windows.join()
+            await self._output.put(_Done())
+        except Exception as e:  # noqa: BLE001 re-raised by the consumer
+            await self._output.put(e)
+
+    async def _initial_windows(self) -> list[ScanWindow]:
+        oldest, newest = await asyncio.gather(
+            self._search(self._q, size=1, sort="oldest"),
+            self._search(self._q, size=1, sort="newest"),
+        )
+        # make sure that the dates are in UTC and that the boundaries are included
+        first_created = oldest.hits.hits[0].created.astimezone(UTC) - timedelta(
+            seconds=1
+        )
+        last_created = newest.hits.hits[0].created.astimezone(UTC) + timedelta(
+            seconds=1
+        )
+        return ScanWindow(first_created, last_created).split(
+            max(2, self._concurrency)
+        )
+
+    async def _window_worker(self) -> None:
+        try:
+            while True:
+                window = await self._windows.get()
+                try:
+                    await self._process_window(window)
+                finally:
+                    self._windows.task_done()
+        except Exception as e:  # noqa: BLE001 re-raised by the consumer
+            await self._output.put(e)
+
+    async def _process_window(self, window: ScanWindow) -> None:
+        query = window.query(self._q)
+        first_page = await self._search(query)
+        total = first_page.hits.total
+        if window.count is not None and total != window.count:
+            # records were created or removed since the plan, or the plan
+            # does not match the query - the window is handled by its real size
+            log.warning(
+                "Window %s contains %s records, %s were planned",
+                window,
+                total,
+                window.count,
+            )
+        if total > self._window_size:
+            if window.can_split:
+                for half in window.split():
+                    self._windows.put_nowait(half)
+                return
+            log.warning(
+                "Window %s contains %s records, only the first %s will be scanned",
+                window,
+                total,
+                self._window_size,
+            )
+        if total:
+            await self._scan_window(query, first_page)
+
+    async def _scan_window(self, query: str | None, first_page: RecordList) -> None:
+        """Return all pages of the window, prefetching the following pages."""
+        await self._output.put(list(first_page.hits.hits))
+
+        total = min(first_page.hits.total, self._window_size)
+        page_count = (total + self._page_size - 1) // self._page_size
+        next_page = 2
+        pending: deque[asyncio.Task[RecordList]] = deque()
+        try:
+            while next_page <= page_count or pending:
+                while next_page <= page_count and len(pending) < self._prefetch:
+                    pending.append(
+                        asyncio.create_task(self._search(query, page=next_page))
+                    )
+                    next_page += 1
+                result = await pending.popleft()
+                if not result.hits.hits:
+                    # records were removed during the scan
+                    break
+                await self._output.put(list(result.hits.hits))
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+class IncrementalHarvest:
+    """Scan of records updated since the cursor of a previous harvest.
+
+    Usage:
+
+    ```
+    harvest = IncrementalHarvest(records_client, cursor=cursor, q="...")
+    try:
+        async for record in harvest.records():
+            ...
+    finally:
+        await harvest.close()
+    if harvest.complete:
+        cursor = harvest.cursor
+    ```
+
+    Records are not returned in the order of their updates, so the cursor
+    must be persisted only after the harvest is complete.
+    """
+
+    def __init__(
+        self,
+        client: AsyncInvenioRecordsClient,
+        *,
+        cursor: HarvestCursor | None,
+        q: str | None = None,
+        margin: timedelta = DEFAULT_HARVEST_MARGIN,
+        **scanner_kwargs: Any,
+    ):
+        """Initialize the harvest.
+
+        :param client:          client used for searching
+        :param cursor:          cursor of the previous harvest, None to harvest all records
+        :param q:               query string
+        :param margin:          records updated within this time before now are not
+                                harvested, protects against clock skew and records
+                                not yet visible in the search index
+        :param scanner_kwargs:  arguments of the RecordScanner
+        """
+        self._since = cursor
+        self.cursor = cursor
+        """Position of the last harvested record."""
+        self.complete = False
+        """True if all the records have been harvested."""
+        self.until = datetime.now(UTC) - margin
+        """Records updated at this time or later are left for the next harvest."""
+        self._scanner = RecordScanner(
+            client, q=incremental_query(q, cursor, self.until), **scanner_kwargs
+        )
+
+    async def records(self) -> AsyncIterator[Record]:
+        """Return the records updated since the cursor."""
+        async for record in self._scanner.records():
+            position = HarvestCursor(
+                updated=record.updated.astimezone(UTC), id=str(record.id)
+            )
+            if self._since is not None and position <= self._since:
+                # updated at the same time as the cursor, but already harvested
+                continue
+            if self.cursor is None or position > self.cursor:
+                self.cursor = position
+            yield record
+        self.complete = True
+
+    async def close(self) -> None:
+        """Stop the harvest."""
+        await self._scanner.close()
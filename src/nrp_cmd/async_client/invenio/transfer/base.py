@@ -18,6 +18,7 @@ if TYPE_CHECKING:
     from ...connection import AsyncConnection
     from ..files import File
     from ..source import DataSource
+    from .journal import UploadJournal
 
 
 class Transfer(Protocol):
@@ -44,12 +45,23 @@ class Transfer(Protocol):
         initialized_upload: File,
         source: DataSource,
         progress_bar: ProgressBar,
+        journal: UploadJournal | None = None,
     ) -> None:
         """Upload the file.
 
         :param connection:              connection to the repository
         :param initialized_upload:      initialized upload as returned from the repository
         :param file:                    file to be uploaded
+        :param journal:                 journal of an interrupted upload that is being
+                                        resumed, transfers that can not be resumed ignore it
+        """
+        ...
+
+    async def checksums(self) -> dict[str, str]:
+        """Return checksums of the uploaded file computed while it was being sent.
+
+        :return:                        hex digests keyed by the algorithm name,
+                                        empty if the transfer does not compute them
         """
         ...
 
@@ -9,14 +9,21 @@
 
 from __future__ import annotations
 
-from asyncio import TaskGroup
 from typing import TYPE_CHECKING
 
 from yarl import URL
 
 from ...connection.aws_limits import adjust_upload_multipart_params
+from ...streams.file import FileSource
 from ...streams.progress import ProgressSource
 from . import Transfer
+from .journal import UploadedPart
+from .scheduler import (
+    DEFAULT_UPLOAD_WINDOW,
+    PartScheduler,
+    UploadPart,
+    plan_upload_parts,
+)
 
 if TYPE_CHECKING:
     from yarl import URL
@@ -25,6 +32,7 @@ if TYPE_CHECKING:
     from ....types.files import File, MultipartUploadLinks
     from ...connection import AsyncConnection
     from ...streams import DataSource
+    from .journal import UploadJournal
 
 
 class MultipartTransfer(Transfer):
@@ -33,8 +41,23 @@ class MultipartTransfer(Transfer):
     This transfer copies a local file to the repository.
     The file will be stored in repository's primary storage (thus local)
     and the upload will be handled solely through the repository.
+
+    Parts are uploaded by `PartScheduler`, at most `window` of them at a time.
+    Parts of local files are sent via `put_file`, without reading them
+    into python where the connection allows it.
     """
 
+    def __init__(
+        self, window: int = DEFAULT_UPLOAD_WINDOW, use_sendfile: bool = True
+    ):
+        """Initialize the transfer.
+
+        :param window:          maximal number of parts uploaded simultaneously
+        :param use_sendfile:    send parts of local files with put_file
+        """
+        self.window = window
+        self.use_sendfile = use_sendfile
+
     async def prepare(
         self,
         connection: AsyncConnection,
@@ -62,8 +85,13 @@ class MultipartTransfer(Transfer):
         initialized_upload: File,
         source: DataSource,
         progress_bar: ProgressBar,
+        journal: UploadJournal | None = None,
     ) -> None:
-        """Upload the file."""
+        """Upload the file.
+
+        If a journal is passed, parts recorded in it are skipped and every newly
+        uploaded part is recorded, so that the upload can be resumed again.
+        """
         links: list[MultipartUploadLinks] = initialized_upload.links.parts or []
         assert links
 
@@ -71,29 +99,74 @@ class MultipartTransfer(Transfer):
         part_size: int = initialized_upload.transfer.part_size
 
         size = initialized_upload.size
+        assert size is not None, "multipart upload needs the size of the file"
         progress_bar.set_total(size)
 
-        async def put_stream(pt: int, start: int, count: int):
+        async def upload_part(part: UploadPart) -> None:
             headers: dict[str, str] = {
-                "Content-Length": str(count),
+                "Content-Length": str(part.size),
                 "Content-Type": "application/octet-stream",
             }
             if "md5" in source.supported_checksums():
                 headers["Content-MD5"] = await source.checksum(
-                    "md5", offset=start, count=count
+                    "md5", offset=part.offset, count=part.size
+                )
+            # subclasses (MappedFileSource) read the file their own way, so only
+            # plain FileSource is sent via sendfile
+            if self.use_sendfile and type(source) is FileSource:
+                response = await connection.put_file(
+                    url=links[part.index].url,
+                    file_name=source.file_name,
+                    offset=part.offset,
+                    count=part.size,
+                    progress_bar=progress_bar,
+                    headers=headers,
                 )
-            return await connection.put_stream(
-                url=links[pt].url,
-                source=ProgressSource(source, progress_bar),
-                open_kwargs={"offset": start, "count": count},
-                headers=headers,
-            )
-
-        async with TaskGroup() as tg:
-            for pt in range(number_of_parts):
-                start = pt * part_size
-                count = min(part_size, size - start)
-                tg.create_task(put_stream(pt, start, count))
+            else:
+                response = await connection.put_stream(
+                    url=links[part.index].url,
+                    # each part has its own progress source so that a retry of
+                    # the part rolls back only the progress of that part
+                    source=ProgressSource(source, progress_bar),
+                    open_kwargs={"offset": part.offset, "count": part.size},
+                    headers=headers,
+                )
+            # put_stream and put_file raise on error responses, so a part
+            # that the storage did not accept is never recorded
+            if journal is not None:
+                journal.record(
+                    UploadedPart(
+                        index=part.index,
+                        size=part.size,
+                        etag=response.headers.get("ETag"),
+                        checksum=(
+                            f"md5:{headers['Content-MD5']}"
+                            if "Content-MD5" in headers
+                            else None
+                        ),
+                    )
+                )
+
+        # put_stream retries transport errors itself, the scheduler additionally
+        # restarts the whole part (re-reading it and computing its checksum again)
+        scheduler = PartScheduler(
+            window=self.window, retry_after_seconds=connection.retry_after_seconds
+        )
+        parts = plan_upload_parts(size, part_size, number_of_parts)
+        if journal is not None:
+            # skip the already uploaded parts, they count as done in the progress
+            for uploaded_part in journal.completed.values():
+                progress_bar.increment(uploaded_part.size)
+            parts = (part for part in parts if not journal.is_completed(part.index))
+        await scheduler.run(parts, upload_part)
+
+    async def checksums(self) -> dict[str, str]:
+        """Return checksums of the uploaded file.
+
+        Parts are uploaded concurrently and out of order, so the checksum
+        of the whole file can not be computed while it is being sent.
+        """
+        return {}
 
     async def get_commit_payload(self, initialized_upload: File) -> dict:
         """Get payload for finalization of the successful upload."""
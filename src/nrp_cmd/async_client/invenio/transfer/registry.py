@@ -9,7 +9,7 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from ....types.files import TRANSFER_TYPE_LOCAL, TRANSFER_TYPE_MULTIPART
 
@@ -32,13 +32,14 @@ class TransferRegistry:
         """
         self.transfers[transfer_type] = transfer
 
-    def get(self, transfer_type: str) -> Transfer:
+    def get(self, transfer_type: str, **options: Any) -> Transfer:
         """Get a transfer for a transfer type.
 
         :param transfer_type:       transfer type
+        :param options:             keyword arguments of the transfer's constructor
         :return:                    instance of a transfer
         """
-        return self.transfers[transfer_type]()
+        return self.transfers[transfer_type](**options)
 
 
 transfer_registry = TransferRegistry()
@@ -0,0 +1,136 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Scheduler of multipart upload parts.
+
+The scheduler keeps at most `window` parts in flight. Parts are started strictly
+in their order, so that the beginning of the file is uploaded first and the
+number of simultaneously opened part streams (and thus the memory used by them)
+is bounded by window × part_size regardless of the number of parts.
+
+A failed part is retried on its own, without restarting the rest of the transfer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+from attrs import define
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterable, Iterator
+
+log = logging.getLogger("invenio_nrp.async_client.invenio.transfer.scheduler")
+
+DEFAULT_UPLOAD_WINDOW = 8
+"""Default number of parts that are uploaded simultaneously."""
+
+
+@define(kw_only=True, frozen=True)
+class UploadPart:
+    """A single part of a multipart upload."""
+
+    index: int
+    """Index of the part, starting from 0."""
+
+    offset: int
+    """Offset of the part within the uploaded file."""
+
+    size: int
+    """Size of the part in bytes."""
+
+
+def plan_upload_parts(
+    size: int, part_size: int, number_of_parts: int
+) -> Iterator[UploadPart]:
+    """Generate the parts of a multipart upload in their natural order.
+
+    :param size:            size of the uploaded file
+    :param part_size:       size of a single part (the last one might be smaller)
+    :param number_of_parts: number of parts
+    """
+    for index in range(number_of_parts):
+        offset = index * part_size
+        yield UploadPart(index=index, offset=offset, size=min(part_size, size - offset))
+
+
+class PartScheduler:
+    """Upload parts with a bounded number of parts in flight."""
+
+    def __init__(
+        self,
+        window: int = DEFAULT_UPLOAD_WINDOW,
+        retry_count: int = 3,
+        retry_after_seconds: float = 1,
+    ):
+        """Initialize the scheduler.
+
+        :param window:              maximal number of parts in flight
+        :param retry_count:         how many times a single part is attempted
+        :param retry_after_seconds: base interval between attempts, grows linearly
+        """
+        self.window = max(1, window)
+        self.retry_count = max(1, retry_count)
+        self.retry_after_seconds = retry_after_seconds
+
+    async def run[T](
+        self,
+        parts: Iterable[UploadPart],
+        upload_part: Callable[[UploadPart], Awaitable[T]],
+    ) -> dict[int, T]:
+        """Upload all the parts.
+
+        :param parts:       parts to upload, in the order in which they should be started
+        :param upload_part: coroutine function uploading a single part
+        :return:            results of upload_part, keyed by the part index
+        :raises Exception:  the last error of a part that failed all its attempts,
+                            parts in flight are cancelled in that case
+        """
+        results: dict[int, T] = {}
+        in_flight: dict[asyncio.Task[T], UploadPart] = {}
+        pending = iter(parts)
+        try:
+            while True:
+                while len(in_flight) < self.window:
+                    part = next(pending, None)
+                    if part is None:
+                        break
+                    task = asyncio.create_task(self._upload_with_retry(part, upload_part))
+                    in_flight[task] = part
+                if not in_flight:
+                    return results
+                done, _ = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    part = in_flight.pop(task)
+                    results[part.index] = task.result()
+        finally:
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+
+    async def _upload_with_retry[T](
+        self, part: UploadPart, upload_part: Callable[[UploadPart], Awaitable[T]]
+    ) -> T:
+        for attempt in range(1, self.retry_count):
+            try:
+                return await upload_part(part)
+            except Exception as e:  # noqa: BLE001 any failure of the part is retried
+                log.warning(
+                    "Upload of part %s failed (attempt %s of %s), retrying: %s",
+                    part.index + 1,
+                    attempt,
+                    self.retry_count,
+                    str(e)[:80],
+                )
+                await asyncio.sleep(self.retry_after_seconds * attempt)
+        # the last attempt propagates its error
+        return await upload_part(part)
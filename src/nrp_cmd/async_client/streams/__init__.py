@@ -7,14 +7,24 @@
 #
 """Data sources and sinks."""
 
-from .base import DataSink, DataSource, InputStream, OutputStream, SinkState
+from .base import (
+    DataSink,
+    DataSource,
+    InputStream,
+    OutputStream,
+    ResumableDataSink,
+    SinkState,
+)
 from .file import FileSink, FileSource
+from .hashing import HashingInputStream, HashingSource
+from .mapped_file import MappedFileSink, MappedFileSource
 from .memory import MemorySink, MemorySource
 from .stdin import StdInDataSource
 
 __all__ = (
     "DataSink",
     "DataSource",
+    "ResumableDataSink",
     "SinkState",
     "InputStream",
     "OutputStream",
@@ -22,5 +32,9 @@ __all__ = (
     "MemorySource",
     "FileSink",
     "FileSource",
+    "HashingInputStream",
+    "HashingSource",
+    "MappedFileSink",
+    "MappedFileSource",
     "StdInDataSource",
 )
@@ -0,0 +1,150 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Data source computing checksums of the data while they are being read."""
+
+from __future__ import annotations
+
+import hashlib
+from collections.abc import AsyncIterator
+from typing import TYPE_CHECKING, Any, override
+
+from .base import DataSource, InputStream
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+class HashingIterator(AsyncIterator[bytes]):
+    """Iterator updating the checksums with every returned chunk."""
+
+    def __init__(self, iterator: AsyncIterator[bytes], stream: HashingInputStream):
+        """Initialize the iterator."""
+        self._iterator = iterator
+        self._stream = stream
+
+    @override
+    async def __anext__(self) -> bytes:
+        data = await anext(self._iterator)
+        self._stream.update(data)
+        return data
+
+
+class HashingInputStream(InputStream):
+    """Input stream updating a set of hashers with the data that pass through it."""
+
+    def __init__(self, stream: InputStream, hashers: Iterable[Any]):
+        """Initialize the input stream.
+
+        :param stream:  the wrapped stream
+        :param hashers: hashlib objects that will be updated with the read data
+        """
+        self._stream = stream
+        self._hashers = list(hashers)
+        self.bytes_read = 0
+
+    def update(self, data: bytes) -> None:
+        """Feed the data to the hashers."""
+        for hasher in self._hashers:
+            hasher.update(data)
+        self.bytes_read += len(data)
+
+    @override
+    async def read(self, n: int = -1) -> bytes:
+        data = await self._stream.read(n)
+        self.update(data)
+        return data
+
+    @override
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return HashingIterator(aiter(self._stream), self)
+
+    @override
+    def __len__(self) -> int:
+        return len(self._stream)
+
+    @override
+    async def close(self) -> None:
+        return await self._stream.close()
+
+
+class HashingSource(DataSource):
+    """Data source computing checksums of the content in the same pass as it is sent.
+
+    Every `open` starts the checksums from scratch, so a retried upload does not
+    mix the data of the failed and the successful attempt. The checksums are
+    available via `digests` after the whole content has been read.
+    """
+
+    def __init__(self, source: DataSource, algorithms: Iterable[str] = ("md5",)):
+        """Create the data source.
+
+        :param source:      the wrapped data source
+        :param algorithms:  names of hashlib algorithms to compute
+        """
+        self._source = source
+        self._algorithms = tuple(algorithms)
+        self._hashers: dict[str, Any] = {}
+        self._stream: HashingInputStream | None = None
+        self._complete_read = False
+
+    @property
+    def has_range_support(self) -> bool:
+        """Return whether the source supports range requests."""
+        return self._source.has_range_support
+
+    @has_range_support.setter
+    def has_range_support(self, value: bool) -> None:
+        """Set whether the source supports range requests."""
+        raise AttributeError("Cannot set has_range_support on HashingSource")
+
+    @override
+    async def open(self, offset: int = 0, count: int | None = None) -> InputStream:
+        self._hashers = {algo: hashlib.new(algo) for algo in self._algorithms}
+        # only a read of the whole content gives checksums of the file
+        self._complete_read = offset == 0 and count is None
+        self._stream = HashingInputStream(
+            await self._source.open(offset, count), self._hashers.values()
+        )
+        return self._stream
+
+    async def digests(self) -> dict[str, str]:
+        """Return hex digests of the content keyed by the algorithm name.
+
+        :return: the digests or an empty dictionary if the last opened stream
+                 did not read the whole content
+        """
+        if (
+            self._stream is None
+            or not self._complete_read
+            or self._stream.bytes_read != await self._source.size()
+        ):
+            return {}
+        return {algo: hasher.hexdigest() for algo, hasher in self._hashers.items()}
+
+    @override
+    async def size(self) -> int:
+        return await self._source.size()
+
+    @override
+    async def content_type(self) -> str:
+        return await self._source.content_type()
+
+    @override
+    async def close(self) -> None:
+        return await self._source.close()
+
+    @override
+    async def checksum(
+        self, algo: str = "md5", offset: int = 0, count: int | None = None
+    ) -> str:
+        return await self._source.checksum(algo, offset, count)
+
+    @override
+    def supported_checksums(self) -> list[str]:
+        """Return a list of supported checksum algorithms."""
+        return self._source.supported_checksums()
@@ -0,0 +1,236 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Memory-mapped file sources and sinks.
+
+Instead of reading the file into intermediate buffers, the source hands out
+memoryview slices of a read-only mapping of the file that the http layer sends
+directly. The sink maps the whole allocated file once and all chunks (parts
+of a multipart download) write into the shared mapping, without reopening
+the file for each part.
+
+Page faults on the mapping are served synchronously, so these are best suited
+for large files on local disks. On network filesystems, the aiofile based
+FileSource and FileSink are the safer choice.
+"""
+
+import contextlib
+import mmap
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import BinaryIO, override
+
+from .base import InputStream, OutputStream, SinkState
+from .file import FileSink, FileSource
+from .os import open_raw_file
+
+MAPPED_CHUNK_SIZE = 1024 * 1024
+"""Size of memoryview slices returned when iterating a mapped stream."""
+
+
+def _close_mapping(mapping: mmap.mmap | None) -> None:
+    """Close the mapping if no memoryview of it is alive.
+
+    The http layer might still hold slices handed out by the stream (for example
+    in a transport buffer), in that case the mapping is closed when the last
+    of them is garbage collected.
+    """
+    if mapping is not None:
+        with contextlib.suppress(BufferError):
+            mapping.close()
+
+
+class MappedInputStream(InputStream):
+    """Input stream returning memoryview slices of a mapped file."""
+
+    def __init__(
+        self,
+        mapping: mmap.mmap | None,
+        offset: int,
+        count: int,
+        chunk_size: int = MAPPED_CHUNK_SIZE,
+    ):
+        """Initialize the stream.
+
+        :param mapping:     read-only mapping of the whole file, None for an empty file
+        :param offset:      offset of the first returned byte
+        :param count:       number of bytes to return
+        :param chunk_size:  size of the slices returned by iteration
+        """
+        self._mapping = mapping
+        self._view = (
+            memoryview(mapping)[offset : offset + count]
+            if mapping is not None
+            else memoryview(b"")
+        )
+        self._position = 0
+        self._chunk_size = chunk_size
+
+    @override
+    async def read(self, n: int = -1) -> memoryview:  # type: ignore[override]
+        """Return a memoryview of up to n next bytes, without copying them."""
+        end = len(self._view) if n < 0 else min(len(self._view), self._position + n)
+        ret = self._view[self._position : end]
+        self._position = end
+        return ret
+
+    @override
+    def __aiter__(self) -> AsyncIterator[memoryview]:  # type: ignore[override]
+        return self
+
+    async def __anext__(self) -> memoryview:
+        """Return the next slice of the mapping."""
+        ret = await self.read(self._chunk_size)
+        if not ret:
+            raise StopAsyncIteration()
+        return ret
+
+    @override
+    def __len__(self) -> int:
+        return len(self._view) - self._position
+
+    @override
+    async def close(self) -> None:
+        self._view.release()
+        _close_mapping(self._mapping)
+        self._mapping = None
+
+
+class MappedFileSource(FileSource):
+    """File source that sends the file from a memory mapping."""
+
+    def __init__(self, file_name: Path | str, chunk_size: int = MAPPED_CHUNK_SIZE):
+        """Initialize the data source.
+
+        :param file_name:   the name of the file to read from, must exist on the filesystem
+        :param chunk_size:  size of the slices handed to the http layer
+        """
+        super().__init__(file_name)
+        self._chunk_size = chunk_size
+
+    @override
+    async def open(self, offset: int = 0, count: int | None = None) -> InputStream:  # type: ignore
+        """Map the file and return a stream over the requested range."""
+        size = await self.size()
+        if count is None:
+            count = size - offset
+        mapping: mmap.mmap | None = None
+        if size:
+            f = await open_raw_file(self._file_name, "rb")
+            try:
+                # the mapping keeps its own reference to the file
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            finally:
+                f.close()
+            if hasattr(mapping, "madvise"):
+                mapping.madvise(mmap.MADV_SEQUENTIAL)
+        return MappedInputStream(mapping, offset, count, self._chunk_size)
+
+
+class MappedOutputStream(OutputStream):
+    """Output stream writing into a shared mapping of the sink's file."""
+
+    def __init__(self, sink: "MappedFileSink", offset: int):
+        """Initialize the stream."""
+        self._sink = sink
+        self._position = offset
+
+    @override
+    async def write(self, data: bytes) -> int:
+        """Copy the data into the mapping."""
+        if not data:
+            return 0
+        mapping = self._sink.mapping
+        end = self._position + len(data)
+        if end > len(mapping):
+            raise OSError(
+                f"Write past the end of the allocated file ({end} > {len(mapping)})"
+            )
+        mapping[self._position : end] = data
+        self._position = end
+        return len(data)
+
+    @override
+    async def close(self) -> None:
+        pass
+
+
+class MappedFileSink(FileSink):
+    """File sink writing the received data into a memory mapping of the file.
+
+    The file is mapped when the sink is allocated with a known size. If the size
+    is not known in advance (or the file is empty), there is nothing to map and
+    the data are written as by FileSink. Resuming interrupted downloads works
+    as with FileSink.
+    """
+
+    def __init__(self, fpath: Path, resumable: bool = False):
+        """Initialize the sink.
+
+        :param fpath: The path to the file where the data will be written.
+        :param resumable: Keep a journal of downloaded ranges, see FileSink.
+        """
+        super().__init__(fpath, resumable=resumable)
+        self._mapped_file: BinaryIO | None = None
+        self._mapping: mmap.mmap | None = None
+
+    @property
+    def mapping(self) -> mmap.mmap:
+        """The mapping of the allocated file."""
+        if self._mapping is None:
+            raise RuntimeError("Sink not allocated or empty")
+        return self._mapping
+
+    @override
+    async def allocate(self, size: int) -> None:
+        """Create the file with the given size and map it."""
+        self._mapped_file = await open_raw_file(self._data_path, "w+b")
+        self._mapped_file.truncate(size)
+        self._map()
+        self._state = SinkState.ALLOCATED
+
+    @override
+    async def resume(
+        self, size: int | None, etag: str | None
+    ) -> list[tuple[int, int]]:
+        """Allocate the sink, reusing data from a previous interrupted download."""
+        ranges = await super().resume(size, etag)
+        if self._mapped_file is None:
+            # previous data are reused, FileSink has opened them via aiofile
+            await super().close()
+            self._mapped_file = await open_raw_file(self._data_path, "r+b")
+            self._map()
+            self._state = SinkState.ALLOCATED
+        return ranges
+
+    def _map(self) -> None:
+        assert self._mapped_file is not None
+        self._mapped_file.seek(0, 2)
+        if self._mapped_file.tell():
+            self._mapping = mmap.mmap(self._mapped_file.fileno(), 0)
+
+    @override
+    async def open_chunk(self, offset: int = 0) -> OutputStream:  # type: ignore
+        """Return a writer into the shared mapping."""
+        if self._state != SinkState.ALLOCATED:
+            raise RuntimeError("Sink not allocated")
+        if self._mapping is None:
+            # unknown size, the file grows as the data are written
+            return await super().open_chunk(offset)
+        return MappedOutputStream(self, offset)
+
+    @override
+    async def close(self) -> None:
+        """Flush the mapping and close the file."""
+        if self._mapping is not None:
+            self._mapping.flush()
+            _close_mapping(self._mapping)
+            self._mapping = None
+        if self._mapped_file is not None:
+            self._mapped_file.close()
+            self._mapped_file = None
+        await super().close()
@@ -11,8 +11,9 @@ import asyncio
 import base64
 import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Literal, cast, overload
+from typing import BinaryIO, Literal, cast, overload
 
 import aiofile
 
@@ -54,26 +55,41 @@ async def open_file(
     return r
 
 
+async def open_raw_file(_fpath: Path, mode: Literal["rb", "w+b", "r+b"]) -> BinaryIO:
+    """Open a plain (unbuffered by aiofile) file, for example to map it into memory."""
+    return cast("BinaryIO", await asyncio.to_thread(open, _fpath, mode))
+
+
 async def file_stat(_fpath: Path) -> os.stat_result:
     """Get file statistics."""
     # aiofile does not provide async stat, so we run a synchronous one
     return os.stat(_fpath)
 
 
-# limit checksum calculations to avoid CPU overload
-# using number of CPUs - 1
-checksum_limiter = asyncio.Semaphore(min(1, (os.cpu_count() or 1) - 1))
+# checksums are calculated in a dedicated pool of threads (hashlib releases the GIL),
+# using number of CPUs - 1 so that one CPU is left for the event loop
+checksum_pool_size = max(1, (os.cpu_count() or 1) - 1)
+_checksum_executor: ThreadPoolExecutor | None = None
+
+
+def checksum_executor() -> ThreadPoolExecutor:
+    """Return the thread pool used for checksum calculations."""
+    global _checksum_executor
+    if _checksum_executor is None:
+        _checksum_executor = ThreadPoolExecutor(
+            max_workers=checksum_pool_size, thread_name_prefix="checksum"
+        )
+    return _checksum_executor
 
 
 async def checksum_file(
     file_name: Path, algo: str = "md5", offset: int = 0, count: int | None = None
 ) -> str:
     """Calculate the checksum of the file."""
-    async with checksum_limiter:
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            None, _checksum, file_name, algo, offset, count
-        )
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        checksum_executor(), _checksum, file_name, algo, offset, count
+    )
 
 
 def _checksum(file_name: Path, algo: str, offset: int, count: int | None) -> str:
@@ -107,6 +123,7 @@ def get_filesystem_block_size(file_path: Path) -> int:
 
 __all__ = (
     "open_file",
+    "open_raw_file",
     "file_stat",
     "FileInputStream",
     "FileOutputStream",
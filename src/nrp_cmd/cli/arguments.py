@@ -11,6 +11,7 @@ import rich_click as click
 import yaml
 from click.exceptions import Exit
 
+from nrp_cmd.columnar import COLUMN_TYPES, parse_columns
 from nrp_cmd.config import Config
 from nrp_cmd.errors import RepositoryClientError, RepositoryError, RepositoryJSONError
 
@@ -39,6 +40,8 @@ class OutputFormat(enum.Enum):
     JSON_LINES = "jsonl"
     YAML = "yaml"
     TABLE = "table"
+    PARQUET = "parquet"
+    """Columnar output of record listings, see with_output(columnar=True)."""
 
     def __str__(self):
         """Return the value of the enum."""
@@ -84,6 +87,8 @@ class Output:
     progress: bool = False
     output: Path | None = None
     output_format: OutputFormat | None = None
+    columns: dict[str, str | None] | None = None
+    """Columns of the parquet output, None for the default columns."""
 
 
 @overload
@@ -168,52 +173,102 @@ def with_setvar(func: ClickCommand) -> ClickCommand:
     return wrapper
 
 
-def with_output(func: ClickCommand) -> ClickCommand:
-    """Add output options to a command."""
+@overload
+def with_output(
+    func: None = None,
+    *,
+    columnar: bool = False,
+) -> Callable[[ClickCommand], ClickCommand]: ...
 
-    @click.option(
-        "-o",
-        "--output",
-        help="Save the output to a file",
-        type=click.Path(),
-    )
-    @click.option(
-        "-f",
-        "--output-format",
-        help="The format of the output",
-        type=click.Choice([str(f) for f in OutputFormat]),
-    )
-    @functools.wraps(func)
-    def wrapper(
-        output: Path | None = None,
-        output_format: OutputFormat | None = None,
-        **kwargs: Any,
-    ) -> None:
-        out = kwargs.pop("out", None) or Output()
-        out.output = Path(output) if output else None
-        # if output_format is None, try to guess it from the output file extension
-        # and fallback to TABLE if output is not specified. Fallback to json if
-        # output file extension is not recognized.
-        if output_format is None:
-            if out.output is not None:
-                ext = out.output.suffix.lower()
-                match ext:
-                    case ".json":
-                        out.output_format = OutputFormat.JSON
-                    case ".jsonl":
-                        out.output_format = OutputFormat.JSON_LINES
-                    case ".yaml" | ".yml":
-                        out.output_format = OutputFormat.YAML
-                    case _:
-                        out.output_format = OutputFormat.JSON
+
+@overload
+def with_output(
+    func: ClickCommand,
+    *,
+    columnar: bool = False,
+) -> ClickCommand: ...
+
+
+def with_output(
+    func: ClickCommand | None = None,
+    *,
+    columnar: bool = False,
+) -> Callable[[ClickCommand], ClickCommand] | ClickCommand:
+    """Add output options to a command.
+
+    :param columnar: the command outputs a list of records and supports
+                     the parquet output format and the --column option
+    """
+    formats = [str(f) for f in OutputFormat if columnar or f != OutputFormat.PARQUET]
+
+    def decorator(func: ClickCommand) -> ClickCommand:
+        @click.option(
+            "-o",
+            "--output",
+            help="Save the output to a file",
+            type=click.Path(),
+        )
+        @click.option(
+            "-f",
+            "--output-format",
+            help="The format of the output",
+            type=click.Choice(formats),
+        )
+        @functools.wraps(func)
+        def wrapper(
+            output: Path | None = None,
+            output_format: OutputFormat | None = None,
+            column: tuple[str, ...] = (),
+            **kwargs: Any,
+        ) -> None:
+            out = kwargs.pop("out", None) or Output()
+            out.output = Path(output) if output else None
+            # if output_format is None, try to guess it from the output file
+            # extension and fallback to TABLE if output is not specified. Fallback
+            # to json if output file extension is not recognized. Compression
+            # extension (.gz, .zst) is skipped.
+            if output_format is None:
+                if out.output is not None:
+                    ext = out.output.suffix.lower()
+                    if ext in (".gz", ".zst"):
+                        ext = Path(out.output.stem).suffix.lower()
+                    match ext:
+                        case ".json":
+                            out.output_format = OutputFormat.JSON
+                        case ".jsonl":
+                            out.output_format = OutputFormat.JSON_LINES
+                        case ".yaml" | ".yml":
+                            out.output_format = OutputFormat.YAML
+                        case ".parquet" if columnar:
+                            out.output_format = OutputFormat.PARQUET
+                        case _:
+                            out.output_format = OutputFormat.JSON
+                else:
+                    out.output_format = OutputFormat.TABLE
             else:
-                out.output_format = OutputFormat.TABLE
-        else:
-            out.output_format = OutputFormat(output_format)
-        func(out=out, **kwargs)
+                out.output_format = OutputFormat(output_format)
+            if column:
+                try:
+                    out.columns = parse_columns(column)
+                except ValueError as e:
+                    raise click.BadParameter(str(e), param_hint="--column") from e
+            func(out=out, **kwargs)
 
-    wrapper.__name__ += "_with_output"
-    return wrapper
+        if columnar:
+            wrapper = click.option(
+                "--column",
+                multiple=True,
+                help="Column of the parquet output as a dotted path into the record "
+                "(e.g. metadata.title), optionally with a type "
+                f"({', '.join(COLUMN_TYPES)}) after a colon",
+            )(wrapper)
+
+        wrapper.__name__ += "_with_output"
+        return wrapper
+
+    if func is None:
+        return decorator
+    return decorator(func)
 
 
 def with_progress(func: ClickCommand) -> ClickCommand:
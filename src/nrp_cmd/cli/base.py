@@ -18,6 +18,7 @@ import yaml
 from rich.console import Console
 from rich.table import Table
 
+from nrp_cmd import json_codec
 from nrp_cmd.config import Config
 from nrp_cmd.converter import converter
 
@@ -46,9 +47,7 @@ def format_output(output_format: OutputFormat, data: Any) -> str:  # noqa: ANN40
         case OutputFormat.JSON:
             return json.dumps(data, indent=4)
         case OutputFormat.JSON_LINES:
-            return json.dumps(
-                data, ensure_ascii=False, separators=(",", ":"), indent=None
-            ).replace("\n", "\\n")
+            return json_codec.dumps_str(data)
         case OutputFormat.YAML:
             return yaml.safe_dump(data)
         case _:
@@ -99,10 +98,22 @@ def async_command(func: Any) -> Callable[..., None]:
 
     import uvloop
 
+    from nrp_cmd.async_client.connection import close_pooled_connections
+    from nrp_cmd.cli.clients import shared_clients
+
+    async def run_and_close(*args: Any, **kwargs: Any) -> None:
+        try:
+            # all records processed by the command share the repository clients
+            async with shared_clients():
+                await func(*args, **kwargs)
+        finally:
+            # release keep-alive connections before the event loop goes away
+            await close_pooled_connections()
+
     @functools.wraps(func)
     def runner(*args: Any, **kwargs: Any):
         with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
-            runner.run(func(*args, **kwargs))
+            runner.run(run_and_close(*args, **kwargs))
 
     return runner
 
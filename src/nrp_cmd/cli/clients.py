@@ -0,0 +1,125 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Repository clients shared by all the records processed by a command.
+
+Commands working on many record ids (get, download, update, delete, ...)
+resolve the repository of each record id and need a client for it. Creating
+a client per record id means a new http connection pool, a new discovery
+lookup and a new repository info object for each record, which for
+thousands of ids costs more than the records themselves.
+
+async_command opens a ClientRegistry for each invocation of a command.
+The registry creates at most one client per repository, concurrent
+requests for the same repository wait for the same client, and closes
+the clients when the command finishes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from contextvars import ContextVar
+from typing import TYPE_CHECKING
+
+from nrp_cmd.async_client import get_async_client
+from nrp_cmd.async_client.connection import AsyncConnection
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+    from nrp_cmd.async_client import AsyncRepositoryClient
+    from nrp_cmd.config import Config, RepositoryConfig
+
+
+class ClientRegistry:
+    """Clients of the repositories used by a command, keyed by the repository."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._clients: dict[tuple[str, str], asyncio.Task[AsyncRepositoryClient]] = {}
+        self._connection: AsyncConnection | None = None
+
+    @property
+    def connection(self) -> AsyncConnection:
+        """Connection used to resolve record ids (dois, html urls) to repositories."""
+        if self._connection is None:
+            self._connection = AsyncConnection()
+        return self._connection
+
+    async def get_client(
+        self, repository_config: RepositoryConfig, config: Config
+    ) -> AsyncRepositoryClient:
+        """Return the client for the repository, creating it on the first call.
+
+        :param repository_config:   configuration of the repository
+        :param config:              configuration used to discover the client
+        """
+        key = (repository_config.alias, str(repository_config.url))
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = asyncio.create_task(
+                get_async_client(repository_config, config=config)
+            )
+
+            def forget(task: asyncio.Task[AsyncRepositoryClient]) -> None:
+                # a failed client is not kept, the next record tries again
+                failed = task.cancelled() or task.exception() is not None
+                if failed and self._clients.get(key) is task:
+                    del self._clients[key]
+
+            client.add_done_callback(forget)
+        # a cancelled caller must not cancel the client shared with other records
+        return await asyncio.shield(client)
+
+    async def close(self) -> None:
+        """Close all the clients and the connection."""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            try:
+                with contextlib.suppress(Exception):
+                    await (await client).close()
+            except asyncio.CancelledError:
+                # a client whose creation was cancelled has nothing to close,
+                # but the cancellation of close itself is propagated
+                if not client.cancelled():
+                    raise
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+current_clients: ContextVar[ClientRegistry | None] = ContextVar(
+    "current_clients", default=None
+)
+"""Registry of the running command."""
+
+
+def client_registry() -> ClientRegistry:
+    """Return the registry of the running command.
+
+    The clients are returned to the callers, so only the shared_clients block
+    knows when they can be closed - there is no registry outside of it.
+    """
+    registry = current_clients.get()
+    if registry is None:
+        raise RuntimeError(
+            "Repository clients are available only inside a shared_clients() block"
+        )
+    return registry
+
+
+@contextlib.asynccontextmanager
+async def shared_clients() -> AsyncIterator[ClientRegistry]:
+    """Share the repository clients within the block, closing them at its end."""
+    registry = ClientRegistry()
+    token = current_clients.set(registry)
+    try:
+        yield registry
+    finally:
+        current_clients.reset(token)
+        await registry.close()
@@ -9,7 +9,7 @@
 
 from rich.console import Console
 
-from nrp_cmd.async_client import limit_connections
+from nrp_cmd.async_client import adaptive_limit_connections
 from nrp_cmd.cli.base import async_command
 from nrp_cmd.cli.records.get import read_record
 from nrp_cmd.config import Config
@@ -47,7 +47,7 @@ async def delete_file(
     """Delete a file in a record."""
     console = Console()
 
-    with limit_connections(10):
+    with adaptive_limit_connections():
         (
             record,
             record_id_url,
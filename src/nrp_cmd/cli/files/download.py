@@ -13,9 +13,10 @@ from asyncio import Task, TaskGroup
 from pathlib import Path
 from typing import Any
 
+import rich_click as click
 from rich.console import Console
 
-from nrp_cmd.async_client.streams import FileSink
+from nrp_cmd.async_client.streams import FileSink, MappedFileSink
 from nrp_cmd.cli.base import OutputFormat, async_command
 from nrp_cmd.cli.records.get import read_record
 from nrp_cmd.cli.records.record_file_name import create_output_file_name
@@ -47,6 +48,12 @@ from ..arguments import (
 @with_model
 @argument_with_help("record_id", type=str, help="Record ID")
 @argument_with_help("keys", type=str, nargs=-1, help="File key")
+@click.option(
+    "--mmap/--no-mmap",
+    "use_mmap",
+    default=False,
+    help="Memory-map the local files instead of reading them in small chunks",
+)
 @async_command
 async def download_files(
     *,
@@ -57,6 +64,7 @@ async def download_files(
     output: Path | None = None,
     model: Model,
     out: Output,
+    use_mmap: bool = False,
 ) -> None:
     """Download files from a record."""
     output = output or Path.cwd()
@@ -74,6 +82,7 @@ async def download_files(
             model.published,
             model.draft,
             verbosity=out.verbosity,
+            use_mmap=use_mmap,
         )
 
 
@@ -88,6 +97,7 @@ async def download_single_record_files(
     published: bool,
     draft: bool,
     verbosity: VerboseLevel,
+    use_mmap: bool = False,
 ):
     (
         record,
@@ -111,6 +121,7 @@ async def download_single_record_files(
             )
             return False
 
+    sink_class = MappedFileSink if use_mmap else FileSink
     tasks: list[tuple[str, Any, Task[Any]]] = []
     async with TaskGroup() as tg:
         for key in keys:
@@ -148,7 +159,9 @@ async def download_single_record_files(
                     file_output,
                     tg.create_task(
                         file_client.download(
-                            file_, FileSink(file_output), progress=file_.key
+                            file_,
+                            sink_class(file_output, resumable=True),
+                            progress=file_.key,
                         )
                     ),
                 )
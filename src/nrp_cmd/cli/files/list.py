@@ -13,7 +13,7 @@ from pathlib import Path
 
 from rich.console import Console
 
-from nrp_cmd.async_client import limit_connections
+from nrp_cmd.async_client import adaptive_limit_connections
 from nrp_cmd.cli.base import OutputWriter, async_command
 from nrp_cmd.cli.files.table_formatters import format_files_table
 from nrp_cmd.cli.records.get import read_record
@@ -54,7 +54,7 @@ async def list_files(
     """List record's files."""
     console = Console()
 
-    with limit_connections(10):
+    with adaptive_limit_connections():
         async with TaskGroup() as tg:
             for record_id in record_ids:
                 tg.create_task(
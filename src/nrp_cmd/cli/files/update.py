@@ -11,7 +11,7 @@ from functools import partial
 
 from rich.console import Console
 
-from nrp_cmd.async_client import limit_connections
+from nrp_cmd.async_client import adaptive_limit_connections
 from nrp_cmd.cli.base import OutputWriter, async_command
 from nrp_cmd.cli.files.table_formatters import format_files_table
 from nrp_cmd.cli.records.get import read_record
@@ -59,7 +59,7 @@ async def update_file_metadata(
     """Update the metadata of a file in a record."""
     console = Console()
 
-    with limit_connections(10):
+    with adaptive_limit_connections():
         (
             record,
             _record_id,
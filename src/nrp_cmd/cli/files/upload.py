@@ -15,8 +15,12 @@ from typing import Any
 import rich_click as click
 from rich.console import Console
 
-from nrp_cmd.async_client import AsyncRepositoryClient, limit_connections
-from nrp_cmd.async_client.streams import DataSource, StdInDataSource
+from nrp_cmd.async_client import AsyncRepositoryClient, adaptive_limit_connections
+from nrp_cmd.async_client.streams import (
+    DataSource,
+    MappedFileSource,
+    StdInDataSource,
+)
 from nrp_cmd.async_client.streams.file import FileSource
 from nrp_cmd.cli.base import OutputWriter, async_command
 from nrp_cmd.cli.files.table_formatters import format_files_table
@@ -47,6 +51,9 @@ async def upload_files_to_record(
     record: Record,
     *files: tuple[str | DataSource | Path, dict[str, Any] | str],
     transfer_type: str = "L",
+    resume: bool = True,
+    use_mmap: bool = False,
+    use_sendfile: bool | None = None,
 ) -> list[File]:
     """Upload files to a record."""
     # convert files to pairs
@@ -67,6 +74,8 @@ async def upload_files_to_record(
                 key = key or "stdin"
             elif not key and isinstance(_file, (str, Path)):
                 key = Path(_file).name
+            if use_mmap and isinstance(_file, (str, Path)):
+                _file = MappedFileSource(_file)
             if not key:
                 raise ValueError("Key must be provided for file")
 
@@ -91,6 +100,12 @@ async def upload_files_to_record(
                         _file,
                         transfer_type=transfer_type,
                         progress=key if True else None,
+                        resume=resume,
+                        transfer_options=(
+                            {"use_sendfile": use_sendfile}
+                            if use_sendfile is not None
+                            else None
+                        ),
                     )
                 )
             )
@@ -114,6 +129,25 @@ async def upload_files_to_record(
 )
 @click.option("--key", type=str, help="Key for the file")
 @click.option("--transfer-type", type=str, help="Transfer type")
+@click.option(
+    "--resume/--no-resume",
+    default=True,
+    help="Resume an interrupted multipart upload of the same file",
+)
+@click.option(
+    "--mmap/--no-mmap",
+    "use_mmap",
+    default=False,
+    help="Memory-map the local files instead of reading them in small chunks",
+)
+@click.option(
+    "--sendfile/--no-sendfile",
+    "use_sendfile",
+    default=None,
+    help="Send local files via sendfile (large-buffer reads on TLS). "
+    "Default is on for multipart and off for local transfers, "
+    "which compute checksums while sending",
+)
 @async_command
 async def upload_files(
     *,
@@ -125,11 +159,14 @@ async def upload_files(
     key: str | None = None,
     model: Model,
     transfer_type: str | None = None,
+    resume: bool = True,
+    use_mmap: bool = False,
+    use_sendfile: bool | None = None,
     out: Output,
 ) -> None:
     """Upload a file to a record."""
     console = Console()
-    with limit_connections(10):
+    with adaptive_limit_connections():
         (
             record,
             _record_id,
@@ -165,6 +202,9 @@ async def upload_files(
                 record,
                 (file, metadata_json),
                 transfer_type=transfer_type,
+                resume=resume,
+                use_mmap=use_mmap,
+                use_sendfile=use_sendfile,
             )
 
     if out.output:
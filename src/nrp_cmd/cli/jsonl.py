@@ -0,0 +1,202 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Streaming writer of JSON Lines output.
+
+Records are serialized as soon as they are written, so that the record
+objects can be released, and the lines are collected into batches.
+Full batches are passed through a bounded queue to a task that writes
+(and optionally compresses) them in a thread, while the event loop keeps
+downloading and parsing the next pages. The memory used by the writer is
+at most (queue_size + 1) * batch_size bytes regardless of the number of
+records.
+
+A partial batch is written when no full batch has been written for
+flush_interval seconds, so that a slow scan still shows its progress.
+"""
+
+import asyncio
+import contextlib
+import gzip
+import sys
+from collections.abc import Generator
+from enum import StrEnum
+from pathlib import Path
+from typing import IO, Any, Self, cast
+
+from nrp_cmd import json_codec
+from nrp_cmd.converter import converter
+
+
+class Compression(StrEnum):
+    """Compression of the output."""
+
+    NONE = "none"
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+    @classmethod
+    def from_path(cls, path: Path | None) -> "Compression":
+        """Guess the compression from the extension of the output file."""
+        match path.suffix.lower() if path else None:
+            case ".gz":
+                return cls.GZIP
+            case ".zst":
+                return cls.ZSTD
+            case _:
+                return cls.NONE
+
+
+def _zstd_writer(stream: IO[bytes]) -> IO[bytes]:
+    """Wrap the stream with a zstd compressor, without closing the stream on close."""
+    try:
+        from compression import zstd  # type: ignore[import-not-found] # python 3.14+
+
+        return zstd.ZstdFile(stream, "wb")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "zstd compression needs python 3.14 or the zstandard package"
+        ) from e
+    return zstandard.ZstdCompressor().stream_writer(stream, closefd=False)  # type: ignore[return-value]
+
+
+@contextlib.contextmanager
+def open_output(
+    path: Path | None, compression: Compression = Compression.NONE
+) -> Generator[IO[bytes], None, None]:
+    """Open a binary output file or standard output, optionally compressed.
+
+    The standard output is flushed but not closed when the context ends.
+    """
+    with contextlib.ExitStack() as stack:
+        stream: IO[bytes]
+        if path is None:
+            stream = sys.stdout.buffer
+            stack.callback(stream.flush)
+        else:
+            stream = stack.enter_context(path.open("wb"))
+        match compression:
+            case Compression.GZIP:
+                gzip_stream = gzip.GzipFile(fileobj=stream, mode="wb")
+                # GzipFile is a binary stream, but typeshed does not derive it from IO
+                stream = cast("IO[bytes]", stack.enter_context(gzip_stream))
+            case Compression.ZSTD:
+                stream = stack.enter_context(_zstd_writer(stream))
+        yield stream
+
+
+class JSONLinesWriter:
+    """Asynchronous writer of records to a jsonl file or standard output."""
+
+    def __init__(
+        self,
+        output: Path | None,
+        compression: Compression = Compression.NONE,
+        *,
+        batch_size: int = 1024 * 1024,
+        flush_interval: float = 1.0,
+        queue_size: int = 8,
+    ) -> None:
+        """Initialize the writer.
+
+        :param output:          output file, standard output if None
+        :param compression:     compression of the output
+        :param batch_size:      size in bytes of the batches written at once
+        :param flush_interval:  seconds after which a partial batch is written
+        :param queue_size:      number of full batches waiting to be written
+        """
+        self._output = output
+        self._compression = compression
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=queue_size)
+        self._lines: list[bytes] = []
+        self._pending_bytes = 0
+        self._stack = contextlib.ExitStack()
+        self._stream: IO[bytes] | None = None
+        self._writer_task: asyncio.Task[None] | None = None
+        self._error: BaseException | None = None
+        self.count = 0
+        """Number of written records."""
+
+    async def __aenter__(self) -> Self:
+        """Open the output and start the writing task."""
+        self._stream = self._stack.enter_context(
+            open_output(self._output, self._compression)
+        )
+        self._writer_task = asyncio.create_task(self._write_batches())
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:  # noqa: ANN001
+        """Write the rest of the records and close the output."""
+        assert self._writer_task is not None
+        try:
+            if exc_type is None and self._error is None:
+                if self._lines:
+                    await self._queue.put(self._take_batch())
+                await self._queue.put(None)
+                await self._writer_task
+            else:
+                self._writer_task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await self._writer_task
+        finally:
+            await asyncio.to_thread(self._stack.close)
+        if exc_type is None and self._error is not None:
+            raise self._error
+
+    async def write(self, data: Any) -> None:
+        """Serialize a record (or other data) and queue it for writing."""
+        if self._error is not None:
+            raise self._error
+        if not isinstance(data, (dict, list)):
+            data = converter.unstructure(data)
+        line = json_codec.dumps(data)
+        self._lines.append(line)
+        self._pending_bytes += len(line) + 1
+        self.count += 1
+        if self._pending_bytes >= self._batch_size:
+            await self._queue.put(self._take_batch())
+
+    def _take_batch(self) -> bytes:
+        self._lines.append(b"")
+        batch = b"\n".join(self._lines)
+        self._lines = []
+        self._pending_bytes = 0
+        return batch
+
+    def _write_batch(self, batch: bytes) -> None:
+        assert self._stream is not None
+        self._stream.write(batch)
+        # compressed streams are flushed only on close, a flush would
+        # end the current compression block
+        if self._compression == Compression.NONE:
+            self._stream.flush()
+
+    async def _write_batches(self) -> None:
+        while True:
+            try:
+                batch = await asyncio.wait_for(
+                    self._queue.get(), timeout=self._flush_interval
+                )
+            except TimeoutError:
+                if not self._lines or self._error is not None:
+                    continue
+                batch = self._take_batch()
+            if batch is None:
+                return
+            if self._error is not None:
+                # keep draining the queue so that the producer does not block
+                continue
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            except Exception as e:  # noqa: BLE001 reported to the producer
+                self._error = e
@@ -13,11 +13,11 @@ from rich.console import Console
 
 from nrp_cmd.async_client import (
     AsyncRecordsClient,
-    get_async_client,
     get_repository_from_record_id,
 )
-from nrp_cmd.async_client.connection import AsyncConnection, limit_connections
+from nrp_cmd.async_client.connection import adaptive_limit_connections
 from nrp_cmd.cli.base import async_command
+from nrp_cmd.cli.clients import client_registry
 from nrp_cmd.config import Config
 
 from ..arguments import (
@@ -50,7 +50,7 @@ async def delete_record(
     """Get a record from the repository."""
     console = Console()
 
-    with limit_connections(10):
+    with adaptive_limit_connections():
         async with asyncio.TaskGroup() as tg:
             for record_id in record_ids:
                 tg.create_task(
@@ -78,13 +78,12 @@ async def delete_single_record(
     verbosity: VerboseLevel,
 ) -> None:
     """Get a single record from the repository and print/save it."""
-    connection = AsyncConnection()
+    clients = client_registry()
 
     final_record_id, repository_config = await get_repository_from_record_id(
-        connection, record_id, config, repository
+        clients.connection, record_id, config, repository
     )
-    # set it temporarily to the config
-    client = await get_async_client(repository_config, config=config)
+    client = await clients.get_client(repository_config, config)
     records_api: AsyncRecordsClient = client.records
     if model is not None:
         records_api = records_api.with_model(model)
@@ -14,8 +14,8 @@ from typing import Any
 import rich_click as click
 from rich.console import Console
 
-from nrp_cmd.async_client import limit_connections
-from nrp_cmd.async_client.streams import FileSink
+from nrp_cmd.async_client import adaptive_limit_connections
+from nrp_cmd.async_client.streams import FileSink, MappedFileSink
 from nrp_cmd.cli.base import OutputFormat, async_command
 from nrp_cmd.cli.records.get import get_single_record
 from nrp_cmd.config import Config
@@ -36,6 +36,12 @@ from ..arguments import (
 
 
 @click.option("--expand", is_flag=True, help="Expand the record")
+@click.option(
+    "--mmap/--no-mmap",
+    "use_mmap",
+    default=False,
+    help="Memory-map the local files instead of reading them in small chunks",
+)
 @with_config
 @with_repository
 @with_record_ids
@@ -52,6 +58,7 @@ async def download_record(
     out: Output,
     model: Model,
     expand: bool = False,
+    use_mmap: bool = False,
 ) -> None:
     """Download a record from the repository.
 
@@ -60,7 +67,7 @@ async def download_record(
     console = Console()
     tasks: list[Task[Any]] = []
     with (
-        limit_connections(10),
+        adaptive_limit_connections(),
         show_progress(total=len(record_ids), quiet=not out.progress),
     ):
         async with TaskGroup() as tg:
@@ -79,6 +86,7 @@ async def download_record(
                             model.draft,
                             expand,
                             out.verbosity,
+                            use_mmap,
                         )
                     )
                 )
@@ -104,6 +112,7 @@ async def download_single_record(
     draft: bool,
     expand: bool,
     verbosity: VerboseLevel,
+    use_mmap: bool = False,
 ) -> bool:
     """Download record with the given id together with its files."""
     # 1. download record metadata
@@ -139,6 +148,7 @@ async def download_single_record(
 
     file_list = await file_client.list(record)
 
+    sink_class = MappedFileSink if use_mmap else FileSink
     tasks: list[Any] = []
     async with TaskGroup() as tg:
         for file_ in file_list:
@@ -151,7 +161,9 @@ async def download_single_record(
             tasks.append(
                 tg.create_task(
                     file_client.download(
-                        file_, FileSink(output_dir / file_key), progress=file_.key
+                        file_,
+                        sink_class(output_dir / file_key, resumable=True),
+                        progress=file_.key,
                     )
                 )
             )
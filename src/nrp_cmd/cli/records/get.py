@@ -18,11 +18,11 @@ from yarl import URL
 from nrp_cmd.async_client import (
     AsyncRecordsClient,
     AsyncRepositoryClient,
-    get_async_client,
     get_repository_from_record_id,
 )
-from nrp_cmd.async_client.connection import AsyncConnection, limit_connections
+from nrp_cmd.async_client.connection import adaptive_limit_connections
 from nrp_cmd.cli.base import OutputFormat, OutputWriter, async_command
+from nrp_cmd.cli.clients import client_registry
 from nrp_cmd.cli.records.record_file_name import create_output_file_name
 from nrp_cmd.cli.records.table_formatters import format_record_table
 from nrp_cmd.config import Config, RepositoryConfig
@@ -61,7 +61,7 @@ async def get_record(
     """Get a record from the repository."""
     console = Console()
 
-    with limit_connections(10):
+    with adaptive_limit_connections():
         tasks: list[
             asyncio.Task[
                 tuple[
@@ -160,12 +160,12 @@ async def read_record(
     Record, str | URL, RepositoryConfig, AsyncRecordsClient, AsyncRepositoryClient
 ]:
     """Read a record from the repository, returning the record, its id and the repository config."""
-    connection = AsyncConnection()
+    clients = client_registry()
 
     final_record_id, repository_config = await get_repository_from_record_id(
-        connection, record_id, config, repository
+        clients.connection, record_id, config, repository
     )
-    client = await get_async_client(repository_config, config=config)
+    client = await clients.get_client(repository_config, config)
     records_api: AsyncRecordsClient = client.records
     if model is not None:
         records_api = records_api.with_model(model)
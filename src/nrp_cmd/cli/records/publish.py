@@ -14,7 +14,7 @@ from pathlib import Path
 import rich_click as click
 from rich.console import Console
 
-from nrp_cmd.async_client.connection import limit_connections
+from nrp_cmd.async_client.connection import adaptive_limit_connections
 from nrp_cmd.cli.base import OutputFormat, OutputWriter, async_command
 from nrp_cmd.cli.base import set_variable as setvar
 from nrp_cmd.cli.records.record_file_name import create_output_file_name
@@ -61,7 +61,7 @@ async def publish_record(
     """Publish a record."""
     console = Console()
 
-    with limit_connections(10):
+    with adaptive_limit_connections():
         tasks: list[asyncio.Task[Record | Request | None]] = []
         async with asyncio.TaskGroup() as tg:
             for record_id in record_ids:
@@ -7,17 +7,25 @@
 #
 """Command-line interface for searching records."""
 
+import contextlib
 from functools import partial
+from typing import TYPE_CHECKING
 
+import rich_click as click
 from rich.console import Console
 
 from nrp_cmd.async_client.base_client import RecordStatus
+from nrp_cmd.cli.arguments import OutputFormat
 from nrp_cmd.cli.base import OutputWriter, async_command
 from nrp_cmd.cli.base import set_variable as setvar
+from nrp_cmd.cli.jsonl import Compression, JSONLinesWriter
 from nrp_cmd.cli.records.table_formatters import (
     format_record_table,
 )
+from nrp_cmd.columnar import ParquetRecordWriter
 from nrp_cmd.config import Config
+from nrp_cmd.dedup import DedupStoreType, make_dedup_store
+from nrp_cmd.types.records import Record
 
 from ..arguments import (
     Model,
@@ -30,16 +38,52 @@ from ..arguments import (
     with_setvar,
     with_verbosity,
 )
+from .scan_workers import scan_in_workers
 from .search import prepare_records_api
 
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
 
 @with_config
 @with_repository
-@with_output
+@with_output(columnar=True)
 @with_verbosity
 @with_setvar
 @with_model(community=True)
 @argument_with_help("query", type=str, required=False, help="Query string")
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Return only records updated since the previous incremental scan "
+    "of the same query",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of worker processes the scan is split between (jsonl output only)",
+)
+@click.option(
+    "--dedup",
+    type=click.Choice([str(t) for t in DedupStoreType]),
+    default=str(DedupStoreType.MEMORY),
+    help="Store of seen records used to drop duplicates: memory is the fastest, "
+    "hash and sqlite use less memory on large scans",
+)
+@click.option(
+    "--raw",
+    is_flag=True,
+    help="Output records as returned by the repository, without converting them "
+    "to the client's model (faster for json/jsonl output)",
+)
+@click.option(
+    "--compress",
+    type=click.Choice([str(c) for c in Compression]),
+    default=None,
+    help="Compress the jsonl output, guessed from the output file extension "
+    "(.gz, .zst) if not set",
+)
 @async_command
 async def scan_records(
     *,
@@ -49,35 +93,143 @@ async def scan_records(
     variable: str | None = None,
     model: Model,
     out: Output,
+    incremental: bool = False,
+    workers: int = 1,
+    dedup: str = DedupStoreType.MEMORY,
+    raw: bool = False,
+    compress: str | None = None,
 ) -> None:
-    """Return all records inside repository that match the given query."""
+    """Return all records inside repository that match the given query.
+
+    With --incremental, the position of the scan is stored in the .nrp directory
+    and the next incremental scan returns only records updated since then.
+
+    With --workers, the scan is planned once and split between worker processes,
+    see the scan_workers module.
+
+    The jsonl output is written by a streaming writer, see the jsonl module,
+    and can be compressed with --compress.
+
+    The parquet output contains the columns given by --column (id, title,
+    creation and update dates and link by default), see the columnar module.
+    """
     console = Console()
+    compression = (
+        Compression(compress) if compress else Compression.from_path(out.output)
+    )
+    if compression != Compression.NONE and out.output_format != OutputFormat.JSON_LINES:
+        raise click.UsageError("Only the jsonl output can be compressed")
+    if out.output_format == OutputFormat.PARQUET:
+        if out.output is None:
+            raise click.UsageError("The parquet output needs an output file (-o)")
+        # records are only projected to the columns, so they need not be structured
+        raw = True
+
+    if workers > 1:
+        if incremental:
+            raise click.UsageError("--incremental can not be combined with --workers")
+        if out.output_format != OutputFormat.JSON_LINES:
+            raise click.UsageError(
+                "--workers writes jsonl only, use -f jsonl or a .jsonl output file"
+            )
+        worker_urls = await scan_in_workers(
+            config,
+            repository,
+            query,
+            model.model,
+            model.draft,
+            model.published,
+            workers,
+            out.output,
+            dedup=DedupStoreType(dedup),
+            raw=raw,
+            compression=compression,
+            return_urls=bool(variable),
+        )
+        if variable:
+            setvar(config, variable, worker_urls)
+        return
 
     records_api = await prepare_records_api(
         config, model.model, model.draft, model.published, repository
     )
+    status = RecordStatus.PUBLISHED if model.published else RecordStatus.DRAFT
+
+    urls: list[str] = []
+
+    write: Callable[[Record], Awaitable[None]]
+
+    async with contextlib.AsyncExitStack() as stack:
+        seen = stack.enter_context(contextlib.closing(make_dedup_store(dedup)))
+        if out.output_format == OutputFormat.JSON_LINES:
+            writer = await stack.enter_async_context(
+                JSONLinesWriter(out.output, compression)
+            )
+            write = writer.write
+        elif out.output_format == OutputFormat.PARQUET:
+            parquet = stack.enter_context(
+                ParquetRecordWriter(out.output, out.columns)  # type: ignore[arg-type]
+            )
+
+            async def write_parquet(entry: Record) -> None:
+                parquet.write(entry)
+
+            write = write_parquet
+
+        else:
+            printer = stack.enter_context(
+                OutputWriter(
+                    out.output,
+                    out.output_format,
+                    console,
+                    partial(format_record_table, verbosity=out.verbosity),  # type: ignore # mypy does not understand this
+                )
+            )
+            printer.multiple()
+
+            async def print_entry(entry: Record) -> None:
+                printer.output(entry)
+
+            write = print_entry
+
+        async def output(entry: Record) -> None:
+            if variable:
+                urls.append(str(entry.links.self_))
+            await write(entry)
 
-    urls: set[str] = set()
-
-    with OutputWriter(
-        out.output,
-        out.output_format,
-        console,
-        partial(format_record_table, verbosity=out.verbosity),  # type: ignore # mypy does not understand this
-    ) as printer:
-        printer.multiple()
-
-        async with records_api.scan(
-            q=query,
-            model=model.model,
-            status=RecordStatus.PUBLISHED if model.published else RecordStatus.DRAFT,
-            facets={},
-        ) as scan:
-            async for entry in scan:
-                link = str(entry.links.self_)
-                if link not in urls:
-                    printer.output(entry)
-                    urls.add(link)
+        if incremental:
+            cursors = config.load_harvest_cursors()
+            cursor_key = cursors.key(
+                str(repository or config.default_alias),
+                query,
+                model.model,
+                status.value,
+            )
+            async with records_api.harvest(  # type: ignore[attr-defined]
+                cursor=cursors.get(cursor_key),
+                q=query,
+                model=model.model,
+                status=status,
+                facets={},
+                dedup=seen,
+                raw=raw,
+            ) as harvest:
+                async for entry in harvest.records():
+                    await output(entry)
+            if harvest.complete and harvest.cursor is not None:
+                cursors[cursor_key] = harvest.cursor
+                cursors.save()
+        else:
+            async with records_api.scan(
+                q=query,
+                model=model.model,
+                status=status,
+                facets={},
+                dedup=seen,
+                raw=raw,
+            ) as scan:
+                async for entry in scan:
+                    await output(entry)
 
     if variable:
-        setvar(config, variable, list(urls))
+        setvar(config, variable, urls)
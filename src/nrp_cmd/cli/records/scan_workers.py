@@ -0,0 +1,265 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Scan of records split between worker processes.
+
+A single process scan is limited by one core spent on parsing and structuring
+the responses. This module plans the date windows of the scan once, writes
+them to a manifest and lets a pool of worker processes scan the shards of the
+plan. Each worker has its own client and writes its records to its own jsonl
+file, the files are streamed to the output in the order the workers finish.
+
+The layout of the shard directory is:
+
+    manifest.json       - the query and the windows of each shard
+    shard-0000.jsonl    - records of the first shard
+    ...
+
+If a worker fails, the directory is kept, so that the failed shards
+can be inspected or scanned again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import IO, TYPE_CHECKING
+
+from attrs import define
+
+from nrp_cmd import json_codec
+from nrp_cmd.async_client.base_client import RecordStatus
+from nrp_cmd.async_client.invenio.scan import ScanPlan  # noqa: TC001 attrs need to have types in runtime
+from nrp_cmd.cli.arguments import OutputFormat
+from nrp_cmd.cli.base import format_output
+from nrp_cmd.cli.jsonl import Compression, open_output
+from nrp_cmd.converter import converter
+from nrp_cmd.dedup import DedupStoreType, make_dedup_store
+
+from .search import prepare_records_api
+
+if TYPE_CHECKING:
+    from nrp_cmd.config import Config
+
+
+@define(kw_only=True)
+class ScanShard:
+    """Part of the scan processed by a single worker."""
+
+    output: str
+    """Name of the jsonl file with the records, relative to the manifest."""
+
+    plan: ScanPlan
+    """Windows scanned by the worker."""
+
+
+@define(kw_only=True)
+class ScanManifest:
+    """Description of a scan split to shards."""
+
+    repository: str | None = None
+    query: str | None = None
+    model: str | None = None
+    draft: bool
+    published: bool
+
+    total: int
+    """Number of records matching the query when the scan was planned."""
+
+    shards: list[ScanShard]
+
+    def save(self, path: Path) -> None:
+        """Save the manifest as json."""
+        path.write_text(
+            json.dumps(converter.unstructure(self), indent=2, ensure_ascii=False),
+            encoding="utf-8",
+        )
+
+    @classmethod
+    def from_file(cls, path: Path) -> ScanManifest:
+        """Load the manifest."""
+        return converter.structure(json.loads(path.read_text(encoding="utf-8")), cls)
+
+
+async def plan_scan_shards(
+    config: Config,
+    repository: str | None,
+    query: str | None,
+    model: str | None,
+    draft: bool,
+    published: bool,
+    workers: int,
+) -> ScanManifest:
+    """Plan the scan and split it into (at most) workers shards."""
+    records_api = await prepare_records_api(config, model, draft, published, repository)
+    plan = await records_api.plan_scan(  # type: ignore[attr-defined]
+        q=query,
+        model=model,
+        status=RecordStatus.PUBLISHED if published else RecordStatus.DRAFT,
+        facets={},
+    )
+    return ScanManifest(
+        repository=repository,
+        query=query,
+        model=model,
+        draft=draft,
+        published=published,
+        total=plan.total,
+        shards=[
+            ScanShard(output=f"shard-{idx:04d}.jsonl", plan=shard_plan)
+            for idx, shard_plan in enumerate(plan.shards(workers))
+        ],
+    )
+
+
+def scan_shard(
+    config: Config,
+    manifest: ScanManifest,
+    shard: ScanShard,
+    directory: Path,
+    dedup: DedupStoreType,
+    raw: bool,
+) -> None:
+    """Scan a shard in a worker process."""
+    import uvloop
+
+    from nrp_cmd.async_client.connection import close_pooled_connections
+
+    async def run() -> None:
+        try:
+            records_api = await prepare_records_api(
+                config,
+                manifest.model,
+                manifest.draft,
+                manifest.published,
+                manifest.repository,
+            )
+            with (
+                (directory / shard.output).open("w", encoding="utf-8") as f,
+                contextlib.closing(make_dedup_store(dedup)) as seen,
+            ):
+                async with records_api.scan(
+                    q=manifest.query,
+                    model=manifest.model,
+                    status=RecordStatus.PUBLISHED
+                    if manifest.published
+                    else RecordStatus.DRAFT,
+                    facets={},
+                    plan=shard.plan,  # type: ignore[call-arg]
+                    dedup=seen,
+                    raw=raw,
+                ) as records:
+                    async for record in records:
+                        f.write(format_output(OutputFormat.JSON_LINES, record))
+                        f.write("\n")
+        finally:
+            await close_pooled_connections()
+
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        runner.run(run())
+
+
+def merge_shard(path: Path, merged: IO[bytes], urls: list[str] | None) -> None:
+    """Append the records of a shard to the merged output.
+
+    :param path:    jsonl file with the records of the shard
+    :param merged:  merged output
+    :param urls:    if not None, urls of the records are appended to this list
+    """
+    with path.open("rb") as f:
+        if urls is None:
+            shutil.copyfileobj(f, merged)
+            return
+        for line in f:
+            merged.write(line)
+            urls.append(json_codec.loads(line)["links"]["self"])
+
+
+async def scan_in_workers(
+    config: Config,
+    repository: str | None,
+    query: str | None,
+    model: str | None,
+    draft: bool,
+    published: bool,
+    workers: int,
+    output: Path | None,
+    dedup: DedupStoreType = DedupStoreType.MEMORY,
+    raw: bool = False,
+    compression: Compression = Compression.NONE,
+    return_urls: bool = False,
+) -> list[str]:
+    """Scan the records in worker processes and merge their outputs.
+
+    :param workers:     number of worker processes
+    :param output:      jsonl file with the merged records, standard output if None.
+                        Shards are stored in a directory next to the output file.
+    :param dedup:       type of the store used to drop duplicates within a shard
+                        (the windows of different shards do not overlap)
+    :param raw:         write the records as returned by the repository
+    :param compression: compression of the merged output
+    :param return_urls: collect urls of the scanned records from the shard files
+    :return:            urls of the scanned records if return_urls is set
+    """
+    if output is not None:
+        directory = output.with_name(output.name + ".shards")
+        directory.mkdir(parents=True, exist_ok=True)
+    else:
+        directory = Path(tempfile.mkdtemp(prefix="nrp-scan-"))
+
+    manifest = await plan_scan_shards(
+        config, repository, query, model, draft, published, workers
+    )
+    manifest.save(directory / "manifest.json")
+
+    loop = asyncio.get_running_loop()
+    urls: list[str] = []
+    # spawn, so that the workers do not inherit the running event loop and open sockets
+    with (
+        ProcessPoolExecutor(
+            max_workers=len(manifest.shards),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool,
+        open_output(output, compression) as merged,
+    ):
+        pending = {
+            asyncio.wrap_future(
+                pool.submit(
+                    scan_shard,
+                    config,
+                    manifest,
+                    shard,
+                    directory,
+                    dedup,
+                    raw,
+                )
+            ): shard
+            for shard in manifest.shards
+        }
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for finished in done:
+                shard = pending.pop(finished)
+                finished.result()
+                shard_path = directory / shard.output
+                await loop.run_in_executor(
+                    None,
+                    merge_shard,
+                    shard_path,
+                    merged,
+                    urls if return_urls else None,
+                )
+                shard_path.unlink()
+        merged.flush()
+    shutil.rmtree(directory)
+    return urls
@@ -13,8 +13,10 @@ import rich_click as click
 from rich.console import Console
 
 from nrp_cmd.async_client import AsyncRecordsClient, RecordStatus, get_async_client
+from nrp_cmd.cli.arguments import OutputFormat
 from nrp_cmd.cli.base import OutputWriter, async_command
 from nrp_cmd.cli.base import set_variable as setvar
+from nrp_cmd.columnar import ParquetRecordWriter
 from nrp_cmd.config import Config
 
 from ..arguments import (
@@ -41,7 +43,7 @@ from .table_formatters import (
 @click.option("--sort", type=str, default="bestmatch", help="Sort order")
 @with_config
 @with_repository
-@with_output
+@with_output(columnar=True)
 @with_verbosity
 @with_setvar
 @with_model(community=True)
@@ -58,8 +60,15 @@ async def search_records(
     sort: str = "bestmatch",
     out: Output,
 ) -> None:
-    """Return a page of records inside repository that match the given query."""
+    """Return a page of records inside repository that match the given query.
+
+    With the parquet output, the records of the page are written as rows
+    with the columns given by --column, see the columnar module.
+    """
     console = Console()
+    parquet = out.output_format == OutputFormat.PARQUET
+    if parquet and out.output is None:
+        raise click.UsageError("The parquet output needs an output file (-o)")
 
     records_api = await prepare_records_api(
         config, model.model, model.draft, model.published, repository
@@ -73,12 +82,19 @@ async def search_records(
         model=model.model,
         status=RecordStatus.PUBLISHED if model.published else RecordStatus.DRAFT,
         facets={},
+        raw=parquet,
     )
 
     if variable:
         urls = [str(record.links.self_) for record in record_list]
         setvar(config, variable, urls)
 
+    if parquet:
+        with ParquetRecordWriter(out.output, out.columns) as writer:  # type: ignore[arg-type]
+            for record in record_list:
+                writer.write(record)
+        return
+
     with OutputWriter(
         out.output,
         out.output_format,
@@ -17,11 +17,10 @@ from rich.console import Console
 
 from nrp_cmd.async_client import (
     AsyncRecordsClient,
-    get_async_client,
     get_repository_from_record_id,
 )
-from nrp_cmd.async_client.connection import AsyncConnection
 from nrp_cmd.cli.base import OutputWriter, async_command
+from nrp_cmd.cli.clients import client_registry
 from nrp_cmd.cli.records.metadata import read_metadata
 from nrp_cmd.cli.records.table_formatters import format_record_table
 from nrp_cmd.config import Config
@@ -72,16 +71,17 @@ async def update_record(
     else:
         record_ids = [record_id]
 
+    clients = client_registry()
     for record_id in record_ids:
         metadata_json = read_metadata(metadata)
         record_url, repository_config = await get_repository_from_record_id(
-            AsyncConnection(), record_id, config, repository
+            clients.connection, record_id, config, repository
         )
 
         published = model.published
         draft = model.draft
 
-        client = await get_async_client(repository_config, config=config)
+        client = await clients.get_client(repository_config, config)
 
         records_api: AsyncRecordsClient = client.records.draft_records
         if model.model is not None:
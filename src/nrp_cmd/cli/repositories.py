@@ -49,6 +49,16 @@ from .base import OutputWriter
 @click.option(
     "--retry-after-seconds", type=int, default=5, help="Retry after this interval"
 )
+@click.option(
+    "--stale-while-revalidate/--no-stale-while-revalidate",
+    default=False,
+    help="Start commands on the cached repository info, refreshing it in the background",
+)
+@click.option(
+    "--cache-responses/--no-cache-responses",
+    default=False,
+    help="Cache records, files and requests, downloading them only if they have changed",
+)
 @click.option(
     "--anonymous/--no-anonymous",
     default=False,
@@ -75,6 +85,8 @@ async def add_repository(
     verify_tls: bool,
     retry_count: int,
     retry_after_seconds: int,
+    stale_while_revalidate: bool,
+    cache_responses: bool,
     anonymous: bool,
     default: bool,
     launch_browser: bool,
@@ -135,6 +147,8 @@ async def add_repository(
             verify_tls=verify_tls,
             retry_count=retry_count,
             retry_after_seconds=retry_after_seconds,
+            stale_while_revalidate=stale_while_revalidate,
+            cache_responses=cache_responses,
         )
     )
     if default or len(config.repositories) == 1:
@@ -14,11 +14,8 @@ from typing import TYPE_CHECKING
 import rich_click as click
 from rich.console import Console
 
-from nrp_cmd.async_client import (
-    AsyncRepositoryClient,
-    limit_connections,
-)
-from nrp_cmd.async_client.connection import limit_connections
+from nrp_cmd.async_client import AsyncRepositoryClient
+from nrp_cmd.async_client.connection import adaptive_limit_connections
 from nrp_cmd.cli.base import OutputWriter, async_command
 from nrp_cmd.cli.records.get import read_record
 from nrp_cmd.config import Config
@@ -67,7 +64,7 @@ async def create_request(
     """Create a request."""
     console = Console()
 
-    with limit_connections(10):
+    with adaptive_limit_connections():
         (
             record,
             _final_record_id,
@@ -9,7 +9,7 @@
 
 from rich.console import Console
 
-from nrp_cmd.async_client.connection import limit_connections
+from nrp_cmd.async_client.connection import adaptive_limit_connections
 from nrp_cmd.cli.base import OutputWriter, async_command
 from nrp_cmd.cli.records.get import read_record
 from nrp_cmd.config import Config
@@ -49,7 +49,7 @@ async def list_requests(
     """Get a record from the repository."""
     console = Console()
 
-    with limit_connections(10):
+    with adaptive_limit_connections():
         (
             record,
             _final_record_id,
@@ -4,23 +4,22 @@ from yarl import URL
 
 from nrp_cmd.async_client import (
     AsyncRequestsClient,
-    get_async_client,
     get_repository_from_record_id,
 )
-from nrp_cmd.async_client.connection import AsyncConnection
+from nrp_cmd.cli.clients import client_registry
 from nrp_cmd.config import Config
 
 
 async def resolve_request(
     request_id: str, config: Config, repository: str | None = None
 ) -> tuple[AsyncRequestsClient, URL]:
-    connection = AsyncConnection()
+    clients = client_registry()
 
     final_request_id, repository_config = await get_repository_from_record_id(
-        connection, request_id, config, repository
+        clients.connection, request_id, config, repository
     )
 
-    repository_client = await get_async_client(repository_config, config=config)
+    repository_client = await clients.get_client(repository_config, config)
 
     request_url: URL
     if isinstance(final_request_id, str):
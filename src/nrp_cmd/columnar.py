@@ -0,0 +1,341 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Columnar (Arrow and Parquet) export of records.
+
+Records are projected to a set of columns given by dotted paths into
+the json of the record (for example ``metadata.title`` or
+``metadata.creators.0.person_or_org.name``, numeric parts index lists),
+and the projected values are collected into Arrow record batches of
+a fixed number of rows. Only the projected values are kept, so a scan
+of any size can be exported with the memory of a single batch.
+
+The type of a column is one of COLUMN_TYPES. Columns without a type
+get it from the values of the first batch; as parquet files need a single
+schema, the type is kept for the rest of the export. Values of string
+columns that are not strings (objects, arrays, numbers) are stored
+as their json.
+
+pyarrow is an optional dependency (the parquet extra), it is imported
+only when an export is created.
+"""
+
+from __future__ import annotations
+
+import importlib
+from collections.abc import Iterable, Mapping, Sequence
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO, Self
+
+from . import json_codec
+from .converter import converter
+
+if TYPE_CHECKING:
+    from types import ModuleType
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+COLUMN_TYPES = ("string", "json", "int64", "float64", "bool", "timestamp", "date")
+"""Types of the exported columns.
+
+json columns keep any value as its json, timestamps are converted to UTC.
+"""
+
+DEFAULT_RECORD_COLUMNS: dict[str, str | None] = {
+    "id": "string",
+    "metadata.title": "string",
+    "created": "timestamp",
+    "updated": "timestamp",
+    "links.self": "string",
+}
+"""Columns exported if none are given."""
+
+DEFAULT_BATCH_ROWS = 65536
+"""Number of rows of a record batch (and of a row group of a parquet file)."""
+
+type Columns = Sequence[str] | Mapping[str, str | None]
+"""Dotted paths of the columns, optionally mapped to their types (None to infer)."""
+
+
+def import_pyarrow() -> ModuleType:
+    """Import pyarrow, raising an ImportError with installation hint if missing."""
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "Columnar export needs pyarrow, install nrp-cmd[parquet]"
+        ) from e
+    return pyarrow
+
+
+def parse_columns(specs: Iterable[str]) -> dict[str, str | None]:
+    """Parse column specifications in the form path[:type].
+
+    Well known columns (DEFAULT_RECORD_COLUMNS) without a type keep their types.
+
+    :raises ValueError: if the type is not one of COLUMN_TYPES
+    """
+    columns: dict[str, str | None] = {}
+    for spec in specs:
+        path, _, type_name = spec.partition(":")
+        columns[path] = type_name or DEFAULT_RECORD_COLUMNS.get(path)
+    _check_types(columns)
+    return columns
+
+
+def _check_types(columns: Mapping[str, str | None]) -> None:
+    for path, type_name in columns.items():
+        if type_name is not None and type_name not in COLUMN_TYPES:
+            raise ValueError(
+                f"Unknown type {type_name} of column {path}, "
+                f"use one of {', '.join(COLUMN_TYPES)}"
+            )
+
+
+def _infer_type(values: list[Any]) -> str:
+    """Return the type of a column from its values."""
+    types = {type(value) for value in values if value is not None}
+    if not types or types == {str}:
+        return "string"
+    if types == {bool}:
+        return "bool"
+    if types == {int}:
+        return "int64"
+    if types <= {int, float}:
+        return "float64"
+    if types <= {dict, list}:
+        return "json"
+    return "string"
+
+
+def _parse_timestamp(value: Any) -> datetime | None:
+    if value is None or isinstance(value, datetime):
+        return value
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=UTC)
+    return timestamp
+
+
+class RecordBatchBuilder:
+    """Collects projected records into Arrow record batches."""
+
+    def __init__(
+        self,
+        columns: Columns | None = None,
+        *,
+        batch_size: int = DEFAULT_BATCH_ROWS,
+    ) -> None:
+        """Initialize the builder.
+
+        :param columns:     dotted paths of the columns (optionally mapped to their
+                            types), DEFAULT_RECORD_COLUMNS if not set
+        :param batch_size:  number of rows of the record batches
+        :raises ValueError: if a type of a column is not one of COLUMN_TYPES
+        """
+        self._pa = import_pyarrow()
+        if columns is None:
+            columns = DEFAULT_RECORD_COLUMNS
+        if not isinstance(columns, Mapping):
+            # well known columns keep their types
+            columns = {path: DEFAULT_RECORD_COLUMNS.get(path) for path in columns}
+        _check_types(columns)
+        self._types: dict[str, str | None] = dict(columns)
+        self._paths = [
+            tuple(int(part) if part.isdigit() else part for part in path.split("."))
+            for path in self._types
+        ]
+        self._values: list[list[Any]] = [[] for _ in self._paths]
+        self._rows = 0
+        self._batch_size = batch_size
+        self._schema: pa.Schema | None = None
+
+    @property
+    def schema(self) -> pa.Schema:
+        """Schema of the batches, columns of not yet known type are strings."""
+        if self._schema is not None:
+            return self._schema
+        return self._make_schema(
+            {path: type_name or "string" for path, type_name in self._types.items()}
+        )
+
+    def __len__(self) -> int:
+        """Return the number of rows waiting for the next batch."""
+        return self._rows
+
+    def add(self, record: Any) -> pa.RecordBatch | None:
+        """Add a record, returning a batch if the record completed it.
+
+        :param record: record (or its json), structured records are unstructured
+                       so that the paths are the same as in the json output
+        """
+        data = record if isinstance(record, dict) else converter.unstructure(record)
+        for path, values in zip(self._paths, self._values, strict=True):
+            value = data
+            try:
+                for part in path:
+                    value = value[part]
+            except (KeyError, IndexError, TypeError):
+                # missing key, list too short or not a container
+                value = None
+            values.append(value)
+        self._rows += 1
+        if self._rows >= self._batch_size:
+            return self.flush()
+        return None
+
+    def flush(self) -> pa.RecordBatch | None:
+        """Return a batch of the rows added since the last batch, None if there are none.
+
+        :raises ValueError: if a value can not be converted to the type of its column
+        """
+        if not self._rows:
+            return None
+        if self._schema is None:
+            for (path, type_name), values in zip(
+                self._types.items(), self._values, strict=True
+            ):
+                if type_name is None:
+                    self._types[path] = _infer_type(values)
+            self._schema = self._make_schema(self._types)  # type: ignore[arg-type]
+        arrays = [
+            self._to_array(path, type_name, values)  # type: ignore[arg-type]
+            for (path, type_name), values in zip(
+                self._types.items(), self._values, strict=True
+            )
+        ]
+        self._values = [[] for _ in self._paths]
+        self._rows = 0
+        return self._pa.RecordBatch.from_arrays(arrays, schema=self._schema)
+
+    def _make_schema(self, types: Mapping[str, str]) -> pa.Schema:
+        pa = self._pa
+        arrow_types = {
+            "string": pa.string(),
+            "json": pa.string(),
+            "int64": pa.int64(),
+            "float64": pa.float64(),
+            "bool": pa.bool_(),
+            "timestamp": pa.timestamp("us", tz="UTC"),
+            "date": pa.date32(),
+        }
+        return pa.schema(
+            [
+                pa.field(path, arrow_types[type_name])
+                for path, type_name in types.items()
+            ]
+        )
+
+    def _to_array(self, path: str, type_name: str, values: list[Any]) -> pa.Array:
+        pa = self._pa
+        arrow_type = self._schema.field(path).type  # type: ignore[union-attr]
+        try:
+            match type_name:
+                case "json":
+                    values = [
+                        None if value is None else json_codec.dumps_str(value)
+                        for value in values
+                    ]
+                case "string":
+                    try:
+                        return pa.array(values, arrow_type)
+                    except (TypeError, ValueError):
+                        # not only strings, keep the other values as json
+                        values = [
+                            value
+                            if value is None or isinstance(value, str)
+                            else json_codec.dumps_str(value)
+                            for value in values
+                        ]
+                case "timestamp" | "date":
+                    try:
+                        return pa.array(values, pa.string()).cast(arrow_type)
+                    except (TypeError, ValueError):
+                        # not iso strings with offsets, parse them one by one
+                        values = [_parse_timestamp(value) for value in values]
+                        if type_name == "date":
+                            values = [value and value.date() for value in values]
+            return pa.array(values, arrow_type)
+        except (TypeError, ValueError) as e:
+            raise ValueError(
+                f"Can not convert column {path} to {type_name}: {e}"
+            ) from e
+
+
+class ParquetRecordWriter:
+    """Writes records to a parquet file, one row group per record batch.
+
+    Usage:
+
+    ```
+    with ParquetRecordWriter(path, ["id", "metadata.title"]) as writer:
+        for record in records:
+            writer.write(record)
+    ```
+
+    The file is created with the first batch, so that the types of the columns
+    can be inferred from it. A file without rows is written if no record is written.
+    """
+
+    def __init__(
+        self,
+        output: Path | str | BinaryIO,
+        columns: Columns | None = None,
+        *,
+        batch_size: int = DEFAULT_BATCH_ROWS,
+        compression: str = "zstd",
+    ) -> None:
+        """Initialize the writer.
+
+        :param output:      path or binary stream of the parquet file
+        :param columns:     columns of the file, see RecordBatchBuilder
+        :param batch_size:  number of rows of a row group
+        :param compression: parquet compression codec (zstd, snappy, gzip, none, ...)
+        """
+        self._builder = RecordBatchBuilder(columns, batch_size=batch_size)
+        self._pq = importlib.import_module("pyarrow.parquet")
+        self._output = str(output) if isinstance(output, Path) else output
+        self._compression = compression
+        self._writer: pq.ParquetWriter | None = None
+        self.count = 0
+        """Number of written records."""
+
+    def __enter__(self) -> Self:
+        """Enter the context, the file is closed when the context ends."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:  # noqa: ANN001
+        """Write the last batch and close the file."""
+        self.close()
+
+    def write(self, record: Any) -> None:
+        """Add a record to the file."""
+        batch = self._builder.add(record)
+        self.count += 1
+        if batch is not None:
+            self.write_batch(batch)
+
+    def write_batch(self, batch: pa.RecordBatch) -> None:
+        """Write a record batch as a row group."""
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(
+                self._output, batch.schema, compression=self._compression
+            )
+        self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        """Write the rest of the records and close the file."""
+        batch = self._builder.flush()
+        if batch is not None:
+            self.write_batch(batch)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(
+                self._output, self._builder.schema, compression=self._compression
+            )
+        self._writer.close()
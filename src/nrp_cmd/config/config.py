@@ -12,6 +12,7 @@ from __future__ import annotations
 import contextlib
 import json
 import os
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
 from typing import Self
 
@@ -20,6 +21,8 @@ from cattrs.gen import make_dict_structure_fn, make_dict_unstructure_fn, overrid
 from yarl import URL
 
 from ..converter import converter
+from .cursors import HarvestCursors
+from .discovery import DiscoveredClient, DiscoveryCache
 from .repository import RepositoryConfig
 from .variables import Variables
 
@@ -43,6 +46,11 @@ class Config:
     datacite_url: str | None = None
     """The URL of the DataCite service to use for DOI resolution."""
 
+    discovery_ttl: int = 24 * 3600
+    """Seconds for which the client discovered for a repository is reused,
+       0 to discover the client on every use. See the discovery module.
+    """
+
     _config_file_path: Path | None = None
     """The path from which the config file was loaded."""
 
@@ -152,6 +160,60 @@ class Config:
             return Variables.from_file(Path.cwd() / ".nrp" / "variables.json")
         return Variables.from_file()
 
+    def load_harvest_cursors(self) -> HarvestCursors:
+        """Load the cursors of incremental harvests, stored alongside the variables."""
+        if self.per_directory_variables:
+            return HarvestCursors.from_file(
+                Path.cwd() / ".nrp" / "harvest-cursors.json"
+            )
+        return HarvestCursors.from_file()
+
+    #
+    # Client discovery cache
+    #
+
+    def get_discovered_client(self, url: URL) -> DiscoveredClient | None:
+        """Return the client discovered for the repository, None if not known or expired."""
+        if self.discovery_ttl <= 0:
+            return None
+        ttl = timedelta(seconds=self.discovery_ttl)
+        discovered = _discovered_clients.get(url, ttl)
+        if discovered is None and self._config_file_path is not None:
+            discovered = self._load_discovery_cache().get(url, ttl)
+            if discovered is not None:
+                _discovered_clients[url] = discovered
+        return discovered
+
+    def set_discovered_client(self, url: URL, client: str, api_url: URL) -> None:
+        """Remember the client discovered for the repository.
+
+        The discovery is stored in the memory of the process and, if the
+        configuration has been loaded from a file, in the discovery cache file.
+        """
+        if self.discovery_ttl <= 0:
+            return
+        discovered = DiscoveredClient(
+            client=client, api_url=api_url, discovered=datetime.now(UTC)
+        )
+        _discovered_clients[url] = discovered
+        if self._config_file_path is not None:
+            # reload the cache so that entries of concurrent commands are kept
+            cache = self._load_discovery_cache()
+            cache[url] = discovered
+            # the cache is an optimization, a read-only home must not break commands
+            with contextlib.suppress(OSError):
+                cache.save()
+
+    def _load_discovery_cache(self) -> DiscoveryCache:
+        assert self._config_file_path is not None
+        return DiscoveryCache.from_file(
+            self._config_file_path.parent / "discovery-cache.json"
+        )
+
+
+_discovered_clients = DiscoveryCache()
+"""Clients discovered within this process, shared by all configurations."""
+
 
 config_unst_hook = make_dict_unstructure_fn(
     Config, converter, _config_file_path=override(omit=True)
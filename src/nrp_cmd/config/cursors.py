@@ -0,0 +1,110 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Cursors of incremental harvests, usually stored in .nrp/harvest-cursors.json."""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+from attrs import define, field
+from cattrs.gen import make_dict_structure_fn, make_dict_unstructure_fn, override
+
+from ..converter import converter
+
+
+@define(kw_only=True, frozen=True, order=True)
+class HarvestCursor:
+    """Position of an incremental harvest.
+
+    Records are ordered by their update timestamp and id, the id breaks ties
+    between records updated at the same time. A harvest starting at the cursor
+    returns only records that are after it.
+    """
+
+    updated: datetime
+    """Last update timestamp of the last harvested record."""
+
+    id: str
+    """Identifier of the last harvested record."""
+
+
+@define(kw_only=True)
+class HarvestCursors:
+    """Cursors of incremental harvests keyed by repository and query."""
+
+    cursors: dict[str, HarvestCursor] = field(factory=dict)
+    """Internal dictionary of cursors."""
+
+    _config_file_path: Path | None = None
+    """Path to the file from which the cursors have been loaded."""
+
+    @staticmethod
+    def key(
+        repository: str, query: str | None, model: str | None, status: str | None
+    ) -> str:
+        """Return the key of the cursor of a harvest."""
+        return json.dumps([repository, model, status, query or ""])
+
+    @classmethod
+    def from_file(cls, config_file_path: Path | None = None) -> "HarvestCursors":
+        """Load the cursors from a file."""
+        if not config_file_path:
+            config_file_path = Path.home() / ".nrp" / "harvest-cursors.json"
+
+        if config_file_path.exists():
+            ret = converter.structure(
+                json.loads(config_file_path.read_text(encoding="utf-8")), cls
+            )
+        else:
+            ret = cls()
+        ret._config_file_path = config_file_path
+        return ret
+
+    def save(self, path: Path | None = None) -> None:
+        """Save the cursors to a file, creating parent directory if needed."""
+        if path:
+            self._config_file_path = path
+        else:
+            path = self._config_file_path
+        assert path, "No path to save the cursors to."
+        path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        # write to a temporary file first so that an interrupted save
+        # does not lose the cursors of other harvests
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(converter.unstructure(self), indent=2, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        tmp_path.chmod(0o600)
+        tmp_path.replace(path)
+
+    def get(self, key: str) -> HarvestCursor | None:
+        """Get the cursor of a harvest, None if the harvest has not run yet."""
+        return self.cursors.get(key)
+
+    def __setitem__(self, key: str, value: HarvestCursor):
+        """Set the cursor of a harvest."""
+        self.cursors[key] = value
+
+    def __delitem__(self, key: str):
+        """Forget the cursor of a harvest, the next harvest will return all records."""
+        del self.cursors[key]
+
+
+converter.register_structure_hook(
+    HarvestCursors,
+    make_dict_structure_fn(
+        HarvestCursors, converter, _config_file_path=override(omit=True)
+    ),
+)
+converter.register_unstructure_hook(
+    HarvestCursors,
+    make_dict_unstructure_fn(
+        HarvestCursors, converter, _config_file_path=override(omit=True)
+    ),
+)
@@ -0,0 +1,115 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Cache of discovered repository clients, usually stored in ~/.nrp/discovery-cache.json.
+
+Finding the client that can handle a repository takes one or two requests
+to the repository (/.well-known/repository, the html root page) for each
+installed client. The result of the discovery - the name of the client's
+entry point and the api url of the repository - is kept for
+Config.discovery_ttl seconds in the memory of the process and in a file
+next to the configuration file, so that the following commands do not
+repeat the requests.
+"""
+
+import json
+import threading
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from attrs import define, field
+from cattrs.gen import make_dict_structure_fn, make_dict_unstructure_fn, override
+from yarl import URL
+
+from ..converter import converter
+
+
+@define(kw_only=True, frozen=True)
+class DiscoveredClient:
+    """Client discovered for a repository."""
+
+    client: str
+    """Name of the client's entry point (in the nrp_cmd.async_client and
+    nrp_cmd.sync_client groups)."""
+
+    api_url: URL
+    """API url of the repository, as returned by can_handle_repository."""
+
+    discovered: datetime
+    """When the client has been discovered."""
+
+    def is_fresh(self, ttl: timedelta) -> bool:
+        """Return True if the discovery is younger than the ttl."""
+        return datetime.now(UTC) - self.discovered < ttl
+
+
+@define(kw_only=True)
+class DiscoveryCache:
+    """Discovered clients keyed by the url of the repository."""
+
+    clients: dict[str, DiscoveredClient] = field(factory=dict)
+    """Internal dictionary of discovered clients."""
+
+    _config_file_path: Path | None = None
+    """Path to the file from which the cache has been loaded."""
+
+    @classmethod
+    def from_file(cls, config_file_path: Path | None = None) -> "DiscoveryCache":
+        """Load the cache from a file, an unreadable cache is treated as empty."""
+        if not config_file_path:
+            config_file_path = Path.home() / ".nrp" / "discovery-cache.json"
+
+        try:
+            ret = converter.structure(
+                json.loads(config_file_path.read_text(encoding="utf-8")), cls
+            )
+        except (OSError, ValueError, TypeError, KeyError):
+            ret = cls()
+        ret._config_file_path = config_file_path
+        return ret
+
+    def save(self, path: Path | None = None) -> None:
+        """Save the cache to a file, creating parent directory if needed."""
+        if path:
+            self._config_file_path = path
+        else:
+            path = self._config_file_path
+        assert path, "No path to save the cache to."
+        path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        # write to a temporary file first so that concurrent commands
+        # never read a partially written cache
+        tmp_path = path.with_suffix(f".{threading.get_native_id()}.tmp")
+        tmp_path.write_text(
+            json.dumps(converter.unstructure(self), indent=2), encoding="utf-8"
+        )
+        tmp_path.chmod(0o600)
+        tmp_path.replace(path)
+
+    def get(self, url: URL | str, ttl: timedelta) -> DiscoveredClient | None:
+        """Return the client discovered for the repository if it is not older than ttl."""
+        discovered = self.clients.get(str(url))
+        if discovered is not None and discovered.is_fresh(ttl):
+            return discovered
+        return None
+
+    def __setitem__(self, url: URL | str, value: DiscoveredClient) -> None:
+        """Set the client discovered for the repository."""
+        self.clients[str(url)] = value
+
+
+converter.register_structure_hook(
+    DiscoveryCache,
+    make_dict_structure_fn(
+        DiscoveryCache, converter, _config_file_path=override(omit=True)
+    ),
+)
+converter.register_unstructure_hook(
+    DiscoveryCache,
+    make_dict_unstructure_fn(
+        DiscoveryCache, converter, _config_file_path=override(omit=True)
+    ),
+)
@@ -49,6 +49,21 @@ class RepositoryConfig:
     credentials.
     """
 
+    stale_while_revalidate: bool = False
+    """Use the cached repository info immediately and refresh it in the background.
+
+    Commands then start without waiting for the repository, but they might
+    run on an outdated info (for example, a newly added model is not known
+    until the next command).
+    """
+
+    cache_responses: bool = False
+    """Cache the responses to GET requests (records, files, requests) in ~/.nrp/cache.
+
+    The cached responses are revalidated with If-None-Match/If-Modified-Since
+    headers on every request, so unchanged responses are not downloaded again.
+    """
+
     class Config:  # noqa
         extra = "forbid"
 
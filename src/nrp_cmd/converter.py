@@ -1,19 +1,26 @@
-import json as _json
+import contextlib
 import logging
 from collections.abc import Callable
+from contextvars import ContextVar
 from datetime import datetime
+from enum import Enum
 from functools import partial
+from pathlib import Path
+from types import NoneType, UnionType
 from typing import (
     Any,
+    Literal,
     Protocol,
     Self,
+    TypeAliasType,
     TypeVar,
+    Union,
     dataclass_transform,
     get_args,
     get_origin,
 )
 
-from attrs import Attribute, define, fields
+from attrs import define, evolve, fields, has, resolve_types
 from cattrs import Converter
 from cattrs.dispatch import StructureHook, UnstructureHook
 from cattrs.gen import (
@@ -24,8 +31,12 @@ from cattrs.gen import (
 )
 from yarl import URL
 
+from . import json_codec
 from .errors import StructureError, UnstructureError
 
+_keep_nulls: ContextVar[bool] = ContextVar("keep_nulls", default=False)
+"""Set while unstructuring with keep_nulls, the generated hooks keep null values then."""
+
 
 def _remove_nulls(data):
     if isinstance(data, dict):
@@ -42,13 +53,55 @@ def _remove_nulls(data):
             _remove_nulls(item)
 
 
+def _unstructure_json(value: Any) -> Any:
+    """Unstructure a json-like value (extra data, Any-typed fields) without nulls.
+
+    Containers of scalars only, the most common case, are checked without
+    a python-level loop and returned as they are, other containers are copied
+    without nulls (the structured object is never modified). Values of non-json
+    types go through the converter.
+    """
+    if isinstance(value, dict):
+        if _JSON_SCALARS.issuperset(map(type, value.values())):
+            return value
+        return {
+            k: v if v.__class__ in _JSON_SCALARS else _unstructure_json(v)
+            for k, v in value.items()
+            if v is not None
+        }
+    if isinstance(value, list):
+        if _JSON_SCALARS.issuperset(map(type, value)):
+            return value
+        return [
+            v if v.__class__ in _JSON_SCALARS else _unstructure_json(v)
+            for v in value
+            if v is not None
+        ]
+    if isinstance(value, (str, int, float)):
+        return value
+    return converter.unstructure(value)
+
+
+_JSON_SCALARS = frozenset((str, int, float, bool))
+
+
 class NullRemovingConverter(Converter):
     def unstructure(
         self, obj: Any, unstructure_as: Any = None, keep_nulls=False
     ) -> Any:
         try:
-            ret = super().unstructure(obj, unstructure_as)
-            if not keep_nulls:
+            if keep_nulls:
+                token = _keep_nulls.set(True)
+                try:
+                    return super().unstructure(obj, unstructure_as)
+                finally:
+                    _keep_nulls.reset(token)
+            hook = self.get_unstructure_hook(
+                obj.__class__ if unstructure_as is None else unstructure_as
+            )
+            ret = hook(obj)
+            # hooks generated by make_unstructure_hook drop the nulls themselves
+            if not getattr(hook, "strips_nulls", False):
                 _remove_nulls(ret)
             return ret
         except Exception as e:
@@ -80,32 +133,155 @@ class TypeHookUnstructureWrapper(Protocol):
         ...
 
 
-def structure_extra_data_hook(data: Any, type_: type, previous: StructureHook) -> Any:
-    """Structure hook for extra data that moves extra data to a separate _extra_data attribute."""
-    ret = previous(data, type)
-    keys: set[str] = set()
+def _resolve_type_alias(type_: Any) -> Any:
+    while isinstance(type_, TypeAliasType):
+        type_ = type_.__value__
+    return type_
+
+
+def _is_nullable(type_: Any) -> bool:
+    """Return True if a field of the type might hold None."""
+    type_ = _resolve_type_alias(type_)
+    if type_ is Any or isinstance(type_, str):
+        # unresolved annotations are treated as nullable
+        return True
+    if get_origin(type_) in (UnionType, Union):
+        return any(_is_nullable(arg) for arg in get_args(type_))
+    return type_ is NoneType
+
 
-    fld: Attribute
-    for fld in fields(type_):
-        if fld.alias:
-            keys.add(fld.alias)
-        else:
-            keys.add(fld.name)
-    extra_keys = data.keys() - keys
-    extra_data = {k: data[k] for k in extra_keys}
-    ret._extra_data = extra_data
-    return ret
+def _is_null_free(type_: Any, nullable: bool = False) -> bool:
+    """Return True if unstructured values of the type never contain nulls.
 
+    Attrs classes are null free, as their hooks are generated by make_unstructure_hook,
+    json-like containers (Any, dict[str, Any], ...) might contain nulls anywhere.
 
-def unstructure_extra_data_hook(data: Any, previous: UnstructureHook) -> Any:
-    """Unstructure hook for extra data that merges extra data from _extra_data attribute."""
-    if "_extra_data" not in data.__dict__:
-        return previous(data)
-    extra_data = data._extra_data
-    data = previous(data)
-    data.pop("_extra_data", None)
-    data.update(extra_data)
-    return data
+    :param nullable: the value itself might be None (it is dropped by the caller)
+    """
+    type_ = _resolve_type_alias(type_)
+    if isinstance(type_, TypeVar):
+        return type_.__bound__ is not None and _is_null_free(type_.__bound__)
+    origin = get_origin(type_)
+    args = get_args(type_)
+    if origin in (UnionType, Union):
+        return all(
+            _is_null_free(arg) if arg is not NoneType else nullable for arg in args
+        )
+    if origin is Literal:
+        return None not in args
+    if origin in (list, set, frozenset):
+        return bool(args) and _is_null_free(args[0])
+    if origin is dict:
+        return bool(args) and all(_is_null_free(arg) for arg in args)
+    if isinstance(origin, type) and has(origin):
+        return True
+    if isinstance(type_, type):
+        return has(type_) or issubclass(type_, _NULL_FREE_TYPES)
+    return False
+
+
+_NULL_FREE_TYPES = (str, int, float, Enum, URL, datetime, Path)
+"""Types whose unstructured values are never None."""
+
+
+def make_structure_extra_data_hook(
+    type_: Any, previous: StructureHook
+) -> StructureHook:
+    """Wrap a structure hook to move extra data to a separate _extra_data attribute."""
+    known_keys = frozenset(
+        fld.alias or fld.name for fld in fields(get_origin(type_) or type_)
+    )
+
+    def structure_extra_data(data: Any, type_: type) -> Any:
+        ret = previous(data, type_)
+        ret._extra_data = {k: v for k, v in data.items() if k not in known_keys}
+        return ret
+
+    return structure_extra_data
+
+
+def make_unstructure_hook(
+    type_: Any,
+    overrides: dict[str, AttributeOverride] | None = None,
+    allow_extra_data: bool = False,
+    wrappers: list[TypeHookUnstructureWrapper] | None = None,
+) -> UnstructureHook:
+    """Generate unstructure hook of an attrs class that drops null values.
+
+    The hook is specialized for the class: fields with None default are skipped
+    by the cattrs-generated code, json-like fields are copied without nulls,
+    other fields that might be None are dropped at the end. Extra data are
+    merged into the result if allow_extra_data is set. Nulls are kept when
+    unstructuring with keep_nulls.
+
+    :param overrides:        cattrs overrides of the fields
+    :param allow_extra_data: merge the _extra_data attribute into the output
+    :param wrappers:         functions wrapping the generated unstructure functions
+    """
+    overrides = overrides or {}
+    cls = get_origin(type_) or type_
+    with contextlib.suppress(NameError, TypeError):
+        resolve_types(cls)
+
+    stripping_overrides = dict(overrides)
+    nullable_keys: list[str] = []
+    for fld in fields(cls):
+        field_override = overrides.get(fld.name) or override()
+        if field_override.omit or not fld.init:
+            continue
+        changes: dict[str, Any] = {}
+        if fld.default is not None:
+            changes["omit_if_default"] = False
+            if _is_nullable(fld.type):
+                nullable_keys.append(field_override.rename or fld.name)
+        if not _is_null_free(fld.type, nullable=True):
+            changes["unstruct_hook"] = _unstructure_json
+        if changes:
+            stripping_overrides[fld.name] = evolve(field_override, **changes)
+
+    with_nulls = make_dict_unstructure_fn(type_, converter, **overrides)
+    without_nulls = make_dict_unstructure_fn(
+        type_, converter, _cattrs_omit_if_default=True, **stripping_overrides
+    )
+    for wrapper in wrappers or []:
+        with_nulls = partial(wrapper, previous=with_nulls)
+        without_nulls = partial(wrapper, previous=without_nulls)
+
+    def unstructure_with_nulls(obj: Any) -> Any:
+        ret = with_nulls(obj)
+        if allow_extra_data and (extra_data := obj.__dict__.get("_extra_data")):
+            ret.update(extra_data)
+        return ret
+
+    def unstructure_without_nulls(obj: Any) -> Any:
+        ret = without_nulls(obj)
+        if wrappers:
+            _remove_nulls(ret)
+        for key in nullable_keys:
+            if key in ret and ret[key] is None:
+                del ret[key]
+        if allow_extra_data and (extra_data := obj.__dict__.get("_extra_data")):
+            for key, value in extra_data.items():
+                if value.__class__ in _JSON_SCALARS:
+                    ret[key] = value
+                elif value is not None:
+                    ret[key] = _unstructure_json(value)
+        return ret
+
+    def unstructure(obj: Any) -> Any:
+        if _keep_nulls.get():
+            return unstructure_with_nulls(obj)
+        return unstructure_without_nulls(obj)
+
+    unstructure.strips_nulls = True  # type: ignore[attr-defined]
+    return unstructure
+
+
+# attrs classes without extend_serialization get null-dropping hooks as well
+converter.register_unstructure_hook_factory(
+    has,
+    lambda type_: make_unstructure_hook(type_),
+)
 
 
 class TypeHookBuilder:
@@ -154,10 +330,6 @@ class TypeHookBuilder:
 
     def build_type_hook(self) -> None:
         """Build and register the type hook."""
-        if self._allow_extra_data:
-            self._structure_wrappers.append(structure_extra_data_hook)
-            self._unstructure_wrappers.append(unstructure_extra_data_hook)
-
         structure_overrides: dict[str, AttributeOverride] = {}
         for serialized_name, model_name in self._rename_fields.items():
             structure_overrides[model_name] = override(rename=serialized_name)
@@ -173,35 +345,17 @@ class TypeHookBuilder:
         st_hook: StructureHook = make_dict_structure_fn(
             self._type, converter, **structure_overrides
         )
+        for structure_wrapper in self._structure_wrappers:
+            st_hook = partial(structure_wrapper, previous=st_hook)
+        if self._allow_extra_data:
+            st_hook = make_structure_extra_data_hook(self._type, st_hook)
 
-        unst_hook: UnstructureHook = make_dict_unstructure_fn(
-            self._type, converter, **unstructure_overrides
+        unst_hook = make_unstructure_hook(
+            self._type,
+            unstructure_overrides,
+            allow_extra_data=self._allow_extra_data,
+            wrappers=self._unstructure_wrappers,
         )
-        if self._structure_wrappers:
-            structure_wrappers: list[StructureHook] = []
-            for structure_wrapper in self._structure_wrappers:
-                if structure_wrappers:
-                    structure_wrappers.append(
-                        partial(structure_wrapper, previous=structure_wrappers[-1])
-                    )
-                else:
-                    structure_wrappers.append(
-                        partial(structure_wrapper, previous=st_hook)
-                    )
-            st_hook = structure_wrappers[-1]
-
-        if self._unstructure_wrappers:
-            unstructure_wrappers: list[UnstructureHook] = []
-            for unstructure_wrapper in self._unstructure_wrappers:
-                if unstructure_wrappers:
-                    unstructure_wrappers.append(
-                        partial(unstructure_wrapper, previous=unstructure_wrappers[-1])
-                    )
-                else:
-                    unstructure_wrappers.append(
-                        partial(unstructure_wrapper, previous=unst_hook)
-                    )
-            unst_hook = unstructure_wrappers[-1]
 
         converter.register_structure_hook(self._type, st_hook)
         converter.register_unstructure_hook(self._type, unst_hook)
@@ -335,11 +489,11 @@ def deserialize_rest_response[T](
                     },
                     arg_type,
                 )
-                for x in _json.loads(json_payload)
+                for x in json_codec.loads(json_payload)
             ]
         ret = converter.structure(
             {
-                **_json.loads(json_payload),
+                **json_codec.loads(json_payload),
                 # "context": result_context,
             },
             result_class,
@@ -0,0 +1,286 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Stores of already seen keys, used to drop duplicate records during scans.
+
+A scan split into windows might return the same record more than once (for
+example if it is modified during the scan). For small scans, a python set of
+the keys is the fastest option, but it takes about a hundred bytes per record.
+For large scans there are:
+
+* a hash table of 64-bit fingerprints of the keys in a flat array, taking
+  12 to 23 bytes per record. Two different keys collide with probability
+  of about n^2 / 2^65, that is once per ~10^5 scans of 10 million records.
+  The fingerprint is python's (randomized) string hash, so the table is
+  valid only within a single process,
+* a sqlite database in a temporary file, taking almost no memory. An in-memory
+  Bloom filter answers most lookups of new keys, so the database is queried
+  only when the filter reports a possible duplicate; inserts are batched.
+"""
+
+from __future__ import annotations
+
+import math
+import sqlite3
+import tempfile
+from array import array
+from enum import StrEnum
+from pathlib import Path
+from typing import Protocol
+
+
+class DedupStoreType(StrEnum):
+    """Available dedup stores."""
+
+    MEMORY = "memory"
+    HASH = "hash"
+    SQLITE = "sqlite"
+
+
+class DedupStore(Protocol):
+    """Store of keys that have already been seen."""
+
+    def add(self, key: str) -> bool:
+        """Add the key to the store.
+
+        :return: True if the key has not been seen before
+        """
+        ...
+
+    def __contains__(self, key: object) -> bool:
+        """Return True if the key has been seen."""
+        ...
+
+    def __len__(self) -> int:
+        """Return the number of seen keys."""
+        ...
+
+    def close(self) -> None:
+        """Release the resources of the store."""
+        ...
+
+
+def _fingerprint(key: str) -> int:
+    """Return a non-zero 64-bit fingerprint of the key (0 marks an empty slot)."""
+    return (hash(key) & 0xFFFF_FFFF_FFFF_FFFF) or 1
+
+
+class MemoryDedupStore:
+    """Dedup store keeping the keys in a python set."""
+
+    def __init__(self) -> None:
+        """Initialize the store."""
+        self._keys: set[str] = set()
+
+    def add(self, key: str) -> bool:
+        """Add the key, returning True if it is new."""
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+    def __contains__(self, key: object) -> bool:
+        """Return True if the key has been seen."""
+        return key in self._keys
+
+    def __len__(self) -> int:
+        """Return the number of seen keys."""
+        return len(self._keys)
+
+    def close(self) -> None:
+        """Forget the keys."""
+        self._keys.clear()
+
+
+class HashDedupStore:
+    """Dedup store keeping 64-bit fingerprints of the keys in an open addressing table."""
+
+    _MAX_LOAD = 0.7
+    """The table is doubled when it is fuller than this."""
+
+    def __init__(self, capacity: int = 1 << 16) -> None:
+        """Initialize the store.
+
+        :param capacity: initial number of slots, rounded up to a power of two
+        """
+        self._slots = array("Q", bytes(8 * (1 << max(4, (capacity - 1).bit_length()))))
+        self._count = 0
+
+    def _find(self, fingerprint: int) -> int:
+        """Return the slot of the fingerprint or the empty slot where it belongs."""
+        mask = len(self._slots) - 1
+        slot = fingerprint & mask
+        slots = self._slots
+        while slots[slot] and slots[slot] != fingerprint:
+            slot = (slot + 1) & mask
+        return slot
+
+    def add(self, key: str) -> bool:
+        """Add the key, returning True if it is new."""
+        fingerprint = _fingerprint(key)
+        slot = self._find(fingerprint)
+        if self._slots[slot]:
+            return False
+        self._slots[slot] = fingerprint
+        self._count += 1
+        if self._count > len(self._slots) * self._MAX_LOAD:
+            self._grow()
+        return True
+
+    def _grow(self) -> None:
+        old_slots = self._slots
+        self._slots = array("Q", bytes(16 * len(old_slots)))
+        for fingerprint in old_slots:
+            if fingerprint:
+                self._slots[self._find(fingerprint)] = fingerprint
+
+    def __contains__(self, key: object) -> bool:
+        """Return True if the key has (probably) been seen."""
+        if not isinstance(key, str):
+            return False
+        return bool(self._slots[self._find(_fingerprint(key))])
+
+    def __len__(self) -> int:
+        """Return the number of seen keys."""
+        return self._count
+
+    def close(self) -> None:
+        """Release the table."""
+        self._slots = array("Q", bytes(8 * 16))
+        self._count = 0
+
+
+class BloomFilter:
+    """Bloom filter over strings, with k hash functions derived by double hashing."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        """Initialize the filter.
+
+        :param capacity:    expected number of keys, the error rate grows above it
+        :param error_rate:  probability that a key not in the filter is reported as present
+        """
+        bit_count = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._bit_count = bit_count
+        self._hash_count = max(1, round(bit_count / capacity * math.log(2)))
+        self._bits = bytearray((bit_count + 7) // 8)
+
+    def _positions(self, key: str) -> list[int]:
+        # the two halves of the 64-bit string hash seed the double hashing
+        fingerprint = _fingerprint(key)
+        h1, h2 = fingerprint & 0xFFFF_FFFF, (fingerprint >> 32) | 1
+        bit_count = self._bit_count
+        return [(h1 + i * h2) % bit_count for i in range(self._hash_count)]
+
+    def add(self, key: str) -> bool:
+        """Add the key, returning True if it was (possibly) present before."""
+        present = True
+        bits = self._bits
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                present = False
+                bits[position >> 3] |= mask
+        return present
+
+    def __contains__(self, key: object) -> bool:
+        """Return True if the key might have been added."""
+        if not isinstance(key, str):
+            return False
+        bits = self._bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class SqliteDedupStore:
+    """Dedup store keeping the keys in a sqlite database with a Bloom prefilter."""
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        expected_count: int = 1_000_000,
+        batch_size: int = 10_000,
+    ) -> None:
+        """Initialize the store.
+
+        :param path:            path to the database, a temporary file removed
+                                on close if not set
+        :param expected_count:  expected number of keys, used to size the Bloom filter
+        :param batch_size:      number of new keys inserted into the database at once
+        """
+        self._temporary_directory: tempfile.TemporaryDirectory[str] | None = None
+        if path is None:
+            self._temporary_directory = tempfile.TemporaryDirectory(
+                prefix="nrp-dedup-"
+            )
+            path = Path(self._temporary_directory.name) / "seen.sqlite"
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=OFF")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY) WITHOUT ROWID"
+        )
+        (self._count,) = self._db.execute("SELECT COUNT(*) FROM seen").fetchone()
+        self._bloom = BloomFilter(max(expected_count, self._count))
+        for (key,) in self._db.execute("SELECT key FROM seen"):
+            self._bloom.add(key)
+        self._pending: set[str] = set()
+        self._batch_size = batch_size
+
+    def add(self, key: str) -> bool:
+        """Add the key, returning True if it is new."""
+        if self._bloom.add(key) and key in self:
+            return False
+        self._pending.add(key)
+        self._count += 1
+        if len(self._pending) >= self._batch_size:
+            self._flush()
+        return True
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO seen (key) VALUES (?)",
+                ((key,) for key in self._pending),
+            )
+            self._db.execute("COMMIT")
+            self._pending.clear()
+
+    def __contains__(self, key: object) -> bool:
+        """Return True if the key has been seen."""
+        if not isinstance(key, str) or key not in self._bloom:
+            return False
+        if key in self._pending:
+            return True
+        return (
+            self._db.execute("SELECT 1 FROM seen WHERE key = ?", (key,)).fetchone()
+            is not None
+        )
+
+    def __len__(self) -> int:
+        """Return the number of seen keys."""
+        return self._count
+
+    def close(self) -> None:
+        """Store the pending keys and close the database."""
+        self._flush()
+        self._db.close()
+        if self._temporary_directory is not None:
+            self._temporary_directory.cleanup()
+
+
+def make_dedup_store(store_type: DedupStoreType | str) -> DedupStore:
+    """Create a dedup store of the given type."""
+    match DedupStoreType(store_type):
+        case DedupStoreType.MEMORY:
+            return MemoryDedupStore()
+        case DedupStoreType.HASH:
+            return HashDedupStore()
+        case DedupStoreType.SQLITE:
+            return SqliteDedupStore()
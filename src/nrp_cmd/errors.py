@@ -28,10 +28,21 @@ class RepositoryNetworkError(RepositoryCommunicationError):
 class RepositoryJSONError(RepositoryCommunicationError):
     """Raised from a repository when an error occurs."""
 
-    def __init__(self, request_info: Any, response: dict[str, Any]):  # noqa ANN401
-        """Initialize the error."""
+    def __init__(
+        self,
+        request_info: Any,  # noqa ANN401
+        response: dict[str, Any],
+        status: int | None = None,
+    ):
+        """Initialize the error.
+
+        :param request_info:    the request that failed
+        :param response:        the JSON body of the response
+        :param status:          the http status code of the response, if known
+        """
         self._request_info = request_info
         self._response = response
+        self._status = status
 
     @property
     def request_info(self) -> Any:
@@ -43,6 +54,11 @@ class RepositoryJSONError(RepositoryCommunicationError):
         """Return the JSON response."""
         return self._response
 
+    @property
+    def status(self) -> int | None:
+        """Return the http status code of the response, if known."""
+        return self._status
+
     def __repr__(self) -> str:
         """Return the representation of the error."""
         return f"{self._request_info.url} : {json.dumps(self.json)}"
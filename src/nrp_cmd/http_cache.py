@@ -0,0 +1,247 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Cache of http responses revalidated by conditional requests.
+
+A cached response keeps the payload together with its validators (the ETag
+and Last-Modified headers). When the response is needed again, the
+connections' get_revalidated sends them in If-None-Match and
+If-Modified-Since headers, and if the server answers 304 Not Modified,
+the cached payload is used without downloading it again.
+
+ResponseCache keeps the recently used responses in memory and stores them
+on disk, one json file per url, in the NRP_CMD_CACHE_DIR directory
+(~/.nrp/cache by default). Both are limited in size, the least recently
+used responses are evicted first. The cache is an optimization only:
+unreadable entries are treated as missing and failures to write them
+are ignored.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from attrs import define, evolve
+
+from .converter import converter
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from yarl import URL
+
+    from .types.auth import BearerTokenForHost
+
+
+@define(kw_only=True, frozen=True)
+class CachedResponse:
+    """Payload of a response with its validators."""
+
+    url: str
+    """Url of the request."""
+
+    payload: str
+    """Body of the response."""
+
+    etag: str | None = None
+    """Value of the ETag header, including the quotes."""
+
+    last_modified: str | None = None
+    """Value of the Last-Modified header."""
+
+    fetched: datetime
+    """When the response has been downloaded or last revalidated."""
+
+    @property
+    def validation_headers(self) -> dict[str, str]:
+        """Headers of a conditional request revalidating this response."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def is_fresh(self, max_age: timedelta) -> bool:
+        """Return True if the response has been (re)validated within max_age."""
+        return datetime.now(UTC) - self.fetched < max_age
+
+    def revalidated(self) -> CachedResponse:
+        """Return the response marked as validated now."""
+        return evolve(self, fetched=datetime.now(UTC))
+
+
+def default_cache_directory() -> Path:
+    """Return the directory of the response cache."""
+    if "NRP_CMD_CACHE_DIR" in os.environ:
+        return Path(os.environ["NRP_CMD_CACHE_DIR"])
+    return Path.home() / ".nrp" / "cache"
+
+
+def response_variant(
+    tokens: list[BearerTokenForHost], url: URL, headers: Mapping[str, str]
+) -> str:
+    """Return the variant of a response to a GET request.
+
+    Responses to the same url differ for different Accept headers and for
+    different users, so the hash of the token sent to the url is a part
+    of the variant.
+
+    :param tokens:      tokens of the connection
+    :param url:         url of the request
+    :param headers:     headers of the request
+    """
+    variant = headers.get("Accept", "")
+    for token in tokens:
+        if url.host == token.host_url.host and url.scheme == token.host_url.scheme:
+            token_hash = hashlib.sha256(token.token.encode("utf-8")).hexdigest()
+            return f"{variant}|{token_hash[:16]}"
+    return variant
+
+
+DEFAULT_MEMORY_LIMIT = 16 * 1024 * 1024
+"""Default size of the payloads kept in memory, in bytes."""
+
+DEFAULT_DISK_LIMIT = 256 * 1024 * 1024
+"""Default size of the cache directory, in bytes."""
+
+
+class ResponseCache:
+    """Responses kept in a memory LRU backed by one json file per url on disk.
+
+    A response can have variants, for example the same url requested
+    with a different Accept header or authorization. They are cached
+    separately.
+
+    When the size of the files exceeds disk_limit, the least recently used
+    files are removed (reading a file updates its modification time).
+    The directory is shared by all the commands, so the size is only
+    estimated between the evictions.
+    """
+
+    def __init__(
+        self,
+        directory: Path | None = None,
+        *,
+        memory_limit: int = DEFAULT_MEMORY_LIMIT,
+        disk_limit: int = DEFAULT_DISK_LIMIT,
+    ) -> None:
+        """Initialize the cache.
+
+        :param directory:       directory of the cache, default_cache_directory() if not set
+        :param memory_limit:    maximum size of the payloads kept in memory, in bytes
+        :param disk_limit:      maximum size of the cache directory, in bytes
+        """
+        self.directory = directory or default_cache_directory()
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self._memory: OrderedDict[tuple[str, str], CachedResponse] = OrderedDict()
+        self._memory_usage = 0
+        self._disk_usage: int | None = None
+        self._lock = threading.Lock()
+
+    def _path(self, url: str, variant: str = "") -> Path:
+        key = f"{url}\n{variant}" if variant else url
+        return (
+            self.directory / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+        )
+
+    def get(self, url: object, variant: str = "") -> CachedResponse | None:
+        """Return the cached response for the url, None if it is not cached.
+
+        :param url:         url of the request
+        :param variant:     variant of the response
+        """
+        key = (str(url), variant)
+        with self._lock:
+            response = self._memory.get(key)
+            if response is not None:
+                self._memory.move_to_end(key)
+                return response
+
+        path = self._path(*key)
+        try:
+            response = converter.structure(
+                json.loads(path.read_text(encoding="utf-8")), CachedResponse
+            )
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+        # guard against hash collisions and files copied between caches
+        if response.url != key[0]:
+            return None
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        self._remember(key, response)
+        return response
+
+    def put(self, response: CachedResponse, variant: str = "") -> None:
+        """Store the response, replacing the previous response for the same url.
+
+        :param response:    the response
+        :param variant:     variant of the response
+        """
+        self._remember((response.url, variant), response)
+        path = self._path(response.url, variant)
+        with contextlib.suppress(OSError):
+            path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+            # write to a temporary file first so that concurrent commands
+            # never read a partially written response
+            tmp_path = path.with_suffix(f".{threading.get_native_id()}.tmp")
+            tmp_path.write_text(
+                json.dumps(converter.unstructure(response)), encoding="utf-8"
+            )
+            tmp_path.chmod(0o600)
+            written = tmp_path.stat().st_size
+            replaced = path.stat().st_size if path.exists() else 0
+            tmp_path.replace(path)
+            self._evict_files(written - replaced)
+
+    def _remember(self, key: tuple[str, str], response: CachedResponse) -> None:
+        """Keep the response in memory, evicting the least recently used ones."""
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_usage -= len(previous.payload)
+            if len(response.payload) > self.memory_limit:
+                return
+            self._memory[key] = response
+            self._memory_usage += len(response.payload)
+            while self._memory_usage > self.memory_limit:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_usage -= len(evicted.payload)
+
+    def _evict_files(self, added: int) -> None:
+        """Remove the least recently used files if the directory is too large."""
+        with self._lock:
+            if self._disk_usage is not None:
+                self._disk_usage += added
+                if self._disk_usage <= self.disk_limit:
+                    return
+            files = []
+            for path in self.directory.glob("*.json"):
+                with contextlib.suppress(OSError):
+                    stat = path.stat()
+                    files.append((stat.st_mtime, stat.st_size, path))
+            usage = sum(size for _, size, _ in files)
+            if usage > self.disk_limit:
+                # evict a bit more so that the directory is not scanned on every put
+                target = self.disk_limit * 3 // 4
+                for _, size, path in sorted(files):
+                    if usage <= target:
+                        break
+                    with contextlib.suppress(OSError):
+                        path.unlink()
+                        usage -= size
+            self._disk_usage = usage
@@ -0,0 +1,157 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""JSON encoding and decoding used by the clients and the commandline.
+
+The codec is chosen at import time: orjson if it is installed, then msgspec,
+then the standard library json module. The choice can be forced by setting
+the NRP_CMD_JSON_BACKEND environment variable to orjson, msgspec or json.
+
+All codecs decode bytes or str, encode to compact utf-8 bytes (non-ascii
+characters are not escaped) and raise ValueError on invalid input.
+"""
+
+import contextlib
+import json
+import os
+from collections.abc import Callable
+from typing import Any, Protocol
+
+
+class JSONCodec(Protocol):
+    """Encoder and decoder of json."""
+
+    name: str
+    """Name of the codec."""
+
+    def loads(self, data: bytes | bytearray | str) -> Any:
+        """Decode json.
+
+        :raises ValueError: if the data is not a valid json
+        """
+        ...
+
+    def dumps(self, data: Any) -> bytes:
+        """Encode data to compact json."""
+        ...
+
+
+class StdlibCodec:
+    """Codec using the json module of the standard library."""
+
+    name = "json"
+
+    def __init__(self) -> None:
+        """Initialize the codec."""
+        self._encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def loads(self, data: bytes | bytearray | str) -> Any:
+        """Decode json.
+
+        :raises ValueError: if the data is not a valid json
+        """
+        return json.loads(data)
+
+    def dumps(self, data: Any) -> bytes:
+        """Encode data to compact json."""
+        return self._encoder.encode(data).encode("utf-8")
+
+
+class OrjsonCodec:
+    """Codec using orjson."""
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        """Initialize the codec, raising ImportError if orjson is not installed."""
+        import orjson
+
+        # orjson.JSONDecodeError is a subclass of ValueError
+        self.loads = orjson.loads
+        self._dumps = orjson.dumps
+        self._option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, data: Any) -> bytes:
+        """Encode data to compact json."""
+        return self._dumps(data, option=self._option)
+
+
+class MsgspecCodec:
+    """Codec using msgspec."""
+
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        """Initialize the codec, raising ImportError if msgspec is not installed."""
+        import msgspec
+
+        self._decode = msgspec.json.Decoder().decode
+        self._decode_error = msgspec.DecodeError
+        self.dumps = msgspec.json.Encoder().encode
+
+    def loads(self, data: bytes | bytearray | str) -> Any:
+        """Decode json.
+
+        :raises ValueError: if the data is not a valid json
+        """
+        try:
+            return self._decode(data)
+        except self._decode_error as e:
+            raise ValueError(str(e)) from e
+
+
+CODECS: dict[str, Callable[[], JSONCodec]] = {
+    OrjsonCodec.name: OrjsonCodec,
+    MsgspecCodec.name: MsgspecCodec,
+    StdlibCodec.name: StdlibCodec,
+}
+"""Known codecs in the order of preference."""
+
+
+def make_codec(name: str) -> JSONCodec:
+    """Create a codec by its name.
+
+    :raises KeyError:       if there is no codec with this name
+    :raises ImportError:    if the library of the codec is not installed
+    """
+    return CODECS[name]()
+
+
+def available_codecs() -> list[JSONCodec]:
+    """Return the codecs whose libraries are installed, in the order of preference."""
+    ret = []
+    for name in CODECS:
+        with contextlib.suppress(ImportError):
+            ret.append(make_codec(name))
+    return ret
+
+
+def _default_codec() -> JSONCodec:
+    name = os.environ.get("NRP_CMD_JSON_BACKEND")
+    if name:
+        if name not in CODECS:
+            raise ValueError(
+                f"Unknown json backend {name} in NRP_CMD_JSON_BACKEND, "
+                f"use one of {', '.join(CODECS)}"
+            )
+        return make_codec(name)
+    return available_codecs()[0]
+
+
+codec = _default_codec()
+"""The codec used by nrp_cmd."""
+
+loads = codec.loads
+"""Decode json with the default codec."""
+
+dumps = codec.dumps
+"""Encode data to compact json bytes with the default codec."""
+
+
+def dumps_str(data: Any) -> str:
+    """Encode data to compact json string with the default codec."""
+    return dumps(data).decode("utf-8")
@@ -4,6 +4,8 @@ from __future__ import annotations
 
 import contextlib
 import contextvars
+import logging
+import time
 from threading import RLock
 from typing import TYPE_CHECKING, Any, Protocol, override
 
@@ -12,6 +14,8 @@ from tqdm import tqdm
 if TYPE_CHECKING:
     from collections.abc import Generator
 
+log = logging.getLogger("invenio_nrp.progress")
+
 
 class DummyLock:
     """A dummy lock that does nothing."""
@@ -204,6 +208,49 @@ class DummyProgress(Progress):
         pass
 
 
+class TransferStatistics:
+    """Throughput and CPU cost of a data transfer.
+
+    The CPU time is measured for the whole process, so with several concurrent
+    transfers it is the cost of all of them per GB of this one.
+    """
+
+    def __init__(self) -> None:
+        """Start measuring."""
+        self.started = time.monotonic()
+        self.cpu_started = time.process_time()
+        self.transferred = 0
+
+    def increment(self, count: int) -> None:
+        """Record transferred bytes (negative on rollback of a failed attempt)."""
+        self.transferred += count
+
+    @property
+    def elapsed(self) -> float:
+        """Wall clock seconds since the start of the transfer."""
+        return time.monotonic() - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Transferred bytes per second."""
+        elapsed = self.elapsed
+        return self.transferred / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def cpu_per_gb(self) -> float:
+        """CPU seconds spent per transferred GB (10^9 bytes)."""
+        if self.transferred <= 0:
+            return 0.0
+        return (time.process_time() - self.cpu_started) / (self.transferred / 1e9)
+
+    def __str__(self) -> str:
+        """Return a human readable summary."""
+        return (
+            f"{self.transferred / 1e6:.1f} MB in {self.elapsed:.1f} s, "
+            f"{self.throughput / 1e6:.1f} MB/s, {self.cpu_per_gb:.2f} CPU s/GB"
+        )
+
+
 class TQDMProgressBar(ProgressBar):
     """A progress bar that uses tqdm to show progress."""
 
@@ -216,12 +263,26 @@ class TQDMProgressBar(ProgressBar):
         self.bar = tqdm(
             total=1, desc=desc, position=position, delay=0, leave=False, **extra_params
         )
+        self._desc = desc
+        # tqdm shows the throughput, data transfers add CPU cost per GB
+        self.statistics: TransferStatistics | None = (
+            TransferStatistics() if extra_params.get("unit") == "B" else None
+        )
+        self._statistics_shown = 0.0
 
     @override
     def increment(self, progress: int) -> None:
         self.bar.update(progress)
         with self.bar.get_lock():
             self._progress.increment(progress)
+        if self.statistics is not None:
+            self.statistics.increment(progress)
+            now = time.monotonic()
+            if now - self._statistics_shown >= 1:
+                self._statistics_shown = now
+                self.bar.set_postfix_str(
+                    f"{self.statistics.cpu_per_gb:.2f} CPU s/GB", refresh=False
+                )
 
     @override
     def set_value(self, progress: int) -> None:
@@ -241,6 +302,8 @@ class TQDMProgressBar(ProgressBar):
 
     @override
     def finish(self) -> None:
+        if self.statistics is not None and self.statistics.transferred:
+            log.debug("%s: %s", self._desc, self.statistics)
         self.bar.close()
         self._progress._finish_bar(self._position)
 
@@ -43,18 +43,34 @@ def _generate_rdm_vocabulary(
     )
 
 
+def rdm_version_from_homepage(homepage: str) -> int:
+    """Return the major version of Invenio RDM from the generator meta tag of the homepage.
+
+    :raises ValueError: if the homepage does not contain the version
+    """
+    grp = re.search('meta name="generator" content="InvenioRDM ([0-9.]+)"', homepage)
+    if grp:
+        return math.floor(float(grp.group(1)))
+    raise ValueError("Could not determine Invenio RDM version from homepage")
+
+
 def make_rdm_info(url: URL, verify_tls: bool = True) -> RepositoryInfo:
-    """If repository does not provide the info endpoint, we assume it is a plain invenio rdm."""
+    """If repository does not provide the info endpoint, we assume it is a plain invenio rdm.
+
+    This function blocks while downloading the homepage, the clients use
+    their introspection modules (async_client.invenio.introspection,
+    sync_client.invenio.introspection) instead.
+    """
     url = url.with_path("/")
     import requests
 
     homepage = requests.get(str(url), verify=verify_tls).text
-    grp = re.search('meta name="generator" content="InvenioRDM ([0-9.]+)"', homepage)
-    if grp:
-        rdm_version = math.floor(float(grp.group(1)))
-    else:
-        raise ValueError("Could not determine Invenio RDM version from homepage")
+    return rdm_info(url, rdm_version_from_homepage(homepage))
 
+
+def rdm_info(url: URL, rdm_version: int) -> RepositoryInfo:
+    """Return the repository info of an Invenio RDM repository of the given version."""
+    url = url.with_path("/")
     transfers = ["L"]
     if rdm_version >= 13:
         transfers.extend(["F", "R", "M"])
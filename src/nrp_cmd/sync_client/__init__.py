@@ -1,4 +1,5 @@
 import importlib.metadata as importlib_metadata
+import threading
 from functools import lru_cache
 
 from yarl import URL
@@ -11,12 +12,64 @@ from .doi import resolve_doi
 
 
 @lru_cache(maxsize=1)
+def sync_client_entry_points() -> dict[str, type[SyncRepositoryClient]]:
+    """Load all available synchronous client classes, keyed by their entry point names."""
+    return {
+        ep.name: ep.load()
+        for ep in importlib_metadata.entry_points(group="nrp_cmd.sync_client")
+    }
+
+
 def sync_client_classes() -> list[type[SyncRepositoryClient]]:
     """Load all available synchronous client classes."""
-    sync_client_classes: list[type[SyncRepositoryClient]] = []
-    for ep in importlib_metadata.entry_points(group="nrp_cmd.sync_client"):
-        sync_client_classes.append(ep.load())
-    return sync_client_classes
+    return list(sync_client_entry_points().values())
+
+
+_discovery_locks: dict[str, threading.Lock] = {}
+"""Locks of discoveries, keyed by the repository url."""
+_discovery_locks_guard = threading.Lock()
+
+
+def discover_sync_client(
+    repository_config: RepositoryConfig,
+    config: Config,
+    refresh: bool = False,
+) -> type[SyncRepositoryClient] | None:
+    """Find the client class that can handle the repository.
+
+    The discovered client is cached (see Config.discovery_ttl) and concurrent
+    discoveries of the same repository from several threads share a single probe
+    of the repository - the other threads wait for it and use the cached result.
+
+    :param repository_config: configuration of the repository
+    :param config: configuration holding the discovery cache
+    :param refresh: probe the repository even if the client is cached
+    :return: the client class or None if no installed client can handle
+             the repository
+    """
+    clients = sync_client_entry_points()
+    if not refresh:
+        discovered = config.get_discovered_client(repository_config.url)
+        if discovered is not None and discovered.client in clients:
+            return clients[discovered.client]
+
+    key = str(repository_config.url)
+    with _discovery_locks_guard:
+        lock = _discovery_locks.setdefault(key, threading.Lock())
+    with lock:
+        if not refresh:
+            # the client might have been discovered while waiting for the lock
+            discovered = config.get_discovered_client(repository_config.url)
+            if discovered is not None and discovered.client in clients:
+                return clients[discovered.client]
+        for name, sync_client_class in clients.items():
+            api_url = sync_client_class.can_handle_repository(
+                repository_config.url, verify_tls=repository_config.verify_tls
+            )
+            if api_url:
+                config.set_discovered_client(repository_config.url, name, api_url)
+                return sync_client_class
+    return None
 
 
 def get_sync_client(
@@ -28,6 +81,7 @@ def get_sync_client(
 
     :param repository: the repository alias or URL
     :param refresh: whether to refresh the client configuration from the server
+                    (and discover the client again, see discover_sync_client)
     :param max_connections: the maximum number of parallel connections
     :param config: the configuration to use. If not given, the configuration is loaded
     from the configuration file.
@@ -48,13 +102,9 @@ def get_sync_client(
     else:
         repository_config = config.find_repository(repository)
 
-    for sync_client_class in sync_client_classes():
-        if sync_client_class.can_handle_repository(
-            repository_config.url, verify_tls=repository_config.verify_tls
-        ):
-            return sync_client_class.from_configuration(
-                repository_config, refresh=refresh
-            )
+    sync_client_class = discover_sync_client(repository_config, config, refresh=refresh)
+    if sync_client_class is not None:
+        return sync_client_class.from_configuration(repository_config, refresh=refresh)
     raise ValueError(f"No sync client found for repository {repository_config.url}")
 
 
@@ -128,6 +178,7 @@ def resolve_record_id(
 
 __all__ = (
     "get_sync_client",
+    "discover_sync_client",
     "SyncRepositoryClient",
     "connection",
     "invenio",
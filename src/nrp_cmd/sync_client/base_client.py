@@ -14,17 +14,23 @@ from collections.abc import Iterator
 from contextlib import AbstractContextManager
 from enum import Enum
 from pathlib import Path
-from typing import Any, Protocol, Self, overload
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, BinaryIO, Literal, Protocol, Self, overload
 
 from yarl import URL
 
+from ..columnar import Columns
 from ..config import RepositoryConfig
+from ..dedup import DedupStore
 from ..types.files import TRANSFER_TYPE_LOCAL, File
 from ..types.info import RepositoryInfo
-from ..types.records import Record, RecordId, RecordList
+from ..types.records import LazyRecord, Record, RecordId, RecordList
 from ..types.requests import Request, RequestList, RequestType, RequestTypeList
 from .streams import DataSink, DataSource
 
+if TYPE_CHECKING:
+    import pyarrow as pa
+
 
 class RecordStatus(Enum):
     """Selector for records."""
@@ -79,6 +85,7 @@ class SyncRecordsClient(Protocol):
         """
         ...
 
+    @overload
     def read(
         self,
         record_id: RecordId,
@@ -86,12 +93,49 @@ class SyncRecordsClient(Protocol):
         model: str | None = None,
         status: RecordStatus | None = None,
         query: dict[str, str] | None = None,
-    ) -> Record:
+        raw: Literal[False] = False,
+    ) -> Record: ...
+
+    @overload
+    def read(
+        self,
+        record_id: RecordId,
+        *,
+        model: str | None = None,
+        status: RecordStatus | None = None,
+        query: dict[str, str] | None = None,
+        raw: Literal[True],
+    ) -> LazyRecord: ...
+
+    @overload
+    def read(
+        self,
+        record_id: RecordId,
+        *,
+        model: str | None = None,
+        status: RecordStatus | None = None,
+        query: dict[str, str] | None = None,
+        raw: bool,
+    ) -> Record | LazyRecord: ...
+
+    def read(
+        self,
+        record_id: RecordId,
+        *,
+        model: str | None = None,
+        status: RecordStatus | None = None,
+        query: dict[str, str] | None = None,
+        raw: bool = False,
+    ) -> Record | LazyRecord:
         """Read a record from the repository. Please provide either record_id or record_url, not both.
 
         :param record_id:       the id of the record. Could be either pid or url
         :param model:           optional model of the record
         :param query:           extra arguments to read, repository specific
+        :param raw:             return the json of the record wrapped in LazyRecord,
+                                structured into Record on attribute access. Changes
+                                to a LazyRecord are not tracked, modify its
+                                as_record() and pass that to update explicitly
         :return:                the record
         """
         ...
@@ -138,8 +182,12 @@ class SyncRecordsClient(Protocol):
         model: str | None = None,
         status: RecordStatus | None = None,
         facets: dict[str, str] | None = None,
+        raw: bool = False,
     ) -> RecordList:
-        """Search for records in the repository."""
+        """Search for records in the repository.
+
+        :param raw:             keep the hits as json wrapped in LazyRecord
+        """
         ...
 
     def next_page(self, *, record_list: RecordList) -> RecordList:
@@ -157,6 +205,11 @@ class SyncRecordsClient(Protocol):
         model: str | None = None,
         status: RecordStatus | None = None,
         facets: dict[str, str] | None = None,
+        prefetch: int = 2,
+        concurrency: int = 4,
+        queue_size: int = 16,
+        dedup: DedupStore | None = None,
+        raw: bool = False,
     ) -> AbstractContextManager[Iterator[Record]]:
         """Scan all the records in the repository.
 
@@ -176,6 +229,63 @@ class SyncRecordsClient(Protocol):
 
         Note: the with section is required so that we can clean up the resources
         if there is a break in the iteration.
+
+        :param prefetch:        number of pages fetched ahead of the consumer
+        :param concurrency:     number of parts of the result set scanned concurrently
+        :param queue_size:      number of fetched pages waiting for the consumer
+        :param dedup:           store of already returned record ids (nrp_cmd.dedup),
+                                records seen before are skipped
+        :param raw:             return the records as LazyRecord, see search
+        """
+        ...
+
+    def scan_batches(
+        self,
+        *,
+        columns: Columns | None = None,
+        batch_size: int = ...,
+        q: str | None = None,
+        model: str | None = None,
+        status: RecordStatus | None = None,
+        facets: dict[str, str] | None = None,
+        dedup: DedupStore | None = None,
+    ) -> AbstractContextManager[Iterator["pa.RecordBatch"]]:
+        """Scan the records into Arrow record batches (needs pyarrow).
+
+        Usage:
+
+        ```
+        with client.scan_batches(columns=["id", "metadata.title"]) as batches:
+            for batch in batches:
+                print(batch.num_rows)
+        ```
+
+        :param columns:         dotted paths of the columns, optionally mapped to their
+                                types, see nrp_cmd.columnar
+        :param batch_size:      number of rows of a batch
+        :param dedup:           store of already returned record ids, see scan
+        """
+        ...
+
+    def export_parquet(
+        self,
+        output: Path | str | BinaryIO,
+        *,
+        columns: Columns | None = None,
+        batch_size: int = ...,
+        compression: str = "zstd",
+        q: str | None = None,
+        model: str | None = None,
+        status: RecordStatus | None = None,
+        facets: dict[str, str] | None = None,
+        dedup: DedupStore | None = None,
+    ) -> int:
+        """Scan the records into a parquet file and return the number of records.
+
+        :param output:          path or binary stream of the parquet file
+        :param columns:         dotted paths of the columns, see scan_batches
+        :param batch_size:      number of rows of a row group
+        :param compression:     parquet compression codec
         """
         ...
 
@@ -252,6 +362,8 @@ class SyncFilesClient(Protocol):
         transfer_type: str = TRANSFER_TYPE_LOCAL,
         transfer_metadata: dict[str, Any] | None = None,
         progress: str | None = None,
+        resume: bool = False,
+        transfer_options: dict[str, Any] | None = None,
     ) -> File:
         """Upload a file to the repository.
 
@@ -260,6 +372,9 @@ class SyncFilesClient(Protocol):
         :param file: file to upload
         :param metadata: metadata of the file
         :param progress: if set, show subprogress with this name
+        :param resume: if set, resume an interrupted multipart upload of the same file
+        :param transfer_options: options of the client-side transfer implementation,
+                                 for example {"use_sendfile": True}
         """
         ...
 
@@ -542,6 +657,27 @@ class SyncRepositoryClient(Protocol):
 
     # endregion
 
+    def close(self) -> None:
+        """Close the client and release pooled http connections.
+
+        The client can still be used after it has been closed, the connections
+        will be re-established on the next request.
+        """
+        ...
+
+    def __enter__(self) -> Self:
+        """Use the client as a context manager that closes it on exit."""
+        ...
+
+    def __exit__(
+        self,
+        _ext: type[BaseException] | None,
+        _exc: BaseException | None,
+        _tb: TracebackType | None,
+    ) -> None:
+        """Close the client when leaving the context."""
+        ...
+
     @property
     def records(self) -> SyncRecordsClient:
         """Return client for accessing records."""
@@ -9,20 +9,25 @@
 
 import contextlib
 import inspect
-import json as _json
 import logging
+import queue
+import threading
 from collections.abc import Callable, Generator
+from datetime import UTC, datetime
 from functools import partial
-from typing import Any, Literal, cast, overload
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Literal, Self, cast, overload
 
 import requests
-from attrs import define, field
+from attrs import define, evolve, field
 from cattrs.dispatch import UnstructureHook
 from requests import adapters
 from requests.structures import CaseInsensitiveDict
 from urllib3.util import Retry
 from yarl import URL
 
+from ... import json_codec
 from ...converter import deserialize_rest_response
 from ...errors import (
     RepositoryClientError,
@@ -30,13 +35,16 @@ from ...errors import (
     RepositoryError,
     RepositoryServerError,
 )
+from ...http_cache import CachedResponse, ResponseCache, response_variant
 from ...progress import DummyProgressBar, ProgressBar
 from ...types.auth import BearerTokenForHost
-from ..streams.base import DataSink, DataSource
+from ..streams.base import DataSink, DataSource, ResumableDataSink
+from ..streams.file import is_range_completed
 from ..streams.progress import ProgressSink
 from .auth import BearerAuthentication
 from .aws_limits import MINIMAL_DOWNLOAD_PART_SIZE, adjust_download_multipart_params
-from .limiter import current_limiter
+from .limiter import current_limiter, current_limiter_var
+from .sendfile import FileReader
 
 log = logging.getLogger("invenio_nrp.sync_client.connection")
 communication_log = logging.getLogger("invenio_nrp.communication")
@@ -95,7 +103,7 @@ def raise_for_invenio_status(response: requests.Response) -> None:
     if not response.ok:
         payload_text = response.text
         try:
-            payload = _json.loads(payload_text)
+            payload = json_codec.loads(payload_text)
         except ValueError:
             payload = {
                 "status": response.status_code,
@@ -103,14 +111,25 @@ def raise_for_invenio_status(response: requests.Response) -> None:
             }
 
         if response.status_code >= 500:
-            raise RepositoryServerError(response.request, payload)
+            raise RepositoryServerError(response.request, payload, response.status_code)
         elif response.status_code >= 400:
-            raise RepositoryClientError(response.request, payload)
+            raise RepositoryClientError(response.request, payload, response.status_code)
         raise RepositoryCommunicationError(response.request, payload)
 
 
 class SyncConnection:
-    """Low-level synchronous connection to the repository."""
+    """Low-level synchronous connection to the repository.
+
+    The connection keeps http connections alive between requests. The underlying
+    urllib3 pools are shared by all threads using this connection, each concurrent
+    caller gets its own `requests.Session` from an internal pool of sessions, so
+    the connection can be used from multiple (Limited)threads at once.
+
+    The size of the http connection pool defaults to the capacity of the current
+    limiter, so that every request allowed by the limiter can reuse a kept-alive
+    connection. Call `close` (or use the connection as a context manager) to
+    release the connections.
+    """
 
     def __init__(
         self,
@@ -118,11 +137,25 @@ class SyncConnection:
         verify_tls: bool = True,
         retry_count: int = 5,
         retry_after_seconds: int = 1,
+        pool_maxsize: int | None = None,
+        response_cache: ResponseCache | None = None,
     ):
-        """Initialize the connection."""
+        """Initialize the connection.
+
+        :param tokens:              bearer tokens for the repository hosts
+        :param verify_tls:          verify TLS certificates
+        :param retry_count:         number of retries for idempotent requests
+        :param retry_after_seconds: base retry interval in seconds
+        :param pool_maxsize:        maximum number of kept-alive connections per host,
+                                    defaults to the capacity of the current limiter
+        :param response_cache:      cache of GET responses revalidated by conditional requests,
+                                    responses are not cached if not set
+        """
         self._verify_tls = verify_tls
         self._retry_count = retry_count
         self._retry_after_seconds = retry_after_seconds
+        self._pool_maxsize = pool_maxsize
+        self._response_cache = response_cache
 
         _tokens: list[BearerTokenForHost] = [
             BearerTokenForHost(host_url=url, token=token)
@@ -131,6 +164,10 @@ class SyncConnection:
         ]
         self._auth = BearerAuthentication(_tokens)
 
+        self._pool_lock = threading.Lock()
+        self._adapters: dict[bool, adapters.HTTPAdapter] = {}
+        self._sessions: queue.LifoQueue[requests.Session] = queue.LifoQueue()
+
     @property
     def verify_tls(self) -> bool:
         """Get whether TLS verification is enabled."""
@@ -150,6 +187,7 @@ class SyncConnection:
     def retry_count(self, value: int) -> None:
         """Set the number of retries for idempotent requests."""
         self._retry_count = value
+        self._drop_adapter(idempotent=True)
 
     @property
     def retry_after_seconds(self) -> int:
@@ -160,36 +198,100 @@ class SyncConnection:
     def retry_after_seconds(self, value: int) -> None:
         """Set the base retry interval in seconds."""
         self._retry_after_seconds = value
+        self._drop_adapter(idempotent=True)
+
+    @property
+    def pool_maxsize(self) -> int:
+        """Get the maximum number of kept-alive connections per host."""
+        if self._pool_maxsize:
+            return self._pool_maxsize
+        limiter = current_limiter_var.get()
+        return limiter.capacity if limiter is not None else 10
+
+    def __enter__(self) -> Self:
+        """Enter the connection context."""
+        return self
+
+    def __exit__(
+        self,
+        _ext: type[BaseException] | None,
+        _exc: BaseException | None,
+        _tb: TracebackType | None,
+    ) -> None:
+        """Close the connection when leaving the context."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the connection and release all kept-alive http connections.
+
+        The connection can still be used after it has been closed, new http
+        connections will be opened on the next request.
+        """
+        with self._pool_lock:
+            _adapters = list(self._adapters.values())
+            self._adapters.clear()
+        while True:
+            try:
+                self._sessions.get_nowait().close()
+            except queue.Empty:
+                break
+        for adapter in _adapters:
+            adapter.close()
+
+    def _get_adapter(self, idempotent: bool) -> adapters.HTTPAdapter:
+        """Return the shared http adapter, creating it if necessary."""
+        with self._pool_lock:
+            adapter = self._adapters.get(idempotent)
+            if adapter is None:
+                if idempotent:
+                    retry = Retry(
+                        total=self._retry_count,
+                        backoff_factor=self._retry_after_seconds,
+                        status_forcelist=[429, 500, 502, 503, 504],
+                        respect_retry_after_header=True,
+                    )
+                else:
+                    retry = Retry(0, read=False)
+                adapter = adapters.HTTPAdapter(
+                    pool_connections=self.pool_maxsize,
+                    pool_maxsize=self.pool_maxsize,
+                    max_retries=retry,
+                )
+                self._adapters[idempotent] = adapter
+            return adapter
+
+    def _drop_adapter(self, idempotent: bool) -> None:
+        """Forget the adapter so that it is re-created with the current settings.
+
+        The adapter is not closed as it might be used by a request in progress,
+        its connections are released when it is garbage collected.
+        """
+        with self._pool_lock:
+            self._adapters.pop(idempotent, None)
 
     @contextlib.contextmanager
     def _client(
         self, idempotent: bool = False
     ) -> Generator[requests.Session, None, None]:
-        """Create a new session with the repository and configure it with the token.
+        """Borrow a session from the pool and configure it for the request.
 
-        :return: A new http client
-        """
-        """
-        Create a new session with the repository and configure it with the token.
-        :return: A new http client
+        :return: a http client, returned to the pool when the context is left
         """
-        if idempotent:
-            retry = Retry(
-                total=self._retry_count,
-                backoff_factor=self._retry_after_seconds,
-                status_forcelist=[429, 500, 502, 503, 504],
-                respect_retry_after_header=True,
-            )
-            adapter = adapters.HTTPAdapter(max_retries=retry)
-        else:
-            adapter = adapters.HTTPAdapter()
+        try:
+            session = self._sessions.get_nowait()
+        except queue.Empty:
+            session = requests.Session()
 
-        session = requests.Session()
-        session.auth = self._auth
+        adapter = self._get_adapter(idempotent)
         session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.auth = self._auth
         session.verify = self._verify_tls
 
-        yield session
+        try:
+            yield session
+        finally:
+            self._sessions.put(session)
 
     @overload
     def head(
@@ -286,6 +388,8 @@ class SyncConnection:
         :raises RepositoryServerError: if the request fails due to server error (HTTP 5xx)
         :raises RepositoryCommunicationError: if the request fails due to network error
         """
+        if self._response_cache is not None and _is_cacheable(result_class):
+            return self._get_cached(url=url, result_class=result_class, **kwargs)
         return self._retried(
             "GET",
             url,
@@ -297,6 +401,77 @@ class SyncConnection:
             **kwargs,
         )
 
+    def _get_cached[T](
+        self,
+        *,
+        url: URL,
+        result_class: type[T],
+        **kwargs: Any,
+    ) -> T:
+        """Perform a GET request, reusing the cached response if it has not changed."""
+        assert self._response_cache is not None
+        params = kwargs.get("params")
+        cache_url = url.update_query(params) if params else url
+        variant = response_variant(
+            self._auth.tokens, cache_url, kwargs.get("headers") or {}
+        )
+        cached = self._response_cache.get(cache_url, variant)
+        response = self.get_revalidated(url=url, cached=cached, **kwargs)
+        if response.url != str(cache_url):
+            response = evolve(response, url=str(cache_url))
+        if response.validation_headers and (
+            cached is None or response.validation_headers != cached.validation_headers
+        ):
+            self._response_cache.put(response, variant)
+        return self._parse_result(
+            response.payload.encode("utf-8"), response.etag, result_class
+        )
+
+    def get_revalidated(
+        self,
+        *,
+        url: URL,
+        cached: CachedResponse | None = None,
+        **kwargs: Any,
+    ) -> CachedResponse:
+        """Perform a conditional GET request revalidating a cached response.
+
+        :param url:                 the url of the request
+        :param cached:              previously downloaded response, its validators
+                                    are sent in If-None-Match/If-Modified-Since headers
+        :param kwargs:              any kwargs to pass to requests
+        :return:                    the cached response if the server returned 304 Not Modified,
+                                    otherwise the downloaded response
+
+        :raises RepositoryClientError: if the request fails due to client passing incorrect parameters (HTTP 4xx)
+        :raises RepositoryServerError: if the request fails due to server error (HTTP 5xx)
+        :raises RepositoryCommunicationError: if the request fails due to network error
+        """
+
+        def _revalidate(response: requests.Response) -> CachedResponse:
+            if response.status_code == 304 and cached is not None:
+                return cached.revalidated()
+            return CachedResponse(
+                url=str(url),
+                payload=response.content.decode("utf-8"),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                fetched=datetime.now(UTC),
+            )
+
+        headers = {
+            **kwargs.pop("headers", {}),
+            **(cached.validation_headers if cached else {}),
+        }
+        return self._retried(
+            "GET",
+            url,
+            _revalidate,
+            idempotent=True,
+            headers=headers,
+            **kwargs,
+        )
+
     def post[T](
         self,
         *,
@@ -421,6 +596,60 @@ class SyncConnection:
             **kwargs,
         )
 
+    def put_file(
+        self,
+        *,
+        url: URL,
+        file_name: Path,
+        offset: int = 0,
+        count: int | None = None,
+        progress_bar: ProgressBar | None = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """Perform a PUT request with a (range of) local file read in large blocks.
+
+        Retries reset the progress of the failed attempt.
+
+        :param url:                 the url of the request
+        :param file_name:           the file to send
+        :param offset:              offset of the first sent byte
+        :param count:               number of bytes to send, until the end of file if None
+        :param progress_bar:        progress bar updated as the data are sent
+        :param kwargs:              any kwargs to pass to requests
+        :return:                    the response (not parsed)
+
+        :raises RepositoryClientError: if the request fails due to client passing incorrect parameters (HTTP 4xx)
+        :raises RepositoryServerError: if the request fails due to server error (HTTP 5xx)
+        :raises RepositoryCommunicationError: if the request fails due to network
+        """
+        progress_bar = progress_bar or DummyProgressBar()
+        sent = 0
+
+        def update_progress(count: int) -> None:
+            nonlocal sent
+            sent += count
+            progress_bar.increment(count)
+
+        def payload() -> FileReader:
+            # roll back the progress of a previous attempt
+            nonlocal sent
+            progress_bar.increment(-sent)
+            sent = 0
+            return FileReader(file_name, offset, count, progress=update_progress)
+
+        def _put(response: requests.Response) -> requests.Response:
+            raise_for_invenio_status(response)
+            return response
+
+        return self._retried(
+            "PUT",
+            url,
+            _put,
+            idempotent=True,
+            data=payload,
+            **kwargs,
+        )
+
     def get_stream(
         self,
         *,
@@ -516,16 +745,33 @@ class SyncConnection:
 
         json_payload = response.content
         if communication_log.isEnabledFor(logging.INFO):
-            communication_log.info("%s", _json.dumps(_json.loads(json_payload)))
+            communication_log.info("%s", json_payload.decode("utf-8", errors="replace"))
+        if inspect.isclass(result_class) and issubclass(
+            result_class, requests.Response
+        ):
+            return cast("T", response)  # mypy can not get it
+        return self._parse_result(
+            json_payload, response.headers.get("ETag"), result_class
+        )
+
+    def _parse_result[T](
+        self, json_payload: bytes, etag: str | None, result_class: type[T]
+    ) -> T:
+        """Parse the payload of a successful response.
+
+        :param json_payload:        the payload of the response
+        :param etag:                the ETag header of the response
+        :param result_class:        the class to parse the response to
+        :return:                    the parsed result
+        """
         if inspect.isclass(result_class):
-            if issubclass(result_class, requests.Response):
-                return cast("T", response)  # mypy can not get it
-            elif issubclass(result_class, str):
+            if issubclass(result_class, str):
                 return cast("T", json_payload.decode("utf-8"))  # mypy can not get it
             elif issubclass(result_class, dict):
-                return _json.loads(json_payload)
-        etag = remove_quotes(response.headers.get("ETag"))
-        return deserialize_rest_response(self, json_payload, result_class, etag)
+                return json_codec.loads(json_payload)
+        return deserialize_rest_response(
+            self, json_payload, result_class, remove_quotes(etag)
+        )
 
     def _retried[T](
         self,
@@ -546,7 +792,7 @@ class SyncConnection:
         if communication_log.isEnabledFor(logging.INFO):
             communication_log.info("%s %s", method.upper(), url)
             if json is not None:
-                communication_log.info("%s", _json.dumps(json))
+                communication_log.info("%s", json_codec.dumps_str(json))
             if data is not None:
                 communication_log.info("(stream)")
 
@@ -583,7 +829,21 @@ class SyncConnection:
         parts: int | None = None,
         part_size: int | None = None,
         progress_bar: ProgressBar | None = None,
+        checksum: str | None = None,
     ) -> None:
+        """Download a file to the sink, in parts if the server supports ranges.
+
+        If the sink is a ResumableDataSink, already downloaded ranges are skipped,
+        every finished part is recorded in the sink and the sink is finalized
+        (verifying the size and the checksum) when the whole file has been downloaded.
+
+        :param url:             url of the file
+        :param sink:            where to write the data
+        :param parts:           requested number of parts
+        :param part_size:       requested size of a part
+        :param progress_bar:    progress bar to update
+        :param checksum:        expected "algo:hexdigest" checksum of the file
+        """
         progress_bar = progress_bar or DummyProgressBar()
         try:
             headers = self.head(url=url, get_links=False)
@@ -601,8 +861,16 @@ class SyncConnection:
         elif "Content-Length" in headers:
             size = int(headers["Content-Length"])
 
-        if size:
+        resumable_sink = sink if isinstance(sink, ResumableDataSink) else None
+        completed: list[tuple[int, int]] = []
+        if resumable_sink is not None:
+            completed = resumable_sink.resume(
+                size or None, remove_quotes(headers.get("ETag"))
+            )
+        elif size:
             sink.allocate(size)
+
+        if size:
             progress_bar.set_total(size)
 
         if (
@@ -611,10 +879,23 @@ class SyncConnection:
             and headers.get("Accept-Ranges") == "bytes"
         ):
             self._download_multipart(
-                location, sink, size, progress_bar, parts, part_size
+                location,
+                sink,
+                size,
+                progress_bar,
+                parts,
+                part_size,
+                completed=completed,
             )
+        elif size and is_range_completed(completed, 0, size):
+            progress_bar.increment(size)
         else:
             self._download_single(location, sink, progress_bar)
+            if resumable_sink is not None and size:
+                resumable_sink.mark_completed(0, size)
+
+        if resumable_sink is not None:
+            resumable_sink.finalize(checksum)
 
     def _download_single(
         self, url: URL, sink: DataSink, progress_bar: ProgressBar
@@ -629,6 +910,7 @@ class SyncConnection:
         progress_bar: ProgressBar,
         parts: int | None = None,
         part_size: int | None = None,
+        completed: list[tuple[int, int]] | None = None,
     ) -> None:
         adjusted_part_size, adjusted_parts = adjust_download_multipart_params(
             size, parts, part_size
@@ -637,12 +919,17 @@ class SyncConnection:
         for i in range(adjusted_parts):
             start = i * adjusted_part_size
             part_size = min((i + 1) * adjusted_part_size, size) - start
+            if completed and is_range_completed(completed, start, start + part_size):
+                progress_bar.increment(part_size)
+                continue
             self.get_stream(
                 url=url,
                 sink=ProgressSink(sink, progress_bar),
                 offset=start,
                 size=part_size,
             )
+            if isinstance(sink, ResumableDataSink):
+                sink.mark_completed(start, part_size)
 
 
 def remove_quotes(etag: str | None) -> str | None:
@@ -651,6 +938,13 @@ def remove_quotes(etag: str | None) -> str | None:
     return etag.strip('"')
 
 
+def _is_cacheable(result_class: type) -> bool:
+    """Return True if the parsed result of a GET request can be built from a cached payload."""
+    return not (
+        inspect.isclass(result_class) and issubclass(result_class, requests.Response)
+    )
+
+
 def connection_unstructure_hook(data: Any, previous: UnstructureHook) -> Any:
     ret = previous(data)
     ret.pop("_connection", None)
@@ -7,6 +7,13 @@
 #
 """Contains the limiter class for limiting the number of simultaneous connections.
 
+The limiter is hierarchical - there is a global cap on the number of simultaneous
+connections and an optional cap on connections to a single server (host). When
+the limiter is full, waiting threads are queued per host and the free slots are
+handed over to the hosts in a round-robin fashion, so that a burst of requests
+to one server (for example pre-signed S3 part urls) can not starve requests
+to another one (for example the repository API).
+
 Note: the limiter is not propagated to created threads - each thread has by default
 its own limiter with the default capacity of 10 connections.
 
@@ -15,26 +22,81 @@ Use LimitedThread to create a thread with the same limiter as the parent thread.
 
 import contextlib
 import contextvars
+import logging
+import time
+from collections import deque
 from collections.abc import Generator
-from threading import Lock, Semaphore, Thread
+from threading import Event, Lock, Thread
 
+from attrs import define
 from yarl import URL
 
+log = logging.getLogger("invenio_nrp.sync_client.connection.limiter")
+
 limiter_lock = Lock()
 
 
-class Limiter(Semaphore):
-    """A class to limit the number of simultaneous connections."""
+@define(kw_only=True)
+class LimiterStatistics:
+    """Statistics of waiting for a free slot in the limiter."""
+
+    acquired: int = 0
+    """Number of granted slots."""
+
+    waited: int = 0
+    """Number of granted slots that had to wait in the queue."""
+
+    total_wait_time: float = 0
+    """Total time (in seconds) spent waiting in the queue."""
+
+    max_wait_time: float = 0
+    """The longest time (in seconds) spent waiting in the queue."""
+
+    @property
+    def average_wait_time(self) -> float:
+        """Average time (in seconds) spent waiting in the queue per granted slot."""
+        return self.total_wait_time / self.acquired if self.acquired else 0
+
+    def record(self, wait_time: float | None) -> None:
+        """Record a granted slot.
+
+        :param wait_time: time spent in the queue, None if the slot was free
+        """
+        self.acquired += 1
+        if wait_time is not None:
+            self.waited += 1
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+
+def limiter_key(url: URL) -> str:
+    """Return the key under which per-server limits are tracked for the url."""
+    return f"{url.host}:{url.port}" if url.host else ""
+
+
+class Limiter:
+    """A thread-safe class to limit the number of simultaneous connections."""
 
     def __init__(self, capacity: int, per_server_capacity: int = -1):
         """Initialize the limiter.
 
-        :param capacity:    the number of simultaneous connections
+        :param capacity:            the number of simultaneous connections
+        :param per_server_capacity: the number of simultaneous connections to a single
+                                    server, -1 means that only the global capacity
+                                    applies
         """
         if capacity <= 0:
             capacity = 10
         self.capacity = capacity
-        super().__init__(capacity)
+        self.per_server_capacity = (
+            min(per_server_capacity, capacity) if per_server_capacity > 0 else capacity
+        )
+        self._lock = Lock()
+        self._in_use = 0
+        self._in_use_per_server: dict[str, int] = {}
+        # servers with waiting threads, in the order in which they get served
+        self._waiters: dict[str, deque[Event]] = {}
+        self._statistics: dict[str, LimiterStatistics] = {}
 
     @property
     def free(self) -> int:
@@ -42,12 +104,97 @@ class Limiter(Semaphore):
 
         :return:   the number of remaining connections (approximate)
         """
-        return self._value
+        return self.capacity - self._in_use
+
+    @property
+    def waiting(self) -> int:
+        """The number of threads waiting for a free slot."""
+        with self._lock:
+            return sum(len(waiters) for waiters in self._waiters.values())
+
+    @property
+    def statistics(self) -> dict[str, LimiterStatistics]:
+        """Per-server statistics of the time spent waiting for a free slot."""
+        return self._statistics
+
+    @property
+    def total_statistics(self) -> LimiterStatistics:
+        """Statistics of the time spent waiting for a free slot, for all servers."""
+        ret = LimiterStatistics()
+        with self._lock:
+            for stats in self._statistics.values():
+                ret.acquired += stats.acquired
+                ret.waited += stats.waited
+                ret.total_wait_time += stats.total_wait_time
+                ret.max_wait_time = max(ret.max_wait_time, stats.max_wait_time)
+        return ret
 
     @contextlib.contextmanager
-    def limit(self, url: URL):
-        with self:
+    def limit(self, url: URL) -> Generator[None, None, None]:
+        """Wait for a free slot for the url and hold it for the duration of the context.
+
+        :param url: the url of the request, its host is used for per-server limits
+        """
+        key = limiter_key(url)
+        self._acquire(key)
+        try:
             yield
+        finally:
+            self._release(key)
+
+    def _can_acquire(self, key: str) -> bool:
+        return (
+            self._in_use < self.capacity
+            and self._in_use_per_server.get(key, 0) < self.per_server_capacity
+        )
+
+    def _take(self, key: str) -> None:
+        self._in_use += 1
+        self._in_use_per_server[key] = self._in_use_per_server.get(key, 0) + 1
+
+    def _record(self, key: str, wait_time: float | None) -> None:
+        self._statistics.setdefault(key, LimiterStatistics()).record(wait_time)
+
+    def _acquire(self, key: str) -> None:
+        with self._lock:
+            if key not in self._waiters and self._can_acquire(key):
+                self._take(key)
+                self._record(key, None)
+                return
+            event = Event()
+            self._waiters.setdefault(key, deque()).append(event)
+        start = time.monotonic()
+        # the slot is taken on our behalf by the releasing thread
+        event.wait()
+        with self._lock:
+            self._record(key, time.monotonic() - start)
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            self._in_use -= 1
+            self._in_use_per_server[key] -= 1
+            if not self._in_use_per_server[key]:
+                del self._in_use_per_server[key]
+            self._wake_up_waiters()
+
+    def _wake_up_waiters(self) -> None:
+        """Hand over free slots to the waiting threads, round-robin between servers.
+
+        Must be called with the lock held.
+        """
+        while self._in_use < self.capacity:
+            for key in self._waiters:
+                if self._can_acquire(key):
+                    break
+            else:
+                return
+            waiters = self._waiters.pop(key)
+            event = waiters.popleft()
+            if waiters:
+                # move the server to the end of the queue
+                self._waiters[key] = waiters
+            self._take(key)
+            event.set()
 
 
 current_limiter_var = contextvars.ContextVar[Limiter](
@@ -66,6 +213,11 @@ class CurrentLimiterProxy:
         """
         return current_limiter_var.get().free
 
+    @property
+    def statistics(self) -> dict[str, LimiterStatistics]:
+        """Per-server statistics of the current limiter."""
+        return current_limiter_var.get().statistics
+
     @contextlib.contextmanager
     def limit(self, url: URL):
         try:
@@ -87,16 +239,38 @@ class CurrentLimiterProxy:
 current_limiter = CurrentLimiterProxy()
 
 
+def log_limiter_statistics(limiter: Limiter) -> None:
+    """Log the queue wait statistics of the limiter at the debug level."""
+    if not log.isEnabledFor(logging.DEBUG):
+        return
+    for key, stats in limiter.statistics.items():
+        log.debug(
+            "%s: %d requests, %d waited, average wait %.3fs, max wait %.3fs",
+            key,
+            stats.acquired,
+            stats.waited,
+            stats.average_wait_time,
+            stats.max_wait_time,
+        )
+
+
 @contextlib.contextmanager
 def limit_connections(
     max_connections: int, per_server_connections: int = -1
 ) -> Generator[None, None, None]:
-    """Limit the number of connections called in the context of the with statement."""
-    token = current_limiter_var.set(Limiter(max_connections, per_server_connections))
+    """Limit the number of connections called in the context of the with statement.
+
+    :param max_connections:         the global number of simultaneous connections
+    :param per_server_connections:  the number of simultaneous connections to a single
+                                    server, -1 for no per-server limit
+    """
+    limiter = Limiter(max_connections, per_server_connections)
+    token = current_limiter_var.set(limiter)
     try:
         yield
     finally:
         current_limiter_var.reset(token)
+        log_limiter_statistics(limiter)
 
 
 class LimitedThread(Thread):
@@ -0,0 +1,93 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Upload of local files with large-buffer reads.
+
+requests (http.client) can not hand the file to os.sendfile, but it sends
+whatever the body's read returns. The reader fills a large reusable buffer via
+readinto and returns a memoryview of it, instead of the default 16 KiB reads
+that allocate a new bytes object for each block.
+
+urllib3 retries failed requests (5xx responses) itself and rewinds the body
+with seek to the position it got from tell before the first attempt.
+"""
+
+from collections.abc import Callable
+from pathlib import Path
+
+SENDFILE_CHUNK_SIZE = 8 * 1024 * 1024
+"""Size of the buffer the file is read into."""
+
+
+class FileReader:
+    """File-like body sending a byte range of a local file."""
+
+    def __init__(
+        self,
+        file_name: Path,
+        offset: int = 0,
+        count: int | None = None,
+        progress: Callable[[int], None] | None = None,
+        chunk_size: int = SENDFILE_CHUNK_SIZE,
+    ):
+        """Initialize the reader.
+
+        :param file_name:   the file to send
+        :param offset:      offset of the first sent byte
+        :param count:       number of bytes to send, until the end of the file if None
+        :param progress:    called with the number of bytes returned by each read
+        :param chunk_size:  size of the buffer the file is read into
+        """
+        if count is None:
+            count = file_name.stat().st_size - offset
+        self._file = open(file_name, "rb", buffering=0)  # noqa: SIM115
+        self._file.seek(offset)
+        self._offset = offset
+        self._count = count
+        self._remaining = count
+        self._progress = progress
+        self._buffer = memoryview(bytearray(min(chunk_size, max(count, 1))))
+
+    def read(self, n: int = -1) -> memoryview:
+        """Read the next block of the file.
+
+        The requested size is ignored, the block is as large as the buffer.
+        The returned view is valid only until the next call.
+        """
+        if self._remaining <= 0:
+            return self._buffer[:0]
+        block = self._buffer[: min(len(self._buffer), self._remaining)]
+        read = self._file.readinto(block)
+        if not read:
+            raise OSError(
+                f"File {self._file.name} is shorter than expected, "
+                f"{self._remaining} bytes missing"
+            )
+        self._remaining -= read
+        if self._progress is not None:
+            self._progress(read)
+        return self._buffer[:read]
+
+    def tell(self) -> int:
+        """Return the number of bytes already read."""
+        return self._count - self._remaining
+
+    def seek(self, position: int) -> None:
+        """Return to the position, rolling back the progress of the bytes read since."""
+        rolled_back = self.tell() - position
+        self._file.seek(self._offset + position)
+        self._remaining = self._count - position
+        if self._progress is not None and rolled_back:
+            self._progress(-rolled_back)
+
+    def __len__(self) -> int:
+        """Return the number of bytes left to send."""
+        return self._remaining
+
+    def close(self) -> None:
+        """Close the file."""
+        self._file.close()
@@ -6,6 +6,7 @@
 
 """Invenio asynchronous client."""
 
+from types import TracebackType
 from typing import Any, Self, override
 
 from yarl import URL  # noqa: TCH002    as attrs need to have type info in runtime
@@ -17,11 +18,12 @@ from ...errors import (
     StructureError,
     is_instance_of_exceptions,
 )
-from ...rdm_compat import make_rdm_info
-from ...types.info import ModelInfo, RepositoryInfo
+from ...http_cache import ResponseCache
+from ...types.info import RepositoryInfo
 from ..base_client import SyncRepositoryClient
 from ..connection import SyncConnection
 from .files import SyncInvenioFilesClient
+from .introspection import RepositoryInfoFetcher, introspect_rdm_repository
 from .records import SyncInvenioRecordsClient
 from .requests import SyncInvenioRequestsClient
 
@@ -45,31 +47,33 @@ class SyncInvenioRepositoryClient(SyncRepositoryClient):
     def can_handle_repository(
         cls, url: URL | str, verify_tls: bool = True
     ) -> URL | None:
-        connection = SyncConnection(verify_tls=verify_tls)
         if isinstance(url, str):
             url = URL(url)
 
-        # check if the repository is an NRP invenio repository
-        well_known_url = url.with_path("/.well-known/repository")
-        try:
-            data = connection.get(url=well_known_url, result_class=dict[str, Any])
-            if "invenio_version" in data:
-                if "api" in data.get("links", {}):
-                    return URL(data["links"]["api"])
-                # fallback for older oarepo-runtime versions
-                return url.with_path("/api")
-        except Exception:
-            pass
-
-        # check if the repository is a plain Invenio RDM repository, such as zenodo
-        try:
-            root_page_data = connection.get(
-                url=url.with_path("/"), result_class=str
-            )
-            if '<meta name="generator" content="InvenioRDM' in root_page_data:
-                return url.with_path("/api")
-        except Exception:
-            pass
+        with SyncConnection(verify_tls=verify_tls) as connection:
+            # check if the repository is an NRP invenio repository
+            well_known_url = url.with_path("/.well-known/repository")
+            try:
+                data = connection.get(
+                    url=well_known_url, result_class=dict[str, Any]
+                )
+                if "invenio_version" in data:
+                    if "api" in data.get("links", {}):
+                        return URL(data["links"]["api"])
+                    # fallback for older oarepo-runtime versions
+                    return url.with_path("/api")
+            except Exception:
+                pass
+
+            # check if the repository is a plain Invenio RDM repository, such as zenodo
+            try:
+                root_page_data = connection.get(
+                    url=url.with_path("/"), result_class=str
+                )
+                if '<meta name="generator" content="InvenioRDM' in root_page_data:
+                    return url.with_path("/api")
+            except Exception:
+                pass
         return None
 
     @override
@@ -102,11 +106,16 @@ class SyncInvenioRepositoryClient(SyncRepositoryClient):
             tokens.update(extra_tokens)
         if config.token:
             tokens[config.url] = config.token
+        response_cache = ResponseCache()
         self._connection = SyncConnection(
             tokens=tokens,
             verify_tls=config.verify_tls,
             retry_count=config.retry_count,
             retry_after_seconds=config.retry_after_seconds,
+            response_cache=response_cache if config.cache_responses else None,
+        )
+        self._info_fetcher = RepositoryInfoFetcher(
+            self._connection, config, response_cache
         )
 
     @override
@@ -115,32 +124,36 @@ class SyncInvenioRepositoryClient(SyncRepositoryClient):
             return self._config.info
 
         try:
-            info = self._connection.get(
-                url=self._config.well_known_repository_url,
-                result_class=RepositoryInfo,
-            )
-            self._config.info = info
-
-            if not self._config.info.links.models:
-                raise ValueError("The repository does not provide the models link.")
-
-            models = self._connection.get(
-                url=self._config.info.links.models,
-                result_class=list[ModelInfo],
-            )
-
-            info.models = {model.type: model for model in models}
-
+            info = self._config.info = self._info_fetcher.fetch()
         except* (RepositoryClientError, RepositoryCommunicationError) as exc:
             if is_instance_of_exceptions(exc, StructureError):
                 raise exc
             # not a NRP based repository, suppose that it is plain invenio rdm
-            info = self._config.info = make_rdm_info(
-                self._config.url, self._config.verify_tls
+            info = self._config.info = introspect_rdm_repository(
+                self._connection, self._config.url
             )
 
         return info
 
+    @override
+    def close(self) -> None:
+        """Close the client and release pooled http connections."""
+        self._info_fetcher.close()
+        self._connection.close()
+
+    @override
+    def __enter__(self) -> Self:
+        return self
+
+    @override
+    def __exit__(
+        self,
+        _ext: type[BaseException] | None,
+        _exc: BaseException | None,
+        _tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
     @property
     @override
     def records(self) -> SyncInvenioRecordsClient:
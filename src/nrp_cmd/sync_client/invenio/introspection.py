@@ -0,0 +1,188 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+"""Introspection of Invenio repositories.
+
+NRP repositories describe themselves at /.well-known/repository, which links
+to the list of the models. RepositoryInfoFetcher keeps both responses in
+the response cache (nrp_cmd.http_cache) together with their ETag and
+Last-Modified headers, so that a refresh of the repository info sends
+conditional requests and downloads the responses only if they have changed.
+
+With RepositoryConfig.stale_while_revalidate, the cached info is returned
+immediately and the responses are revalidated in a background thread. The
+refreshed info replaces RepositoryConfig.info when the revalidation finishes,
+the command runs on the cached info until then.
+
+Repositories that do not provide the NRP /.well-known/repository endpoint
+are supposed to be plain Invenio RDM (such as Zenodo). Their version is read
+from the generator meta tag of the homepage, which is downloaded over the
+client's connection, and the repository info is built by nrp_cmd.rdm_compat.
+The client keeps the info in RepositoryConfig.info, so the homepage is downloaded again
+only when the info is refreshed.
+
+Concurrent introspections of the same host share a single download
+of the homepage.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING
+
+from ... import json_codec
+from ...converter import converter
+from ...errors import StructureError
+from ...http_cache import CachedResponse, ResponseCache
+from ...rdm_compat import rdm_info, rdm_version_from_homepage
+from ...types.info import ModelInfo, RepositoryInfo
+
+if TYPE_CHECKING:
+    from yarl import URL
+
+    from ...config import RepositoryConfig
+    from ..connection import SyncConnection
+
+log = logging.getLogger("invenio_nrp.sync_client.invenio.introspection")
+
+
+class RepositoryInfoFetcher:
+    """Downloads the repository info, revalidating the cached responses."""
+
+    def __init__(
+        self,
+        connection: SyncConnection,
+        config: RepositoryConfig,
+        cache: ResponseCache | None = None,
+    ) -> None:
+        """Initialize the fetcher.
+
+        :param connection:  connection used to download the info
+        :param config:      configuration of the repository, its info is replaced
+                            when a background revalidation finishes
+        :param cache:       cache of the responses, ResponseCache() if not set
+        """
+        self._connection = connection
+        self._config = config
+        self._cache = cache or ResponseCache()
+        self._refresh: threading.Thread | None = None
+
+    def fetch(self) -> RepositoryInfo:
+        """Return the repository info.
+
+        :raises ValueError: if the repository does not provide the models link
+        """
+        if self._config.stale_while_revalidate:
+            info = self._cached_info()
+            if info is not None:
+                if self._refresh is None:
+                    self._refresh = threading.Thread(
+                        target=self._refresh_in_background, daemon=True
+                    )
+                    self._refresh.start()
+                return info
+        return self._revalidate()
+
+    def close(self) -> None:
+        """Wait for the background revalidation."""
+        if self._refresh is not None:
+            self._refresh.join()
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self._config.info = self._revalidate()
+        except Exception as e:  # noqa: BLE001 the cached info is still used
+            log.warning(
+                "Could not refresh the info of repository %s: %s", self._config.url, e
+            )
+
+    def _cached_info(self) -> RepositoryInfo | None:
+        """Return the info from the cached responses, None if they are not cached."""
+        info_response = self._cache.get(self._config.well_known_repository_url)
+        if info_response is None:
+            return None
+        try:
+            info = _structure(info_response, RepositoryInfo)
+            if not info.links.models:
+                return None
+            models_response = self._cache.get(info.links.models)
+            if models_response is None:
+                return None
+            info.models = {
+                model.type: model
+                for model in _structure(models_response, list[ModelInfo])
+            }
+        except (StructureError, ValueError):
+            # cached by a different version of the client
+            return None
+        return info
+
+    def _revalidate(self) -> RepositoryInfo:
+        info_response = self._get(self._config.well_known_repository_url)
+        info = _structure(info_response, RepositoryInfo)
+        if not info.links.models:
+            raise ValueError("The repository does not provide the models link.")
+        models_response = self._get(info.links.models)
+
+        info.models = {
+            model.type: model for model in _structure(models_response, list[ModelInfo])
+        }
+        self._cache.put(info_response)
+        self._cache.put(models_response)
+        return info
+
+    def _get(self, url: URL) -> CachedResponse:
+        return self._connection.get_revalidated(url=url, cached=self._cache.get(url))
+
+
+def _structure[T](response: CachedResponse, result_class: type[T]) -> T:
+    return converter.structure(json_codec.loads(response.payload), result_class)
+
+
+_pending_introspections: dict[str, Future[RepositoryInfo]] = {}
+"""Introspections in progress, keyed by the root url of the repository."""
+
+_pending_introspections_lock = threading.Lock()
+
+
+def introspect_rdm_repository(connection: SyncConnection, url: URL) -> RepositoryInfo:
+    """Return the repository info of a plain Invenio RDM repository.
+
+    :param connection:  connection used to download the homepage
+    :param url:         any url within the repository
+    :raises ValueError: if the homepage does not contain the Invenio RDM version
+    """
+    root_url = url.with_path("/")
+    key = str(root_url)
+    with _pending_introspections_lock:
+        introspection = _pending_introspections.get(key)
+        if introspection is not None:
+            owner = False
+        else:
+            owner = True
+            introspection = _pending_introspections[key] = Future()
+    if not owner:
+        return introspection.result()
+
+    try:
+        info = _introspect(connection, root_url)
+    except BaseException as e:
+        introspection.set_exception(e)
+        raise
+    else:
+        introspection.set_result(info)
+        return info
+    finally:
+        with _pending_introspections_lock:
+            del _pending_introspections[key]
+
+
+def _introspect(connection: SyncConnection, root_url: URL) -> RepositoryInfo:
+    homepage = connection.get(url=root_url, result_class=str)
+    return rdm_info(root_url, rdm_version_from_homepage(homepage))
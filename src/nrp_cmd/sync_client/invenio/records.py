@@ -9,19 +9,43 @@ from __future__ import annotations
 import contextlib
 import copy
 from collections.abc import Generator, Iterator
-from datetime import UTC, datetime, timedelta
-from typing import Any, Self, override
+from typing import TYPE_CHECKING, Any, BinaryIO, Literal, Self, overload, override
 
 from yarl import URL
 
+from ...columnar import (
+    DEFAULT_BATCH_ROWS,
+    Columns,
+    ParquetRecordWriter,
+    RecordBatchBuilder,
+)
 from ...converter import converter
 from ...types.info import RepositoryInfo
-from ...types.records import Record, RecordId, RecordList
+from ...types.records import LazyRecord, Record, RecordId, RecordList
 from ...types.requests import Request, RequestType
 from ...types.rest import RESTHits, RESTPaginationLinks
 from ..base_client import SyncRecordsClient, RecordStatus
 from ..connection import SyncConnection
 from .requests import SyncInvenioRequestsClient
+from .scan import (
+    DEFAULT_HARVEST_MARGIN,
+    DEFAULT_SCAN_CONCURRENCY,
+    DEFAULT_SCAN_HISTOGRAM,
+    DEFAULT_SCAN_PREFETCH,
+    DEFAULT_SCAN_QUEUE_SIZE,
+    IncrementalHarvest,
+    RecordScanner,
+    ScanPlan,
+)
+
+if TYPE_CHECKING:
+    from datetime import timedelta
+    from pathlib import Path
+
+    import pyarrow as pa
+
+    from ...config.cursors import HarvestCursor
+    from ...dedup import DedupStore
 
 OPENSEARCH_SCAN_WINDOW = 5000
 OPENSEARCH_SCAN_PAGE = 100
@@ -141,6 +165,39 @@ class SyncInvenioRecordsClient(SyncRecordsClient):
             result_class=Record,
         )
 
+    @overload
+    def read(
+        self,
+        record_id: RecordId,
+        *,
+        model: str | None = None,
+        status: RecordStatus | None = None,
+        query: dict[str, str] | None = None,
+        raw: Literal[False] = False,
+    ) -> Record: ...
+
+    @overload
+    def read(
+        self,
+        record_id: RecordId,
+        *,
+        model: str | None = None,
+        status: RecordStatus | None = None,
+        query: dict[str, str] | None = None,
+        raw: Literal[True],
+    ) -> LazyRecord: ...
+
+    @overload
+    def read(
+        self,
+        record_id: RecordId,
+        *,
+        model: str | None = None,
+        status: RecordStatus | None = None,
+        query: dict[str, str] | None = None,
+        raw: bool,
+    ) -> Record | LazyRecord: ...
+
     @override
     def read(
         self,
@@ -149,10 +206,15 @@ class SyncInvenioRecordsClient(SyncRecordsClient):
         model: str | None = None,
         status: RecordStatus | None = None,
         query: dict[str, str] | None = None,
-    ) -> Record:
+        raw: bool = False,
+    ) -> Record | LazyRecord:
         """Read a record from the repository. Please provide either record_id or record_url, not both.
 
         :param record_id:       the id of the record. Could be either pid or url
+        :param raw:             return the json of the record wrapped in LazyRecord,
+                                that is structured only when its attributes are accessed.
+                                Changes to a LazyRecord are not tracked, modify its
+                                as_record() and pass that to update explicitly
         :return:                the record
         """
         record_url = _record_id_to_url(
@@ -161,6 +223,16 @@ class SyncInvenioRecordsClient(SyncRecordsClient):
 
         if query:
             record_url = record_url.with_query(**query)
+        if raw:
+            return LazyRecord(
+                self._connection.get(
+                    url=record_url,
+                    result_class=dict,
+                    headers={
+                        "Accept": self._info.default_content_type,
+                    },
+                )
+            )
         return self._connection.get(
             url=record_url,
             result_class=Record,
@@ -180,8 +252,13 @@ class SyncInvenioRecordsClient(SyncRecordsClient):
         model: str | None = None,
         status: RecordStatus | None = None,
         facets: dict[str, str] | None = None,
+        raw: bool = False,
     ) -> RecordList:
-        """Search for records in the repository."""
+        """Search for records in the repository.
+
+        :param raw:             keep the hits as json wrapped in LazyRecord, they are
+                                structured only when their attributes are accessed
+        """
         search_url, extra_facets = _get_search_params(
             self._info, model or self._model, status or self._status
         )
@@ -196,6 +273,17 @@ class SyncInvenioRecordsClient(SyncRecordsClient):
         if sort:
             query["sort"] = sort
 
+        if raw:
+            return RecordList.from_raw(
+                self._connection.get(
+                    url=search_url,
+                    params=query,
+                    result_class=dict,
+                    headers={
+                        "Accept": self._info.default_content_type,
+                    },
+                )
+            )
         return self._connection.get(
             url=search_url,
             params=query,
@@ -246,6 +334,13 @@ class SyncInvenioRecordsClient(SyncRecordsClient):
         model: str | None = None,
         status: RecordStatus | None = None,
         facets: dict[str, str] | None = None,
+        prefetch: int = DEFAULT_SCAN_PREFETCH,
+        concurrency: int = DEFAULT_SCAN_CONCURRENCY,
+        queue_size: int = DEFAULT_SCAN_QUEUE_SIZE,
+        histogram: str | None = DEFAULT_SCAN_HISTOGRAM,
+        plan: ScanPlan | None = None,
+        dedup: DedupStore | None = None,
+        raw: bool = False,
     ) -> Generator[Iterator[Record], None]:
         """Scan all the records in the repository.
 
@@ -266,100 +361,216 @@ class SyncInvenioRecordsClient(SyncRecordsClient):
         Note: in invenio, we do not have the scan api over the rest, so we simulate it
         by:
             * searching page by page if the number of records < OPENSEARCH_SCAN_WINDOW
-            * scanning by date bisection if the number of records > OPENSEARCH_SCAN_WINDOW
+            * scanning by date windows if the number of records > OPENSEARCH_SCAN_WINDOW
+
+        See the scan module for details.
+
+        :param prefetch:        number of pages fetched ahead of the consumer
+        :param concurrency:     number of date windows scanned concurrently
+        :param queue_size:      number of fetched pages waiting for the consumer
+        :param histogram:       name of the date histogram aggregation used to plan
+                                the date windows
+        :param plan:            windows to scan, as returned by plan_scan (or a part of them)
+        :param dedup:           store of already returned record ids, see nrp_cmd.dedup.
+                                Records returned more than once are not deduplicated
+                                if not set.
+        :param raw:             return the records as LazyRecord, see search
         """
+        scanner = RecordScanner(
+            self,
+            q=q,
+            model=model,
+            status=status,
+            facets=facets,
+            window_size=OPENSEARCH_SCAN_WINDOW,
+            page_size=OPENSEARCH_SCAN_PAGE,
+            prefetch=prefetch,
+            concurrency=concurrency,
+            queue_size=queue_size,
+            histogram=histogram,
+            plan=plan,
+            dedup=dedup,
+            raw=raw,
+        )
+        try:
+            yield scanner.records()
+        finally:
+            scanner.close()
 
-        def opensearch_date_serialize(date: datetime) -> str:
-            return date.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    @contextlib.contextmanager
+    def harvest(
+        self,
+        *,
+        cursor: HarvestCursor | None,
+        q: str | None = None,
+        model: str | None = None,
+        status: RecordStatus | None = None,
+        facets: dict[str, str] | None = None,
+        prefetch: int = DEFAULT_SCAN_PREFETCH,
+        concurrency: int = DEFAULT_SCAN_CONCURRENCY,
+        queue_size: int = DEFAULT_SCAN_QUEUE_SIZE,
+        histogram: str | None = DEFAULT_SCAN_HISTOGRAM,
+        margin: timedelta = DEFAULT_HARVEST_MARGIN,
+        dedup: DedupStore | None = None,
+        raw: bool = False,
+    ) -> Generator[IncrementalHarvest, None]:
+        """Scan the records updated since the cursor of a previous harvest.
 
-        def opensearch_date_interval(start: datetime, end: datetime) -> str:
-            return f"[{opensearch_date_serialize(start)} TO {opensearch_date_serialize(end)}{'}'}"
+        Usage:
 
-        def paginated_scan(
-            q: str | None,
-            model: str | None,
-            status: RecordStatus | None,
-            facets: dict[str, str] | None = None,
-        ) -> Iterator[Record]:
-            result = self.search(
-                q=q,
-                size=OPENSEARCH_SCAN_PAGE,
-                model=model,
-                status=status,
-                facets=facets,
-            )
-            while result.hits.hits:
-                for record in result.hits.hits:
-                    yield record
-                result = self.next_page(record_list=result)
-
-        def scan_via_date_bisect() -> Iterator[Record]:
-            result = self.search(q=q, size=1, facets=dict(sort="oldest"))
-            first_created = result.hits.hits[0].created
-            result = self.search(q=q, size=1, facets=dict(sort="newest"))
-            last_created = result.hits.hits[0].created
-
-            # make sure that the first_created and last_created are in UTC
-            first_created = first_created.astimezone(UTC) - timedelta(seconds=1)
-            last_created = last_created.astimezone(UTC) + timedelta(seconds=1)
-
-            # reversed to push the first half at the top
-            stack = [
-                [date_in_between(first_created, last_created), last_created],
-                [first_created, date_in_between(first_created, last_created)],
-            ]
-
-            while stack:
-                start, end = stack.pop()
-                date_query = f"created:{opensearch_date_interval(start, end)}"
-                if q:
-                    subquery = f"({q}) AND {date_query}"
-                else:
-                    subquery = date_query
-                result = self.search(
-                    q=subquery,
-                    size=1,
-                    model=model,
-                    status=status,
-                    facets=facets,
-                )
+        ```
+        with client.harvest(cursor=cursor, q=...) as harvest:
+            for record in harvest.records():
+                print(record)
+        if harvest.complete:
+            save(harvest.cursor)
+        ```
 
-                if result.hits.total <= OPENSEARCH_SCAN_WINDOW:
-                    if result.hits.total:
-                        for record in paginated_scan(
-                            q=subquery,
-                            model=model,
-                            status=status,
-                            facets=facets,
-                        ):
-                            yield record
-                else:
-                    # reversed to push the first half at the top
-                    stack.append([date_in_between(start, end), end])
-                    stack.append([start, date_in_between(start, end)])
-
-        def _scan_pages() -> Generator[Record, None]:
-            # at first check if we can get all records in one paginated listing
-            # repository can not handle page_size=0, so we use 1
-            result = self.search(
+        :param cursor:          cursor of the previous harvest, None to harvest all records
+        :param margin:          records updated within this time before the harvest
+                                are left for the next harvest
+        :param dedup:           store of already returned record ids, see scan
+        :param raw:             return the records as LazyRecord, see search
+        """
+        harvest = IncrementalHarvest(
+            self,
+            cursor=cursor,
+            q=q,
+            margin=margin,
+            model=model,
+            status=status,
+            facets=facets,
+            window_size=OPENSEARCH_SCAN_WINDOW,
+            page_size=OPENSEARCH_SCAN_PAGE,
+            prefetch=prefetch,
+            concurrency=concurrency,
+            queue_size=queue_size,
+            histogram=histogram,
+            dedup=dedup,
+            raw=raw,
+        )
+        try:
+            yield harvest
+        finally:
+            harvest.close()
+
+    @contextlib.contextmanager
+    def scan_batches(
+        self,
+        *,
+        columns: Columns | None = None,
+        batch_size: int = DEFAULT_BATCH_ROWS,
+        q: str | None = None,
+        model: str | None = None,
+        status: RecordStatus | None = None,
+        facets: dict[str, str] | None = None,
+        dedup: DedupStore | None = None,
+        **scan_options: Any,
+    ) -> Generator[Iterator[pa.RecordBatch], None]:
+        """Scan the records into Arrow record batches.
+
+        Usage:
+
+        ```
+        with client.scan_batches(columns=["id", "metadata.title"]) as batches:
+            for batch in batches:
+                print(batch.num_rows)
+        ```
+
+        The records are scanned in the raw mode and projected to the columns,
+        see the nrp_cmd.columnar module. Needs pyarrow.
+
+        :param columns:         dotted paths of the columns, optionally mapped
+                                to their types
+        :param batch_size:      number of rows of a batch
+        :param dedup:           store of already returned record ids, see scan
+        :param scan_options:    other options of scan (prefetch, concurrency, plan, ...)
+        """
+        builder = RecordBatchBuilder(columns, batch_size=batch_size)
+        with self.scan(
+            q=q,
+            model=model,
+            status=status,
+            facets=facets,
+            dedup=dedup,
+            raw=True,
+            **scan_options,
+        ) as records:
+            yield _record_batches(records, builder)
+
+    def export_parquet(
+        self,
+        output: Path | str | BinaryIO,
+        *,
+        columns: Columns | None = None,
+        batch_size: int = DEFAULT_BATCH_ROWS,
+        compression: str = "zstd",
+        q: str | None = None,
+        model: str | None = None,
+        status: RecordStatus | None = None,
+        facets: dict[str, str] | None = None,
+        dedup: DedupStore | None = None,
+        **scan_options: Any,
+    ) -> int:
+        """Scan the records into a parquet file and return the number of records.
+
+        Row groups are written as soon as they are full, so the memory used
+        does not depend on the number of records. Needs pyarrow.
+
+        :param output:          path or binary stream of the parquet file
+        :param columns:         dotted paths of the columns, see scan_batches
+        :param batch_size:      number of rows of a row group
+        :param compression:     parquet compression codec
+        :param scan_options:    other options of scan (prefetch, concurrency, plan, ...)
+        """
+        writer = ParquetRecordWriter(
+            output, columns, batch_size=batch_size, compression=compression
+        )
+        try:
+            with self.scan(
                 q=q,
-                size=1,
                 model=model,
                 status=status,
                 facets=facets,
-            )
-            if result.hits.total <= OPENSEARCH_SCAN_WINDOW:
-                if result.hits.total:
-                    for record in paginated_scan(q, model, status, facets):
-                        yield record
-            else:
-                # there is more than OPENSEARCH_SCAN_WINDOW records, that means
-                # that we do not know even the result count. We will get to it
-                # by scanning the records by date and using bisection.
-                for record in scan_via_date_bisect():
-                    yield record
-
-        yield _scan_pages()
+                dedup=dedup,
+                raw=True,
+                **scan_options,
+            ) as records:
+                for record in records:
+                    writer.write(record)
+        finally:
+            writer.close()
+        return writer.count
+
+    def plan_scan(
+        self,
+        *,
+        q: str | None = None,
+        model: str | None = None,
+        status: RecordStatus | None = None,
+        facets: dict[str, str] | None = None,
+        histogram: str | None = DEFAULT_SCAN_HISTOGRAM,
+    ) -> ScanPlan:
+        """Plan the date windows of a scan without scanning the records.
+
+        The windows of the plan can be distributed between several scans,
+        for example between workers of a harvest, and passed to them
+        via the plan argument of scan.
+
+        :param histogram:       name of the date histogram aggregation used to plan
+                                the date windows
+        """
+        scanner = RecordScanner(
+            self,
+            q=q,
+            model=model,
+            status=status,
+            facets=facets,
+            window_size=OPENSEARCH_SCAN_WINDOW,
+            page_size=1,
+            histogram=histogram,
+        )
+        return scanner.plan()
 
     def _etag_headers(self, etag: str | None) -> dict[str, str]:
         """Return the headers with the etag if it was returned by the repository."""
@@ -516,8 +727,17 @@ class SyncInvenioRecordsClient(SyncRecordsClient):
         )
 
 
-def date_in_between(date1: datetime, date2: datetime):
-    return date1 + (date2 - date1) / 2
+def _record_batches(
+    records: Iterator[Record], builder: RecordBatchBuilder
+) -> Iterator[pa.RecordBatch]:
+    """Collect the records into record batches."""
+    for record in records:
+        batch = builder.add(record)
+        if batch is not None:
+            yield batch
+    batch = builder.flush()
+    if batch is not None:
+        yield batch
 
 
 def _record_id_to_url(
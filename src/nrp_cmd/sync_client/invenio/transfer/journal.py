@@ -0,0 +1,191 @@
+#
+# This file was generated from the asynchronous client at invenio/transfer/journal.py by generate_synchronous_client.sh
+# Do not edit this file directly, instead edit the original file and regenerate this file.
+#
+
+
+"""Checkpoint journal of multipart uploads.
+
+The journal records the parts of a multipart upload that have already been
+uploaded, so that an interrupted upload can be resumed by uploading only
+the missing parts. Journals are stored in ~/.nrp/uploads, one file per
+(files url, key) pair, and are removed when the upload is committed.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from attrs import define, field
+from yarl import URL
+
+from ....converter import converter
+from ....errors import StructureError
+
+log = logging.getLogger("invenio_nrp.sync_client.invenio.transfer.journal")
+
+
+def default_journal_directory() -> Path:
+    """Return the directory where upload journals are stored."""
+    return Path.home() / ".nrp" / "uploads"
+
+
+@define(kw_only=True)
+class UploadedPart:
+    """A part that has been successfully uploaded."""
+
+    index: int
+    """Index of the part, starting from 0."""
+
+    size: int
+    """Size of the part in bytes."""
+
+    etag: str | None = None
+    """ETag returned by the storage for the part, if any."""
+
+    checksum: str | None = None
+    """Checksum of the part as sent to the storage, for example 'md5:...'."""
+
+
+@define(kw_only=True)
+class UploadJournal:
+    """Persistent state of a multipart upload."""
+
+    files_url: URL
+    """Url of the files endpoint of the record."""
+
+    key: str
+    """Key of the uploaded file."""
+
+    source: str
+    """Identity of the uploaded data, see FileSource.identity."""
+
+    size: int
+    """Size of the uploaded file."""
+
+    part_size: int
+    """Size of a single part."""
+
+    links: list[URL] = field(factory=list)
+    """Urls of the parts, as returned when the upload was initialized."""
+
+    commit_url: URL | None = None
+    """Url for committing the upload."""
+
+    completed: dict[int, UploadedPart] = field(factory=dict)
+    """Parts that have been uploaded, keyed by their index."""
+
+    _path: Path | None = None
+    """Path of the journal file."""
+
+    _lock: threading.Lock = field(factory=threading.Lock)
+    """Lock guarding concurrent updates of the journal."""
+
+    @staticmethod
+    def journal_path(
+        files_url: URL, key: str, directory: Path | None = None
+    ) -> Path:
+        """Return the path of the journal for the given file.
+
+        :param files_url:   url of the files endpoint of the record
+        :param key:         key of the file
+        :param directory:   directory with the journals, ~/.nrp/uploads by default
+        """
+        digest = hashlib.sha256(f"{files_url}n{key}".encode()).hexdigest()[:32]
+        return (directory or default_journal_directory()) / f"{digest}.json"
+
+    @classmethod
+    def load(cls, path: Path) -> UploadJournal | None:
+        """Load the journal, returning None if it does not exist or is corrupted."""
+        try:
+            ret = converter.structure(
+                json.loads(path.read_text(encoding="utf-8")), cls
+            )
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, StructureError) as e:
+            log.warning("Ignoring corrupted upload journal %s: %s", path, e)
+            return None
+        ret._path = path
+        return ret
+
+    def matches(self, source: str, size: int, part_size: int) -> bool:
+        """Return True if the journal describes an upload of the same data."""
+        return (
+            self.source == source
+            and self.size == size
+            and self.part_size == part_size
+        )
+
+    def is_completed(self, index: int) -> bool:
+        """Return True if the part has already been uploaded."""
+        return index in self.completed
+
+    def record(self, part: UploadedPart) -> None:
+        """Record an uploaded part and save the journal."""
+        with self._lock:
+            self.completed[part.index] = part
+            self._save()
+
+    def save(self, path: Path | None = None) -> None:
+        """Save the journal atomically."""
+        with self._lock:
+            if path:
+                self._path = path
+            self._save()
+
+    def _save(self) -> None:
+        assert self._path is not None, "No path to save the journal to."
+        self._path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        tmp_path = self._path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(converter.unstructure(self)), encoding="utf-8")
+        tmp_path.chmod(0o600)
+        tmp_path.replace(self._path)
+
+    def delete(self) -> None:
+        """Remove the journal file."""
+        if self._path:
+            with contextlib.suppress(FileNotFoundError):
+                self._path.unlink()
+
+
+def _journal_unstructure_hook(journal: UploadJournal) -> dict:
+    return {
+        "files_url": str(journal.files_url),
+        "key": journal.key,
+        "source": journal.source,
+        "size": journal.size,
+        "part_size": journal.part_size,
+        "links": [str(link) for link in journal.links],
+        "commit_url": str(journal.commit_url) if journal.commit_url else None,
+        "completed": [converter.unstructure(x) for x in journal.completed.values()],
+    }
+
+
+def _journal_structure_hook(data: dict, _type: type) -> UploadJournal:
+    return UploadJournal(
+        files_url=URL(data["files_url"]),
+        key=data["key"],
+        source=data["source"],
+        size=data["size"],
+        part_size=data["part_size"],
+        links=[URL(link) for link in data.get("links", [])],
+        commit_url=URL(data["commit_url"]) if data.get("commit_url") else None,
+        completed={
+            part.index: part
+            for part in (
+                converter.structure(x, UploadedPart) for x in data.get("completed", [])
+            )
+        },
+    )
+
+
+converter.register_unstructure_hook(UploadJournal, _journal_unstructure_hook)
+converter.register_structure_hook(UploadJournal, _journal_structure_hook)
+
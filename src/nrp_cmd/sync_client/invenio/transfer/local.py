@@ -10,6 +10,8 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from ...streams.file import FileSource
+from ...streams.hashing import HashingSource
 from ...streams.progress import ProgressSource
 from . import Transfer
 
@@ -20,6 +22,7 @@ if TYPE_CHECKING:
     from ...connection import SyncConnection
     from ...streams import DataSource
     from ..files import File
+    from .journal import UploadJournal
 
 
 class LocalTransfer(Transfer):
@@ -28,33 +31,83 @@ class LocalTransfer(Transfer):
     This transfer copies a local file to the repository.
     The file will be stored in repository's primary storage (thus local)
     and the upload will be handled solely through the repository.
+
+    Checksums of the file are computed while the data are being sent, without
+    another pass over the file. They are available via `checksums` after the
+    upload and are compared with the checksum that the repository computed.
+
+    With `use_sendfile`, local files are sent via `put_file` instead. The data do
+    not pass through python then, so no checksums are computed during the upload.
     """
 
+    def __init__(
+        self,
+        checksum_algorithms: tuple[str, ...] = ("md5",),
+        send_content_md5: bool = True,
+        use_sendfile: bool = False,
+    ):
+        """Initialize the transfer.
+
+        :param checksum_algorithms:     checksums computed while the file is uploaded
+        :param send_content_md5:        compute md5 before the upload and send it in
+                                        the Content-MD5 header, so that the repository
+                                        rejects corrupted data. This needs an extra
+                                        pass over the file.
+        :param use_sendfile:            send local files with sendfile
+        """
+        self.checksum_algorithms = checksum_algorithms
+        self.send_content_md5 = send_content_md5
+        self.use_sendfile = use_sendfile
+        self._hashing_source: HashingSource | None = None
+
     def upload(
         self,
         connection: SyncConnection,
         initialized_upload: File,
         source: DataSource,
         progress_bar: ProgressBar,
+        journal: UploadJournal | None = None,
     ) -> None:
         """Upload the file."""
-        if not initialized_upload.links.content:
+        content_url = (
+            initialized_upload.links.content if initialized_upload.links else None
+        )
+        if not content_url:
             raise ValueError("The upload does not provide the content link.")
 
         headers = {}
 
-        if "md5" in source.supported_checksums():
+        if self.send_content_md5 and "md5" in source.supported_checksums():
             md5_checksum = source.checksum("md5")
             headers["Content-MD5"] = md5_checksum
 
         headers["Content-Length"] = str(source.size())
 
+        # subclasses (MappedFileSource) read the file their own way, so only
+        # plain FileSource is sent via sendfile
+        if self.use_sendfile and type(source) is FileSource:
+            self._hashing_source = None
+            connection.put_file(
+                url=content_url,
+                file_name=source.file_name,
+                progress_bar=progress_bar,
+                headers=headers,
+            )
+            return
+
+        self._hashing_source = HashingSource(source, self.checksum_algorithms)
         connection.put_stream(
-            url=initialized_upload.links.content,
-            source=ProgressSource(source, progress_bar),
+            url=content_url,
+            source=ProgressSource(self._hashing_source, progress_bar),
             headers=headers,
         )
 
+    def checksums(self) -> dict[str, str]:
+        """Return checksums of the uploaded file computed during the upload."""
+        if self._hashing_source is None:
+            return {}
+        return self._hashing_source.digests()
+
     def prepare(
         self,
         connection: SyncConnection,
@@ -6,14 +6,24 @@
 
 """Data sources and sinks."""
 
-from .base import DataSink, DataSource, InputStream, OutputStream, SinkState
+from .base import (
+    DataSink,
+    DataSource,
+    InputStream,
+    OutputStream,
+    ResumableDataSink,
+    SinkState,
+)
 from .file import FileSink, FileSource
+from .hashing import HashingInputStream, HashingSource
+from .mapped_file import MappedFileSink, MappedFileSource
 from .memory import MemorySink, MemorySource
 from .stdin import StdInDataSource
 
 __all__ = (
     "DataSink",
     "DataSource",
+    "ResumableDataSink",
     "SinkState",
     "InputStream",
     "OutputStream",
@@ -21,6 +31,10 @@ __all__ = (
     "MemorySource",
     "FileSink",
     "FileSource",
+    "HashingInputStream",
+    "HashingSource",
+    "MappedFileSink",
+    "MappedFileSource",
     "StdInDataSource",
 )
 
@@ -81,6 +81,42 @@ class DataSink(Protocol):
         ...
 
 
+@runtime_checkable
+class ResumableDataSink(DataSink, Protocol):
+    """Protocol for data sinks that can resume an interrupted download.
+
+    Instead of `allocate`, the downloader calls `resume` to learn which byte ranges
+    have already been downloaded, reports every finished range via `mark_completed`
+    and calls `finalize` when the whole content has been written.
+    """
+
+    def resume(self, size: int | None, etag: str | None) -> list[tuple[int, int]]:
+        """Allocate the sink, reusing data from a previous interrupted download.
+
+        :param size: The size of the downloaded content, None if not known.
+        :param etag: The etag of the downloaded content, used to check that
+                     the previously downloaded data are still valid.
+        :return: Already downloaded byte ranges as (start, end) pairs, end exclusive.
+        """
+        ...
+
+    def mark_completed(self, offset: int, size: int) -> None:
+        """Record that the byte range has been completely written.
+
+        :param offset: The start of the range.
+        :param size: The size of the range in bytes.
+        """
+        ...
+
+    def finalize(self, checksum: str | None = None) -> None:
+        """Verify the downloaded data and make them available at the target.
+
+        :param checksum: The expected checksum of the content in the "algo:hexdigest"
+                         form, as returned by the repository. Not verified if None.
+        """
+        ...
+
+
 @runtime_checkable
 class DataSource(Protocol):
     """Protocol for data sources."""
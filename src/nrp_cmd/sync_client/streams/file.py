@@ -6,45 +6,164 @@
 
 """File sources and sinks."""
 
+import base64
 import contextlib
 import hashlib
+import json
 from pathlib import Path
-from typing import override
+from typing import Any, override
 
 import magic
 
-from .base import DataSink, DataSource, InputStream, OutputStream, SinkState
+from ...errors import RepositoryCommunicationError
+from .base import (
+    DataSource,
+    InputStream,
+    OutputStream,
+    ResumableDataSink,
+    SinkState,
+)
 from .bounded_stream import BoundedStream
 from .os import FileOutputStream, checksum_file, file_stat, open_file
 
 
-class FileSink(DataSink):
-    """Implementation of a sink that writes data to filesystem."""
+class FileSink(ResumableDataSink):
+    """Implementation of a sink that writes data to filesystem.
 
-    def __init__(self, fpath: Path):
+    If the sink is resumable, the data are written to "<name>.part" and
+    the completed byte ranges are recorded in a "<name>.part.json" sidecar
+    journal. A re-run of an interrupted download then downloads only
+    the missing ranges. When the download is finished, the size (and checksum
+    if known) is verified and the data file is atomically renamed to the target.
+    """
+
+    def __init__(self, fpath: Path, resumable: bool = False):
         """Initialize the sink.
 
         :param fpath: The path to the file where the data will be written.
+        :param resumable: Keep a journal of downloaded ranges next to the target
+                          and write the data to the target only when finished.
         """
         self._fpath = fpath
+        self._resumable = resumable
         self._state = SinkState.NOT_ALLOCATED
         self._file: FileOutputStream | None = None
+        self._size: int | None = None
+        self._etag: str | None = None
+        self._ranges: list[tuple[int, int]] = []
+
+    @property
+    def _data_path(self) -> Path:
+        """Path of the file the data are written to."""
+        if self._resumable:
+            return self._fpath.with_name(self._fpath.name + ".part")
+        return self._fpath
+
+    @property
+    def _journal_path(self) -> Path:
+        """Path of the sidecar journal of downloaded ranges."""
+        return self._fpath.with_name(self._fpath.name + ".part.json")
 
     @override
     def allocate(self, size: int) -> None:
         """Allocate space for the sink."""
-        self._file = open_file(self._fpath, mode="wb")
+        self._file = open_file(self._data_path, mode="wb")
         # need to get to the AIOFile to truncate, as the wrapper does not provide it
         self._file.file.truncate(size)
         self._state = SinkState.ALLOCATED
 
+    @override
+    def resume(
+        self, size: int | None, etag: str | None
+    ) -> list[tuple[int, int]]:
+        """Allocate the sink, reusing data from a previous interrupted download."""
+        self._size = size
+        self._etag = etag
+        self._ranges = []
+        if self._resumable and size is not None:
+            journal = self._load_journal()
+            data_stat = None
+            with contextlib.suppress(FileNotFoundError):
+                data_stat = file_stat(self._data_path)
+            if (
+                journal is not None
+                and data_stat is not None
+                and data_stat.st_size == size
+                and journal.get("size") == size
+                and journal.get("etag") == etag
+            ):
+                self._ranges = [(start, end) for start, end in journal["ranges"]]
+                self._file = open_file(self._data_path, mode="r+b")
+                self._state = SinkState.ALLOCATED
+                return list(self._ranges)
+
+        self.allocate(size or 0)
+        if self._resumable:
+            self._save_journal()
+        return []
+
+    @override
+    def mark_completed(self, offset: int, size: int) -> None:
+        """Record that the byte range has been completely written."""
+        if not self._resumable:
+            return
+        self._ranges = merge_ranges([*self._ranges, (offset, offset + size)])
+        self._save_journal()
+
+    @override
+    def finalize(self, checksum: str | None = None) -> None:
+        """Verify the downloaded data and move them to the target."""
+        self.close()
+        if not self._resumable:
+            return
+        data_path = self._data_path
+        actual_size = (file_stat(data_path)).st_size
+        if self._size is not None and actual_size != self._size:
+            raise RepositoryCommunicationError(
+                f"Downloaded {data_path} has size {actual_size}, expected {self._size}"
+            )
+        if checksum and ":" in checksum:
+            algo, expected = checksum.split(":", 1)
+            if algo in hashlib.algorithms_available:
+                actual = base64.b64decode(checksum_file(data_path, algo)).hex()
+                if actual != expected.lower():
+                    # the data are corrupted, the next attempt has to start over
+                    data_path.unlink(missing_ok=True)
+                    self._journal_path.unlink(missing_ok=True)
+                    raise RepositoryCommunicationError(
+                        f"Checksum of downloaded {self._fpath} does not match, "
+                        f"expected {checksum}, got {algo}:{actual}"
+                    )
+        data_path.replace(self._fpath)
+        self._journal_path.unlink(missing_ok=True)
+
+    def _load_journal(self) -> dict[str, Any] | None:
+        try:
+            return json.loads(self._journal_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _save_journal(self) -> None:
+        tmp_path = self._journal_path.with_name(self._journal_path.name + ".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    "size": self._size,
+                    "etag": self._etag,
+                    "ranges": self._ranges,
+                }
+            ),
+            encoding="utf-8",
+        )
+        tmp_path.replace(self._journal_path)
+
     @override
     def open_chunk(self, offset: int = 0) -> OutputStream:  # type: ignore
         """Open a chunk of the sink for writing."""
         if self._state != SinkState.ALLOCATED:
             raise RuntimeError("Sink not allocated")
 
-        chunk = open_file(self._fpath, mode="r+b")
+        chunk = open_file(self._data_path, mode="r+b")
         chunk.seek(offset)
         return chunk
 
@@ -69,6 +188,22 @@ class FileSink(DataSink):
         return f"<{self.__class__.__name__} {self._fpath} {self._state}>"
 
 
+def merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Merge overlapping and adjacent (start, end) ranges."""
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def is_range_completed(ranges: list[tuple[int, int]], start: int, end: int) -> bool:
+    """Return True if the (start, end) range is covered by the merged ranges."""
+    return any(r_start <= start and end <= r_end for r_start, r_end in ranges)
+
+
 class FileSource(DataSource):
     """A data source that reads data from a file."""
 
@@ -83,6 +218,20 @@ class FileSource(DataSource):
             file_name = Path(file_name)
         self._file_name = file_name
 
+    @property
+    def file_name(self) -> Path:
+        """The name of the file this source reads from."""
+        return self._file_name
+
+    def identity(self) -> str:
+        """Return a string identifying the file and its current content.
+
+        The identity changes whenever the file is modified, it is used to check
+        that an interrupted upload can be resumed from the same data.
+        """
+        stat = file_stat(self._file_name)
+        return f"{self._file_name.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
     @override
     def open(self, offset: int = 0, count: int | None = None) -> InputStream:  # type: ignore
         """Open the file for reading."""
@@ -0,0 +1,150 @@
+#
+# This file was generated from the asynchronous client at streams/hashing.py by generate_synchronous_client.sh
+# Do not edit this file directly, instead edit the original file and regenerate this file.
+#
+
+
+"""Data source computing checksums of the data while they are being read."""
+
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any, override
+
+from .base import DataSource, InputStream
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+class HashingIterator(Iterator[bytes]):
+    """Iterator updating the checksums with every returned chunk."""
+
+    def __init__(self, iterator: Iterator[bytes], stream: HashingInputStream):
+        """Initialize the iterator."""
+        self._iterator = iterator
+        self._stream = stream
+
+    @override
+    def __next__(self) -> bytes:
+        data = next(self._iterator)
+        self._stream.update(data)
+        return data
+
+
+class HashingInputStream(InputStream):
+    """Input stream updating a set of hashers with the data that pass through it."""
+
+    def __init__(self, stream: InputStream, hashers: Iterable[Any]):
+        """Initialize the input stream.
+
+        :param stream:  the wrapped stream
+        :param hashers: hashlib objects that will be updated with the read data
+        """
+        self._stream = stream
+        self._hashers = list(hashers)
+        self.bytes_read = 0
+
+    def update(self, data: bytes) -> None:
+        """Feed the data to the hashers."""
+        for hasher in self._hashers:
+            hasher.update(data)
+        self.bytes_read += len(data)
+
+    @override
+    def read(self, n: int = -1) -> bytes:
+        data = self._stream.read(n)
+        self.update(data)
+        return data
+
+    @override
+    def __iter__(self) -> Iterator[bytes]:
+        return HashingIterator(iter(self._stream), self)
+
+    @override
+    def __len__(self) -> int:
+        return len(self._stream)
+
+    @override
+    def close(self) -> None:
+        return self._stream.close()
+
+
+class HashingSource(DataSource):
+    """Data source computing checksums of the content in the same pass as it is sent.
+
+    Every `open` starts the checksums from scratch, so a retried upload does not
+    mix the data of the failed and the successful attempt. The checksums are
+    available via `digests` after the whole content has been read.
+    """
+
+    def __init__(self, source: DataSource, algorithms: Iterable[str] = ("md5",)):
+        """Create the data source.
+
+        :param source:      the wrapped data source
+        :param algorithms:  names of hashlib algorithms to compute
+        """
+        self._source = source
+        self._algorithms = tuple(algorithms)
+        self._hashers: dict[str, Any] = {}
+        self._stream: HashingInputStream | None = None
+        self._complete_read = False
+
+    @property
+    def has_range_support(self) -> bool:
+        """Return whether the source supports range requests."""
+        return self._source.has_range_support
+
+    @has_range_support.setter
+    def has_range_support(self, value: bool) -> None:
+        """Set whether the source supports range requests."""
+        raise AttributeError("Cannot set has_range_support on HashingSource")
+
+    @override
+    def open(self, offset: int = 0, count: int | None = None) -> InputStream:
+        self._hashers = {algo: hashlib.new(algo) for algo in self._algorithms}
+        # only a read of the whole content gives checksums of the file
+        self._complete_read = offset == 0 and count is None
+        self._stream = HashingInputStream(
+            self._source.open(offset, count), self._hashers.values()
+        )
+        return self._stream
+
+    def digests(self) -> dict[str, str]:
+        """Return hex digests of the content keyed by the algorithm name.
+
+        :return: the digests or an empty dictionary if the last opened stream
+                 did not read the whole content
+        """
+        if (
+            self._stream is None
+            or not self._complete_read
+            or self._stream.bytes_read != self._source.size()
+        ):
+            return {}
+        return {algo: hasher.hexdigest() for algo, hasher in self._hashers.items()}
+
+    @override
+    def size(self) -> int:
+        return self._source.size()
+
+    @override
+    def content_type(self) -> str:
+        return self._source.content_type()
+
+    @override
+    def close(self) -> None:
+        return self._source.close()
+
+    @override
+    def checksum(
+        self, algo: str = "md5", offset: int = 0, count: int | None = None
+    ) -> str:
+        return self._source.checksum(algo, offset, count)
+
+    @override
+    def supported_checksums(self) -> list[str]:
+        """Return a list of supported checksum algorithms."""
+        return self._source.supported_checksums()
+
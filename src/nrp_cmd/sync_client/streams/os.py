@@ -10,7 +10,7 @@ import base64
 import hashlib
 import os
 from pathlib import Path
-from typing import Literal, overload
+from typing import BinaryIO, Literal, cast, overload
 
 from .base import InputStream, OutputStream
 
@@ -47,6 +47,11 @@ def open_file(
     return r
 
 
+def open_raw_file(_fpath: Path, mode: Literal["rb", "w+b", "r+b"]) -> BinaryIO:
+    """Open a plain file, for example to map it into memory."""
+    return cast("BinaryIO", open(_fpath, mode))
+
+
 def file_stat(_fpath: Path) -> os.stat_result:
     """Get file statistics."""
     return os.stat(_fpath)
@@ -85,6 +90,7 @@ def get_filesystem_block_size(file_path: Path) -> int:
 
 __all__ = (
     "open_file",
+    "open_raw_file",
     "file_stat",
     "FileInputStream",
     "FileOutputStream",
@@ -42,7 +42,7 @@ class ProgressInputStream(InputStream):
 
     @override
     def __iter__(self) -> Iterator[bytes]:
-        return ProgressIterator(aiter(self._stream), self._source)
+        return ProgressIterator(iter(self._stream), self._source)
 
     @override
     def __len__(self) -> int:
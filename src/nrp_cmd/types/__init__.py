@@ -10,6 +10,7 @@ from .info import (
 )
 from .records import (
     FilesEnabled,
+    LazyRecord,
     ParentRecord,
     Record,
     RecordId,
@@ -30,4 +31,5 @@ __all__ = (
     "ParentRecord",
     "RecordList",
     "RecordId",
+    "LazyRecord",
 )
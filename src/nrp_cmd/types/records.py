@@ -11,12 +11,13 @@
 # currently python is unable to resolve type hints for generic types
 # when from __future__ import annotations is used
 
+from datetime import datetime
 from typing import Any
 
 from attrs import define, field
 from yarl import URL
 
-from ..converter import Omit, Rename, extend_serialization
+from ..converter import Omit, Rename, converter, extend_serialization
 from .base import Model
 from .files import File  # noqa: F401
 from .rest import BaseRecord, RESTList, RESTObjectLinks
@@ -77,6 +78,56 @@ class Record(BaseRecord):
         return self._extra_data
 
 
+class LazyRecord(dict[str, Any]):
+    """Record returned by the raw mode of the client.
+
+    The record is kept as the json returned by the repository (so it can be
+    written out without any conversion) and is structured into Record only
+    when an attribute of Record other than id, created or updated is accessed.
+    Raw records do not carry an etag.
+
+    Changes are not tracked and nothing is written back to the repository.
+    To change the record, modify the structured record returned by as_record()
+    and pass it to the update method of the records client explicitly.
+    """
+
+    __slots__ = ("_record",)
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        """Wrap the json of a record."""
+        super().__init__(data)
+        self._record: Record | None = None
+
+    @property
+    def id(self) -> str:
+        """Identifier of the record."""
+        return self["id"]
+
+    @property
+    def created(self) -> datetime:
+        """Timestamp when the record was created."""
+        return datetime.fromisoformat(self["created"])
+
+    @property
+    def updated(self) -> datetime:
+        """Timestamp when the record was last updated."""
+        return datetime.fromisoformat(self["updated"])
+
+    def as_record(self) -> Record:
+        """Return the structured record."""
+        # the slot is not set on unpickled records
+        record = getattr(self, "_record", None)
+        if record is None:
+            record = self._record = converter.structure({**self}, Record)
+        return record
+
+    def __getattr__(self, name: str) -> Any:
+        """Return the attribute of the structured record."""
+        if name.startswith("__") or name == "_record":
+            raise AttributeError(name)
+        return getattr(self.as_record(), name)
+
+
 @extend_serialization(Omit("_etag", from_unstructure=True), allow_extra_data=True)
 @define(kw_only=True)
 class RecordList(RESTList[Record]):
@@ -87,6 +138,14 @@ class RecordList(RESTList[Record]):
     aggregations: Any | None = None
     """Aggregations."""
 
+    @classmethod
+    def from_raw(cls, data: dict[str, Any]) -> "RecordList":
+        """Structure a search response, keeping its hits as LazyRecord."""
+        hits = data.get("hits") or {}
+        ret = converter.structure({**data, "hits": {**hits, "hits": []}}, cls)
+        ret.hits.hits = [LazyRecord(hit) for hit in hits.get("hits", [])]
+        return ret
+
     def as_dataframe(self, *keys: str):
         """Convert the record list to a pandas DataFrame."""
         import pandas as pd
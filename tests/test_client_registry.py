@@ -0,0 +1,140 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import asyncio
+
+import pytest
+from yarl import URL
+
+import nrp_cmd.cli.clients
+from nrp_cmd.cli.clients import (
+    ClientRegistry,
+    client_registry,
+    current_clients,
+    shared_clients,
+)
+from nrp_cmd.cli.records.get import read_record
+from nrp_cmd.config import Config, RepositoryConfig
+
+
+class FakeRecords:
+    def __init__(self):
+        self.read_ids = []
+
+    async def read(self, record_id, query):
+        self.read_ids.append(record_id)
+        return {"id": record_id}
+
+
+class FakeClient:
+    def __init__(self, repository_config):
+        self.repository_config = repository_config
+        self.records = FakeRecords()
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def created_clients(monkeypatch):
+    clients = []
+
+    async def get_async_client(repository_config, config):
+        await asyncio.sleep(0.01)
+        clients.append(FakeClient(repository_config))
+        return clients[-1]
+
+    monkeypatch.setattr(nrp_cmd.cli.clients, "get_async_client", get_async_client)
+    return clients
+
+
+def make_config():
+    config = Config()
+    for alias in ("first", "second"):
+        config.add_repository(
+            RepositoryConfig(alias=alias, url=URL(f"https://{alias}.org/api"))
+        )
+    return config
+
+
+async def test_records_share_client(created_clients):
+    config = make_config()
+    async with shared_clients():
+        await asyncio.gather(
+            *(
+                read_record(f"r{idx}", "first", config, False, None, False, False)
+                for idx in range(50)
+            )
+        )
+        await read_record("r", "second", config, False, None, False, False)
+
+    assert [client.repository_config.alias for client in created_clients] == [
+        "first",
+        "second",
+    ]
+    assert len(created_clients[0].records.read_ids) == 50
+    assert all(client.closed for client in created_clients)
+    assert current_clients.get() is None
+
+
+async def test_registry_outside_command(created_clients):
+    config = make_config()
+    with pytest.raises(RuntimeError):
+        client_registry()
+    with pytest.raises(RuntimeError):
+        await read_record("r1", "first", config, False, None, False, False)
+    assert not created_clients
+
+
+async def test_failed_client_is_not_kept(monkeypatch):
+    config = make_config()
+    attempts = []
+
+    async def get_async_client(repository_config, config):
+        attempts.append(repository_config.alias)
+        if len(attempts) == 1:
+            raise ConnectionError("repository is down")
+        return FakeClient(repository_config)
+
+    monkeypatch.setattr(nrp_cmd.cli.clients, "get_async_client", get_async_client)
+    registry = ClientRegistry()
+    with pytest.raises(ConnectionError):
+        await registry.get_client(config.get_repository("first"), config)
+    client = await registry.get_client(config.get_repository("first"), config)
+    assert attempts == ["first", "first"]
+    await registry.close()
+    assert client.closed
+
+
+async def test_close_skips_cancelled_clients(monkeypatch):
+    config = make_config()
+    started = asyncio.Event()
+
+    async def get_async_client(repository_config, config):
+        if repository_config.alias == "first":
+            started.set()
+            await asyncio.sleep(10)
+        return FakeClient(repository_config)
+
+    monkeypatch.setattr(nrp_cmd.cli.clients, "get_async_client", get_async_client)
+    registry = ClientRegistry()
+    pending = asyncio.create_task(
+        registry.get_client(config.get_repository("first"), config)
+    )
+    await started.wait()
+    second = await registry.get_client(config.get_repository("second"), config)
+    creation = next(iter(registry._clients.values()))
+
+    # the creation of the first client is cancelled while close waits for it
+    closing = asyncio.create_task(registry.close())
+    await asyncio.sleep(0)
+    creation.cancel()
+    await closing
+    assert second.closed
+    with pytest.raises(asyncio.CancelledError):
+        await pending
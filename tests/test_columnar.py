@@ -0,0 +1,166 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import contextlib
+from datetime import UTC, datetime
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from nrp_cmd.async_client.invenio.records import AsyncInvenioRecordsClient
+from nrp_cmd.columnar import (
+    ParquetRecordWriter,
+    RecordBatchBuilder,
+    parse_columns,
+)
+from nrp_cmd.sync_client.invenio.records import SyncInvenioRecordsClient
+from nrp_cmd.types.records import LazyRecord
+
+RECORDS = [
+    {
+        "id": f"r{i}",
+        "created": "2024-01-01T10:00:00+00:00",
+        "metadata": {
+            "title": f"Record {i}",
+            "count": i,
+            "creators": [{"name": f"Creator {i}"}],
+            "subjects": ["a", "b"],
+        },
+    }
+    for i in range(10)
+]
+
+
+def test_builder_projects_dotted_paths():
+    builder = RecordBatchBuilder(
+        ["id", "metadata.count", "metadata.creators.0.name", "metadata.subjects"],
+        batch_size=4,
+    )
+    batches = [builder.add(LazyRecord(record)) for record in RECORDS]
+    batches = [batch for batch in batches if batch is not None]
+    batches.append(builder.flush())
+    assert [batch.num_rows for batch in batches] == [4, 4, 2]
+    assert builder.flush() is None
+
+    table = pa.Table.from_batches(batches)
+    assert table.schema.field("metadata.count").type == pa.int64()
+    assert table.column("metadata.creators.0.name")[9].as_py() == "Creator 9"
+    assert table.column("metadata.subjects")[0].as_py() == '["a","b"]'
+
+
+def test_builder_types():
+    builder = RecordBatchBuilder(
+        {
+            "created": "timestamp",
+            "missing": None,
+            "metadata.count": "string",
+            "metadata.title": None,
+        }
+    )
+    builder.add(RECORDS[1])
+    batch = builder.flush()
+    assert batch.to_pylist() == [
+        {
+            "created": datetime(2024, 1, 1, 10, tzinfo=UTC),
+            "missing": None,
+            "metadata.count": "1",
+            "metadata.title": "Record 1",
+        }
+    ]
+    # the inferred types are kept, so values of other types are kept as json
+    builder.add({"missing": 1, "metadata": {"title": {"en": "Title"}}})
+    assert builder.flush().to_pylist()[0]["metadata.title"] == '{"en":"Title"}'
+
+    builder = RecordBatchBuilder({"metadata.count": None})
+    builder.add(RECORDS[1])
+    builder.flush()
+    builder.add({"metadata": {"count": "many"}})
+    with pytest.raises(ValueError, match="metadata.count"):
+        builder.flush()
+
+
+def test_parse_columns():
+    assert parse_columns(["id", "created", "metadata.size:int64"]) == {
+        "id": "string",
+        "created": "timestamp",
+        "metadata.size": "int64",
+    }
+    with pytest.raises(ValueError, match="Unknown type"):
+        parse_columns(["metadata.title:text"])
+
+
+def test_parquet_writer_row_groups(tmp_path):
+    path = tmp_path / "records.parquet"
+    with ParquetRecordWriter(path, ["id", "metadata.title"], batch_size=4) as writer:
+        for record in RECORDS:
+            writer.write(record)
+    assert writer.count == len(RECORDS)
+
+    parquet = pq.ParquetFile(path)
+    assert parquet.metadata.num_row_groups == 3
+    assert parquet.read().column("id").to_pylist() == [r["id"] for r in RECORDS]
+
+
+def test_parquet_writer_without_records(tmp_path):
+    path = tmp_path / "records.parquet"
+    with ParquetRecordWriter(path):
+        pass
+    table = pq.read_table(path)
+    assert table.num_rows == 0
+    assert table.column_names == [
+        "id",
+        "metadata.title",
+        "created",
+        "updated",
+        "links.self",
+    ]
+
+
+class FakeScanClient:
+    def __init__(self):
+        self.scan_options = None
+
+    def _records(self, **kwargs):
+        self.scan_options = kwargs
+        return [LazyRecord(record) for record in RECORDS]
+
+    @contextlib.asynccontextmanager
+    async def async_scan(self, **kwargs):
+        async def records():
+            for record in self._records(**kwargs):
+                yield record
+
+        yield records()
+
+    @contextlib.contextmanager
+    def sync_scan(self, **kwargs):
+        yield iter(self._records(**kwargs))
+
+
+async def test_async_scan_batches():
+    client = FakeScanClient()
+    client.scan = client.async_scan
+    async with AsyncInvenioRecordsClient.scan_batches(
+        client, columns=["id"], batch_size=3, q="test"
+    ) as batches:
+        rows = [batch.num_rows async for batch in batches]
+    assert rows == [3, 3, 3, 1]
+    assert client.scan_options["raw"]
+    assert client.scan_options["q"] == "test"
+
+
+def test_sync_export_parquet(tmp_path):
+    client = FakeScanClient()
+    client.scan = client.sync_scan
+    path = tmp_path / "records.parquet"
+    count = SyncInvenioRecordsClient.export_parquet(
+        client, path, columns=["id", "metadata.count"], batch_size=4
+    )
+    assert count == len(RECORDS)
+    assert pq.read_table(path).column("metadata.count").to_pylist() == list(range(10))
@@ -0,0 +1,67 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import asyncio
+import gc
+import threading
+import weakref
+
+from nrp_cmd.async_client.connection import AsyncConnection, close_pooled_connections
+from nrp_cmd.async_client.connection.connection import _pooled_sessions
+
+
+async def test_pooled_connections_are_not_kept_alive():
+    connection = AsyncConnection()
+    session = connection._get_session()
+    assert session in _pooled_sessions
+
+    reference = weakref.ref(connection)
+    del connection
+    gc.collect()
+    assert reference() is None
+
+    # the session of the collected connection is closed in the background
+    await asyncio.sleep(0.01)
+    assert session.closed
+    assert session not in _pooled_sessions
+
+
+async def test_close_pooled_connections():
+    connection = AsyncConnection()
+    session = connection._get_session()
+    await close_pooled_connections()
+    assert session.closed
+    assert session not in _pooled_sessions
+
+    # the connection opens a new session on the next request
+    new_session = connection._get_session()
+    assert new_session is not session
+    await connection.close()
+    assert new_session.closed
+    assert new_session not in _pooled_sessions
+
+
+def test_session_of_another_loop_is_closed():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        connection = AsyncConnection()
+
+        async def open_session():
+            return connection._get_session()
+
+        session = asyncio.run_coroutine_threadsafe(open_session(), loop).result()
+
+        # the session is closed inside its own loop
+        asyncio.run(connection.close())
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0.1), loop).result()
+        assert session.closed
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
@@ -0,0 +1,64 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+from nrp_cmd.converter import converter
+from nrp_cmd.types.files import File
+from nrp_cmd.types.records import Record
+
+RECORD = {
+    "id": "abc-123",
+    "created": "2024-01-01T10:00:00+00:00",
+    "updated": "2024-01-02T10:00:00+00:00",
+    "revision_id": None,
+    "links": {"self": "https://example.org/api/records/abc-123", "files": None},
+    "parent": {"communities": {"default": "cesnet"}, "workflow": None},
+    "metadata": {
+        "title": "Test",
+        "version": None,
+        "creators": [{"name": "A", "affiliation": None}, None],
+    },
+}
+
+
+def test_unstructure_drops_nulls():
+    record = converter.structure(RECORD, Record)
+    assert converter.unstructure(record) == {
+        "id": "abc-123",
+        "created": "2024-01-01T10:00:00+00:00",
+        "updated": "2024-01-02T10:00:00+00:00",
+        "links": {"self": "https://example.org/api/records/abc-123"},
+        "parent": {"communities": {"default": "cesnet"}},
+        "metadata": {"title": "Test", "creators": [{"name": "A"}]},
+    }
+    # the nulls are dropped from the output only
+    assert record.metadata["version"] is None
+    assert record.metadata["creators"][1] is None
+
+
+def test_unstructure_keeps_nulls():
+    record = converter.structure(RECORD, Record)
+    converter.unstructure(record)
+    unstructured = converter.unstructure(record, keep_nulls=True)
+    assert unstructured["revision_id"] is None
+    assert unstructured["parent"]["workflow"] is None
+    assert unstructured["metadata"] == RECORD["metadata"]
+
+
+def test_unstructure_any_typed_field():
+    file = converter.structure(
+        {
+            "key": "data.csv",
+            "metadata": {"caption": None, "tags": ["a", None]},
+            "links": {"self": "https://example.org/api/files/data.csv"},
+            "checksum": "md5:00",
+        },
+        File,
+    )
+    unstructured = converter.unstructure(file)
+    assert unstructured["metadata"] == {"tags": ["a"]}
+    assert unstructured["checksum"] == "md5:00"
+    assert file.metadata == {"caption": None, "tags": ["a", None]}
@@ -0,0 +1,65 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import pytest
+
+from nrp_cmd.dedup import (
+    BloomFilter,
+    DedupStoreType,
+    HashDedupStore,
+    SqliteDedupStore,
+    make_dedup_store,
+)
+
+KEYS = [f"https://repository.org/api/records/{i:05d}-abcde" for i in range(5000)]
+
+
+@pytest.mark.parametrize("store_type", list(DedupStoreType))
+def test_dedup_store_drops_duplicates(store_type):
+    store = make_dedup_store(store_type)
+    try:
+        assert all(store.add(key) for key in KEYS)
+        assert not any(store.add(key) for key in KEYS[::7])
+        assert len(store) == len(KEYS)
+        assert KEYS[123] in store
+        assert "https://repository.org/api/records/unknown" not in store
+    finally:
+        store.close()
+
+
+def test_hash_store_grows():
+    store = HashDedupStore(capacity=16)
+    for key in KEYS:
+        store.add(key)
+    assert all(key in store for key in KEYS)
+    assert len(store) == len(KEYS)
+
+
+def test_bloom_filter_error_rate():
+    bloom = BloomFilter(capacity=len(KEYS), error_rate=0.01)
+    for key in KEYS:
+        bloom.add(key)
+    assert all(key in bloom for key in KEYS)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_sqlite_store_persists(tmp_path):
+    path = tmp_path / "seen.sqlite"
+    store = SqliteDedupStore(path, batch_size=100)
+    for key in KEYS:
+        store.add(key)
+    store.close()
+    assert path.exists()
+
+    store = SqliteDedupStore(path)
+    try:
+        assert len(store) == len(KEYS)
+        assert not store.add(KEYS[0])
+        assert store.add("new key")
+    finally:
+        store.close()
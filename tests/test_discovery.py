@@ -0,0 +1,130 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import asyncio
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from yarl import URL
+
+import nrp_cmd.async_client
+import nrp_cmd.config.config
+import nrp_cmd.sync_client
+from nrp_cmd.async_client import discover_async_client
+from nrp_cmd.config import Config, RepositoryConfig
+from nrp_cmd.config.discovery import DiscoveredClient, DiscoveryCache
+from nrp_cmd.sync_client import discover_sync_client
+
+REPOSITORY = RepositoryConfig(alias="test", url=URL("https://repository.org/"))
+
+
+class AsyncFakeClient:
+    probes = 0
+
+    @classmethod
+    async def can_handle_repository(cls, url, verify_tls=True):
+        cls.probes += 1
+        await asyncio.sleep(0.01)
+        return URL(url) / "api"
+
+
+class SyncFakeClient:
+    probes = 0
+
+    @classmethod
+    def can_handle_repository(cls, url, verify_tls=True):
+        cls.probes += 1
+        time.sleep(0.01)
+        return URL(url) / "api"
+
+
+@pytest.fixture(autouse=True)
+def fake_clients(monkeypatch):
+    AsyncFakeClient.probes = SyncFakeClient.probes = 0
+    monkeypatch.setattr(
+        nrp_cmd.async_client,
+        "async_client_entry_points",
+        lambda: {"fake": AsyncFakeClient},
+    )
+    monkeypatch.setattr(
+        nrp_cmd.sync_client,
+        "sync_client_entry_points",
+        lambda: {"fake": SyncFakeClient},
+    )
+    # forget the clients discovered by other tests
+    monkeypatch.setattr(nrp_cmd.config.config, "_discovered_clients", DiscoveryCache())
+
+
+def make_config(tmp_path, **kwargs):
+    config = Config(**kwargs)
+    config.save(tmp_path / "invenio-config.json")
+    return Config.from_file(tmp_path / "invenio-config.json")
+
+
+async def test_concurrent_discoveries_probe_once(tmp_path):
+    config = make_config(tmp_path)
+    clients = await asyncio.gather(
+        *(discover_async_client(REPOSITORY, config) for _ in range(10))
+    )
+    assert clients == [AsyncFakeClient] * 10
+    assert AsyncFakeClient.probes == 1
+
+    assert await discover_async_client(REPOSITORY, config) is AsyncFakeClient
+    assert AsyncFakeClient.probes == 1
+    assert await discover_async_client(REPOSITORY, config, refresh=True)
+    assert AsyncFakeClient.probes == 2
+
+
+async def test_discovery_is_cached_in_file(tmp_path, monkeypatch):
+    await discover_async_client(REPOSITORY, make_config(tmp_path))
+
+    # a new process does not have the in-memory cache
+    monkeypatch.setattr(nrp_cmd.config.config, "_discovered_clients", DiscoveryCache())
+    config = Config.from_file(tmp_path / "invenio-config.json")
+    discovered = config.get_discovered_client(REPOSITORY.url)
+    assert discovered.client == "fake"
+    assert discovered.api_url == URL("https://repository.org/api")
+    assert await discover_async_client(REPOSITORY, config) is AsyncFakeClient
+    assert AsyncFakeClient.probes == 1
+
+
+async def test_expired_discovery_is_probed_again(tmp_path):
+    config = make_config(tmp_path, discovery_ttl=60)
+    cache = DiscoveryCache.from_file(tmp_path / "discovery-cache.json")
+    cache[REPOSITORY.url] = DiscoveredClient(
+        client="fake",
+        api_url=URL("https://repository.org/api"),
+        discovered=datetime.now(UTC) - timedelta(minutes=2),
+    )
+    cache.save()
+    assert config.get_discovered_client(REPOSITORY.url) is None
+    assert await discover_async_client(REPOSITORY, config) is AsyncFakeClient
+    assert AsyncFakeClient.probes == 1
+
+    config = make_config(tmp_path, discovery_ttl=0)
+    await discover_async_client(REPOSITORY, config)
+    await discover_async_client(REPOSITORY, config)
+    assert AsyncFakeClient.probes == 3
+
+
+def test_sync_concurrent_discoveries_probe_once(tmp_path):
+    config = make_config(tmp_path)
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(discover_sync_client(REPOSITORY, config))
+        )
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [SyncFakeClient] * 10
+    assert SyncFakeClient.probes == 1
@@ -0,0 +1,148 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import base64
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+from yarl import URL
+
+from nrp_cmd.async_client.invenio.files import AsyncInvenioFilesClient
+from nrp_cmd.async_client.streams import FileSource, HashingSource
+from nrp_cmd.async_client.streams.os import checksum_file
+from nrp_cmd.converter import converter
+from nrp_cmd.errors import RepositoryCommunicationError
+from nrp_cmd.sync_client.invenio.files import SyncInvenioFilesClient
+from nrp_cmd.sync_client.streams import FileSource as SyncFileSource
+from nrp_cmd.sync_client.streams import HashingSource as SyncHashingSource
+
+DATA = bytes(range(256)) * 1000
+
+
+async def test_hashing_source_single_pass(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+    source = HashingSource(FileSource(path), ("md5", "sha256"))
+
+    # a partial read does not give checksums of the file
+    stream = await source.open(10, 100)
+    await stream.read()
+    await stream.close()
+    assert await source.digests() == {}
+
+    # a retried upload starts the checksums from scratch
+    stream = await source.open()
+    await stream.read(1000)
+    stream = await source.open()
+    async for _ in stream:
+        pass
+    await stream.close()
+    assert await source.digests() == {
+        "md5": hashlib.md5(DATA).hexdigest(),
+        "sha256": hashlib.sha256(DATA).hexdigest(),
+    }
+
+
+async def test_checksum_file_runs_in_pool(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+    expected = base64.b64encode(hashlib.md5(DATA[5:105]).digest()).decode("ascii")
+    assert await checksum_file(path, "md5", 5, 100) == expected
+
+
+def test_sync_hashing_source(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+    source = SyncHashingSource(SyncFileSource(path))
+    stream = source.open()
+    for _ in stream:
+        pass
+    stream.close()
+    assert source.digests() == {"md5": hashlib.md5(DATA).hexdigest()}
+
+
+files_url = URL("https://repository.org/api/records/abc/draft/files")
+
+
+class CorruptingRepository:
+    """Repository whose checksum of the committed file does not match the data."""
+
+    retry_after_seconds = 0
+
+    def __init__(self):
+        self.headers = None
+        self.deleted = []
+
+    def post(self, *, url, json, result_class, **kwargs):
+        file = {
+            "key": "data.bin",
+            "links": {
+                "self": str(files_url / "data.bin"),
+                "content": str(files_url / "data.bin" / "content"),
+                "commit": str(files_url / "data.bin" / "commit"),
+            },
+        }
+        if url == files_url:
+            return converter.structure(
+                {"enabled": True, "entries": [file], "links": {"self": str(url)}},
+                result_class,
+            )
+        return converter.structure({**file, "checksum": "md5:0000"}, result_class)
+
+    def delete(self, *, url, **kwargs):
+        self.deleted.append(url)
+
+
+class AsyncCorruptingRepository(CorruptingRepository):
+    async def post(self, **kwargs):
+        return super().post(**kwargs)
+
+    async def put_stream(self, *, url, source, headers):
+        self.headers = headers
+        stream = await source.open()
+        async for _ in stream:
+            pass
+        await stream.close()
+        return SimpleNamespace(headers={})
+
+    async def delete(self, **kwargs):
+        super().delete(**kwargs)
+
+
+class SyncCorruptingRepository(CorruptingRepository):
+    def put_stream(self, *, url, source, headers):
+        self.headers = headers
+        stream = source.open()
+        for _ in stream:
+            pass
+        stream.close()
+        return SimpleNamespace(headers={})
+
+
+async def test_corrupted_upload_is_deleted(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+    connection = AsyncCorruptingRepository()
+    client = AsyncInvenioFilesClient(connection, SimpleNamespace(features=[]))
+    with pytest.raises(RepositoryCommunicationError, match="data.bin"):
+        await client.upload(files_url, "data.bin", {}, path)
+    assert connection.deleted == [files_url / "data.bin"]
+    # the data are checked by the repository before the commit as well
+    assert connection.headers["Content-MD5"] == base64.b64encode(
+        hashlib.md5(DATA).digest()
+    ).decode("ascii")
+
+
+def test_sync_corrupted_upload_is_deleted(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+    connection = SyncCorruptingRepository()
+    client = SyncInvenioFilesClient(connection, SimpleNamespace(features=[]))
+    with pytest.raises(RepositoryCommunicationError, match="data.bin"):
+        client.upload(files_url, "data.bin", {}, path)
+    assert connection.deleted == [files_url / "data.bin"]
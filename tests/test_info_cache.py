@@ -0,0 +1,247 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import json
+import threading
+from datetime import UTC, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from yarl import URL
+
+from nrp_cmd.async_client.connection import AsyncConnection
+from nrp_cmd.async_client.invenio.introspection import (
+    RepositoryInfoFetcher as AsyncRepositoryInfoFetcher,
+)
+from nrp_cmd.config import RepositoryConfig
+from nrp_cmd.http_cache import CachedResponse, ResponseCache
+from nrp_cmd.sync_client.connection import SyncConnection
+from nrp_cmd.sync_client.invenio.introspection import (
+    RepositoryInfoFetcher as SyncRepositoryInfoFetcher,
+)
+
+
+def make_documents(
+    base_url, version="1.0", models_path="/.well-known/repository/models"
+):
+    info = {
+        "schema": "local://introspection-v1.0.0",
+        "name": "Test repository",
+        "description": "",
+        "version": version,
+        "invenio_version": "12.0",
+        "links": {
+            "self": f"{base_url}/.well-known/repository/",
+            "records": f"{base_url}/api/records/",
+            "models": f"{base_url}{models_path}",
+        },
+    }
+    models = [
+        {
+            "type": "datasets",
+            "schema": "local://datasets-1.0.0.json",
+            "name": "Datasets",
+            "description": "",
+            "version": version,
+            "features": [],
+            "links": {"records": f"{base_url}/api/datasets/"},
+        }
+    ]
+    return {
+        "/api/.well-known/repository/": json.dumps(info),
+        models_path: json.dumps(models),
+    }
+
+
+class Repository(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RepositoryHandler)
+        self.base_url = f"http://127.0.0.1:{self.server_port}"
+        self.documents = make_documents(self.base_url)
+        self.downloads = 0
+        self.not_modified = 0
+        self.lock = threading.Lock()
+        self.release = threading.Event()
+        self.release.set()
+
+    def change(self, version, **kwargs):
+        self.documents = make_documents(self.base_url, version, **kwargs)
+
+
+class RepositoryHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.release.wait()
+        document = self.server.documents.get(self.path)
+        if document is None:
+            self.send_response(404)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b'{"status": 404, "message": "Not found"}')
+            return
+        etag = f'"{hash(document)}"'
+        if self.headers.get("If-None-Match") == etag:
+            with self.server.lock:
+                self.server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        with self.server.lock:
+            self.server.downloads += 1
+        payload = document.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def repository():
+    server = Repository()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.release.set()
+    server.shutdown()
+    server.server_close()
+
+
+def make_config(repository, **kwargs):
+    return RepositoryConfig(
+        alias="test",
+        url=URL(repository.base_url) / "api",
+        retry_count=1,
+        retry_after_seconds=0,
+        **kwargs,
+    )
+
+
+def test_cache_round_trip(tmp_path):
+    cache = ResponseCache(tmp_path)
+    assert cache.get("https://repository.org/") is None
+
+    response = CachedResponse(
+        url="https://repository.org/",
+        payload="{}",
+        etag='W/"1"',
+        fetched=datetime.now(UTC),
+    )
+    cache.put(response)
+    assert cache.get(URL("https://repository.org/")) == response
+    assert response.validation_headers == {"If-None-Match": 'W/"1"'}
+
+    # a damaged entry is treated as missing by a new process
+    cache._path("https://repository.org/").write_text("{")
+    assert cache.get("https://repository.org/") == response
+    assert ResponseCache(tmp_path).get("https://repository.org/") is None
+
+
+def test_sync_refresh_revalidates(repository, tmp_path):
+    config = make_config(repository)
+    cache = ResponseCache(tmp_path)
+    with SyncConnection(retry_count=1) as connection:
+        info = SyncRepositoryInfoFetcher(connection, config, cache).fetch()
+        assert info.models["datasets"].version == "1.0"
+        assert (repository.downloads, repository.not_modified) == (2, 0)
+
+        # the next command revalidates the cached responses
+        info = SyncRepositoryInfoFetcher(connection, config, cache).fetch()
+        assert info.models["datasets"].version == "1.0"
+        assert (repository.downloads, repository.not_modified) == (2, 2)
+
+        repository.change("2.0")
+        info = SyncRepositoryInfoFetcher(connection, config, cache).fetch()
+        assert info.version == info.models["datasets"].version == "2.0"
+        assert (repository.downloads, repository.not_modified) == (4, 2)
+
+
+async def test_async_refresh_revalidates(repository, tmp_path):
+    config = make_config(repository)
+    cache = ResponseCache(tmp_path)
+    async with AsyncConnection(retry_count=1) as connection:
+        info = await AsyncRepositoryInfoFetcher(connection, config, cache).fetch()
+        assert info.models["datasets"].version == "1.0"
+        assert (repository.downloads, repository.not_modified) == (2, 0)
+
+        info = await AsyncRepositoryInfoFetcher(connection, config, cache).fetch()
+        assert info.models["datasets"].version == "1.0"
+        assert (repository.downloads, repository.not_modified) == (2, 2)
+
+        repository.change("2.0")
+        info = await AsyncRepositoryInfoFetcher(connection, config, cache).fetch()
+        assert info.models["datasets"].version == "2.0"
+        assert (repository.downloads, repository.not_modified) == (4, 2)
+
+
+async def test_async_stale_while_revalidate(repository, tmp_path):
+    config = make_config(repository, stale_while_revalidate=True)
+    cache = ResponseCache(tmp_path)
+    async with AsyncConnection(retry_count=1) as connection:
+        # nothing is cached, so the info is downloaded
+        await AsyncRepositoryInfoFetcher(connection, config, cache).fetch()
+        assert repository.downloads == 2
+
+        repository.change("2.0")
+        repository.release.clear()
+        fetcher = AsyncRepositoryInfoFetcher(connection, config, cache)
+        info = await fetcher.fetch()
+        assert info.models["datasets"].version == "1.0"
+
+        repository.release.set()
+        await fetcher.close()
+        assert config.info.models["datasets"].version == "2.0"
+        assert repository.downloads == 4
+
+
+def test_sync_stale_while_revalidate(repository, tmp_path):
+    config = make_config(repository, stale_while_revalidate=True)
+    cache = ResponseCache(tmp_path)
+    with SyncConnection(retry_count=1) as connection:
+        SyncRepositoryInfoFetcher(connection, config, cache).fetch()
+
+        repository.change("2.0")
+        repository.release.clear()
+        fetcher = SyncRepositoryInfoFetcher(connection, config, cache)
+        info = fetcher.fetch()
+        assert info.models["datasets"].version == "1.0"
+
+        repository.release.set()
+        fetcher.close()
+        assert config.info.models["datasets"].version == "2.0"
+        assert (
+            SyncRepositoryInfoFetcher(connection, config, cache).fetch().version
+            == "2.0"
+        )
+
+
+async def test_async_changed_models_link(repository, tmp_path):
+    config = make_config(repository)
+    cache = ResponseCache(tmp_path)
+    async with AsyncConnection(retry_count=1) as connection:
+        await AsyncRepositoryInfoFetcher(connection, config, cache).fetch()
+
+        # the models moved, the link in the cached info leads nowhere
+        repository.change("2.0", models_path="/api/models")
+        info = await AsyncRepositoryInfoFetcher(connection, config, cache).fetch()
+        assert str(info.links.models).endswith("/api/models")
+        assert info.models["datasets"].version == "2.0"
+
+
+def test_sync_changed_models_link(repository, tmp_path):
+    config = make_config(repository)
+    cache = ResponseCache(tmp_path)
+    with SyncConnection(retry_count=1) as connection:
+        SyncRepositoryInfoFetcher(connection, config, cache).fetch()
+
+        repository.change("2.0", models_path="/api/models")
+        info = SyncRepositoryInfoFetcher(connection, config, cache).fetch()
+        assert info.models["datasets"].version == "2.0"
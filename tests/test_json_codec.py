@@ -0,0 +1,46 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import json
+
+import pytest
+
+from nrp_cmd.cli.arguments import OutputFormat
+from nrp_cmd.cli.base import format_output
+from nrp_cmd.json_codec import available_codecs
+
+RECORD = {
+    "id": "abc-123",
+    "metadata": {"title": "Příliš žluťoučký kůň\núpěl", "count": 3, "ratio": 0.5},
+    "files": {"enabled": True, "entries": None},
+    "subjects": ["a", "b"],
+}
+
+
+@pytest.fixture(params=[codec.name for codec in available_codecs()])
+def codec(request):
+    return next(codec for codec in available_codecs() if codec.name == request.param)
+
+
+def test_codec_matches_stdlib(codec):
+    encoded = codec.dumps(RECORD)
+    assert encoded == json.dumps(
+        RECORD, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+    assert codec.loads(encoded) == RECORD
+    assert codec.loads(encoded.decode("utf-8")) == RECORD
+
+
+def test_codec_raises_value_error(codec):
+    with pytest.raises(ValueError):
+        codec.loads(b'{"id": ')
+
+
+def test_jsonl_output_is_single_line():
+    line = format_output(OutputFormat.JSON_LINES, RECORD)
+    assert "\n" not in line
+    assert json.loads(line) == RECORD
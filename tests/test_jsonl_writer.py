@@ -0,0 +1,63 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import asyncio
+import gzip
+import json
+
+import pytest
+
+from nrp_cmd.cli.jsonl import Compression, JSONLinesWriter
+from nrp_cmd.types.records import LazyRecord
+
+RECORDS = [{"id": f"r{i}", "metadata": {"title": f"Record {i}"}} for i in range(1000)]
+
+
+def read_lines(data: bytes) -> list:
+    return [json.loads(line) for line in data.decode("utf-8").splitlines()]
+
+
+async def test_writer_batches_records(tmp_path):
+    path = tmp_path / "records.jsonl"
+    async with JSONLinesWriter(path, batch_size=1000, queue_size=1) as writer:
+        for record in RECORDS:
+            await writer.write(LazyRecord(record))
+    assert writer.count == len(RECORDS)
+    assert read_lines(path.read_bytes()) == RECORDS
+
+
+async def test_writer_compresses_output(tmp_path):
+    path = tmp_path / "records.jsonl.gz"
+    assert Compression.from_path(path) == Compression.GZIP
+    async with JSONLinesWriter(path, Compression.GZIP, batch_size=4096) as writer:
+        for record in RECORDS:
+            await writer.write(record)
+    assert read_lines(gzip.decompress(path.read_bytes())) == RECORDS
+
+
+async def test_writer_flushes_partial_batch(tmp_path):
+    path = tmp_path / "records.jsonl"
+    async with JSONLinesWriter(path, flush_interval=0.01) as writer:
+        await writer.write(RECORDS[0])
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if path.read_bytes():
+                break
+        assert read_lines(path.read_bytes()) == RECORDS[:1]
+
+
+async def test_writer_reports_write_errors(tmp_path):
+    path = tmp_path / "records.jsonl"
+
+    def fail(batch):
+        raise OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        async with JSONLinesWriter(path, batch_size=100, queue_size=1) as writer:
+            writer._write_batch = fail
+            for record in RECORDS:
+                await writer.write(record)
@@ -0,0 +1,63 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import json
+import pickle
+from datetime import UTC, datetime
+
+from yarl import URL
+
+from nrp_cmd.cli.arguments import OutputFormat
+from nrp_cmd.cli.base import format_output
+from nrp_cmd.types.records import LazyRecord, Record, RecordList
+
+HIT = {
+    "id": "abc-123",
+    "created": "2024-01-01T10:00:00+00:00",
+    "updated": "2024-01-02T10:00:00+00:00",
+    "links": {"self": "https://example.org/api/records/abc-123"},
+    "files": {"enabled": False},
+    "metadata": {"title": "Test"},
+}
+
+SEARCH_RESPONSE = {
+    "hits": {"hits": [HIT, {**HIT, "id": "def-456"}], "total": 2},
+    "links": {"self": "https://example.org/api/records?page=1"},
+    "sortBy": "newest",
+}
+
+
+def test_lazy_record_is_structured_on_access():
+    record = LazyRecord(HIT)
+    assert record.id == "abc-123"
+    assert record.updated == datetime(2024, 1, 2, 10, tzinfo=UTC)
+    assert record._record is None
+
+    assert record.links.self_ == URL("https://example.org/api/records/abc-123")
+    assert record.metadata == {"title": "Test"}
+    assert isinstance(record.as_record(), Record)
+    assert record.as_record() is record.as_record()
+
+
+def test_lazy_record_is_written_without_conversion():
+    record = LazyRecord(HIT)
+    assert json.loads(format_output(OutputFormat.JSON_LINES, record)) == HIT
+    assert record._record is None
+
+
+def test_lazy_record_pickle():
+    record = pickle.loads(pickle.dumps(LazyRecord(HIT)))
+    assert record == HIT
+    assert record.files_.enabled is False
+
+
+def test_record_list_from_raw():
+    records = RecordList.from_raw(SEARCH_RESPONSE)
+    assert records.total == 2
+    assert records.sortBy == "newest"
+    assert [record.id for record in records] == ["abc-123", "def-456"]
+    assert all(isinstance(record, LazyRecord) for record in records)
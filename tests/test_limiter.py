@@ -0,0 +1,147 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import asyncio
+import threading
+import time
+
+from yarl import URL
+
+from nrp_cmd.async_client.connection.limiter import (
+    AdaptiveLimiter,
+    is_overload_error,
+    limiter_key,
+)
+from nrp_cmd.async_client.connection.limiter import Limiter as AsyncLimiter
+from nrp_cmd.errors import RepositoryRetryError, RepositoryServerError
+from nrp_cmd.sync_client.connection.limiter import Limiter as SyncLimiter
+
+api_url = URL("https://repository.org/api/records")
+s3_url = URL("https://s3.repository.org/bucket/part")
+
+
+async def test_async_limiter_per_server_capacity():
+    limiter = AsyncLimiter(4, per_server_capacity=2)
+    running: dict[str, int] = {"api": 0, "s3": 0}
+    max_running: dict[str, int] = {"api": 0, "s3": 0}
+
+    async def request(name, url):
+        async with limiter.limit(url):
+            running[name] += 1
+            max_running[name] = max(max_running[name], running[name])
+            await asyncio.sleep(0.01)
+            running[name] -= 1
+
+    await asyncio.gather(
+        *[request("s3", s3_url) for _ in range(10)],
+        *[request("api", api_url) for _ in range(3)],
+    )
+    assert max_running == {"api": 2, "s3": 2}
+    assert limiter.free == 4
+    assert limiter.statistics["s3.repository.org:443"].acquired == 10
+    assert limiter.total_statistics.waited > 0
+
+
+async def test_async_limiter_fair_between_servers():
+    limiter = AsyncLimiter(1)
+    order = []
+
+    async def request(name, url):
+        async with limiter.limit(url):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    # s3 requests are queued before the api ones, but they get served alternately
+    await asyncio.gather(
+        *[request("s3", s3_url) for _ in range(4)],
+        *[request("api", api_url) for _ in range(2)],
+    )
+    assert order == ["s3", "s3", "api", "s3", "api", "s3"]
+
+
+async def test_async_limiter_cancelled_waiter():
+    limiter = AsyncLimiter(1)
+    async with limiter.limit(api_url):
+        task = asyncio.create_task(limiter._acquire("x"))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.sleep(0)
+    assert limiter.free == 1
+    assert limiter.waiting == 0
+
+
+def test_sync_limiter_per_server_capacity():
+    limiter = SyncLimiter(4, per_server_capacity=2)
+    lock = threading.Lock()
+    running = {"api": 0, "s3": 0}
+    max_running = {"api": 0, "s3": 0}
+
+    def request(name, url):
+        with limiter.limit(url):
+            with lock:
+                running[name] += 1
+                max_running[name] = max(max_running[name], running[name])
+            time.sleep(0.01)
+            with lock:
+                running[name] -= 1
+
+    threads = [
+        threading.Thread(target=request, args=("s3", s3_url)) for _ in range(10)
+    ] + [threading.Thread(target=request, args=("api", api_url)) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert max_running == {"api": 2, "s3": 2}
+    assert limiter.free == 4
+    assert limiter.total_statistics.acquired == 13
+
+
+async def test_adaptive_limiter_aimd():
+    limiter = AdaptiveLimiter(64, 16, initial_server_capacity=4)
+    url = URL("https://adaptive.repository.org/api")
+    state = limiter.server_concurrency(limiter_key(url))
+    state.limit = 4
+
+    # requests without a known latency (streamed uploads) do not change the limit
+    for _ in range(20):
+        async with limiter.limit(url):
+            await asyncio.sleep(0)
+    assert state.capacity == 4
+
+    # flat latency increases the limit, even if the bodies of the responses
+    # take much longer to stream than the first one did
+    for idx in range(20):
+        async with limiter.limit(url) as slot:
+            await asyncio.sleep(0.005)
+            slot.responded()
+            await asyncio.sleep(0.05 if idx else 0)
+    increased = state.capacity
+    assert increased > 4
+
+    # too many requests halves it
+    try:
+        async with limiter.limit(url):
+            raise RepositoryRetryError(1)
+    except RepositoryRetryError:
+        pass
+    assert state.capacity == increased // 2
+
+    # the state is kept for new limiters
+    assert AdaptiveLimiter().server_concurrency(limiter_key(url)) is state
+
+
+def test_overload_uses_http_status():
+    # a proxy answering 503 with a html page, the body fallback carries the status
+    assert is_overload_error(RepositoryServerError(None, {"reason": "<html>"}, 503))
+    assert is_overload_error(RepositoryServerError(None, {"status": 500}, 504))
+    # the http status wins over the status reported in the body
+    assert not is_overload_error(RepositoryServerError(None, {"status": 503}, 500))
+    # the body is used only if the http status is not known
+    assert is_overload_error(RepositoryServerError(None, {"status": 503}))
+    assert not is_overload_error(RepositoryServerError(None, {"message": "x"}))
@@ -0,0 +1,75 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import asyncio
+
+from nrp_cmd.async_client.streams import MappedFileSink, MappedFileSource
+
+DATA = bytes(range(256)) * 100
+
+
+async def test_mapped_source_ranges(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+    source = MappedFileSource(path, chunk_size=1000)
+
+    stream = await source.open(100, 2500)
+    assert len(stream) == 2500
+    chunks = [bytes(chunk) async for chunk in stream]
+    await stream.close()
+    assert [len(c) for c in chunks] == [1000, 1000, 500]
+    assert b"".join(chunks) == DATA[100:2600]
+
+    stream = await source.open(25000)
+    assert bytes(await stream.read()) == DATA[25000:]
+    await stream.close()
+
+
+async def test_mapped_sink_parts(tmp_path):
+    target = tmp_path / "data.bin"
+    sink = MappedFileSink(target, resumable=True)
+    assert await sink.resume(len(DATA), None) == []
+
+    async def write(offset, size):
+        chunk = await sink.open_chunk(offset)
+        await chunk.write(DATA[offset : offset + size])
+        await chunk.close()
+        await sink.mark_completed(offset, size)
+
+    await asyncio.gather(write(0, 10000), write(10000, 10000), write(20000, 5600))
+    await sink.finalize()
+    assert target.read_bytes() == DATA
+
+
+async def test_mapped_sink_resume(tmp_path):
+    target = tmp_path / "data.bin"
+    sink = MappedFileSink(target, resumable=True)
+    await sink.resume(len(DATA), '"e"')
+    chunk = await sink.open_chunk(0)
+    await chunk.write(DATA[:100])
+    await sink.mark_completed(0, 100)
+    await sink.close()
+
+    sink = MappedFileSink(target, resumable=True)
+    assert await sink.resume(len(DATA), '"e"') == [(0, 100)]
+    chunk = await sink.open_chunk(100)
+    await chunk.write(DATA[100:])
+    await sink.finalize()
+    assert target.read_bytes() == DATA
+
+
+async def test_mapped_sink_unknown_size(tmp_path):
+    # the size is not known, the sink is allocated empty and grows on write
+    target = tmp_path / "data.bin"
+    sink = MappedFileSink(target)
+    assert await sink.resume(None, None) == []
+    chunk = await sink.open_chunk(0)
+    await chunk.write(DATA[:1000])
+    await chunk.write(DATA[1000:])
+    await chunk.close()
+    await sink.finalize()
+    assert target.read_bytes() == DATA
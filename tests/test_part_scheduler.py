@@ -0,0 +1,102 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import asyncio
+import threading
+import time
+
+import pytest
+
+from nrp_cmd.async_client.invenio.transfer.scheduler import (
+    PartScheduler as AsyncPartScheduler,
+)
+from nrp_cmd.async_client.invenio.transfer.scheduler import plan_upload_parts
+from nrp_cmd.sync_client.invenio.transfer.scheduler import (
+    PartScheduler as SyncPartScheduler,
+)
+
+
+def test_plan_upload_parts():
+    parts = list(plan_upload_parts(25, 10, 3))
+    assert [(p.index, p.offset, p.size) for p in parts] == [
+        (0, 0, 10),
+        (1, 10, 10),
+        (2, 20, 5),
+    ]
+
+
+async def test_async_scheduler_window_order_and_retry():
+    scheduler = AsyncPartScheduler(window=3, retry_after_seconds=0)
+    started: list[int] = []
+    in_flight = 0
+    max_in_flight = 0
+    failures = {5: 2}
+
+    async def upload(part):
+        nonlocal in_flight, max_in_flight
+        started.append(part.index)
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        try:
+            await asyncio.sleep(0.001)
+            if failures.get(part.index):
+                failures[part.index] -= 1
+                raise OSError("connection reset")
+            return part.index * 10
+        finally:
+            in_flight -= 1
+
+    results = await scheduler.run(plan_upload_parts(100, 10, 10), upload)
+    assert results == {i: i * 10 for i in range(10)}
+    assert max_in_flight == 3
+    # parts are started in order, part 5 was retried twice
+    assert [i for i in started if i != 5] == [0, 1, 2, 3, 4, 6, 7, 8, 9]
+    assert started.count(5) == 3
+
+
+async def test_async_scheduler_gives_up():
+    scheduler = AsyncPartScheduler(window=2, retry_count=2, retry_after_seconds=0)
+    started: list[int] = []
+
+    async def upload(part):
+        started.append(part.index)
+        if part.index == 1:
+            raise OSError("broken")
+        await asyncio.sleep(0.01)
+
+    with pytest.raises(OSError):
+        await scheduler.run(plan_upload_parts(100, 10, 10), upload)
+    assert len(started) < 10
+
+
+def test_sync_scheduler_window_and_retry():
+    scheduler = SyncPartScheduler(window=3, retry_after_seconds=0)
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    failures = {2: 1}
+
+    def upload(part):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            fail = failures.get(part.index)
+            if fail:
+                failures[part.index] -= 1
+        try:
+            time.sleep(0.005)
+            if fail:
+                raise OSError("connection reset")
+            return part.index
+        finally:
+            with lock:
+                in_flight -= 1
+
+    results = scheduler.run(plan_upload_parts(100, 10, 10), upload)
+    assert results == {i: i for i in range(10)}
+    assert max_in_flight <= 3
@@ -0,0 +1,85 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import asyncio
+import threading
+import time
+
+import pytest
+from yarl import URL
+
+from nrp_cmd.async_client.invenio.introspection import (
+    introspect_rdm_repository as async_introspect,
+)
+from nrp_cmd.rdm_compat import rdm_version_from_homepage
+from nrp_cmd.sync_client.invenio.introspection import (
+    introspect_rdm_repository as sync_introspect,
+)
+
+HOMEPAGE = '<html><head><meta name="generator" content="InvenioRDM 13.0"/></head>'
+
+
+class AsyncFakeConnection:
+    def __init__(self):
+        self.requests = []
+
+    async def get(self, *, url, result_class):
+        assert result_class is str
+        self.requests.append(url)
+        await asyncio.sleep(0.01)
+        return HOMEPAGE
+
+
+class SyncFakeConnection:
+    def __init__(self):
+        self.requests = []
+
+    def get(self, *, url, result_class):
+        assert result_class is str
+        self.requests.append(url)
+        time.sleep(0.01)
+        return HOMEPAGE
+
+
+def test_rdm_version_from_homepage():
+    assert rdm_version_from_homepage(HOMEPAGE) == 13
+    with pytest.raises(ValueError):
+        rdm_version_from_homepage("<html></html>")
+
+
+async def test_async_introspections_share_request():
+    connection = AsyncFakeConnection()
+    infos = await asyncio.gather(
+        *(async_introspect(connection, URL("https://zenodo.org/api")) for _ in range(5))
+    )
+    assert connection.requests == [URL("https://zenodo.org/")]
+    assert infos[0].invenio_version == "RDM 13"
+    assert infos[0].version == "Zenodo"
+    assert infos[0].transfers == ["L", "F", "R", "M"]
+
+    # finished introspections are not reused, the client caches the info
+    await async_introspect(connection, URL("https://zenodo.org/"))
+    assert len(connection.requests) == 2
+
+
+def test_sync_introspections_share_request():
+    connection = SyncFakeConnection()
+    infos = []
+    threads = [
+        threading.Thread(
+            target=lambda: infos.append(
+                sync_introspect(connection, URL("https://rdm.example.org/api"))
+            )
+        )
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert connection.requests == [URL("https://rdm.example.org/")]
+    assert [info.invenio_version for info in infos] == ["RDM 13"] * 5
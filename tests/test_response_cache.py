@@ -0,0 +1,163 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import json
+import os
+import threading
+from datetime import UTC, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from yarl import URL
+
+from nrp_cmd.async_client.connection import AsyncConnection
+from nrp_cmd.http_cache import CachedResponse, ResponseCache, response_variant
+from nrp_cmd.sync_client.connection import SyncConnection
+from nrp_cmd.types.auth import BearerTokenForHost
+
+
+def make_response(url, size=10):
+    return CachedResponse(
+        url=url, payload="x" * size, etag='"1"', fetched=datetime.now(UTC)
+    )
+
+
+def test_memory_is_limited(tmp_path):
+    cache = ResponseCache(tmp_path, memory_limit=100)
+    for idx in range(5):
+        cache.put(make_response(f"https://repository.org/{idx}", 30))
+    cache.get("https://repository.org/2")
+    cache.put(make_response("https://repository.org/5", 30))
+    assert [url for url, _ in cache._memory] == [
+        "https://repository.org/4",
+        "https://repository.org/2",
+        "https://repository.org/5",
+    ]
+    # the evicted responses are still on the disk
+    assert cache.get("https://repository.org/0") is not None
+
+
+def test_disk_is_limited(tmp_path):
+    cache = ResponseCache(tmp_path, memory_limit=0, disk_limit=4096)
+    for idx in range(10):
+        cache.put(make_response(f"https://repository.org/{idx}", 500))
+        # make the order of modification times deterministic
+        os.utime(cache._path(f"https://repository.org/{idx}"), (idx, idx))
+    assert sum(path.stat().st_size for path in tmp_path.glob("*.json")) <= 4096
+    assert cache.get("https://repository.org/0") is None
+    assert cache.get("https://repository.org/9") is not None
+
+
+def test_variants(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.put(make_response("https://repository.org/", 1), "application/json")
+    assert cache.get("https://repository.org/") is None
+    assert cache.get("https://repository.org/", "application/json") is not None
+
+    tokens = [BearerTokenForHost(host_url=URL("https://repository.org"), token="a")]
+    url = URL("https://repository.org/records/1")
+    assert response_variant(tokens, url, {}) != response_variant([], url, {})
+    assert response_variant([], url, {"Accept": "application/json"}) == (
+        "application/json"
+    )
+
+
+class Repository(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RepositoryHandler)
+        self.base_url = URL(f"http://127.0.0.1:{self.server_port}")
+        self.records = {"/records/1": {"id": "1", "revision": 1}}
+        self.downloads = 0
+        self.not_modified = 0
+        self.lock = threading.Lock()
+
+
+class RepositoryHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        record = self.server.records[path]
+        etag = f'"{record["revision"]}"'
+        if path != "/records/1":
+            # no validators, the response can not be cached
+            etag = None
+        elif self.headers.get("If-None-Match") == etag:
+            with self.server.lock:
+                self.server.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        with self.server.lock:
+            self.server.downloads += 1
+        payload = json.dumps({**record, "query": query}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def repository():
+    server = Repository()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_sync_get_serves_not_modified_from_cache(repository, tmp_path):
+    url = repository.base_url / "records" / "1"
+    with SyncConnection(retry_count=1, response_cache=ResponseCache(tmp_path)) as c:
+        assert c.get(url=url, result_class=dict)["revision"] == 1
+        assert c.get(url=url, result_class=dict)["revision"] == 1
+        assert (repository.downloads, repository.not_modified) == (1, 1)
+
+        # query parameters and Accept headers select a different response
+        assert c.get(url=url, result_class=dict, params={"q": "a"})["query"] == "q=a"
+        c.get(url=url, result_class=dict, headers={"Accept": "application/json"})
+        assert repository.downloads == 3
+
+        repository.records["/records/1"] = {"id": "1", "revision": 2}
+        assert c.get(url=url, result_class=dict)["revision"] == 2
+        assert repository.downloads == 4
+
+    # a new connection reads the cached response from the disk
+    with SyncConnection(retry_count=1, response_cache=ResponseCache(tmp_path)) as c:
+        assert c.get(url=url, result_class=dict)["revision"] == 2
+        assert (repository.downloads, repository.not_modified) == (4, 2)
+
+
+async def test_async_get_serves_not_modified_from_cache(repository, tmp_path):
+    url = repository.base_url / "records" / "1"
+    cache = ResponseCache(tmp_path)
+    async with AsyncConnection(retry_count=1, response_cache=cache) as c:
+        assert (await c.get(url=url, result_class=dict))["revision"] == 1
+        assert await c.get(url=url, result_class=str) == json.dumps(
+            {"id": "1", "revision": 1, "query": ""}
+        )
+        assert (repository.downloads, repository.not_modified) == (1, 1)
+
+        repository.records["/records/1"] = {"id": "1", "revision": 2}
+        assert (await c.get(url=url, result_class=dict))["revision"] == 2
+        assert (repository.downloads, repository.not_modified) == (2, 1)
+
+
+async def test_responses_without_validators_are_not_cached(repository, tmp_path):
+    repository.records["/records/2"] = {"id": "2", "revision": 1}
+    url = repository.base_url / "records" / "2"
+    cache = ResponseCache(tmp_path)
+    async with AsyncConnection(retry_count=1, response_cache=cache) as c:
+        await c.get(url=url, result_class=dict)
+        await c.get(url=url, result_class=dict)
+    assert repository.downloads == 2
+    assert cache.get(url) is None
@@ -0,0 +1,102 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import asyncio
+
+import pytest
+from yarl import URL
+
+from nrp_cmd.async_client.connection import AsyncConnection
+from nrp_cmd.async_client.streams.file import (
+    FileSink,
+    is_range_completed,
+    merge_ranges,
+)
+from nrp_cmd.errors import RepositoryCommunicationError
+from nrp_cmd.progress import DummyProgressBar
+
+
+def test_merge_ranges():
+    assert merge_ranges([(10, 20), (0, 10), (30, 40), (35, 50)]) == [
+        (0, 20),
+        (30, 50),
+    ]
+    assert is_range_completed([(0, 20), (30, 50)], 5, 20)
+    assert not is_range_completed([(0, 20), (30, 50)], 15, 35)
+
+
+async def write(sink, offset, data):
+    chunk = await sink.open_chunk(offset=offset)
+    await chunk.write(data)
+    await chunk.close()
+    await sink.mark_completed(offset, len(data))
+
+
+async def test_resumable_file_sink(tmp_path):
+    target = tmp_path / "data.bin"
+
+    # interrupted download, only the first half is written
+    sink = FileSink(target, resumable=True)
+    assert await sink.resume(10, "etag-1") == []
+    await write(sink, 0, b"01234")
+    await sink.close()
+    assert not target.exists()
+
+    # resumed download gets the already written range
+    sink = FileSink(target, resumable=True)
+    assert await sink.resume(10, "etag-1") == [(0, 5)]
+    await write(sink, 5, b"56789")
+    await sink.finalize()
+
+    assert target.read_bytes() == b"0123456789"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["data.bin"]
+
+
+async def test_resumable_file_sink_changed_etag(tmp_path):
+    target = tmp_path / "data.bin"
+    sink = FileSink(target, resumable=True)
+    await sink.resume(10, "etag-1")
+    await write(sink, 0, b"01234")
+    await sink.close()
+
+    # the file has changed on the server, previous data are discarded
+    sink = FileSink(target, resumable=True)
+    assert await sink.resume(10, "etag-2") == []
+
+
+async def test_resumable_file_sink_size_mismatch(tmp_path):
+    target = tmp_path / "data.bin"
+    sink = FileSink(target, resumable=True)
+    await sink.resume(10, None)
+    await write(sink, 0, b"0123456789")
+    (tmp_path / "data.bin.part").write_bytes(b"short")
+
+    with pytest.raises(RepositoryCommunicationError):
+        await sink.finalize()
+    assert not target.exists()
+
+
+async def test_cancelled_part_is_not_swallowed(tmp_path):
+    connection = AsyncConnection()
+    downloaded = []
+
+    async def get_stream(*, url, sink, offset, size):
+        if offset:
+            raise asyncio.CancelledError()
+        downloaded.append(offset)
+
+    connection.get_stream = get_stream
+    size = 64 * 1024 * 1024
+    with pytest.raises(asyncio.CancelledError):
+        await connection._download_multipart(
+            URL("https://repository.org/file"),
+            FileSink(tmp_path / "data.bin"),
+            size,
+            DummyProgressBar(),
+            parts=2,
+        )
+    assert downloaded == [0]
@@ -0,0 +1,506 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import asyncio
+import io
+import json
+import re
+import time
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+from nrp_cmd.async_client.invenio.scan import IncrementalHarvest as AsyncHarvest
+from nrp_cmd.async_client.invenio.scan import RecordScanner as AsyncRecordScanner
+from nrp_cmd.async_client.invenio.scan import ScanPlan, ScanWindow, histogram_windows
+from nrp_cmd.cli.records.scan_workers import ScanManifest, ScanShard, merge_shard
+from nrp_cmd.config.cursors import HarvestCursor, HarvestCursors
+from nrp_cmd.dedup import MemoryDedupStore
+from nrp_cmd.sync_client.invenio.scan import IncrementalHarvest as SyncHarvest
+from nrp_cmd.sync_client.invenio.scan import RecordScanner as SyncRecordScanner
+
+START = datetime(2024, 1, 1, tzinfo=UTC)
+# skewed repository - most of the records were created within a single hour
+RECORDS = [
+    SimpleNamespace(
+        id=f"r{i}",
+        created=START + timedelta(minutes=i if i < 100 else i * 1000),
+        updated=START + timedelta(minutes=i if i < 100 else i * 1000),
+    )
+    for i in range(137)
+]
+DATE_QUERY = re.compile(r"created:\[(\S+) TO (\S+)\}")
+UPDATED_QUERY = re.compile(r"updated:\[(\S+) TO (\S+)\}")
+
+
+def parse_date(value: str) -> datetime:
+    if value == "*":
+        return datetime.min.replace(tzinfo=UTC)
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=UTC)
+
+
+def hourly_histogram(hits):
+    """Date histogram aggregation of the records, keys in epoch milliseconds."""
+    buckets = {}
+    for record in hits:
+        key = int(record.created.replace(minute=0).timestamp() * 1000)
+        buckets[key] = buckets.get(key, 0) + 1
+    return {
+        "buckets": [
+            {"key": key, "doc_count": count} for key, count in sorted(buckets.items())
+        ]
+    }
+
+
+class FakeRepository:
+    """Search over RECORDS, understanding only the created:[a TO b} query."""
+
+    def __init__(self, histogram=False):
+        self.histogram = histogram
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.raw_requests = 0
+
+    def matching(self, q, facets):
+        hits = RECORDS
+        if q and (match := DATE_QUERY.search(q)):
+            start, end = parse_date(match[1]), parse_date(match[2])
+            hits = [r for r in hits if start <= r.created < end]
+        if q and (match := UPDATED_QUERY.search(q)):
+            start, end = parse_date(match[1]), parse_date(match[2])
+            hits = [r for r in hits if start <= r.updated < end]
+        if facets.get("sort") == "newest":
+            hits = list(reversed(hits))
+        return hits
+
+    def aggregations(self, hits):
+        if not self.histogram:
+            return {}
+        histogram = hourly_histogram if self.histogram is True else self.histogram
+        return {"created": histogram(hits)}
+
+    def result(self, q, page, size, facets, raw):
+        self.raw_requests += raw
+        hits = self.matching(q, facets)
+        return SimpleNamespace(
+            hits=SimpleNamespace(
+                total=len(hits), hits=hits[(page - 1) * size : page * size]
+            ),
+            aggregations=self.aggregations(hits),
+        )
+
+
+class AsyncFakeClient(FakeRepository):
+    async def search(self, *, q, page, size, model, status, facets, raw=False):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+            return self.result(q, page, size, facets, raw)
+        finally:
+            self.in_flight -= 1
+
+
+class SyncFakeClient(FakeRepository):
+    def search(self, *, q, page, size, model, status, facets, raw=False):
+        return self.result(q, page, size, facets, raw)
+
+
+async def test_async_scan_returns_every_record_once():
+    client = AsyncFakeClient()
+    scanner = AsyncRecordScanner(
+        client, window_size=20, page_size=5, concurrency=4, prefetch=2, queue_size=2
+    )
+    try:
+        ids = [record.id async for record in scanner.records()]
+    finally:
+        await scanner.close()
+    assert sorted(ids) == sorted(r.id for r in RECORDS)
+    assert client.max_in_flight > 1
+
+
+async def test_async_scan_small_result_set_is_paginated():
+    client = AsyncFakeClient()
+    scanner = AsyncRecordScanner(client, window_size=1000, page_size=10, prefetch=3)
+    try:
+        ids = [record.id async for record in scanner.records()]
+    finally:
+        await scanner.close()
+    # records keep the order of the search, no probes are made
+    assert ids == [r.id for r in RECORDS]
+    assert client.requests == 14
+
+
+async def test_async_scan_close_on_break():
+    scanner = AsyncRecordScanner(
+        AsyncFakeClient(), window_size=20, page_size=5, queue_size=1
+    )
+    try:
+        async for _record in scanner.records():
+            break
+    finally:
+        await scanner.close()
+
+
+def test_sync_scan_returns_every_record_once():
+    scanner = SyncRecordScanner(
+        SyncFakeClient(), window_size=20, page_size=5, concurrency=4, queue_size=2
+    )
+    try:
+        ids = [record.id for record in scanner.records()]
+    finally:
+        scanner.close()
+    assert sorted(ids) == sorted(r.id for r in RECORDS)
+
+
+def test_sync_scan_close_on_break():
+    scanner = SyncRecordScanner(
+        SyncFakeClient(), window_size=20, page_size=5, queue_size=1
+    )
+    started = time.monotonic()
+    try:
+        for _record in scanner.records():
+            break
+    finally:
+        scanner.close()
+    assert time.monotonic() - started < 5
+
+
+def test_histogram_windows_packing():
+    aggregation = {
+        "buckets": [
+            {"key": "2024-01-01T00:00:00", "doc_count": 5},
+            {"key": "2024-01-01T01:00:00", "doc_count": 4},
+            {"key": "2024-01-01T02:00:00", "doc_count": 30},
+            {"key": "2024-01-01T04:00:00", "doc_count": 1},
+        ]
+    }
+    newest = START + timedelta(hours=4, minutes=30)
+    windows = histogram_windows(aggregation, 40, 10, newest)
+    assert [(w.start.hour, w.end.hour, w.count) for w in windows] == [
+        (0, 2, 9),
+        (2, 4, 30),
+        (4, 4, 1),
+    ]
+    # the last window ends just after the newest record
+    assert windows[-1].end == newest + timedelta(seconds=1)
+    # counts not matching the query - the histogram can not be used
+    assert histogram_windows(aggregation, 41, 10, newest) is None
+    assert histogram_windows({"buckets": []}, 0, 10, newest) is None
+    not_dates = {"buckets": [{"key": "abc", "doc_count": 1}] * 2}
+    assert histogram_windows(not_dates, 2, 10, newest) is None
+
+
+def monthly_histogram(hits):
+    """Calendar month histogram of the records, keys as dates."""
+    buckets = {}
+    for record in hits:
+        key = record.created.date().replace(day=1).isoformat()
+        buckets[key] = buckets.get(key, 0) + 1
+    return {
+        "buckets": [
+            {"key": key, "doc_count": count} for key, count in sorted(buckets.items())
+        ]
+    }
+
+
+# february is shorter than march, the records at the end of march
+# must not be left out of the last window
+MONTHLY_RECORDS = [
+    SimpleNamespace(id=f"m{i}", created=created, updated=created)
+    for i, created in enumerate(
+        [datetime(2024, 2, day, tzinfo=UTC) for day in range(1, 30)]
+        + [datetime(2024, 3, day, 12, tzinfo=UTC) for day in range(1, 32)]
+    )
+]
+
+
+async def test_async_scan_of_uneven_calendar_buckets(monkeypatch):
+    monkeypatch.setattr(__name__ + ".RECORDS", MONTHLY_RECORDS)
+    client = AsyncFakeClient(histogram=monthly_histogram)
+    scanner = AsyncRecordScanner(client, window_size=40, page_size=10)
+    try:
+        plan = await scanner.plan()
+        ids = [record.id async for record in scanner.records()]
+    finally:
+        await scanner.close()
+    assert plan.method == "histogram"
+    assert plan.windows[-1].end > datetime(2024, 3, 31, 12, tzinfo=UTC)
+    assert sorted(ids) == sorted(r.id for r in MONTHLY_RECORDS)
+
+
+def test_sync_scan_of_uneven_calendar_buckets(monkeypatch):
+    monkeypatch.setattr(__name__ + ".RECORDS", MONTHLY_RECORDS)
+    scanner = SyncRecordScanner(
+        SyncFakeClient(histogram=monthly_histogram), window_size=40, page_size=10
+    )
+    try:
+        assert scanner.plan().method == "histogram"
+        ids = [record.id for record in scanner.records()]
+    finally:
+        scanner.close()
+    assert sorted(ids) == sorted(r.id for r in MONTHLY_RECORDS)
+
+
+async def test_async_scan_window_differing_from_plan(caplog):
+    client = AsyncFakeClient(histogram=True)
+    scanner = AsyncRecordScanner(client, window_size=20, page_size=5)
+    plan = await scanner.plan()
+    await scanner.close()
+
+    # the histogram counted records into wrong windows - the windows are
+    # scanned by their real size and the difference is reported
+    counts = [window.count for window in plan.windows]
+    windows = [
+        ScanWindow(window.start, window.end, count)
+        for window, count in zip(plan.windows, counts[1:] + counts[:1], strict=True)
+    ]
+    scanner = AsyncRecordScanner(
+        client,
+        window_size=20,
+        page_size=5,
+        plan=ScanPlan(total=plan.total, method=plan.method, windows=windows),
+    )
+    try:
+        ids = [record.id async for record in scanner.records()]
+    finally:
+        await scanner.close()
+    assert sorted(ids) == sorted(r.id for r in RECORDS)
+    assert "were planned" in caplog.text
+
+
+async def test_async_scan_planned_from_histogram():
+    bisecting = AsyncFakeClient()
+    scanner = AsyncRecordScanner(bisecting, window_size=20, page_size=5)
+    try:
+        assert (await scanner.plan()).method == "bisection"
+        ids = [record.id async for record in scanner.records()]
+    finally:
+        await scanner.close()
+    assert sorted(ids) == sorted(r.id for r in RECORDS)
+
+    client = AsyncFakeClient(histogram=True)
+    scanner = AsyncRecordScanner(client, window_size=20, page_size=5)
+    try:
+        plan = await scanner.plan()
+        ids = [record.id async for record in scanner.records()]
+    finally:
+        await scanner.close()
+    assert plan.method == "histogram"
+    assert sum(window.count for window in plan.windows) == len(RECORDS)
+    # the bulk of the records was created within a single hour, that bucket is bisected
+    assert any(window.count > 20 for window in plan.windows)
+    assert sorted(ids) == sorted(r.id for r in RECORDS)
+    assert client.requests < bisecting.requests
+
+
+async def test_async_scan_of_plan_parts():
+    client = AsyncFakeClient(histogram=True)
+    scanner = AsyncRecordScanner(client, window_size=20, page_size=5)
+    plan = await scanner.plan()
+    await scanner.close()
+
+    ids = []
+    for windows in (plan.windows[::2], plan.windows[1::2]):
+        part = AsyncRecordScanner(
+            client,
+            window_size=20,
+            page_size=5,
+            plan=ScanPlan(total=plan.total, method=plan.method, windows=windows),
+        )
+        try:
+            ids.extend([record.id async for record in part.records()])
+        finally:
+            await part.close()
+    assert sorted(ids) == sorted(r.id for r in RECORDS)
+
+
+def test_sync_scan_planned_from_histogram():
+    scanner = SyncRecordScanner(
+        SyncFakeClient(histogram=True), window_size=20, page_size=5, queue_size=2
+    )
+    try:
+        assert scanner.plan().method == "histogram"
+        ids = [record.id for record in scanner.records()]
+    finally:
+        scanner.close()
+    assert sorted(ids) == sorted(r.id for r in RECORDS)
+
+
+async def test_async_incremental_harvest(monkeypatch):
+    client = AsyncFakeClient(histogram=True)
+    harvest = AsyncHarvest(client, cursor=None, window_size=20, page_size=5)
+    try:
+        ids = [record.id async for record in harvest.records()]
+    finally:
+        await harvest.close()
+    assert harvest.complete
+    assert sorted(ids) == sorted(r.id for r in RECORDS)
+    assert harvest.cursor == HarvestCursor(updated=RECORDS[-1].updated, id="r136")
+
+    # two records updated at the same time as the cursor, one of them already seen
+    updated = [
+        SimpleNamespace(id="r136", created=START, updated=RECORDS[-1].updated),
+        SimpleNamespace(id="r137", created=START, updated=RECORDS[-1].updated),
+        SimpleNamespace(id="r5", created=START, updated=datetime.now(UTC)),
+    ]
+    monkeypatch.setattr(__name__ + ".RECORDS", RECORDS + updated)
+    harvest = AsyncHarvest(
+        client,
+        cursor=harvest.cursor,
+        margin=timedelta(seconds=-1),
+        window_size=20,
+        page_size=5,
+    )
+    try:
+        ids = [record.id async for record in harvest.records()]
+    finally:
+        await harvest.close()
+    assert sorted(ids) == ["r137", "r5"]
+    assert harvest.cursor.id == "r5"
+
+    # nothing has been updated since the last harvest
+    harvest = AsyncHarvest(client, cursor=harvest.cursor, window_size=20, page_size=5)
+    try:
+        assert [record.id async for record in harvest.records()] == []
+    finally:
+        await harvest.close()
+
+
+def test_sync_incremental_harvest():
+    cursor = HarvestCursor(updated=RECORDS[100].updated, id="r100")
+    harvest = SyncHarvest(SyncFakeClient(), cursor=cursor, window_size=20, page_size=5)
+    try:
+        ids = [record.id for record in harvest.records()]
+    finally:
+        harvest.close()
+    assert sorted(ids) == sorted(r.id for r in RECORDS[101:])
+    assert harvest.complete
+
+
+def test_harvest_cursors_persisted(tmp_path):
+    path = tmp_path / ".nrp" / "harvest-cursors.json"
+    cursors = HarvestCursors.from_file(path)
+    key = cursors.key("repo", "title:abc", None, "published")
+    assert cursors.get(key) is None
+    cursors[key] = HarvestCursor(updated=START, id="r1")
+    cursors.save()
+
+    loaded = HarvestCursors.from_file(path)
+    assert loaded.get(key) == HarvestCursor(updated=START, id="r1")
+    assert loaded.get(cursors.key("repo", None, None, "published")) is None
+
+
+def test_plan_shards_balance_records():
+    windows = [
+        ScanWindow(START + timedelta(days=i), START + timedelta(days=i + 1), count)
+        for i, count in enumerate([100, 10, 10, 10, 50, 60])
+    ]
+    plan = ScanPlan(total=240, method="histogram", windows=windows)
+    shards = plan.shards(3)
+    assert sorted(shard.total for shard in shards) == [70, 70, 100]
+    scanned = [window for shard in shards for window in shard.windows]
+    assert sorted(scanned, key=lambda window: window.start) == windows
+
+    # not enough windows for all the workers - the largest are split
+    shards = plan.shards(8)
+    assert len(shards) == 8
+    assert sum(shard.total for shard in shards) == 240
+
+    assert ScanPlan(total=10, method="pagination").shards(4) == [
+        ScanPlan(total=10, method="pagination")
+    ]
+
+
+def test_scan_manifest_roundtrip(tmp_path):
+    plan = ScanPlan(
+        total=5,
+        method="histogram",
+        windows=[ScanWindow(START, START + timedelta(hours=1), 5)],
+    )
+    manifest = ScanManifest(
+        repository="repo",
+        query=None,
+        model=None,
+        draft=False,
+        published=True,
+        total=5,
+        shards=[ScanShard(output="shard-0000.jsonl", plan=plan)],
+    )
+    manifest.save(tmp_path / "manifest.json")
+    loaded = ScanManifest.from_file(tmp_path / "manifest.json")
+    assert loaded == manifest
+    assert loaded.shards[0].plan.windows[0].count == 5
+
+
+def test_merge_shard_reads_urls(tmp_path):
+    shard = tmp_path / "shard-0000.jsonl"
+    lines = [
+        json.dumps({"id": f"r{idx}", "links": {"self": f"https://repo/r{idx}"}}) + "\n"
+        for idx in range(3)
+    ]
+    shard.write_text("".join(lines), encoding="utf-8")
+
+    merged = io.BytesIO()
+    urls: list[str] = []
+    merge_shard(shard, merged, urls)
+    assert merged.getvalue().decode("utf-8") == "".join(lines)
+    assert urls == [f"https://repo/r{idx}" for idx in range(3)]
+
+    merged = io.BytesIO()
+    merge_shard(shard, merged, None)
+    assert merged.getvalue().decode("utf-8") == "".join(lines)
+
+async def test_async_scan_drops_duplicates(monkeypatch):
+    expected = sorted(r.id for r in RECORDS)
+    # a record returned twice, as if it was moved between windows during the scan
+    monkeypatch.setattr(__name__ + ".RECORDS", RECORDS + RECORDS[-1:])
+    seen = MemoryDedupStore()
+    scanner = AsyncRecordScanner(
+        AsyncFakeClient(), window_size=20, page_size=5, dedup=seen
+    )
+    try:
+        ids = [record.id async for record in scanner.records()]
+    finally:
+        await scanner.close()
+    assert sorted(ids) == expected
+    assert len(seen) == len(expected)
+
+
+def test_sync_scan_drops_duplicates(monkeypatch):
+    expected = sorted(r.id for r in RECORDS)
+    monkeypatch.setattr(__name__ + ".RECORDS", RECORDS[:3] + RECORDS)
+    scanner = SyncRecordScanner(
+        SyncFakeClient(), window_size=20, page_size=5, dedup=MemoryDedupStore()
+    )
+    try:
+        ids = [record.id for record in scanner.records()]
+    finally:
+        scanner.close()
+    assert sorted(ids) == expected
+
+
+async def test_async_scan_raw_mode_is_passed_to_search():
+    client = AsyncFakeClient()
+    scanner = AsyncRecordScanner(client, window_size=20, page_size=5, raw=True)
+    try:
+        ids = [record.id async for record in scanner.records()]
+    finally:
+        await scanner.close()
+    assert sorted(ids) == sorted(r.id for r in RECORDS)
+    assert client.raw_requests == client.requests
+
+
+def test_sync_scan_raw_mode_is_passed_to_search():
+    client = SyncFakeClient()
+    scanner = SyncRecordScanner(client, window_size=1000, page_size=10, raw=True)
+    try:
+        assert len(list(scanner.records())) == len(RECORDS)
+    finally:
+        scanner.close()
+    assert client.raw_requests == 14
@@ -0,0 +1,203 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import asyncio
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+import uvloop
+from yarl import URL
+
+from nrp_cmd.async_client.connection import AsyncConnection
+from nrp_cmd.async_client.connection.sendfile import FilePayload
+from nrp_cmd.async_client.invenio.transfer.multipart import MultipartTransfer
+from nrp_cmd.async_client.streams import FileSource, MappedFileSource
+from nrp_cmd.converter import converter
+from nrp_cmd.progress import DummyProgressBar, TransferStatistics
+from nrp_cmd.sync_client.connection.sendfile import FileReader
+from nrp_cmd.types.files import File
+
+DATA = bytes(range(256)) * 100
+
+
+class ChunkedWriter:
+    """aiohttp writer that can not be bypassed by sendfile."""
+
+    chunked = True
+    transport = None
+
+    def __init__(self):
+        self.data = bytearray()
+
+    async def write(self, chunk):
+        self.data += chunk
+
+
+async def test_file_payload_fallback(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+    progress: list[int] = []
+    payload = FilePayload(path, 100, 10000, progress=progress.append, chunk_size=4096)
+    assert payload.size == 10000
+
+    writer = ChunkedWriter()
+    await payload.write(writer)
+    assert bytes(writer.data) == DATA[100:10100]
+    assert progress == [4096, 4096, 1808]
+
+
+async def test_file_payload_short_file(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA[:100])
+    with pytest.raises(OSError):
+        await FilePayload(path, 0, 200).write(ChunkedWriter())
+
+
+class UploadServer(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), UploadHandler)
+        self.url = URL(f"http://127.0.0.1:{self.server_port}/upload")
+        self.received = b""
+
+
+class UploadHandler(BaseHTTPRequestHandler):
+    def do_PUT(self):
+        self.server.received = self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def upload_server():
+    server = UploadServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize(
+    "loop_factory", [asyncio.new_event_loop, uvloop.new_event_loop]
+)
+def test_put_file(tmp_path, upload_server, loop_factory, monkeypatch):
+    # uvloop (used by the command line client) does not implement loop.sendfile,
+    # the file is sent with os.sendfile on the socket of the transport
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+    sendfile_calls = []
+
+    def sendfile(out_fd, in_fd, offset, count):
+        sendfile_calls.append(count)
+        return original_sendfile(out_fd, in_fd, offset, count)
+
+    original_sendfile = os.sendfile
+    monkeypatch.setattr(os, "sendfile", sendfile)
+
+    async def upload():
+        async with AsyncConnection(retry_count=1) as connection:
+            response = await connection.put_file(
+                url=upload_server.url, file_name=path, offset=100, count=10000
+            )
+            return response.status
+
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        assert runner.run(upload()) == 200
+    assert upload_server.received == DATA[100:10100]
+    assert sendfile_calls
+
+
+class RecordingConnection:
+    """Connection recording which method uploaded the parts."""
+
+    retry_after_seconds = 0
+
+    def __init__(self):
+        self.methods: list[str] = []
+
+    async def put_stream(self, *, url, source, open_kwargs, headers):
+        self.methods.append("put_stream")
+        return SimpleNamespace(headers={})
+
+    async def put_file(self, *, url, file_name, offset, count, progress_bar, headers):
+        self.methods.append("put_file")
+        return SimpleNamespace(headers={})
+
+
+@pytest.mark.parametrize(
+    "source_class,method",
+    [(FileSource, "put_file"), (MappedFileSource, "put_stream")],
+)
+async def test_multipart_sendfile_only_for_plain_files(tmp_path, source_class, method):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA[:20])
+    upload = converter.structure(
+        {
+            "key": "data.bin",
+            "size": 20,
+            "transfer": {"type": "M", "part_size": 10},
+            "links": {
+                "self": "https://repository.org/api/files/data.bin",
+                "parts": [{"url": f"https://s3.org/part/{i}"} for i in range(2)],
+            },
+        },
+        File,
+    )
+    connection = RecordingConnection()
+    await MultipartTransfer(use_sendfile=True).upload(
+        connection, upload, source_class(path), DummyProgressBar()
+    )
+    assert connection.methods == [method, method]
+
+
+def test_file_reader(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+    progress: list[int] = []
+    reader = FileReader(path, 10, progress=progress.append, chunk_size=10000)
+    assert len(reader) == len(DATA) - 10
+    data = bytearray()
+    while block := reader.read(8192):
+        data += block
+    reader.close()
+    assert bytes(data) == DATA[10:]
+    assert progress == [10000, 10000, 5590]
+
+
+def test_transfer_statistics():
+    statistics = TransferStatistics()
+    assert statistics.cpu_per_gb == 0
+    statistics.increment(10**9)
+    assert statistics.throughput > 0
+    assert "CPU s/GB" in str(statistics)
+
+
+def test_file_reader_rewinds(tmp_path):
+    # urllib3 rewinds the body with seek before retrying a failed request
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+    progress: list[int] = []
+    reader = FileReader(path, 100, 1000, progress=progress.append, chunk_size=300)
+    assert reader.tell() == 0
+    reader.read()
+    reader.read()
+    assert reader.tell() == 600
+    reader.seek(0)
+    assert sum(progress) == 0
+    data = bytearray()
+    while block := reader.read():
+        data += block
+    reader.close()
+    assert bytes(data) == DATA[100:1100]
+    assert sum(progress) == 1000
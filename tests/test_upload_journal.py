@@ -0,0 +1,224 @@
+#
+# Copyright (C) 2024 CESNET z.s.p.o.
+#
+# invenio-nrp is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+#
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+from yarl import URL
+
+from nrp_cmd.async_client.connection import AsyncConnection
+from nrp_cmd.async_client.invenio.transfer.journal import UploadedPart, UploadJournal
+from nrp_cmd.async_client.invenio.transfer.multipart import MultipartTransfer
+from nrp_cmd.async_client.streams import FileSource
+from nrp_cmd.converter import converter
+from nrp_cmd.progress import DummyProgressBar
+from nrp_cmd.sync_client.connection import SyncConnection
+from nrp_cmd.sync_client.invenio.transfer.multipart import (
+    MultipartTransfer as SyncMultipartTransfer,
+)
+from nrp_cmd.sync_client.streams import FileSource as SyncFileSource
+from nrp_cmd.types.files import File
+
+files_url = URL("https://repository.org/api/records/abc/draft/files")
+
+
+def test_journal_roundtrip(tmp_path):
+    path = UploadJournal.journal_path(files_url, "data.bin", tmp_path)
+    journal = UploadJournal(
+        files_url=files_url,
+        key="data.bin",
+        source="data.bin:30:1",
+        size=30,
+        part_size=10,
+        links=[URL(f"https://s3.org/part/{i}") for i in range(3)],
+        path=path,
+    )
+    journal.save()
+    journal.record(UploadedPart(index=1, size=10, etag='"abc"', checksum="md5:x"))
+
+    loaded = UploadJournal.load(path)
+    assert loaded is not None
+    assert loaded.matches("data.bin:30:1", 30, 10)
+    assert not loaded.matches("data.bin:30:2", 30, 10)
+    assert loaded.is_completed(1) and not loaded.is_completed(0)
+    assert loaded.completed[1].etag == '"abc"'
+    assert loaded.links == journal.links
+
+    path.write_text('{"key": 1}')
+    assert UploadJournal.load(path) is None
+
+    loaded.delete()
+    assert UploadJournal.load(path) is None
+
+
+class PlainFileSource(FileSource):
+    """File source without checksums, the test does not need them."""
+
+    def supported_checksums(self) -> list[str]:
+        return []
+
+
+class FlakyConnection:
+    """Connection that fails the upload of the given parts."""
+
+    retry_after_seconds = 0
+
+    def __init__(self, failing: set[str]):
+        self.failing = failing
+        self.uploaded: list[str] = []
+
+    async def put_stream(self, *, url, source, open_kwargs, headers):
+        return self._put(url)
+
+    async def put_file(self, *, url, file_name, offset, count, progress_bar, headers):
+        return self._put(url)
+
+    def _put(self, url):
+        if str(url) in self.failing:
+            raise OSError("connection reset")
+        self.uploaded.append(str(url))
+        return SimpleNamespace(headers={"ETag": f'"{url.name}"'})
+
+
+async def test_multipart_upload_resumes_from_journal(tmp_path):
+    data = tmp_path / "data.bin"
+    data.write_bytes(b"x" * 30)
+    links = [URL(f"https://s3.org/part/{i}") for i in range(3)]
+    upload = converter.structure(
+        {
+            "key": "data.bin",
+            "size": 30,
+            "transfer": {"type": "M", "part_size": 10},
+            "links": {
+                "self": str(files_url / "data.bin"),
+                "parts": [{"url": str(link)} for link in links],
+            },
+        },
+        File,
+    )
+    journal = UploadJournal(
+        files_url=files_url,
+        key="data.bin",
+        source="id",
+        size=30,
+        part_size=10,
+        path=tmp_path / "journal.json",
+    )
+    transfer = MultipartTransfer(window=1)
+
+    # the first run fails on the last part, the first two are recorded
+    connection = FlakyConnection({str(links[2])})
+    with pytest.raises(OSError):
+        await transfer.upload(
+            connection, upload, PlainFileSource(data), DummyProgressBar(), journal=journal
+        )
+    assert sorted(journal.completed) == [0, 1]
+
+    # the second run uploads only the missing part
+    connection = FlakyConnection(set())
+    journal = UploadJournal.load(tmp_path / "journal.json")
+    await transfer.upload(
+        connection, upload, PlainFileSource(data), DummyProgressBar(), journal=journal
+    )
+    assert connection.uploaded == [str(links[2])]
+    assert sorted(journal.completed) == [0, 1, 2]
+
+
+class PartStorage(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), PartHandler)
+        self.base_url = URL(f"http://127.0.0.1:{self.server_port}")
+        self.failing = {"/part/1"}
+
+
+class PartHandler(BaseHTTPRequestHandler):
+    def do_PUT(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        status = 500 if self.path in self.server.failing else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.send_header("ETag", f'"{self.path}"')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def part_storage():
+    server = PartStorage()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_storage_upload(part_storage):
+    return converter.structure(
+        {
+            "key": "data.bin",
+            "size": 30,
+            "transfer": {"type": "M", "part_size": 10},
+            "links": {
+                "self": str(files_url / "data.bin"),
+                "parts": [
+                    {"url": str(part_storage.base_url / "part" / str(i))}
+                    for i in range(3)
+                ],
+            },
+        },
+        File,
+    )
+
+
+def make_journal(tmp_path):
+    return UploadJournal(
+        files_url=files_url,
+        key="data.bin",
+        source="id",
+        size=30,
+        part_size=10,
+        path=tmp_path / "journal.json",
+    )
+
+
+@pytest.mark.parametrize("use_sendfile", [True, False])
+async def test_failed_part_is_not_recorded(tmp_path, part_storage, use_sendfile):
+    data = tmp_path / "data.bin"
+    data.write_bytes(b"x" * 30)
+    journal = make_journal(tmp_path)
+    transfer = MultipartTransfer(window=1, use_sendfile=use_sendfile)
+    async with AsyncConnection(retry_count=1, retry_after_seconds=0) as connection:
+        with pytest.raises(ExceptionGroup):
+            await transfer.upload(
+                connection,
+                make_storage_upload(part_storage),
+                FileSource(data),
+                DummyProgressBar(),
+                journal=journal,
+            )
+    assert sorted(journal.completed) == [0]
+
+
+def test_sync_failed_part_is_not_recorded(tmp_path, part_storage):
+    data = tmp_path / "data.bin"
+    data.write_bytes(b"x" * 30)
+    journal = make_journal(tmp_path)
+    transfer = SyncMultipartTransfer(window=1)
+    with SyncConnection(retry_count=1, retry_after_seconds=0) as connection:
+        with pytest.raises(ExceptionGroup):
+            transfer.upload(
+                connection,
+                make_storage_upload(part_storage),
+                SyncFileSource(data),
+                DummyProgressBar(),
+                journal=journal,
+            )
+    assert sorted(journal.completed) == [0]